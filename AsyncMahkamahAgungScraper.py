@@ -0,0 +1,72 @@
+import asyncio
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from MahkamahAgungScraper import MahkamahAgungScraper
+
+
+class AsyncMahkamahAgungScraper:
+    # Async counterpart of MahkamahAgungScraper. Every call is delegated to the sync
+    # implementation on a bounded thread pool, so fetching/parsing stays in one place
+    # and the sync API keeps working unchanged.
+
+    def __init__(self, scraper=None, max_workers=8, **scraper_kwargs):
+        self.scraper = scraper or MahkamahAgungScraper(**scraper_kwargs)
+        self.max_workers = max_workers
+        self.console = self.scraper.console
+        self.scraper.transport.resize(max_workers) # One pooled connection per worker thread
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ma-scraper")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_in_executor(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _fetch_page(self, page_number, url=None):
+        return await self.run_in_executor(self.scraper._fetch_page, page_number, url)
+
+    @staticmethod
+    def get_last_page(html_content):
+        return MahkamahAgungScraper.get_last_page(html_content)
+
+    async def get_list_courts(self, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_list_courts, url=url, html=html)
+
+    async def get_court_yearly_decisions(self, court_code=None, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_court_yearly_decisions, court_code=court_code, url=url, html=html)
+
+    async def get_court_decision_categories_by_year(self, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_court_decision_categories_by_year, url=url, html=html)
+
+    async def get_decision_classifications(self, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_decision_classifications, url=url, html=html)
+
+    async def get_monthly_decision_counts(self, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_monthly_decision_counts, url=url, html=html)
+
+    async def get_listing_page(self, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_listing_page, url=url, html=html)
+
+    async def get_decision_list(self, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_decision_list, url=url, html=html)
+
+    async def get_decision_detail(self, url=None, html=None):
+        return await self.run_in_executor(self.scraper.get_decision_detail, url=url, html=html)
+
+    async def iter_decisions(self, court_filter=None, year_range=None, with_detail=True, with_pdf=None, courts=None, read_ahead=4, fields=None):
+        # Async iterator over MahkamahAgungScraper.iter_decisions (same arguments, fields projection included); each step runs on the executor
+        records = self.scraper.iter_decisions(court_filter, year_range, with_detail, with_pdf, courts, read_ahead, fields)
+        end = object()
+        try:
+            while (record := await self.run_in_executor(next, records, end)) is not end: yield record
+        finally:
+            with contextlib.suppress(ValueError): records.close() # Still running on the executor after a cancel
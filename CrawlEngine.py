@@ -0,0 +1,361 @@
+import asyncio
+import contextlib
+import os
+import socket
+
+from rich.console import Console
+
+from DeltaTracker import upload_key
+from FrontierStore import DONE, FAILED, FrontierStore
+from MahkamahAgungScraper import MahkamahAgungScraper
+
+LEVELS = ("court", "year", "category", "classification", "month", "page", "decision", "pdf")
+DEFAULT_LEVEL_LIMITS = {"court": 2, "year": 4, "category": 4, "classification": 4, "month": 4, "page": 4, "decision": 8, "pdf": 4}
+OWN_POOL_LEVELS = ("pdf",) # Downloads run on the PdfDownloader pool, outside the global request limit
+SYNC_CURSOR_KEYS = ("year_idx", "category_idx", "classification_idx", "month_idx", "decision_page")
+OWN_CONTEXT_KEYS = ("delta", "delta_mark", "listing_key", "upload_since", "last_page", "court_count", "row") # Per-node bookkeeping, not inherited by children
+DELTA_LEVELS = ("court", "year", "month")
+DEFERRED_DEPTH = -1 # Store priority is -depth: deferred detail fetches are claimed after every other level
+
+
+class CrawlNode:
+    __slots__ = ("level", "key", "context")
+
+    def __init__(self, level, key, context):
+        self.level = level
+        self.key = key
+        self.context = context
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['level'], tuple(int(k) for k in row['key'].split('/')), row['context'])
+
+    @property
+    def depth(self):
+        return LEVELS.index(self.level) if self.level in LEVELS else -1
+
+    @property
+    def state_key(self):
+        return "/".join(str(k) for k in self.key)
+
+    def as_row(self):
+        # Parsed listings ride along in memory only; after a crash the page is simply fetched again
+        return self.state_key, self.level, self.depth, {k: v for k, v in self.context.items() if k != 'listing'}
+
+
+class CrawlEngine:
+    # Work-frontier crawler: every level of Court -> Year -> Category -> Classification -> Month
+    # -> Page -> Decision -> PDF is a node in a FrontierStore (deepest first, so the frontier stays
+    # small). N workers claim nodes, bounded by a global and a per-level semaphore. With a file
+    # backed store the frontier survives crashes: claimed nodes go back to pending on the next run
+    # and everything else continues where it stopped. Without one an in-memory store is used.
+    #
+    # The legacy resume state in main.current_state is still kept up to date: `court_idx` is the
+    # last contiguously completed court, `courts_done` holds courts finished out of order and
+    # `pages_done` holds finished listing pages of unfinished courts. Cursor keys written by the
+    # sequential run_scraper (`year_idx`, ..., `decision_page`) are honoured for the court after
+    # `court_idx`, so a run can be resumed by either implementation.
+    #
+    # With a DeltaTracker, court/year/month counts and each listing's newest upload date are recorded
+    # as subtrees finish; an incremental tracker skips subtrees whose count is unchanged and pages a
+    # changed listing only until it reaches rows uploaded before the previous crawl.
+    #
+    # With a CrawlPlanner, zero-count courts/years/months are never fetched, courts and years are
+    # queued in the planner's order and its global progress task advances per decision.
+    #
+    # With a FieldProjection, decision nodes carry their listing row: when the fields are all on the
+    # listing the record is produced without a detail request, otherwise the detail page is merged
+    # over the row so listing-only fields survive the projection; with defer_details, detail fetches wait
+    # until no listing work is pending. Records passed to on_decision are projected to the fields.
+
+    def __init__(self, scraper, on_decision=None, download_pdf=None, state=None, save_state=None,
+                 concurrency=8, level_limits=None, progress=None, console=None,
+                 store=None, worker_id=None, lease=300.0, max_attempts=1, pdf_downloader=None, is_recorded=None, is_seen=None, delta=None, planner=None, projection=None):
+        self.scraper = scraper
+        self.on_decision = on_decision
+        self.download_pdf = download_pdf
+        self.pdf_downloader = pdf_downloader
+        self.is_recorded = is_recorded
+        self.is_seen = is_seen
+        self.delta = delta
+        self.planner = planner
+        self.projection = projection
+        self.state = state if state is not None else {}
+        self.save_state = save_state or (lambda: None)
+        self.concurrency = max(1, concurrency)
+        self.level_limits = {**DEFAULT_LEVEL_LIMITS, **(level_limits or {})}
+        self.progress = progress
+        self.console = console or Console()
+        self.store = store or FrontierStore(":memory:", console=self.console)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = lease
+        self.max_attempts = max(1, max_attempts)
+        self.stats = {level: 0 for level in LEVELS}
+        self.errors = 0
+        self._global = None
+        self._limits = {}
+        self._listings = {}
+        self._in_flight = 0
+        self._detached = set()
+        self._wakeup = None
+        self._tasks = {}
+        self._task_totals = {}
+        self._marks = {}
+        self._failed = set()
+        self._courts_done = set(self.state.get('courts_done', []))
+        self._pages_done = set(self.state.get('pages_done', []))
+        self._sync_cursor = self._build_sync_cursor()
+
+    # --- Resume helpers ---
+    def _build_sync_cursor(self):
+        court_idx = self.state.get('court_idx', -1)
+        if not any(k in self.state for k in SYNC_CURSOR_KEYS): return None
+        return (court_idx + 1, self.state.get('year_idx', -1) + 1, self.state.get('category_idx', -1) + 1,
+                self.state.get('classification_idx', -1) + 1, self.state.get('month_idx', -1) + 1,
+                self.state.get('decision_page', 0) + 1)
+
+    def _is_done(self, node):
+        court = node.key[0]
+        if court <= self.state.get('court_idx', -1) or court in self._courts_done: return True
+        if node.level == "page" and node.state_key in self._pages_done: return True
+        if self._sync_cursor and court == self._sync_cursor[0] and len(node.key) > 1 and node.level not in ("decision", "pdf"):
+            return tuple(node.key) < self._sync_cursor[:len(node.key)]
+        return False
+
+    def _mark_court_done(self, court):
+        self._courts_done.add(court)
+        watermark = self.state.get('court_idx', -1)
+        while watermark + 1 in self._courts_done:
+            watermark += 1; self._courts_done.discard(watermark)
+        if watermark != self.state.get('court_idx', -1):
+            self.state['court_idx'] = watermark
+            for key in SYNC_CURSOR_KEYS: self.state.pop(key, None)
+            self._sync_cursor = None
+        prefix = f"{court}/"
+        self._pages_done = {k for k in self._pages_done if not k.startswith(prefix) and int(k.split('/', 1)[0]) > watermark}
+
+    def _persist(self):
+        self.state['courts_done'] = sorted(self._courts_done)
+        self.state['pages_done'] = sorted(self._pages_done)
+        self.save_state()
+
+    # --- Progress helpers ---
+    def _progress_add(self, level, count, completed=0):
+        if not self.progress or not count: return
+        if level not in self._tasks:
+            self._tasks[level] = self.progress.add_task(f"[cyan]{level.capitalize()}s", total=0)
+        # Task ids are not positions in progress.tasks once other tasks were removed, so keep totals here
+        self._task_totals[level] = self._task_totals.get(level, 0) + count
+        self.progress.update(self._tasks[level], total=self._task_totals[level], advance=completed)
+
+    def _progress_advance(self, level):
+        if self.progress and level in self._tasks: self.progress.advance(self._tasks[level])
+
+    # --- Frontier ---
+    def _discover(self, children):
+        todo = [c for c in children if not self._is_done(c)]
+        by_level = {}
+        for child in todo:
+            by_level[child.level] = by_level.get(child.level, 0) + 1
+            if child.context.get('listing') is not None: self._listings[child.state_key] = child.context['listing']
+        for level, count in by_level.items(): self._progress_add(level, count)
+        rows = [child.as_row() for child in todo]
+        if self.projection and self.projection.defer_details: rows = [(key, level, DEFERRED_DEPTH if level == "decision" else depth, ctx) for key, level, depth, ctx in rows]
+        return rows
+
+    def _finished(self, nodes):
+        # nodes: (key, level, status) of everything the store just moved to done/failed
+        if self.delta: self._record_delta(nodes)
+        changed = False
+        for key, level, _ in nodes:
+            if level == "page":
+                self._pages_done.add(key); changed = True
+            elif level == "court":
+                self._mark_court_done(int(key)); changed = True
+            if level in LEVELS:
+                self.stats[level] += 1; self._progress_advance(level)
+            if level == "decision" and self.planner: self.planner.advance()
+        if changed: self._persist()
+
+    def _record_delta(self, nodes):
+        # A subtree's count (and its listing's newest upload) is remembered once it finished without failures
+        self._failed.update(key for key, _, status in nodes if status == FAILED)
+        done = [key for key, level, status in nodes if status == DONE and level in DELTA_LEVELS]
+        for key, ctx in (self.store.contexts(done) if done else {}).items():
+            if not (delta := ctx.get('delta')) or any(f == key or f.startswith(f"{key}/") for f in self._failed): continue
+            self.delta.record(delta[0], delta[1], self._marks.pop(delta[0], None))
+
+    async def _worker(self):
+        while True:
+            claimed = self.store.claim(self.worker_id, lease=self.lease)
+            if not claimed:
+                # Nothing pending: done once no other worker can still discover children
+                if self._in_flight == 0: self._wakeup.set(); return
+                self._wakeup.clear(); await self._wakeup.wait(); continue
+            node = CrawlNode.from_row(claimed[0])
+            if (listing := self._listings.pop(node.state_key, None)) is not None: node.context['listing'] = listing
+            self._in_flight += 1
+            if node.level in OWN_POOL_LEVELS: # Detached, so a slow transfer never holds a crawl worker
+                task = asyncio.create_task(self._process(node, claimed[0]['attempts']))
+                self._detached.add(task); task.add_done_callback(self._detached.discard)
+            else: await self._process(node, claimed[0]['attempts'])
+
+    async def _process(self, node, attempts):
+        try:
+            try:
+                async with (contextlib.nullcontext() if node.level in OWN_POOL_LEVELS else self._global), self._limits[node.level]:
+                    children = await getattr(self, f"_expand_{node.level}")(node)
+            except asyncio.CancelledError: raise
+            except Exception as e:
+                self.errors += 1
+                self.console.print(f"[red]Err {node.level} {node.state_key} (attempt {attempts}): {e}")
+                self._finished(self.store.fail(node.state_key, self.worker_id, e, self.max_attempts))
+            else:
+                self._finished(self.store.complete(node.state_key, self.worker_id, self._discover(children)))
+        finally:
+            self._in_flight -= 1
+            self._wakeup.set()
+
+    # --- Level expansion ---
+    @staticmethod
+    def _child(node, level, index, **context):
+        inherited = {k: v for k, v in node.context.items() if k not in OWN_CONTEXT_KEYS}
+        return CrawlNode(level, node.key + (index,), {**inherited, **context})
+
+    def _delta(self, key, count, mark=False):
+        # Delta bookkeeping for a child subtree, or None when an incremental crawl skips it (count unchanged)
+        if not self.delta: return {}
+        if not self.delta.visit(key, count):
+            if self.planner and count is not None: self.planner.refine(count[0] if isinstance(count, list) else count, 0)
+            return None
+        return {"delta": [key, count], **({"delta_mark": self.delta.mark(key)} if mark and self.delta.incremental else {})}
+
+    async def _expand_court(self, node):
+        code = node.context['court_code']
+        years = await self.scraper.get_court_yearly_decisions(court_code=code)
+        planned = self.planner.plan_years(years, node.context.get('court_count')) if self.planner else enumerate(years or [])
+        return [self._child(node, "year", i, year=y.get('year'), year_link=y['link'], **delta)
+                for i, y in planned if y.get('link')
+                and (delta := self._delta(f"{code}/{y.get('year')}", y.get('decision_count'))) is not None]
+
+    async def _expand_year(self, node):
+        categories = await self.scraper.get_court_decision_categories_by_year(url=node.context['year_link'])
+        return [self._child(node, "category", i, category=c.get('category'), category_link=c['link'])
+                for i, c in enumerate(categories or []) if c.get('link')]
+
+    async def _expand_category(self, node):
+        classifications = await self.scraper.get_decision_classifications(url=node.context['category_link'])
+        return [self._child(node, "classification", i, classification=c.get('classification'), classification_link=c['link'])
+                for i, c in enumerate(classifications or []) if c.get('link')]
+
+    async def _expand_classification(self, node):
+        link = node.context['classification_link']
+        listing = await self.scraper.get_listing_page(link)
+        if listing is None: raise Exception("Failed fetch classification listing")
+        targets = MahkamahAgungScraper.month_listing_targets(listing['months'], link)
+        ctx, total = node.context, sum(m['count'] for m in listing['months']) if listing['months'] else None
+        prefix = f"{ctx.get('court_code')}/{ctx.get('year')}/{ctx.get('category')}/{ctx.get('classification')}"
+        return [self._child(node, "month", i, month=t['month'], month_link=t['link'], month_count=t['count'],
+                            listing=listing if t['link'] == link else None, **delta)
+                for i, t in enumerate(targets) if not self.planner or self.planner.keep_month(t)
+                if (delta := self._delta(f"{prefix}/{t['month'] or '*'}", total if t['month'] is None else t['count'], mark=True)) is not None]
+
+    async def _expand_month(self, node):
+        ctx = node.context
+        if ctx.get('month_count') == 0: return []
+        listing = ctx.get('listing') or await self.scraper.get_listing_page(ctx['month_link'])
+        if listing is None: raise Exception("Failed fetch page 1 for pagination")
+        last_page = listing['last_page'] or 1
+        delta = {"listing_key": ctx['delta'][0]} if ctx.get('delta') else {}
+        if ctx.get('delta_mark') and last_page > 1: # Incremental: page 1 first, further pages only while its rows are newer than the mark
+            return [self._child(node, "page", 1, page_url=MahkamahAgungScraper.page_url(ctx['month_link'], 1), listing=listing,
+                                upload_since=ctx['delta_mark'], last_page=last_page, **delta)]
+        return [self._child(node, "page", page_num, page_url=MahkamahAgungScraper.page_url(ctx['month_link'], page_num),
+                            listing=listing if page_num == 1 else None, **delta)
+                for page_num in range(1, last_page + 1)]
+
+    async def _expand_page(self, node):
+        ctx, listing = node.context, node.context.get('listing')
+        decisions = listing['decisions'] if listing else await self.scraper.get_decision_list(url=ctx['page_url'])
+        rows = [(i, d) for i, d in enumerate(decisions or []) if d.get('link')]
+        uploads = [upload_key(d.get('upload_date')) for _, d in rows]
+        children = []
+        if listing_key := ctx.get('listing_key'): # The listing's newest upload becomes its next high-water mark
+            newest = max(filter(None, uploads), default=None)
+            if newest and newest > self._marks.get(listing_key, ''): self._marks[listing_key] = newest
+        if since := ctx.get('upload_since'): # Listings are newest first: stop at the first row uploaded before the last crawl
+            fresh = [row for row, upload in zip(rows, uploads) if upload is None or upload >= since]
+            if len(fresh) == len(rows) and node.key[-1] < ctx['last_page']:
+                page_num = node.key[-1] + 1
+                children.append(CrawlNode("page", node.key[:-1] + (page_num,), {**ctx, "listing": None, "page_url": MahkamahAgungScraper.page_url(ctx['month_link'], page_num)}))
+            elif self.planner: self.planner.refine(len(rows) - len(fresh) + (ctx['last_page'] - node.key[-1]) * len(rows), 0)
+            rows = fresh
+        # Rows whose decision is already in the output (is_seen(link, nomor, court_code)) are not fetched again
+        with_row = self.projection is not None and self.projection.fields is not None # Projected records keep the listing's fields too
+        decisions = [self._child(node, "decision", i, decision_link=d['link'], putus_date=d.get('putus_date'), listing=None, **({"row": d} if with_row else {}))
+                     for i, d in rows
+                     if not (self.is_seen and self.is_seen(d['link'], MahkamahAgungScraper.nomor_from_title(d.get('title')), ctx.get('court_code')))]
+        if self.planner: self.planner.advance(len(rows) - len(decisions))
+        return decisions + children
+
+    async def _expand_decision(self, node):
+        ctx = node.context
+        row = ctx.get('row'); from_detail = not (row and self.projection and not self.projection.needs_detail) # Listing-only projection: the record comes from the listing row
+        detail = await self.scraper.get_decision_detail(url=ctx['decision_link']) if from_detail else MahkamahAgungScraper.listing_record(row)
+        if not detail: return []
+        if row and from_detail: detail = {**MahkamahAgungScraper.listing_record(row), **detail} # Mixed fields: listing-only ones (title, dates, counts) from the row
+        MahkamahAgungScraper.add_source(detail, ctx)
+        pdf_url = detail.get('download_link_pdf') if self.pdf_downloader or self.download_pdf else None
+        if self.on_decision: self.on_decision(self.projection.project(detail, from_detail=from_detail) if self.projection else detail)
+        archive_url = detail.get('download_link_zip') if self.pdf_downloader and self.pdf_downloader.archives else None # Queued with or without a PDF link
+        return [self._child(node, "pdf", i, pdf_url=url) for i, url in enumerate((pdf_url, archive_url)) if url]
+
+    async def _expand_pdf(self, node):
+        url = node.context['pdf_url']
+        path = await asyncio.wrap_future(self.pdf_downloader.submit(url, node.context.get('decision_link'))) if self.pdf_downloader else await self.scraper.run_in_executor(self.download_pdf, url)
+        if path is None:
+            raise Exception("PDF download failed")
+        return []
+
+    # --- Entry point ---
+    async def run(self, courts):
+        court_nodes = []
+        if self.planner: # Zero-count courts are done without a request; the rest are queued in the planned order
+            planned = self.planner.plan_courts(courts)
+            for court_idx in sorted(set(range(len(courts))) - {i for i, _ in planned}):
+                if not self._is_done(CrawlNode("court", (court_idx,), {})): self._mark_court_done(court_idx)
+            self.console.log(self.planner.describe())
+        for court_idx, court in (planned if self.planner else enumerate(courts)):
+            code = MahkamahAgungScraper.extract_court_code(court.get('link_pengadilan'))
+            node = CrawlNode("court", (court_idx,), {"court_name": court.get('nama_pengadilan', f'?C {court_idx+1}'), "court_code": code,
+                                                     "court_count": court.get('jumlah_putusan')})
+            if self._is_done(node): continue
+            if not code: self.console.log(f"[yellow]Skip Court (no code): {node.context['court_name']}"); self._mark_court_done(court_idx); continue
+            count = [court['jumlah_putusan'], court.get('jumlah_publikasi')] if court.get('jumlah_putusan') is not None else None
+            if (delta := self._delta(code, count)) is None: self._mark_court_done(court_idx); continue # Unchanged since the last crawl
+            node.context.update(delta); court_nodes.append(node)
+        return await self.run_nodes(court_nodes)
+
+    async def run_nodes(self, nodes):
+        # Crawls everything below the given nodes, which may sit at any level (e.g. one court+year shard unit)
+        self._global = asyncio.Semaphore(self.concurrency)
+        self._limits = {level: asyncio.Semaphore(max(1, self.level_limits.get(level, self.concurrency))) for level in LEVELS}
+        self._wakeup = asyncio.Event()
+        self._failed = {f["key"] for f in self.store.failures(limit=-1)}
+        if requeued := self.store.requeue_claimed():
+            self.console.log(f"[yellow]Requeued {requeued} nodes left in flight by the previous run")
+        if self.is_recorded: # Decisions completed while their record sat in an unflushed output buffer are crawled again
+            lost = [key for key, link in self.store.values("decision", "decision_link") if not self.is_recorded(link)]
+            if lost: self.console.log(f"[yellow]Reopened {self.store.reopen(lost)} decisions missing from the output")
+        self.store.add([node.as_row() for node in nodes])
+        for level, statuses in self.store.counts().items():
+            if level in LEVELS: self._progress_add(level, sum(statuses.values()), completed=statuses.get(DONE, 0) + statuses.get(FAILED, 0))
+            if level == "decision" and self.planner: self.planner.advance(statuses.get(DONE, 0) + statuses.get(FAILED, 0))
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for w in [*workers, *self._detached]: w.cancel()
+            await asyncio.gather(*workers, *self._detached, return_exceptions=True)
+            self._persist()
+        return self.stats
@@ -0,0 +1,243 @@
+import bisect
+import contextlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rich.console import Console
+
+PAGE_TYPES = ( # (page type, URL pattern), most specific first; same layout as MockPutusanServer.ROUTES
+    ("court_list", re.compile(r'/pengadilan/index/')),
+    ("yearly", re.compile(r'/direktori/periode/')),
+    ("detail", re.compile(r'/direktori/putusan/')),
+    ("pdf", re.compile(r'/direktori/download_file/[^/]+/pdf/')),
+    ("zip", re.compile(r'/direktori/download_file/')),
+    ("listing", re.compile(r'/klasifikasi/')),
+    ("category", re.compile(r'/tahun/\d{4}/direktori/')),
+    ("year_index", re.compile(r'/tahun/\d{4}')),
+)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+RATES = {"decisions_per_minute": ("decisions_total", 60), "pdf_bytes_per_second": ("pdf_bytes_total", 1)} # Derived from counter samples
+HELP = {
+    "http_request_seconds": "Request latency per page type (retries counted separately)",
+    "http_responses_total": "Responses per page type and HTTP status ('error' for connection errors)",
+    "http_response_bytes_total": "Response body bytes per page type",
+    "http_retries_total": "Failed requests that were retried",
+    "http_cache_hits_total": "Pages answered by the HTTP cache without a request",
+    "parse_seconds": "Parse time per extractor",
+    "decisions_total": "Decisions accepted by the output (written or buffered)",
+    "output_bytes_total": "Bytes written to the output files",
+    "pdf_bytes_total": "PDF bytes downloaded",
+    "pdf_downloads_total": "PDF downloads per result",
+    "rate_limit_requests_per_second": "Current AIMD request rate per budget",
+    "dead_letters_total": "URLs given up by the retry policy",
+    "circuit_breaker_opened_total": "Times the circuit breaker paused the crawl",
+    "http_connections_opened_total": "New connections per pool (html/pdf); requests minus these were reused",
+    "http_wire_bytes_total": "Response bytes on the wire (before gzip/brotli decoding) per pool",
+    "http_connection_reuse_ratio": "Share of requests sent on an already open connection per pool",
+    "queue_depth": "Work waiting per queue",
+    "decisions_per_minute": "Decisions per minute over the rate window",
+    "pdf_bytes_per_second": "PDF download throughput over the rate window",
+}
+
+
+def page_type(url):
+    for name, pattern in PAGE_TYPES:
+        if pattern.search(url or ''): return name
+    return "other"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot: above the largest bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value; self.count += 1
+
+    def cumulative(self):
+        total, out = 0, []
+        for le, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n; out.append((le, total))
+        return out
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation (Prometheus' histogram_quantile, without interpolation)
+        if not self.count: return None
+        for le, total in self.cumulative():
+            if total >= q * self.count: return le
+
+
+class CrawlMetrics:
+    # In-process metrics for the crawler hot paths: counters, histograms and gauges, labelled like
+    # Prometheus series. The scraper and PdfDownloader record request latency/status/bytes and parse
+    # times themselves (metrics=...); everything else (output, queues, limiter rates) is read from the
+    # components' own stats by collectors at scrape time, so the hot paths pay one dict update.
+    #
+    # serve(port) exposes /metrics (Prometheus text format) and /metrics.json on a local HTTP thread;
+    # write_snapshots(path) rewrites a JSON snapshot every `interval` seconds (atomically, so an
+    # alerting job never reads half a file). Snapshots also carry decisions/min and PDF bytes/s.
+
+    def __init__(self, namespace="putusan", rate_window=300, console=None):
+        self.namespace = namespace
+        self.rate_window = rate_window
+        self.console = console or Console()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._samples = deque()
+        self._server = None
+        self._writer = None
+        self._stop = threading.Event()
+
+    # --- Recording ---
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock: self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if (histogram := self._histograms.get(key)) is None: histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def time(self, name, buckets=PARSE_BUCKETS, **labels):
+        started = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - started, buckets, **labels)
+
+    def record_request(self, kind, status, latency, size=0):
+        self.observe("http_request_seconds", latency, page_type=kind)
+        self.inc("http_responses_total", page_type=kind, status=status)
+        if size: self.inc("http_response_bytes_total", size, page_type=kind)
+
+    def collect(self, collector):
+        # collector() yields (name, "counter"|"gauge", labels, value), called on every render/snapshot
+        self._collectors.append(collector)
+
+    # --- Reading ---
+    def _collected(self):
+        series = []
+        for collector in self._collectors:
+            try: series.extend(collector())
+            except Exception as e: self.console.log(f"[yellow]Metrics collector failed: {e}")
+        return series
+
+    def _rates(self, values):
+        # Counter samples over the last rate_window seconds -> per-unit rates
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, values))
+            while len(self._samples) > 2 and now - self._samples[1][0] >= self.rate_window: self._samples.popleft()
+            then, old = self._samples[0]
+        elapsed = now - then
+        return {name: round((values.get(source, 0) - old.get(source, 0)) / elapsed * per, 3) if elapsed > 0 else 0.0
+                for name, (source, per) in RATES.items()}
+
+    def _series(self):
+        collected = self._collected()
+        with self._lock:
+            counters = [(name, "counter", dict(labels), value) for (name, labels), value in self._counters.items()]
+            histograms = {key: (histogram.cumulative(), histogram.sum, histogram.count, histogram.quantile(0.5), histogram.quantile(0.95))
+                          for key, histogram in self._histograms.items()}
+        series = counters + [(name, kind, labels, value) for name, kind, labels, value in collected]
+        totals = {}
+        for name, kind, labels, value in series:
+            if kind == "counter" and not labels: totals[name] = totals.get(name, 0) + value
+        series += [(name, "gauge", {}, value) for name, value in self._rates(totals).items()]
+        return series, histograms
+
+    @staticmethod
+    def _label_text(labels):
+        return "{" + ",".join(f'{k}="{str(v)}"' for k, v in sorted(labels.items())) + "}" if labels else ""
+
+    def snapshot(self):
+        series, histograms = self._series()
+        snapshot = {"timestamp": round(time.time(), 3), "uptime": round(time.time() - self.started, 1), "counters": {}, "gauges": {}, "histograms": {}}
+        for name, kind, labels, value in series:
+            snapshot["counters" if kind == "counter" else "gauges"][name + self._label_text(labels)] = value
+        for (name, labels), (cumulative, total, count, p50, p95) in histograms.items():
+            snapshot["histograms"][name + self._label_text(dict(labels))] = {
+                "count": count, "sum": round(total, 6), "mean": round(total / count, 6) if count else None, "p50": p50, "p95": p95}
+        return snapshot
+
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        series, histograms = self._series()
+        lines, typed = [], set()
+        def header(name, kind):
+            if name in typed: return
+            typed.add(name)
+            if name in HELP: lines.append(f"# HELP {self.namespace}_{name} {HELP[name]}")
+            lines.append(f"# TYPE {self.namespace}_{name} {kind}")
+        for name, kind, labels, value in sorted(series, key=lambda s: s[0]):
+            header(name, kind); lines.append(f"{self.namespace}_{name}{self._label_text(labels)} {value}")
+        for (name, labels), (cumulative, total, count, _, _) in sorted(histograms.items()):
+            header(name, "histogram"); labels = dict(labels)
+            for le, n in cumulative: lines.append(f"{self.namespace}_{name}_bucket{self._label_text({**labels, 'le': '+Inf' if le == float('inf') else le})} {n}")
+            lines.append(f"{self.namespace}_{name}_sum{self._label_text(labels)} {total}")
+            lines.append(f"{self.namespace}_{name}_count{self._label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    # --- Export ---
+    def serve(self, port=9108, host="127.0.0.1"):
+        metrics = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics": body, content_type = metrics.render().encode(), "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json": body, content_type = json.dumps(metrics.snapshot()).encode(), "application/json"
+                else: self.send_error(404); return
+                self.send_response(200); self.send_header("Content-Type", content_type); self.send_header("Content-Length", str(len(body)))
+                self.end_headers(); self.wfile.write(body)
+            def log_message(self, *args): pass
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        self.console.log(f"[cyan]Metrics:[/cyan] http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server.server_address[1]
+
+    def write_snapshot(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f: json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp, path)
+
+    def write_snapshots(self, path, interval=30.0):
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        def loop():
+            while not self._stop.wait(interval):
+                try: self.write_snapshot(path)
+                except OSError as e: self.console.log(f"[yellow]Could not write metrics snapshot {path}: {e}")
+        self._writer = (threading.Thread(target=loop, name="metrics-snapshot", daemon=True), path)
+        self._writer[0].start()
+
+    def close(self):
+        self._stop.set()
+        if self._writer:
+            thread, path = self._writer; self._writer = None
+            thread.join()
+            try: self.write_snapshot(path) # Final numbers of the run
+            except OSError: pass
+        if self._server: self._server.shutdown(); self._server.server_close(); self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
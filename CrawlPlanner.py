@@ -0,0 +1,101 @@
+import math
+
+from rich.console import Console
+
+COURT_ORDERS = {
+    "site": None,
+    "largest": lambda court: -(court.get('jumlah_putusan') or 0),
+    "smallest": lambda court: court.get('jumlah_putusan') or 0,
+}
+YEAR_ORDERS = {
+    "site": None,
+    "recent": lambda year: -int(year['year']) if str(year.get('year')).isdigit() else 0,
+    "oldest": lambda year: int(year['year']) if str(year.get('year')).isdigit() else 0,
+}
+STRUCTURE_REQUESTS = 12 # Yearly, year index, category and classification pages of an average court
+AVG_BYTES = {"html": 45_000, "pdf": 250_000} # Average response sizes for the byte estimate
+
+
+class CrawlPlanner:
+    # Plans the crawl from the counts the site already shows (jumlah_putusan per court, decision_count
+    # per year, a count per month) before fetching below them: zero-count courts, years and months are
+    # pruned, courts and years can be reordered, and one global progress task over the planned
+    # decisions gives the ETA for the whole crawl. The total starts from the court counts and is
+    # refined as soon as a court's year counts are known; skipped rows and subtrees advance it too.
+    # Orders only change which work is claimed first; node keys keep the site's indices.
+
+    def __init__(self, court_order="site", year_order="site", page_size=20, pdfs=True, details=True, avg_bytes=None, progress=None, console=None):
+        if court_order not in COURT_ORDERS: raise ValueError(f"Unknown court order '{court_order}' (expected {', '.join(COURT_ORDERS)})")
+        if year_order not in YEAR_ORDERS: raise ValueError(f"Unknown year order '{year_order}' (expected {', '.join(YEAR_ORDERS)})")
+        self.court_order = court_order
+        self.year_order = year_order
+        self.page_size = max(1, page_size)
+        self.pdfs = pdfs and details # Listing-only crawls have no PDF links
+        self.details = details
+        self.avg_bytes = {**AVG_BYTES, **(avg_bytes or {})}
+        self.progress = progress
+        self.console = console or Console()
+        self.total = 0
+        self.done = 0
+        self.courts_planned = 0
+        self.pruned = {"court": 0, "year": 0, "month": 0}
+        self._task = None
+
+    # --- Planning ---
+    def plan_courts(self, courts):
+        # (index, court) of the courts worth crawling, in crawl order; sets the initial total
+        planned = []
+        for court_idx, court in enumerate(courts):
+            if court.get('jumlah_putusan') == 0: self.pruned["court"] += 1; continue
+            planned.append((court_idx, court))
+        if key := COURT_ORDERS[self.court_order]: planned.sort(key=lambda item: key(item[1]))
+        self.courts_planned = len(planned)
+        self._add_total(sum(court.get('jumlah_putusan') or 0 for _, court in planned))
+        return planned
+
+    def plan_years(self, years, court_count=None):
+        # (index, year) of the years with decisions, in crawl order; replaces the court's estimate by the year counts
+        planned = []
+        for i, year in enumerate(years or []):
+            if year.get('decision_count') == 0: self.pruned["year"] += 1; continue
+            planned.append((i, year))
+        if key := YEAR_ORDERS[self.year_order]: planned.sort(key=lambda item: key(item[1]))
+        self.refine(court_count or 0, sum(year.get('decision_count') or 0 for _, year in planned))
+        return planned
+
+    def keep_month(self, target):
+        if target.get('count') == 0: self.pruned["month"] += 1; return False
+        return True
+
+    # --- Progress ---
+    def _add_total(self, amount):
+        self.total = max(self.done, self.total + amount)
+        if self.progress:
+            if self._task is None: self._task = self.progress.add_task("[bold green]Planned decisions", total=self.total)
+            self.progress.update(self._task, total=self.total, description=f"[bold green]Planned decisions (~{self.estimate()['requests']:,} requests)")
+
+    def refine(self, estimated, actual):
+        # A finer count replaced an estimate (e.g. a court's year counts), or a subtree was dropped (actual=0)
+        if actual != estimated: self._add_total(actual - estimated)
+
+    def advance(self, count=1):
+        # Decisions crawled, failed or skipped (already in the output)
+        if not count: return
+        self.done += count
+        if self.progress and self._task is not None: self.progress.update(self._task, completed=min(self.done, self.total))
+
+    # --- Estimates ---
+    def estimate(self, decisions=None):
+        decisions = self.total - self.done if decisions is None else decisions
+        listing_pages = math.ceil(decisions / self.page_size)
+        html = STRUCTURE_REQUESTS * self.courts_planned + listing_pages + (decisions if self.details else 0)
+        pdf = decisions if self.pdfs else 0
+        return {"decisions": decisions, "requests": html + pdf, "bytes": html * self.avg_bytes["html"] + pdf * self.avg_bytes["pdf"]}
+
+    def describe(self, rate=None):
+        # rate: requests/sec, for a duration estimate before the crawl starts
+        estimate = self.estimate()
+        duration = f", ~{estimate['requests'] / rate / 3600:.1f} h at {rate:g} req/s" if rate else ""
+        pruned = ", ".join(f"{n} {level}s" for level, n in self.pruned.items() if n) or "nothing"
+        return (f"Plan: {estimate['decisions']:,} decisions in {self.courts_planned} courts (order: {self.court_order}/{self.year_order}), "
+                f"~{estimate['requests']:,} requests, ~{estimate['bytes'] / 1e9:.1f} GB{duration}; pruned {pruned}")
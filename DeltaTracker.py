@@ -0,0 +1,81 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from rich.console import Console
+
+
+def upload_key(date_text):
+    # "dd-mm-yyyy" listing date -> sortable "yyyy-mm-dd" (None when missing or malformed)
+    m = re.fullmatch(r'(\d{2})-(\d{2})-(\d{4})', date_text or '')
+    return f"{m.group(3)}-{m.group(2)}-{m.group(1)}" if m else None
+
+
+class DeltaTracker:
+    # Counts and upload high-water marks from the last complete crawl of each subtree, kept across
+    # runs (unlike the frontier, which is removed after a finished crawl). Keys are stable names, not
+    # crawl indices: "<court>", "<court>/<year>" and "<court>/<year>/<category>/<classification>/<month>".
+    # Court counts are jumlah_putusan/jumlah_publikasi from the court list, years use decision_count
+    # and month listings the month card counts. A count is only recorded once the whole subtree
+    # finished without failures, so an interrupted or failing subtree is visited again next time.
+    #
+    # incremental=True (--delta) makes CrawlEngine skip subtrees whose count did not change and stop
+    # paging a listing at rows uploaded before the listing's previous high-water mark. Otherwise the
+    # tracker only records, so a full crawl leaves the baseline for the next delta run.
+
+    def __init__(self, path="crawl_delta.sqlite3", incremental=False, console=None):
+        self.path = path
+        self.incremental = incremental
+        self.console = console or Console()
+        self.stats = {"changed": 0, "unchanged": 0, "new": 0, "recorded": 0}
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS subtrees (key TEXT PRIMARY KEY, count TEXT, mark TEXT, updated_at REAL)")
+
+    def _row(self, key):
+        return self._db.execute("SELECT count, mark FROM subtrees WHERE key = ?", (key,)).fetchone()
+
+    def changed(self, key, count):
+        # True when the subtree has to be crawled: never completed, count unknown or different
+        with self._lock:
+            row = self._row(key)
+            if row is None: self.stats["new"] += 1; return True
+            if count is None or json.loads(row[0]) != count: self.stats["changed"] += 1; return True
+            self.stats["unchanged"] += 1; return False
+
+    def visit(self, key, count):
+        # Whether the engine descends into a subtree: always in full mode, only if changed in incremental mode
+        changed = self.changed(key, count)
+        return changed or not self.incremental
+
+    def mark(self, key):
+        with self._lock: row = self._row(key)
+        return row[1] if row else None
+
+    def record(self, key, count, mark=None):
+        # mark never moves backwards (a listing whose newest rows vanished keeps the previous mark)
+        with self._lock:
+            self._db.execute("INSERT INTO subtrees (key, count, mark, updated_at) VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                             "count = excluded.count, mark = nullif(max(coalesce(subtrees.mark, ''), coalesce(excluded.mark, '')), ''), updated_at = excluded.updated_at",
+                             (key, json.dumps(count), mark, time.time()))
+            self.stats["recorded"] += 1
+
+    def describe(self):
+        s = self.stats
+        return (f"Delta ({'incremental' if self.incremental else 'recording'}): {s['changed']} changed, {s['new']} new, "
+                f"{s['unchanged']} unchanged subtrees; {s['recorded']} counts recorded")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None: self._db.close(); self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
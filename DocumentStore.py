@@ -0,0 +1,135 @@
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from rich.console import Console
+
+from PdfDownloader import PdfDownloader
+
+EXTENSIONS = {"pdf": ".pdf", "zip": ".zip"}
+
+
+class DocumentStore:
+    # Content-addressed store for downloaded PDFs and ZIP archives. Each body is kept once under
+    # objects/<ab>/<cd>/<sha256>.<ext> (65,536 directories, so none grows past a few hundred files
+    # even at tens of millions of documents), and a SQLite index maps every URL to its hash: the same
+    # decision reached through different URLs is stored once, and lookup(url) answers "already
+    # downloaded?" from the index alone, so a restart does not stat or list the tree.
+    #
+    # Downloads are staged in tmp/ under a name derived from the URL and the process id, so two shard
+    # workers fetching the same URL never write one file; a .part another process left idle (killed,
+    # or restarted under a new pid) is taken over with adopt_part() and resumed. put() moves a
+    # verified file into place with one rename, so an object is always complete. Several processes
+    # may share a store: the index is in WAL mode and identical bodies renamed concurrently land on the same name.
+
+    def __init__(self, root, index_file=None, console=None):
+        self.root = root
+        self.console = console or Console()
+        self.stats = {"stored": 0, "deduplicated": 0, "bytes": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+        self._counts = None # Final count() once closed
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        self._db = sqlite3.connect(index_file or os.path.join(root, "index.sqlite3"), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS objects (hash TEXT PRIMARY KEY, kind TEXT NOT NULL, size INTEGER, stored_at TEXT) WITHOUT ROWID")
+        self._db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL, linked_at TEXT) WITHOUT ROWID")
+        self._db.execute("CREATE INDEX IF NOT EXISTS urls_hash ON urls (hash)")
+        self._db.commit()
+
+    # --- Layout ---
+    def object_path(self, digest, kind="pdf"):
+        return os.path.join(self.root, "objects", digest[:2], digest[2:4], digest + EXTENSIONS[kind])
+
+    def staging_path(self, url, kind="pdf", pid=None):
+        # Download target of a URL in this process before its content hash is known (the downloader appends .part)
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.root, "tmp", f"{name}.{pid or os.getpid()}{EXTENSIONS[kind]}")
+
+    def adopt_part(self, url, kind="pdf", idle=300):
+        # Renames a .part of `url` another process has not written to for `idle` seconds to this process's staging
+        # name, so the download resumes instead of starting over; True when one was taken over
+        target = f"{self.staging_path(url, kind)}.part"
+        stem = os.path.basename(target).split('.')[0]
+        for part in glob.glob(os.path.join(self.root, "tmp", f"{stem}.*{EXTENSIONS[kind]}.part")):
+            if part == target: continue
+            try:
+                if time.time() - os.path.getmtime(part) < idle: continue # Possibly still being written
+                os.replace(part, target); return True
+            except OSError: continue # Taken over by another process first
+        return False
+
+    @staticmethod
+    def hash_file(path, chunk_size=1024 * 1024):
+        digest, size = hashlib.sha256(), 0
+        with open(path, 'rb') as f:
+            while chunk := f.read(chunk_size): digest.update(chunk); size += len(chunk)
+        return digest.hexdigest(), size
+
+    # --- Index ---
+    def lookup(self, url):
+        # Object path of an already stored URL, or None; no file system access
+        with self._lock: row = self._db.execute("SELECT o.hash, o.kind FROM urls u JOIN objects o ON o.hash = u.hash WHERE u.url = ?", (url,)).fetchone()
+        return self.object_path(*row) if row else None
+
+    def __contains__(self, url):
+        return self.lookup(url) is not None
+
+    def put(self, url, path, kind="pdf"):
+        # Moves a complete file into the store (or drops it when the same body is already stored) and links `url` to it
+        if kind not in EXTENSIONS: raise ValueError(f"Unknown document kind '{kind}' (expected {', '.join(EXTENSIONS)})")
+        digest, size = self.hash_file(path)
+        target, now = self.object_path(digest, kind), time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM objects WHERE hash = ?", (digest,)).fetchone() and os.path.exists(target):
+                os.remove(path); self.stats["deduplicated"] += 1; self.stats["bytes_saved"] += size
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True); os.replace(path, target)
+                self._db.execute("INSERT OR IGNORE INTO objects (hash, kind, size, stored_at) VALUES (?, ?, ?, ?)", (digest, kind, size, now))
+                self.stats["stored"] += 1; self.stats["bytes"] += size
+            self._db.execute("INSERT INTO urls (url, hash, linked_at) VALUES (?, ?, ?) ON CONFLICT(url) DO UPDATE SET hash = excluded.hash, linked_at = excluded.linked_at", (url, digest, now))
+            self._db.commit()
+        return target
+
+    def paths(self, kind=None):
+        # Object paths of every stored document (of one kind), from the index
+        with self._lock: rows = self._db.execute("SELECT hash, kind FROM objects" + (" WHERE kind = ?" if kind else ""), (kind,) if kind else ()).fetchall()
+        return [self.object_path(*row) for row in rows]
+
+    def import_directory(self, directory, records, fields=("download_link_pdf", "download_link_zip")):
+        # Moves the files of a flat PdfDownloader directory into the store, linked through the URLs of scraped records;
+        # returns how many were moved (files no record refers to stay where they are)
+        moved = 0
+        for record in records:
+            for url in filter(None, (record.get(field) for field in fields)):
+                kind, path = PdfDownloader.kind_for(url), os.path.join(directory, PdfDownloader.filename_for(url))
+                if url not in self and PdfDownloader.is_complete(path, kind=kind): self.put(url, path, kind); moved += 1
+        return moved
+
+    # --- Lifecycle ---
+    def count(self):
+        # (URLs, stored documents, stored bytes)
+        with self._lock:
+            if self._db is None: return self._counts
+            urls = self._db.execute("SELECT count(*) FROM urls").fetchone()[0]
+            return (urls, *self._db.execute("SELECT count(*), coalesce(sum(size), 0) FROM objects").fetchone())
+
+    def describe(self):
+        s, (urls, objects, size) = self.stats, self.count()
+        return (f"Store: {objects} documents ({size / 1e6:.1f} MB) for {urls} URLs under {self.root}; {s['stored']} stored, "
+                f"{s['deduplicated']} duplicates dropped ({s['bytes_saved'] / 1e6:.1f} MB saved)")
+
+    def close(self):
+        counts = self.count()
+        with self._lock:
+            if self._db is None: return
+            self._counts = counts; self._db.close(); self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
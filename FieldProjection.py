@@ -0,0 +1,45 @@
+import threading
+
+from ParserBackends import DETAIL_LABEL_MAP
+
+LISTING_FIELDS = ("title", "link", "register_date", "putus_date", "upload_date", "description_parties", "view_count", "download_count",
+                  "breadcrumbs", "nomor") # nomor is read from the listing title
+DETAIL_FIELDS = ("title_full", "parties_raw", *DETAIL_LABEL_MAP.values(), "lembaga_peradilan_link", "download_link_zip", "download_link_pdf")
+PRESETS = {"all": None, "listing": LISTING_FIELDS}
+
+
+class FieldProjection:
+    # The decision fields a crawl has to produce. Listing rows already carry the title, dates, parties,
+    # view/download counts and the detail link; the detail page is only fetched when a requested field
+    # exists nowhere else (hakim_ketua, amar, download_link_pdf, ...), which halves the requests of a
+    # listing-only crawl. Records keep the requested fields plus the `_source_*` provenance fields.
+    # fields=None keeps everything (the detail page is always fetched).
+    #
+    # defer_details=True makes CrawlEngine claim decision nodes only after all listing work, so the
+    # whole listing tree (and the planner's exact total) is done before the first detail fetch.
+
+    def __init__(self, fields=None, defer_details=False):
+        # fields: None, names, or a comma-separated string; presets expand ("listing,hakim_ketua")
+        if isinstance(fields, str): fields = [f.strip() for f in fields.split(',') if f.strip()]
+        if fields is not None and "all" in fields: fields = None
+        if fields is not None:
+            fields = [name for f in fields for name in (PRESETS[f] if f in PRESETS else (f,))]
+            if unknown := [f for f in fields if f not in LISTING_FIELDS and f not in DETAIL_FIELDS]:
+                raise ValueError(f"Unknown field(s) {', '.join(unknown)} (listing: {', '.join(LISTING_FIELDS)}; detail: {', '.join(DETAIL_FIELDS)})")
+            fields = frozenset(fields)
+        self.fields = fields
+        self.defer_details = defer_details
+        self.needs_detail = fields is None or any(f not in LISTING_FIELDS for f in fields)
+        self.stats = {"from_listing": 0, "from_detail": 0}
+        self._lock = threading.Lock()
+
+    def project(self, record, from_detail=True):
+        with self._lock: self.stats["from_detail" if from_detail else "from_listing"] += 1
+        if self.fields is None: return record
+        return {k: v for k, v in record.items() if k in self.fields or k.startswith('_')}
+
+    def describe(self):
+        fields = "all fields" if self.fields is None else ", ".join(sorted(self.fields))
+        saved = f", {self.stats['from_listing']} detail requests saved" if self.stats["from_listing"] else ""
+        return (f"{fields} ({'detail pages' + (', deferred' if self.defer_details else '') if self.needs_detail else 'listing only'}): "
+                f"{self.stats['from_detail']} records from detail pages, {self.stats['from_listing']} from listings{saved}")
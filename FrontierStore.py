@@ -0,0 +1,219 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from rich.console import Console
+
+PENDING, CLAIMED, EXPANDED, DONE, FAILED = "pending", "claimed", "expanded", "done", "failed"
+TERMINAL = (DONE, FAILED)
+
+
+class FrontierStore:
+    # Crawl frontier and resume state in one SQLite (WAL) file. Every discovered node (court, year,
+    # ..., page, decision, pdf) is a row keyed by its index path ("court/year/.../decision"):
+    #   pending -> claimed (leased by a worker) -> expanded (children recorded, waiting on them) -> done
+    # A node's completion and the insertion of its children happen in one transaction, so a crash
+    # loses at most the claimed in-flight nodes, which go back to pending on the next start (or once
+    # their lease expires when several workers share the file). Nodes failing max_attempts times are
+    # parked as `failed`, which counts as finished for their parent.
+    # The `meta` table holds small JSON documents such as the sequential runner's cursor state.
+
+    def __init__(self, path="crawl_state.sqlite3", console=None):
+        self.path = path
+        self.console = console or Console()
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS nodes (
+            key TEXT PRIMARY KEY, level TEXT NOT NULL, parent TEXT, priority INTEGER NOT NULL, context TEXT,
+            status TEXT NOT NULL DEFAULT 'pending', pending_children INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_until REAL, error TEXT,
+            discovered_at REAL, updated_at REAL, completed_at REAL)""")
+        # Claim order: deepest level first (priority = -depth), then discovery order (rowid)
+        self._db.execute("CREATE INDEX IF NOT EXISTS nodes_claim ON nodes(status, priority)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS nodes_lease ON nodes(lease_until) WHERE status = 'claimed'")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT, updated_at REAL)")
+
+    def _transaction(self, func, *args):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(*args)
+                self._db.execute("COMMIT")
+                return result
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    # --- Discovery ---
+    @staticmethod
+    def _rows(nodes, parent, now):
+        return [(key, level, parent, -depth, json.dumps(context, ensure_ascii=False), now, now) for key, level, depth, context in nodes]
+
+    def add(self, nodes, parent=None):
+        # nodes: (key, level, depth, context) tuples. Already known keys keep their status.
+        def insert():
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO nodes (key, level, parent, priority, context, discovered_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 self._rows(nodes, parent, time.time()))
+            return self._db.total_changes - before
+        return self._transaction(insert)
+
+    # --- Claiming ---
+    def claim(self, worker, limit=1, lease=300.0, levels=None):
+        def take():
+            now = time.time()
+            level_filter = f" AND level IN ({', '.join('?' * len(levels))})" if levels else ""
+            rows = self._db.execute(f"SELECT key, level, context, attempts FROM nodes WHERE status = 'pending'{level_filter} "
+                                    "ORDER BY priority, rowid LIMIT ?", (*(levels or ()), limit)).fetchall()
+            self._db.executemany("UPDATE nodes SET status = 'claimed', worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                                 [(worker, now + lease, now, key) for key, *_ in rows])
+            return [{"key": key, "level": level, "context": json.loads(context) if context else {}, "attempts": attempts + 1}
+                    for key, level, context, attempts in rows]
+        return self._transaction(take)
+
+    def requeue_claimed(self, worker=None, expired_only=False):
+        # Puts claimed nodes back to pending: all of them (single-process resume), one worker's, or expired leases only
+        clauses, params = ["status = 'claimed'"], []
+        if worker is not None: clauses.append("worker = ?"); params.append(worker)
+        if expired_only: clauses.append("lease_until < ?"); params.append(time.time())
+        def requeue():
+            return self._db.execute(f"UPDATE nodes SET status = 'pending', worker = NULL, lease_until = NULL WHERE {' AND '.join(clauses)}", params).rowcount
+        return self._transaction(requeue)
+
+    def renew(self, worker, lease=300.0):
+        # Heartbeat: extends the leases of everything `worker` holds
+        def extend():
+            now = time.time()
+            return self._db.execute("UPDATE nodes SET lease_until = ?, updated_at = ? WHERE status = 'claimed' AND worker = ?", (now + lease, now, worker)).rowcount
+        return self._transaction(extend)
+
+    # --- Completion ---
+    def _finish(self, key, status, now):
+        finished = []
+        while key is not None:
+            self._db.execute("UPDATE nodes SET status = ?, worker = NULL, lease_until = NULL, completed_at = ?, updated_at = ? WHERE key = ?", (status, now, now, key))
+            level, parent = self._db.execute("SELECT level, parent FROM nodes WHERE key = ?", (key,)).fetchone()
+            finished.append((key, level, status))
+            if parent is None: break
+            self._db.execute("UPDATE nodes SET pending_children = pending_children - 1 WHERE key = ?", (parent,))
+            row = self._db.execute("SELECT status, pending_children FROM nodes WHERE key = ?", (parent,)).fetchone()
+            if row is None or row[0] != EXPANDED or row[1] > 0: break
+            key, status = parent, DONE
+        return finished
+
+    def _owned(self, key, worker):
+        row = self._db.execute("SELECT status, worker FROM nodes WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] == CLAIMED and row[1] == worker
+
+    def complete(self, key, worker, children=()):
+        # Records the children of a claimed node and finishes it if there are none. Returns the
+        # (key, level, status) of every node that became terminal, ancestors included; nothing
+        # if the claim was lost (lease expired and another worker took the node).
+        def finish():
+            if not self._owned(key, worker): return []
+            now = time.time()
+            if children:
+                before = self._db.total_changes
+                self._db.executemany("INSERT OR IGNORE INTO nodes (key, level, parent, priority, context, discovered_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     self._rows(children, key, now))
+                added = self._db.total_changes - before
+                if added:
+                    self._db.execute("UPDATE nodes SET status = 'expanded', pending_children = ?, worker = NULL, lease_until = NULL, error = NULL, updated_at = ? WHERE key = ?",
+                                     (added, now, key))
+                    return []
+            return self._finish(key, DONE, now)
+        return self._transaction(finish)
+
+    def fail(self, key, worker, error, max_attempts=3):
+        # Back to pending for another attempt, or parked as failed once attempts run out
+        def record():
+            if not self._owned(key, worker): return []
+            now = time.time()
+            attempts = self._db.execute("SELECT attempts FROM nodes WHERE key = ?", (key,)).fetchone()[0]
+            self._db.execute("UPDATE nodes SET error = ?, updated_at = ? WHERE key = ?", (str(error)[:500], now, key))
+            if attempts < max_attempts:
+                self._db.execute("UPDATE nodes SET status = 'pending', worker = NULL, lease_until = NULL WHERE key = ?", (key,))
+                return []
+            return self._finish(key, FAILED, now)
+        return self._transaction(record)
+
+    def reopen(self, keys):
+        # Puts finished nodes back to pending (e.g. decisions whose output was lost in an unflushed
+        # buffer) and reopens their finished ancestors, so completion propagates through them again
+        def reopen_all():
+            now, reopened = time.time(), 0
+            for key in keys:
+                row = self._db.execute("SELECT status, parent FROM nodes WHERE key = ?", (key,)).fetchone()
+                if row is None or row[0] not in TERMINAL: continue
+                self._db.execute("UPDATE nodes SET status = 'pending', attempts = 0, error = NULL, completed_at = NULL, updated_at = ? WHERE key = ?", (now, key))
+                reopened += 1
+                parent = row[1]
+                while parent is not None:
+                    status, grandparent = self._db.execute("SELECT status, parent FROM nodes WHERE key = ?", (parent,)).fetchone()
+                    if status not in TERMINAL:
+                        self._db.execute("UPDATE nodes SET pending_children = pending_children + 1 WHERE key = ?", (parent,)); break
+                    self._db.execute("UPDATE nodes SET status = 'expanded', pending_children = 1, completed_at = NULL, updated_at = ? WHERE key = ?", (now, parent))
+                    parent = grandparent
+            return reopened
+        return self._transaction(reopen_all)
+
+    # --- Inspection ---
+    def status(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT status FROM nodes WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT level, status, COUNT(*) FROM nodes GROUP BY level, status").fetchall()
+        counts = {}
+        for level, status, count in rows: counts.setdefault(level, {})[status] = count
+        return counts
+
+    def values(self, level, field, status=DONE):
+        # (key, context[field]) of every `level` node with `status`
+        with self._lock:
+            return self._db.execute("SELECT key, json_extract(context, ?) FROM nodes WHERE level = ? AND status = ?", (f"$.{field}", level, status)).fetchall()
+
+    def contexts(self, keys):
+        with self._lock:
+            rows = self._db.execute(f"SELECT key, context FROM nodes WHERE key IN ({', '.join('?' * len(keys))})", list(keys)).fetchall()
+        return {key: json.loads(context) if context else {} for key, context in rows}
+
+    def remaining(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM nodes WHERE status NOT IN ('done', 'failed')").fetchone()[0]
+
+    def failures(self, limit=100):
+        with self._lock:
+            rows = self._db.execute("SELECT key, level, attempts, error FROM nodes WHERE status = 'failed' ORDER BY updated_at LIMIT ?", (limit,)).fetchall()
+        return [{"key": key, "level": level, "attempts": attempts, "error": error} for key, level, attempts, error in rows]
+
+    # --- Meta documents ---
+    def get_meta(self, name, default=None):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, name, value):
+        with self._lock:
+            self._db.execute("INSERT INTO meta (name, value, updated_at) VALUES (?, ?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                             (name, json.dumps(value, ensure_ascii=False), time.time()))
+
+    def meta_items(self, prefix):
+        with self._lock:
+            rows = self._db.execute("SELECT name, value FROM meta WHERE substr(name, 1, ?) = ? ORDER BY name", (len(prefix), prefix)).fetchall()
+        return {name: json.loads(value) for name, value in rows}
+
+    def delete_meta(self, name):
+        with self._lock: self._db.execute("DELETE FROM meta WHERE name = ?", (name,))
+
+    def close(self):
+        with self._lock:
+            try: self._db.close()
+            except sqlite3.Error: pass
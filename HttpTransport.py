@@ -0,0 +1,187 @@
+import socket
+import threading
+import weakref
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from rich.console import Console
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING # "gzip,deflate" plus br/zstd when their decoders are installed
+
+try: import httpx # Optional: pip install "httpx[http2]" for --http2
+except ImportError: httpx = None
+try: import h2
+except ImportError: h2 = None
+
+KEEPALIVE_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+
+class _Stats:
+    # Counters shared by the adapters of one transport (a resize replaces the adapter, not the numbers)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {"requests": 0, "connections": 0, "tls_handshakes": 0, "wire_bytes": 0, "body_bytes": 0}
+        self.http_version = "HTTP/1.1"
+
+    def add(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items(): self.values[name] += amount
+
+
+def _counting_pool(pool_class, stats):
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            stats.add(connections=1, tls_handshakes=int(self.scheme == "https"))
+            return super()._new_conn()
+    return CountingPool
+
+
+class PooledAdapter(HTTPAdapter):
+    # urllib3 adapter with blocking per-host pools (threads wait for a pooled connection instead of
+    # opening throwaway ones), TCP keep-alive, and counts of new connections and wire bytes
+    def __init__(self, stats, pool_connections=4, pool_maxsize=16):
+        self.stats = stats
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, socket_options=KEEPALIVE_SOCKET_OPTIONS, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _counting_pool(HTTPConnectionPool, self.stats),
+                                                   "https": _counting_pool(HTTPSConnectionPool, self.stats)}
+
+    def send(self, request, stream=False, **kwargs):
+        response = super().send(request, stream=stream, **kwargs)
+        if stream: self.stats.add(requests=1) # Streamed bodies (PDFs) are counted by their reader
+        else: self.stats.add(requests=1, body_bytes=len(response.content), wire_bytes=response.raw.tell())
+        return response
+
+
+class _HttpxBody:
+    # File-like Response.raw over an httpx response (decoded bytes), so iter_content() keeps working
+    def __init__(self, response, request):
+        self.response = response
+        self.request = request
+        self._chunks = None
+        self._buffer = b""
+
+    def read(self, amt=None, **_):
+        if self._chunks is None: self._chunks = self.response.iter_bytes()
+        try:
+            while amt is None or len(self._buffer) < amt:
+                chunk = next(self._chunks, None)
+                if chunk is None: break
+                self._buffer += chunk
+        except httpx.HTTPError as e: raise Http2Adapter.convert(e, self.request) from e
+        data, self._buffer = (self._buffer, b"") if amt is None else (self._buffer[:amt], self._buffer[amt:])
+        return data
+
+    def close(self):
+        self.response.close()
+
+    def release_conn(self):
+        self.response.close()
+
+
+class Http2Adapter(BaseAdapter):
+    # requests adapter backed by an httpx.Client with HTTP/2: all requests to a host multiplex over
+    # one connection. Responses and errors are converted to requests' types, so callers do not change.
+    def __init__(self, stats, pool_maxsize=16, keepalive=60.0, verify=True):
+        super().__init__()
+        self.stats = stats
+        self._streams = weakref.WeakSet() # Network streams seen so far: a new one is a new connection
+        self.client = httpx.Client(http2=True, verify=verify, limits=httpx.Limits(
+            max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize, keepalive_expiry=keepalive))
+
+    @staticmethod
+    def convert(error, request=None):
+        if isinstance(error, httpx.ConnectTimeout): return requests.exceptions.ConnectTimeout(error, request=request)
+        if isinstance(error, httpx.TimeoutException): return requests.exceptions.ReadTimeout(error, request=request)
+        if isinstance(error, httpx.DecodingError): return requests.exceptions.ContentDecodingError(error, request=request)
+        return requests.exceptions.ConnectionError(error, request=request)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        timeout = httpx.Timeout(timeout[1], connect=timeout[0]) if isinstance(timeout, tuple) else httpx.Timeout(timeout)
+        try:
+            out = self.client.send(self.client.build_request(request.method, request.url, headers=dict(request.headers),
+                                                             content=request.body, timeout=timeout), stream=True)
+            if not stream: out.read()
+        except httpx.HTTPError as e: raise self.convert(e, request) from e
+        stream_id = out.extensions.get("network_stream")
+        new = stream_id is not None and stream_id not in self._streams
+        if new: self._streams.add(stream_id)
+        self.stats.http_version = out.http_version
+        self.stats.add(requests=1, connections=int(new), tls_handshakes=int(new and out.url.scheme == "https"))
+        if not stream: self.stats.add(body_bytes=len(out.content), wire_bytes=out.num_bytes_downloaded)
+        response = requests.Response()
+        response.status_code, response.reason, response.url = out.status_code, out.reason_phrase, str(out.url)
+        response.headers = CaseInsensitiveDict(out.headers.multi_items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.request, response.connection = request, self
+        response.raw = _HttpxBody(out, request)
+        if not stream: response._content, response._content_consumed = out.content, True
+        return response
+
+    def close(self):
+        self.client.close()
+
+
+class HttpTransport:
+    # The requests.Session behind one kind of traffic (HTML pages or PDFs, each with its own pools):
+    # pool_maxsize connections per host kept alive across requests, pool_connections hosts cached,
+    # gzip/deflate (and brotli when the brotli package is installed) advertised and decoded. With
+    # http2=True (needs httpx and h2) requests go through an httpx client instead and share one
+    # multiplexed connection per host; without them the transport logs a warning and stays on
+    # HTTP/1.1. stats count requests, new connections (TLS handshakes for https) and, for bodies
+    # read in one go, wire vs decoded bytes, so describe() shows how well connections are reused.
+
+    def __init__(self, name="html", pool_connections=4, pool_maxsize=16, http2=False, keepalive=60.0, headers=None, console=None):
+        self.name = name
+        self.pool_connections = pool_connections
+        self.pool_maxsize = max(1, pool_maxsize)
+        self.keepalive = keepalive
+        self.console = console or Console()
+        if http2 and (httpx is None or h2 is None):
+            self.console.log(f"[yellow]HTTP/2 needs the httpx and h2 packages (pip install \"httpx[http2]\"); {name} traffic stays on HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.stats = _Stats()
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING.replace(",", ", ")
+        if headers: self.session.headers.update(headers)
+        self._mount()
+
+    def _mount(self):
+        if self.http2: adapter = Http2Adapter(self.stats, pool_maxsize=self.pool_maxsize, keepalive=self.keepalive)
+        else: adapter = PooledAdapter(self.stats, pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        old = self.session.adapters.get("https://")
+        self.session.mount("https://", adapter); self.session.mount("http://", adapter)
+        if old is not None: old.close()
+
+    def resize(self, pool_maxsize):
+        # Grows the per-host pools (e.g. to the async engine's worker count); never shrinks them
+        if pool_maxsize > self.pool_maxsize: self.pool_maxsize = pool_maxsize; self._mount()
+
+    def snapshot(self):
+        with self.stats.lock: values = dict(self.stats.values)
+        values["reused"] = max(0, values["requests"] - values["connections"])
+        values["reuse_ratio"] = round(values["reused"] / values["requests"], 4) if values["requests"] else 0.0
+        values["http_version"] = self.stats.http_version
+        return values
+
+    def describe(self):
+        s = self.snapshot()
+        wire = (f", {s['wire_bytes'] / 1e6:.1f} MB on the wire for {s['body_bytes'] / 1e6:.1f} MB of bodies "
+                f"({s['body_bytes'] / s['wire_bytes']:.1f}x)" if s["wire_bytes"] else "")
+        return (f"{self.name}: {s['requests']} requests over {s['connections']} connections ({s['reuse_ratio']:.1%} reused, "
+                f"{s['tls_handshakes']} TLS handshakes), {s['http_version']}{wire}")
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
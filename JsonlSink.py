@@ -0,0 +1,251 @@
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import time
+
+from rich.console import Console
+
+try:
+    import zstandard
+except ImportError: # optional: pip install zstandard
+    zstandard = None
+
+COMPRESSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+FSYNC_POLICIES = ("never", "batch", "close")
+PARTITIONS = {
+    "court": lambda record: record.get('_source_court_code') or "unknown",
+    "court_year": lambda record: f"{record.get('_source_court_code') or 'unknown'}.{record.get('_source_year') or 'unknown'}",
+}
+
+
+def open_jsonl(path):
+    # Text stream over a plain, .gz or .zst JSONL file
+    if path.endswith(".gz"): return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith(".zst"):
+        if zstandard is None: raise ValueError(f"Reading {path} needs the optional 'zstandard' package")
+        raw = open(path, 'rb')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_jsonl(path):
+    # Yields the records of one file, stopping quietly at a torn tail (killed writer)
+    errors = (EOFError, gzip.BadGzipFile, ValueError) + ((zstandard.ZstdError,) if zstandard else ())
+    with open_jsonl(path) as f:
+        try:
+            for line in f:
+                if not line.endswith('\n'): return
+                yield json.loads(line)
+        except errors: return
+
+
+def iter_jsonl_from(path, offset=0):
+    # (offset after the line, record) for the complete lines of a plain file after `offset`; a torn tail ends it
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"): return
+            offset += len(line)
+            try: yield offset, json.loads(line)
+            except ValueError: yield offset, None
+
+
+def output_segments(path):
+    # Segment files a JsonlSink wrote for `path`, in order (see JsonlSink below)
+    stem = os.path.splitext(path)[0]
+    pattern = re.compile(rf"{re.escape(os.path.basename(stem))}(?:\.(?P<partition>.+?))?\.(?P<seq>\d{{5}})\.jsonl(?:\.gz|\.zst)?")
+    return sorted(p for p in glob.glob(f"{glob.escape(stem)}.*") if pattern.fullmatch(os.path.basename(p)))
+
+
+def iter_output(path):
+    # Records of a sink's output: `path` itself when it exists, plus any rotated/partitioned/compressed segments
+    for segment in ([path] if os.path.exists(path) else []) + output_segments(path): yield from iter_jsonl(segment)
+
+
+def repair_tail(path):
+    # Drops a partial last line so appended records start on a line of their own
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size: return
+        f.seek(max(0, size - 65536)); tail = f.read()
+        if tail.endswith(b"\n"): return
+        cut = tail.rfind(b"\n")
+        f.truncate(size - len(tail) + cut + 1 if cut >= 0 else (0 if size <= 65536 else size))
+
+
+class JsonlSink:
+    # Buffered JSONL output shared by all crawl workers. Records are buffered and written in one
+    # batch per `flush_records` records or `flush_interval` seconds. With compression each batch
+    # is written as its own complete gzip member / zstd frame, so a segment is readable up to the
+    # last flush even if the process dies. fsync policy: "never" (leave it to the OS), "batch"
+    # (after every flush) or "close".
+    #
+    # Without rotation, partitioning or compression everything goes to `path` itself. Otherwise
+    # segments are named <stem>[.<partition>].<00001>.jsonl[.gz|.zst]; a segment is rotated once
+    # it reaches `rotate_bytes`, and `partition` (a PARTITIONS name or a callable) splits records
+    # by e.g. court and year.
+    #
+    # Exactly-once: `key` values (a field, or a tuple of fields) already present in any segment are
+    # loaded on open and repeated records are dropped, so a resumed crawl that re-scrapes a page
+    # writes nothing twice.
+    # With an `index` (SeenIndex) the written keys live there instead of in an in-memory set; the
+    # caller syncs it from the existing output first. A record goes into the index only once its
+    # batch is on disk (buffered keys are held in memory until then), so a killed process never
+    # leaves the index claiming decisions the output does not have.
+    # `mirror` (e.g. a ParquetExporter or SearchIndex, or a list of them) receives every record that was accepted.
+    # Index and mirrors are closed with the sink.
+
+    def __init__(self, path, flush_records=100, flush_interval=5.0, fsync="batch", rotate_bytes=None, partition=None,
+                 compression=None, key="_source_decision_detail_url", max_open=16, index=None, mirror=None, console=None):
+        if compression not in COMPRESSIONS: raise ValueError(f"Unknown compression '{compression}' (expected gzip or zstd)")
+        if compression == "zstd" and zstandard is None: raise ValueError("zstd compression needs the optional 'zstandard' package")
+        if fsync not in FSYNC_POLICIES: raise ValueError(f"Unknown fsync policy '{fsync}' (expected one of {', '.join(FSYNC_POLICIES)})")
+        self.path = path
+        self.flush_records = max(1, flush_records)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.partition = PARTITIONS[partition] if isinstance(partition, str) else partition
+        self.compression = compression
+        self.key = key
+        self.max_open = max_open
+        self.mirrors = [m for m in (mirror if isinstance(mirror, (list, tuple)) else (mirror,)) if m is not None]
+        self.console = console or Console()
+        self.single_file = not (rotate_bytes or partition or compression)
+        self.stem = os.path.splitext(path)[0]
+        self.stats = {"written": 0, "duplicates": 0, "flushes": 0, "bytes": 0}
+        self._lock = threading.RLock()
+        self._buffers = {}
+        self._buffered = 0
+        self._pending = {} # key -> buffered record not in the index yet
+        self._files = {}
+        self._sequence = {}
+        self._last_flush = time.monotonic()
+        self._closed = False
+        if self.single_file and os.path.exists(path): repair_tail(path)
+        self.index = index
+        self.keys = index if index is not None else self._load_keys()
+        self._stop = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="jsonl-sink", daemon=True)
+            self._flusher.start()
+
+    # --- Segments ---
+    def segments(self):
+        return ([self.path] if os.path.exists(self.path) else []) if self.single_file else output_segments(self.path)
+
+    def iter_records(self):
+        for path in self.segments(): yield from iter_jsonl(path)
+
+    def key_of(self, record):
+        # `key` is a field name, or a tuple of them (value tuple; None while its first field is missing)
+        if not isinstance(self.key, tuple): return record.get(self.key)
+        return tuple(record.get(k) for k in self.key) if record.get(self.key[0]) is not None else None
+
+    def _load_keys(self):
+        if not self.key: return None
+        keys = set()
+        for path in self.segments():
+            for record in iter_jsonl(path):
+                if (value := self.key_of(record)) is not None: keys.add(value)
+        if keys: self.console.log(f"[cyan]Output sink: {len(keys)} records already written to {self.path}")
+        return keys
+
+    def _segment_path(self, partition):
+        if self.single_file: return self.path
+        name = re.sub(r'[\\/*?:"<>| ]', "_", partition) if partition else None
+        seq = self._sequence.get(partition)
+        if seq is None: # Continue after the highest existing segment; compressed ones are never appended to after a restart
+            prefix = f"{os.path.basename(self.stem)}.{name + '.' if name else ''}"
+            existing = [int(m.group(1)) for p in glob.glob(f"{glob.escape(self.stem)}.{glob.escape(name) + '.' if name else ''}[0-9]*")
+                        if (m := re.fullmatch(rf"{re.escape(prefix)}(\d{{5}})\.jsonl(?:\.gz|\.zst)?", os.path.basename(p)))]
+            seq = max(existing, default=0) + (1 if self.compression or not existing else 0)
+            self._sequence[partition] = seq
+        return f"{self.stem}.{name + '.' if name else ''}{seq:05d}.jsonl{COMPRESSIONS[self.compression]}"
+
+    def _file(self, partition):
+        f = self._files.pop(partition, None)
+        if f is None:
+            if len(self._files) >= self.max_open: self._close_file(next(iter(self._files)))
+            path = self._segment_path(partition)
+            if not self.compression and os.path.exists(path): repair_tail(path)
+            f = open(path, 'ab')
+        self._files[partition] = f # Most recently used last
+        return f
+
+    def _close_file(self, partition):
+        f = self._files.pop(partition)
+        if self.fsync == "close": f.flush(); os.fsync(f.fileno())
+        f.close()
+
+    # --- Writing ---
+    def write(self, record):
+        # Returns False for a record whose key was already written
+        with self._lock:
+            if self._closed: raise ValueError("write to a closed JsonlSink")
+            if self.keys is not None and (value := self.key_of(record)) is not None:
+                if value in self.keys or value in self._pending: self.stats["duplicates"] += 1; return False
+                if self.index is not None: self._pending[value] = record
+                else: self.keys.add(value)
+            partition = self.partition(record) if self.partition else None
+            self._buffers.setdefault(partition, []).append(json.dumps(record, ensure_ascii=False))
+            self._buffered += 1
+            for mirror in self.mirrors: mirror.write(record)
+            if self._buffered >= self.flush_records: self.flush()
+            return True
+
+    def flush(self):
+        with self._lock:
+            for partition, lines in self._buffers.items():
+                if not lines: continue
+                data = ("\n".join(lines) + "\n").encode('utf-8')
+                if self.compression == "gzip": data = gzip.compress(data, compresslevel=6)
+                elif self.compression == "zstd": data = zstandard.ZstdCompressor(level=3).compress(data)
+                f = self._file(partition)
+                f.write(data); f.flush()
+                if self.fsync == "batch": os.fsync(f.fileno())
+                self.stats["written"] += len(lines); self.stats["bytes"] += len(data)
+                if self.rotate_bytes and f.tell() >= self.rotate_bytes:
+                    self._close_file(partition); self._sequence[partition] += 1
+            if self._buffered: self.stats["flushes"] += 1
+            for record in self._pending.values(): self.index.add_record(record, self.key) # Written (and fsynced): now indexed
+            self._buffers.clear(); self._buffered = 0; self._pending.clear()
+            self._last_flush = time.monotonic()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval / 2):
+            with self._lock:
+                if self._buffered and time.monotonic() - self._last_flush >= self.flush_interval: self.flush()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._closed: return
+            self.flush()
+            for partition in list(self._files): self._close_file(partition)
+            for mirror in self.mirrors: mirror.close()
+            if self.index is not None: self.index.close()
+            self._closed = True
+        if self._flusher and self._flusher is not threading.current_thread(): self._flusher.join()
+
+    def backlog(self):
+        # Records accepted but not flushed yet
+        with self._lock: return self._buffered
+
+    def describe(self):
+        s = self.stats
+        return f"{s['written']} records in {s['flushes']} flushes ({s['bytes'] / 1e6:.1f} MB), {s['duplicates']} duplicates dropped" + "".join(f"; {part.describe()}" for part in (*self.mirrors, self.index) if part is not None)
+
+    def __contains__(self, value):
+        return self.keys is not None and (value in self.keys or value in self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -3,268 +3,350 @@ import os
 import time
 import requests
 import re
-from bs4 import BeautifulSoup, Tag, NavigableString
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from rich.console import Console
 
+from CrawlMetrics import PARSE_BUCKETS, page_type
+from FieldProjection import FieldProjection
+from HttpTransport import HttpTransport
+from ParserBackends import get_parser_backend
+from RetryPolicy import FetchError, RetryPolicy
+from StateJournal import StateJournal
+
 
 
 class MahkamahAgungScraper:
-    DEFAULT_BASE_URL = "https://putusan3.mahkamahagung.go.id/pengadilan.html"
+    SITE_ROOT = "https://putusan3.mahkamahagung.go.id"
+    DEFAULT_BASE_URL = f"{SITE_ROOT}/pengadilan.html"
+    COURT_LIST_PATH = "/pengadilan/index/ditjen/umum.html"
     DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+    MONTH_NAMES = ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli", "Agustus", "September", "Oktober", "November", "Desember"]
 
-    def __init__(self, base_url=DEFAULT_BASE_URL, params=None, headers=None,
-                 state_file="scrape_state.json", output_file="mahkamah_agung_courts.json",
-                 timeout=60, retry_delay=5):
-        self.base_url = base_url
+    def __init__(self, base_url=None, params=None, headers=None,
+                 state_file="scrape_state.jsonl", output_file="mahkamah_agung_courts.json",
+                 timeout=60, retry_delay=5, rate_limiter=None, cache=None, shared_fetch_size=32, parser="lxml",
+                 site_root=None, metrics=None, retry_policy=None, transport=None, console=None):
+        self.site_root = (site_root or self.SITE_ROOT).rstrip('/')
+        self.base_url = base_url or f"{self.site_root}/pengadilan.html"
         self.params = params or {}
         self.headers = headers or self.DEFAULT_HEADERS.copy()
         self.state_file = state_file
         self.output_file = output_file
         self.timeout = timeout
         self.retry_delay = retry_delay
-        self.console = Console()
-        self.session = requests.Session()
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self.shared_fetch_size = shared_fetch_size
+        self.stats = {"requests": 0, "shared_hits": 0}
+        self._shared_pages = OrderedDict()
+        self._inflight = {}
+        self._shared_lock = threading.Lock()
+        self.console = console or Console()
+        self.retry_policy = retry_policy or RetryPolicy(base_delay=retry_delay, console=self.console)
+        self.journal = StateJournal(state_file, console=self.console)
+        self.parser = get_parser_backend(parser, console=self.console)
+        self.transport = transport or HttpTransport("html", headers=self.headers, console=self.console) # HTML pool; PDFs use their own
+        self.session = self.transport.session
         self.session.headers.update(self.headers)
         self.current_page = 1
         self.all_scraped_data = []
         self.last_page = None
 
     def _load_state(self):
-        if not os.path.exists(self.state_file):
-            return 1, []
+        # Returns (next_page, number of records saved so far). The records stay in the journal
+        # on disk; stream them with iter_scraped_data() instead of holding them in RAM.
+        legacy_file = f"{os.path.splitext(self.state_file)[0]}.json"
         try:
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                state = json.load(f)
-                self.console.log(f"[yellow]Resuming from page {state.get('next_page', 1)}...")
-                return max(1, state.get('next_page', 1)), state.get('scraped_data', [])
+            checkpoint = self.journal.load()
+            if checkpoint is None and legacy_file != self.state_file and os.path.exists(legacy_file):
+                with open(legacy_file, 'r', encoding='utf-8') as f: state = json.load(f)
+                self.journal.append(state.get('scraped_data', []), {"next_page": state.get('next_page', 1)})
+                os.replace(legacy_file, f"{legacy_file}.migrated"); checkpoint = self.journal.checkpoint
+                self.console.log(f"[cyan]Migrated {legacy_file} into {self.state_file}")
+            if checkpoint is None: return 1, 0
+            self.console.log(f"[yellow]Resuming from page {checkpoint.get('next_page', 1)} ({self.journal.records} records saved)...")
+            return max(1, checkpoint.get('next_page', 1)), self.journal.records
         except Exception as e:
             self.console.log(f"[red]Error loading state: {e}. Starting fresh.")
-            try:
-                if os.path.exists(self.state_file): os.remove(self.state_file)
+            try: self.journal.remove()
             except OSError: pass
-            return 1, []
+            return 1, 0
 
-    def _save_state(self, page_to_save, data_to_save):
+    def _save_state(self, page_to_save, new_records):
+        # Appends only the records scraped since the previous save
         try:
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump({"next_page": page_to_save, "scraped_data": data_to_save},
-                          f, indent=4, ensure_ascii=False)
-        except IOError as e:
+            self.journal.append(new_records, {"next_page": page_to_save})
+        except (IOError, OSError) as e:
             self.console.log(f"[red]Warning: Could not save state: {e}")
 
+    def iter_scraped_data(self):
+        return self.journal.iter_records()
+
     def _fetch_page(self, page_number, url=None):
+        # Within a run, identical URLs are fetched once: concurrent callers wait for the
+        # in-flight request and recent bodies are kept in a small in-memory LRU.
+        if not self.shared_fetch_size or url is None: return self._request_page(page_number, url)
+        with self._shared_lock:
+            if (html := self._shared_pages.get(url)) is not None:
+                self._shared_pages.move_to_end(url); self.stats["shared_hits"] += 1
+                return html
+            event = self._inflight.get(url)
+            owner = event is None
+            if owner: event = self._inflight[url] = threading.Event()
+        if not owner:
+            event.wait()
+            with self._shared_lock:
+                if (html := self._shared_pages.get(url)) is not None:
+                    self.stats["shared_hits"] += 1
+                    return html
+            return self._fetch_page(page_number, url)
+        html = None
+        try:
+            html = self._request_page(page_number, url)
+        finally:
+            with self._shared_lock:
+                if html is not None:
+                    self._shared_pages[url] = html
+                    while len(self._shared_pages) > self.shared_fetch_size: self._shared_pages.popitem(last=False)
+                self._inflight.pop(url, None)
+                event.set()
+        return html
+
+    def _request_page(self, page_number, url=None):
         params = {**self.params}
         if url is None: params['page'] = page_number
         target_url = url or self.base_url
-        attempt = 0
+        current_params = params if url is None or 'page' not in url else None
+        cached = self.cache.lookup(target_url, current_params) if self.cache else None
+        kind = page_type(target_url) if self.metrics else None
+        if cached is not None and cached.fresh:
+            if self.metrics: self.metrics.inc("http_cache_hits_total", page_type=kind)
+            return cached.body
+        retry = self.retry_policy.begin(target_url)
         while True:
-            attempt += 1
-            current_params = params if url is None or 'page' not in url else None
+            retry.before() # Blocks while the circuit breaker is open
+            if self.rate_limiter: self.rate_limiter.acquire('html')
+            started = time.monotonic()
             try:
-                response = self.session.get(target_url, params=current_params, timeout=self.timeout)
+                with self._shared_lock: self.stats["requests"] += 1
+                response = self.session.get(target_url, params=current_params, timeout=self.timeout,
+                                            headers=cached.conditional_headers() if cached else None)
+                if self.rate_limiter:
+                    self.rate_limiter.record('html', status=response.status_code, latency=time.monotonic() - started,
+                                             retry_after=response.headers.get('Retry-After'))
+                if self.metrics: self.metrics.record_request(kind, response.status_code, time.monotonic() - started, len(response.content))
+                if response.status_code == 304 and cached is not None:
+                    retry.success(); self.cache.revalidated(target_url, current_params, cached)
+                    return cached.body
                 response.raise_for_status()
+                retry.success()
+                if self.cache:
+                    self.cache.store(target_url, response.text, current_params,
+                                     etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
                 return response.text
             except requests.exceptions.RequestException as e:
-                self.console.log(f"[yellow]Error fetching page {page_number if url is None else ''} ({target_url}), attempt {attempt}: {e}. Retrying in {self.retry_delay}s...")
-                time.sleep(self.retry_delay)
+                status = e.response.status_code if getattr(e, 'response', None) is not None else None
+                if self.rate_limiter and status is None: self.rate_limiter.record('html', error=e, latency=time.monotonic() - started)
+                if self.metrics and status is None: self.metrics.record_request(kind, "error", time.monotonic() - started)
+                # Throttling responses are paced by the rate limiter (lowered rate + Retry-After pause)
+                paced = self.rate_limiter is not None and status in self.rate_limiter.THROTTLE_CODES
+                delay = retry.failure(status, e, paced) # FetchError once the URL is given up (dead-lettered)
+                if self.metrics: self.metrics.inc("http_retries_total", page_type=kind)
+                self.console.log(f"[yellow]Error fetching page {page_number if url is None else ''} ({target_url}), attempt {retry.attempts}: {e}. Retrying in {delay:.1f}s...")
+                if delay: time.sleep(delay)
+
+    @staticmethod
+    def extract_court_code(court_link):
+        if not court_link: return None
+        try:
+            parts = [p for p in urlparse(court_link).path.split('/') if p]
+            code = parts[-1].replace('.html', '') if parts else ''
+        except Exception: return None
+        return code if any(x in code for x in ['pn-', 'pt-', 'pa-', 'ma-', 'tun-']) else None
+
+    @classmethod
+    def month_from_date(cls, date_text):
+        if not date_text or not (m := re.match(r'\d{2}-(\d{2})-\d{4}$', date_text)) or not 1 <= int(m.group(1)) <= 12: return None
+        return cls.MONTH_NAMES[int(m.group(1)) - 1]
+
+    @staticmethod
+    def nomor_from_title(title):
+        # "Putusan PN X Nomor 68/Pid.B/2024/PN Arm [Tanggal ...]" -> "68/Pid.B/2024/PN Arm"
+        m = re.search(r'\bNomor\s+(.+?)(?:\s+Tanggal\b|$)', title or '')
+        return m.group(1).strip() if m else None
+
+    @classmethod
+    def listing_record(cls, row):
+        # A decision record from its listing row alone (no detail request)
+        return {**row, "nomor": cls.nomor_from_title(row.get('title'))}
+
+    @classmethod
+    def add_source(cls, record, ctx):
+        # Provenance fields of a decision record; ctx uses CrawlEngine's node context keys
+        record['_source_court_name'] = ctx.get('court_name'); record['_source_court_code'] = ctx.get('court_code')
+        record['_source_year'] = ctx.get('year'); record['_source_category'] = ctx.get('category')
+        record['_source_classification'] = ctx.get('classification'); record['_source_month'] = ctx.get('month') or cls.month_from_date(ctx.get('putus_date'))
+        record['_source_decision_list_url'] = ctx.get('page_url'); record['_source_decision_detail_url'] = ctx['decision_link']
+        record['_scrape_timestamp'] = time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())
+        return record
+
+    @staticmethod
+    def in_year_range(year, year_range):
+        # year_range: None, one year, or (first, last) inclusive with None for an open end
+        if year_range is None: return True
+        first, last = year_range if isinstance(year_range, (tuple, list)) else (year_range, year_range)
+        if not str(year).isdigit(): return False
+        return (first is None or int(year) >= int(first)) and (last is None or int(year) <= int(last))
 
     @staticmethod
     def get_last_page(html_content):
-        if not html_content: return None
-        soup = BeautifulSoup(html_content, 'lxml')
-        pages = [int(a['data-ci-pagination-page'])
-                 for a in soup.select('ul.pagination a[data-ci-pagination-page]')
-                 if a.get('data-ci-pagination-page', '').isdigit()]
-        return max(pages) if pages else 1
-
-    def get_list_courts(self, url=None):
-        html_content = self._fetch_page(1, url=url)
-        if not html_content: return []
-        soup = BeautifulSoup(html_content, 'lxml')
-        court_data = []
-        for row in soup.select('table.table-responsive.table-striped tbody tr'):
-            cells = row.select('td')
-            if len(cells) != 4: continue
-            nama_tag = cells[0].select_one('a')
-            tinggi_tag = cells[1].select_one('a')
-            if not nama_tag or not tinggi_tag: continue
-
-            jumlah_putusan, jumlah_publikasi = None, None
-            match = re.match(r'([\d,.]+)\s*/\s*([\d,.]+)', cells[3].text.strip())
-            if match:
-                try:
-                    ps = re.sub(r'\D', '', match.group(1))
-                    pubs = re.sub(r'\D', '', match.group(2))
-                    if ps: jumlah_putusan = int(ps)
-                    if pubs: jumlah_publikasi = int(pubs)
-                except ValueError: pass
-
-            court_data.append({
-                "nama_pengadilan": nama_tag.text.strip(),
-                "link_pengadilan": nama_tag.get('href'),
-                "pengadilan_tinggi": tinggi_tag.text.strip(),
-                "link_pengadilan_tinggi": tinggi_tag.get('href'),
-                "provinsi": cells[2].text.strip(),
-                "jumlah_putusan": jumlah_putusan,
-                "jumlah_publikasi": jumlah_publikasi,
-            })
-        return court_data
-
-    def get_court_yearly_decisions(self, court_code=None, url=None):
-        if not (url or court_code): raise ValueError("Either court_code or url must be provided")
-        if not (html := self._fetch_page(1, url or f"https://putusan3.mahkamahagung.go.id/direktori/periode/tahunjenis/putus/pengadilan/{court_code}.html")): return []
-        soup = BeautifulSoup(html, 'lxml')
-        tbody = soup.select_one('table.table-striped tbody')
-        if not tbody: return []
-        return [
-            {
-                "year": links[0].text.strip(),
-                "decision_count": int(c) if (c := re.sub(r'[.,]', '', links[1].text.strip())).isdigit() else 0,
-                "link": links[0].get('href')
-            }
-            for row in tbody.select('tr')
-            if (links := row.select('td > a[href]')) and len(links) == 2 and links[0].text.strip().isdigit()
-        ]
-
-    def get_court_decision_categories_by_year(self, url):
-        if not url: raise ValueError("URL must be provided")
-        if not (html := self._fetch_page(1, url)): return []
-        soup = BeautifulSoup(html, 'lxml')
-        card = soup.select_one('div.card:has(> div.card-header :-soup-contains("Direktori"))')
-        if not card: return []
-        return [
-            {"category": name, "link": tag.get('href')}
-            for tag in card.select('div.card-body a[href][style*="color:black"]')
-            if (name := next(tag.stripped_strings, None)) and name.lower() != "semua direktori"
-        ]
-
-    def get_decision_classifications(self, url):
-        if not url: raise ValueError("URL must be provided")
-        if not (html := self._fetch_page(1, url)): return []
-        soup = BeautifulSoup(html, 'lxml')
-        card = soup.select_one('div.card:has(> div.card-header :-soup-contains("Klasifikasi"))')
-        if not card: return []
-        return [
-            {"classification": name, "link": tag.get('href')}
-            for tag in card.select('div.card-body a[href]')
-            if (name := next(tag.stripped_strings, None))
-        ]
-
-    def get_monthly_decision_counts(self, url):
-        if not url: raise ValueError("URL must be provided")
-        if not (html := self._fetch_page(1, url)): return []
-        soup = BeautifulSoup(html, 'lxml')
-        card = soup.select_one('div.card:has(> div.card-header :-soup-contains("Bulan"))')
-        if not card: return []
-        return [
-            {"month": month_text, "count": int(count_text)}
-            for p_tag in card.select('div.card-body div.form-check p.card-text')
-            if (span := p_tag.find('span', class_='badge'))
-            and (count_text := span.text.strip()).isdigit()
-            and (prev_node := span.find_previous(string=True))
-            and (month_text := prev_node.strip())
-        ]
-
-    def get_decision_list(self, url):
-        if not url: raise ValueError("URL must be provided for decision list")
-        if not (html := self._fetch_page(1, url)): return []
-        soup = BeautifulSoup(html, 'lxml')
-        container = soup.select_one('#popular-post-list-sidebar')
-        if not container: return []
-
-        return [
-            {
-                 "breadcrumbs": [a.text.strip() for a in entry_c.select('div.small:first-of-type a')] if entry_c.select_one('div.small:first-of-type') else [],
-                 "register_date": (m.group(1) if (m := re.search(r'Register\s*:\s*(\d{2}-\d{2}-\d{4})', date_text)) else None),
-                 "putus_date": (m.group(1) if (m := re.search(r'Putus\s*:\s*(\d{2}-\d{2}-\d{4})', date_text)) else None),
-                 "upload_date": (m.group(1) if (m := re.search(r'Upload\s*:\s*(\d{2}-\d{2}-\d{4})', date_text)) else None),
-                 "title": title,
-                 "link": title_tag.get('href'),
-                 "description_parties": "\n".join(
-                     txt.strip() for txt in (
-                         (node.strip() if isinstance(node, NavigableString) else ('\n' if node.name == 'br' else node.get_text(strip=True)))
-                         for node in last_div.contents
-                         if not (isinstance(node, Tag) and node.find(lambda tag: tag.name == 'i' and ('icon-eye' in tag.get('class', []) or 'icon-download' in tag.get('class', []))))
-                     ) if txt
-                 ).strip() if last_div else '',
-                 "view_count": (int(vt) if last_div and (vs := last_div.select_one('i.icon-eye + strong')) and (vt := vs.text.strip()).isdigit() else 0),
-                 "download_count": (int(dt) if last_div and (ds := last_div.select_one('i.icon-download + strong')) and (dt := ds.text.strip()).isdigit() else 0),
-             }
-            for entry in container.select('div.spost.clearfix')
-            if (entry_c := entry.select_one('div.entry-c'))
-            and not entry_c.select_one('div.small:contains("Data Tidak Ditemukan")')
-            and (title_tag := entry_c.select_one('strong > a[href]'))
-            and (title := title_tag.text.strip())
-            and (date_text := (d.text if (d := entry_c.select_one('div.small:nth-of-type(2)')) else '')) is not None
-            and (last_div := entry_c.select_one('div:last-of-type')) is not None
-        ]
-
-    def get_decision_detail(self, url):
-        if not url: raise ValueError("URL must be provided for decision detail")
-        self.console.log(f"[cyan]Fetching decision detail from: {url}")
-        html = self._fetch_page(1, url)
+        return _DEFAULT_PARSER.parse_last_page(html_content)
+
+    @staticmethod
+    def page_url(link, page_num):
+        return f"{link}{'&' if '?' in link else '?'}page={page_num}" if page_num > 1 else link
+
+    @staticmethod
+    def month_listing_targets(months, classification_link):
+        # Month-filtered listing URLs when the month card links them; otherwise the classification
+        # listing is crawled once (the month never went into the URL) and rows keep their putus month.
+        if linked := [m for m in months or [] if m.get('link')]:
+            return [{"month": m['month'], "link": m['link'], "count": m.get('count')} for m in linked]
+        return [{"month": None, "link": classification_link, "count": None}]
+
+    # --- Extractors: pass `html` to parse an already fetched page, otherwise `url` is fetched ---
+    def _parse(self, parse, html, *args):
+        if not self.metrics: return parse(html, *args)
+        with self.metrics.time("parse_seconds", PARSE_BUCKETS, extractor=parse.__name__): return parse(html, *args)
+
+    def _html_for(self, url, html, message="URL must be provided"):
+        if html is not None: return html
+        if not url: raise ValueError(message)
+        return self._fetch_page(1, url)
+
+    def get_listing_page(self, url=None, html=None):
+        # One fetch + one parse of a directory listing: month filter card, pagination and decision rows.
+        return self._parse(self.parser.parse_listing_page, self._html_for(url, html, "URL must be provided for listing page"))
+
+    def get_list_courts(self, url=None, html=None):
+        if html is None: html = self._fetch_page(1, url=url)
+        return self._parse(self.parser.parse_list_courts, html)
+
+    def get_court_yearly_decisions(self, court_code=None, url=None, html=None):
+        if html is None:
+            if not (url or court_code): raise ValueError("Either court_code or url must be provided")
+            html = self._fetch_page(1, url or f"{self.site_root}/direktori/periode/tahunjenis/putus/pengadilan/{court_code}.html")
+        return self._parse(self.parser.parse_court_yearly_decisions, html)
+
+    def get_court_decision_categories_by_year(self, url=None, html=None):
+        return self._parse(self.parser.parse_decision_categories, self._html_for(url, html))
+
+    def get_decision_classifications(self, url=None, html=None):
+        return self._parse(self.parser.parse_decision_classifications, self._html_for(url, html))
+
+    def get_monthly_decision_counts(self, url=None, html=None):
+        return self._parse(self.parser.parse_monthly_decision_counts, self._html_for(url, html))
+
+    def get_decision_list(self, url=None, html=None):
+        return self._parse(self.parser.parse_decision_list, self._html_for(url, html, "URL must be provided for decision list"))
+
+    def get_decision_detail(self, url=None, html=None):
+        if html is None:
+            if not url: raise ValueError("URL must be provided for decision detail")
+            self.console.log(f"[cyan]Fetching decision detail from: {url}")
+            html = self._fetch_page(1, url)
         if not html:
             self.console.log("[red]Failed to fetch decision detail page")
             return None
-        soup = BeautifulSoup(html, 'lxml')
-        details = {}
+        details = self._parse(self.parser.parse_decision_detail, html, url)
+        if details is not None: self.console.log(f"[green]Successfully extracted decision details from {url}")
+        return details
+
+
+    # --- Streaming API: the whole hierarchy as a lazy iterator (no state files, no output files) ---
+    def iter_courts(self, url=None):
+        url = url or f"{self.site_root}{self.COURT_LIST_PATH}"
+        first_page = self._fetch_page(1, url)
+        if not first_page: raise Exception("Failed fetch page 1 of the court list")
+        for page_num in range(1, (self.get_last_page(first_page) or 1) + 1):
+            yield from (self.get_list_courts(html=first_page) if page_num == 1 else self.get_list_courts(url=self.page_url(url, page_num))) or []
+
+    def iter_listing_rows(self, courts=None, court_filter=None, year_range=None):
+        # (context, row) for every listing row of the selected courts and years, one page fetched at a time.
+        # court_filter: court codes, or a callable(court) -> bool; zero-count courts and years are not fetched
+        for court in self.iter_courts() if courts is None else courts:
+            code = self.extract_court_code(court.get('link_pengadilan'))
+            if not code or court.get('jumlah_putusan') == 0: continue
+            if court_filter is not None and not (court_filter(court) if callable(court_filter) else code in court_filter): continue
+            for year in self._entries(self.get_court_yearly_decisions, court_code=code):
+                if not year.get('link') or year.get('decision_count') == 0 or not self.in_year_range(year.get('year'), year_range): continue
+                for category in self._entries(self.get_court_decision_categories_by_year, url=year['link']):
+                    if not category.get('link'): continue
+                    for classification in self._entries(self.get_decision_classifications, url=category['link']):
+                        if not classification.get('link'): continue
+                        ctx = {"court_name": court.get('nama_pengadilan'), "court_code": code, "year": year.get('year'),
+                               "category": category.get('category'), "classification": classification.get('classification')}
+                        yield from self._iter_listing(ctx, classification['link'])
+
+    def _entries(self, extractor, **kwargs):
+        try: return extractor(**kwargs) or []
+        except FetchError as e: self.console.log(f"[red]Subtree skipped: {e}"); return [] # Dead-lettered by the retry policy
+
+    def _iter_listing(self, ctx, link):
+        try: yield from self._iter_listing_pages(ctx, link)
+        except FetchError as e: self.console.log(f"[red]Listing skipped: {e}") # Dead-lettered by the retry policy
+
+    def _iter_listing_pages(self, ctx, link):
+        listing = self.get_listing_page(link)
+        if listing is None: self.console.log(f"[red]Failed fetch listing {link}, skipped"); return
+        for target in self.month_listing_targets(listing['months'], link):
+            if target['count'] == 0: continue
+            first_page = listing if target['link'] == link else self.get_listing_page(target['link'])
+            if first_page is None: self.console.log(f"[red]Failed fetch listing {target['link']}, skipped"); continue
+            for page_num in range(1, (first_page['last_page'] or 1) + 1):
+                page_url = self.page_url(target['link'], page_num)
+                rows = first_page['decisions'] if page_num == 1 else self.get_decision_list(url=page_url)
+                for row in rows or []:
+                    if row.get('link'): yield {**ctx, "month": target['month'], "page_url": page_url}, row
+
+    def decision_record(self, ctx, row, with_detail=True, with_pdf=None, with_row=False):
+        # One listing row -> its decision record (None when the detail page could not be parsed);
+        # with_row merges the detail over the row, keeping listing-only fields (title, dates, counts)
+        ctx = {**ctx, "putus_date": row.get('putus_date'), "decision_link": row['link']}
+        if with_detail:
+            try: record = self.get_decision_detail(url=row['link'])
+            except FetchError: return None # Dead-lettered by the retry policy
+            if not record: return None
+            if with_row: record = {**self.listing_record(row), **record}
+        else: record = self.listing_record(row)
+        if with_pdf and (pdf_url := record.get('download_link_pdf')): record['_pdf_path'] = with_pdf(pdf_url)
+        return self.add_source(record, ctx)
+
+    def iter_decisions(self, court_filter=None, year_range=None, with_detail=True, with_pdf=None, courts=None, read_ahead=4, fields=None):
+        # Lazily yields decision records in site order. Listings are walked one page at a time as the
+        # caller consumes; at most `read_ahead` detail pages (and PDFs) are fetched ahead on a small
+        # thread pool, so memory stays bounded however large the selection is.
+        # with_detail=False yields the listing rows only (title, link, dates, nomor); with_pdf is a
+        # callable url -> local path (e.g. PdfDownloader.download), stored as `_pdf_path`.
+        # fields: the fields needed (names, "listing", or a FieldProjection); detail pages are only
+        # fetched when one of them is not on the listing, and records keep just those fields.
+        projection = fields if isinstance(fields, FieldProjection) else FieldProjection(fields)
+        rows = self.iter_listing_rows(courts, court_filter, year_range)
+        if not (with_detail and projection.needs_detail):
+            for ctx, row in rows: yield projection.project(self.decision_record(ctx, row, with_detail=False), from_detail=False)
+            return
+        pool, pending = ThreadPoolExecutor(max_workers=max(1, read_ahead), thread_name_prefix="ma-read-ahead"), deque()
+        try:
+            for ctx, row in rows:
+                pending.append(pool.submit(self.decision_record, ctx, row, True, with_pdf, projection.fields is not None))
+                if len(pending) >= read_ahead and (record := pending.popleft().result()) is not None: yield projection.project(record)
+            while pending:
+                if (record := pending.popleft().result()) is not None: yield projection.project(record)
+        finally: pool.shutdown(wait=False, cancel_futures=True) # The caller may stop early
 
-        metadata_container = soup.select_one('#tabs-1 #popular-post-list-sidebar')
-        if not metadata_container:
-            self.console.log("[yellow]Metadata container '#tabs-1 #popular-post-list-sidebar' not found.")
-            return None
 
-        title_h2 = metadata_container.find('h2')
-        if title_h2:
-            details['title_full'] = title_h2.get_text(separator='\n', strip=True)
-            parties_span = title_h2.find('span', id='title_pihak')
-            details['parties_raw'] = parties_span.get_text(separator='\n', strip=True) if parties_span else None
-        else:
-             self.console.log("[yellow]Title H2 not found near metadata.")
-             details['title_full'] = None
-             details['parties_raw'] = None
-
-        table = metadata_container.find('table', class_='table')
-        if table:
-            rows = table.select('tbody > tr')
-            label_map = {
-                "nomor": "nomor", "tingkat proses": "tingkat_proses", "klasifikasi": "klasifikasi",
-                "kata kunci": "kata_kunci", "tahun": "tahun", "tanggal register": "tanggal_register",
-                "lembaga peradilan": "lembaga_peradilan", "jenis lembaga peradilan": "jenis_lembaga_peradilan",
-                "hakim ketua": "hakim_ketua", "hakim anggota": "hakim_anggota", "panitera": "panitera",
-                "amar": "amar", "amar lainnya": "amar_lainnya", "catatan amar": "catatan_amar",
-                "tanggal musyawarah": "tanggal_musyawarah", "tanggal dibacakan": "tanggal_dibacakan",
-                "kaidah": "kaidah", "abstrak": "abstrak"
-            }
-            for row in rows:
-                cells = row.find_all('td', recursive=False)
-                if len(cells) == 2:
-                    label_td, value_td = cells
-                    label_text = label_td.text.strip().lower()
-                    dict_key = label_map.get(label_text)
-                    if dict_key:
-                        try:
-                            if dict_key == "klasifikasi": details[dict_key] = [a.text.strip() for a in value_td.find_all('a')]
-                            elif dict_key == "lembaga_peradilan":
-                                link_tag = value_td.find('a')
-                                details[dict_key] = link_tag.text.strip() if link_tag else value_td.text.strip()
-                                details["lembaga_peradilan_link"] = link_tag['href'] if link_tag else None
-                            elif dict_key in ["catatan_amar", "abstrak"]: details[dict_key] = value_td.get_text(separator='\n' if dict_key == "catatan_amar" else '', strip=True)
-                            else: value = value_td.text.strip(); details[dict_key] = value if value != '—' else None
-                        except Exception as e:
-                             self.console.log(f"[red]Error parsing metadata row '{label_text}': {e}")
-                             details[dict_key] = None
-        elif not details.get('title_full'):
-             self.console.log("[yellow]Metadata table not found and no title fallback available.")
-             return None
-        else:
-            self.console.log("[yellow]Metadata table not found within container, using only H2 data if found.")
-
-        details['download_link_zip'] = None
-        details['download_link_pdf'] = None
-        if lampiran_card := soup.select_one('div.card:has(div.card-header div.togglet:-soup-contains("Lampiran"))'):
-            if zip_link_tag := lampiran_card.select_one('ul.portfolio-meta a[href*="/zip/"]'): details['download_link_zip'] = zip_link_tag.get('href')
-            if pdf_link_tag := lampiran_card.select_one('ul.portfolio-meta a[href*="/pdf/"]'): details['download_link_pdf'] = pdf_link_tag.get('href')
-
-        self.console.log(f"[green]Successfully extracted decision details from {url}")
-        return details
\ No newline at end of file
+_DEFAULT_PARSER = get_parser_backend("lxml")
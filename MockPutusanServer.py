@@ -0,0 +1,408 @@
+import argparse
+import datetime
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from rich.console import Console
+
+from MahkamahAgungScraper import MahkamahAgungScraper
+
+CATEGORIES = ["Pidana Umum", "Pidana Khusus", "Perdata", "Perdata Agama", "Perdata Khusus", "Pidana Militer", "Tata Usaha Negara", "Pajak"]
+CLASSIFICATIONS = ["Pencurian", "Narkotika dan Psikotropika", "Penipuan", "Penggelapan", "Wanprestasi", "Perbuatan Melawan Hukum",
+                   "Perceraian", "Lalu Lintas", "Perlindungan Anak", "Penganiayaan"]
+PROVINCES = ["Aceh", "Sumatera Utara", "Jawa Barat", "Jawa Tengah", "Jawa Timur", "Bali", "Sulawesi Utara", "Papua"]
+MONTHS = MahkamahAgungScraper.MONTH_NAMES
+
+INDEX = r'/direktori/index/pengadilan/(?P<court>[\w-]+)/tahunjenis/putus/tahun/(?P<year>\d{4})'
+ROUTES = [ # (page type, path pattern); the same URL layout as putusan3.mahkamahagung.go.id
+    ("court_list", re.compile(r'/pengadilan/index/ditjen/umum\.html')),
+    ("yearly", re.compile(r'/direktori/periode/tahunjenis/putus/pengadilan/(?P<court>[\w-]+)\.html')),
+    ("year_index", re.compile(INDEX + r'\.html')),
+    ("category", re.compile(INDEX + r'/direktori/(?P<category>[\w-]+)\.html')),
+    ("listing", re.compile(INDEX + r'/direktori/(?P<category>[\w-]+)/klasifikasi/(?P<classification>[\w-]+)(?:/bulan/(?P<month>\d{1,2}))?\.html')),
+    ("detail", re.compile(r'/direktori/putusan/(?P<id>zaf[0-9a-f]{16})\.html')),
+    ("pdf", re.compile(r'/direktori/download_file/(?P<id>zaf[0-9a-f]{16})/pdf/(?P=id)')),
+    ("zip", re.compile(r'/direktori/download_file/(?P<id>zaf[0-9a-f]{16})/zip/(?P=id)')),
+]
+STATS_PATH = "/__mock__/stats"
+
+PAGE = """<!DOCTYPE html>
+<html lang="en-US"><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/public/frontend/style.css" type="text/css" />
+<script type="text/javascript">var base_url = '{root}/';</script></head>
+<body class="stretched"><div id="wrapper" class="clearfix">
+<header id="header"><nav id="primary-menu"><ul><li><a href="{root}/beranda.html">Beranda</a></li><li><a href="{root}/direktori.html">Direktori</a></li></ul></nav></header>
+<section id="content"><div class="content-wrap"><div class="container clearfix">
+{body}
+</div></div></section>
+<footer id="footer" class="dark"><div id="copyrights">Copyrights &copy; Kepaniteraan Mahkamah Agung Republik Indonesia</div></footer>
+</div></body></html>
+"""
+
+
+def slug(name):
+    return name.lower().replace(' ', '-')
+
+
+class MockDataset:
+    # Deterministic synthetic hierarchy: court -> year -> category -> classification -> decisions,
+    # with each decision's putus date spread over the twelve months. Decision n is uploaded n days
+    # into the following year and listings show the newest upload first, like the real site.
+    # `growth` ({(court, year, category, classification): n}) adds n newer decisions to a listing,
+    # e.g. to serve the same site "a day later".
+
+    def __init__(self, courts=3, years=2, categories=2, classifications=2, decisions=30, page_size=20, first_year=2025,
+                 courts_per_page=20, month_links=False, pdf_bytes=4096, seed=0, growth=None):
+        if categories > len(CATEGORIES) or classifications > len(CLASSIFICATIONS):
+            raise ValueError(f"At most {len(CATEGORIES)} categories and {len(CLASSIFICATIONS)} classifications")
+        self.courts, self.years, self.categories, self.classifications = courts, years, categories, classifications
+        self.decisions, self.page_size, self.first_year, self.courts_per_page = decisions, page_size, first_year, courts_per_page
+        self.month_links, self.pdf_bytes, self.seed, self.growth = month_links, pdf_bytes, seed, growth or {}
+
+    @staticmethod
+    def court_code(court):
+        return f"pn-mock-{court + 1:03d}"
+
+    def court_index(self, code):
+        match = re.fullmatch(r'pn-mock-(\d{3})', code or '')
+        court = int(match.group(1)) - 1 if match else -1
+        return court if 0 <= court < self.courts else None
+
+    def year_index(self, year):
+        index = self.first_year - int(year)
+        return index if 0 <= index < self.years else None
+
+    def decision_count(self, court, year, category, classification):
+        # +/-50% around the configured size so pages, months and classifications are uneven like the real site
+        rng = random.Random(f"{self.seed}/{court}/{year}/{category}/{classification}")
+        return rng.randint(self.decisions - self.decisions // 2, self.decisions + self.decisions // 2) + self.growth.get((court, year, category, classification), 0)
+
+    def total_decisions(self):
+        return sum(self.decision_count(c, y, k, l) for c in range(self.courts) for y in range(self.years)
+                   for k in range(self.categories) for l in range(self.classifications))
+
+    def decision_month(self, number):
+        return (number * 5) % 12
+
+    def upload_date(self, year, number):
+        return (datetime.date(self.first_year - year + 1, 1, 1) + datetime.timedelta(days=number)).strftime("%d-%m-%Y")
+
+    def nomor(self, court, year, category, classification, number):
+        # Unique per court, like real register numbers (the case type differs per classification)
+        return f"{number + 1}/Pid.{category + 1}{classification + 1}/{self.first_year - year}/PN M{court + 1:03d}"
+
+    @staticmethod
+    def decision_id(court, year, category, classification, number):
+        return f"zaf{court:04x}{year:02x}{category:02x}{classification:02x}{number:06x}"
+
+    def parse_decision_id(self, decision_id):
+        c, y, k, l, n = (int(decision_id[i:j], 16) for i, j in ((3, 7), (7, 9), (9, 11), (11, 13), (13, 19)))
+        if c >= self.courts or y >= self.years or k >= self.categories or l >= self.classifications: return None
+        return (c, y, k, l, n) if n < self.decision_count(c, y, k, l) else None
+
+    def decisions_for(self, court, year, category, classification, month=None):
+        return [n for n in range(self.decision_count(court, year, category, classification)) if month is None or self.decision_month(n) == month]
+
+    def pdf(self, decision_id):
+        # A valid one-page PDF whose text is "PUTUSAN Nomor <id>", padded by a comment line to pdf_bytes
+        stream = f"BT /F1 12 Tf 72 720 Td (PUTUSAN Nomor {decision_id}) Tj ET".encode()
+        objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+                   b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+                   b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream), b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+        body = 9 + sum(len(b"%d 0 obj\n%s\nendobj\n" % (i, obj)) for i, obj in enumerate(objects, 1))
+        pad = 0
+        for _ in range(2): # The startxref digits depend on the padding
+            pad = self.pdf_bytes - body - 20 * (len(objects) + 1) - len(b"xref\n0 %d\n" % (len(objects) + 1)) - len(b"trailer << /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, body + max(pad, 0)))
+        out = b"%PDF-1.4\n" + (b"%" + b"0" * (pad - 2) + b"\n" if pad >= 2 else b"")
+        offsets = []
+        for i, obj in enumerate(objects, 1): offsets.append(len(out)); out += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n%s" % (len(objects) + 1, b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+        return out + b"trailer << /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+
+class MockPutusanServer:
+    # Local stand-in for putusan3 serving a MockDataset, with injectable latency, errors and 429 bursts.
+    # Runs on a background thread (start/stop or `with`) or blocking via serve_forever().
+
+    def __init__(self, dataset=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500,
+                 throttle_every=0, throttle_burst=0, retry_after=1, seed=0, console=None):
+        self.dataset = dataset or MockDataset()
+        self.latency, self.jitter, self.error_rate, self.error_status = latency, jitter, error_rate, error_status
+        self.throttle_every, self.throttle_burst, self.retry_after = throttle_every, throttle_burst, retry_after
+        self.console = console or Console()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self.stats = {"requests": 0, "bytes": 0, "by_type": {}, "by_status": {}}
+        self.httpd = ThreadingHTTPServer((host, port), _MockRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-putusan3", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.console.log(f"[cyan]Mock putusan3 serving {self.dataset.total_decisions()} decisions at {self.url}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread: self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def snapshot(self):
+        with self._lock: return json.loads(json.dumps(self.stats))
+
+    def _fault(self):
+        with self._lock:
+            self._requests += 1
+            if self.throttle_every and (self._requests - 1) % self.throttle_every < self.throttle_burst:
+                return 429, {"Retry-After": str(self.retry_after)}
+            if self.error_rate and self._rng.random() < self.error_rate: return self.error_status, {}
+        return None
+
+    def _record(self, page_type, status, size):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += size
+            self.stats["by_type"][page_type] = self.stats["by_type"].get(page_type, 0) + 1
+            self.stats["by_status"][str(status)] = self.stats["by_status"].get(str(status), 0) + 1
+
+    def respond(self, path, query):
+        # Returns (page type, status, headers, body bytes) for a request path and parsed query string
+        if path == STATS_PATH: return "stats", 200, {"Content-Type": "application/json"}, json.dumps(self.snapshot()).encode()
+        page_type, match = next(((name, m) for name, pattern in ROUTES if (m := pattern.fullmatch(path))), (None, None))
+        if self.latency or self.jitter: time.sleep(self.latency + self._rng.uniform(0, self.jitter))
+        if page_type is None: return "unknown", 404, {}, b"Not Found"
+        if fault := self._fault(): return page_type, fault[0], fault[1], b"Error"
+        try: page = int(query.get("page", ["1"])[0])
+        except ValueError: page = 1
+        body = getattr(self, f"_render_{page_type}")(page=page, **match.groupdict())
+        if body is None: return page_type, 404, {}, b"Not Found"
+        if isinstance(body, bytes): return page_type, 200, {"Content-Type": "application/pdf" if page_type == "pdf" else "application/zip"}, body
+        return page_type, 200, {"Content-Type": "text/html; charset=utf-8"}, body.encode("utf-8")
+
+    # --- Rendering ---
+    def _page(self, title, body):
+        return PAGE.format(title=title, root=self.url, body=body)
+
+    def _index_url(self, court, year):
+        return f"{self.url}/direktori/index/pengadilan/{self.dataset.court_code(court)}/tahunjenis/putus/tahun/{self.dataset.first_year - year}"
+
+    def _listing_url(self, court, year, category, classification, month=None):
+        return (f"{self._index_url(court, year)}/direktori/{slug(CATEGORIES[category])}/klasifikasi/{slug(CLASSIFICATIONS[classification])}"
+                + (f"/bulan/{month + 1}" if month is not None else "") + ".html")
+
+    @staticmethod
+    def _pagination(link, current, last):
+        if last <= 1: return ""
+        items = "".join(f'<li class="page-item"><a href="{link}?page={p}" data-ci-pagination-page="{p}" class="page-link">{p}</a></li>'
+                        if p != current else f'<li class="page-item active"><a class="page-link">{p}</a></li>'
+                        for p in range(max(1, current - 2), min(last, current + 2) + 1))
+        if current < last: items += f'<li class="page-item"><a href="{link}?page={last}" data-ci-pagination-page="{last}" class="page-link">Last</a></li>'
+        return f'<div class="pagging text-center"><ul class="pagination justify-content-center">{items}</ul></div>'
+
+    @staticmethod
+    def _card(header, body):
+        return f'<div class="card mb-3"><div class="card-header"><h4 class="card-title mb-0">{header}</h4></div><div class="card-body">\n{body}\n</div></div>'
+
+    def _category_card(self, court, year):
+        links = [f'<a href="{self._index_url(court, year)}.html" style="color:black">Semua Direktori</a><br>']
+        links += [f'<a href="{self._index_url(court, year)}/direktori/{slug(CATEGORIES[k])}.html" style="color:black"><i class="icon-folder-open"></i> {CATEGORIES[k]} '
+                  f'<span class="badge badge-light">{sum(self.dataset.decision_count(court, year, k, l) for l in range(self.dataset.classifications))}</span></a><br>'
+                  for k in range(self.dataset.categories)]
+        return self._card("Direktori", "\n".join(links))
+
+    def _classification_card(self, court, year, category):
+        return self._card("Klasifikasi", "\n".join(
+            f'<a href="{self._listing_url(court, year, category, l)}" style="color:black">{CLASSIFICATIONS[l]} '
+            f'<span class="badge">{self.dataset.decision_count(court, year, category, l)}</span></a><br>' for l in range(self.dataset.classifications)))
+
+    def _month_card(self, court, year, category, classification):
+        counts = [0] * 12
+        for n in self.dataset.decisions_for(court, year, category, classification): counts[self.dataset.decision_month(n)] += 1
+        entries = []
+        for m, count in enumerate(counts):
+            text = f'<p class="card-text">{MONTHS[m]} <span class="badge badge-secondary float-right">{count}</span></p>'
+            if self.dataset.month_links: text = f'<a href="{self._listing_url(court, year, category, classification, m)}">{text}</a>'
+            entries.append(f'<div class="form-check">{text}</div>')
+        return self._card("Bulan", "\n".join(entries))
+
+    def _entries(self, court, year, category, classification, numbers):
+        year_value = self.dataset.first_year - year
+        code = self.dataset.court_code(court)
+        rows = []
+        for n in numbers:
+            decision_id = self.dataset.decision_id(court, year, category, classification, n)
+            putus = f"{n % 28 + 1:02d}-{self.dataset.decision_month(n) + 1:02d}-{year_value}"
+            rows.append(f"""<div class="spost clearfix"><div class="entry-c">
+<div class="small"><a href="{self.url}/direktori.html">Putusan</a> <i class="icon-angle-right"></i> <a href="{self._index_url(court, year)}.html">{code.upper()}</a> <i class="icon-angle-right"></i> <a href="#">{CATEGORIES[category]}</a></div>
+<strong><a href="{self.url}/direktori/putusan/{decision_id}.html">Putusan {code.upper()} Nomor {self.dataset.nomor(court, year, category, classification, n)}</a></strong>
+<div class="small">Register : {putus} — Putus : {putus} — Upload : {self.dataset.upload_date(year, n)}</div>
+<div>Penuntut Umum:<br>PENUNTUT {n}<br>Terdakwa:<br>TERDAKWA {n}<br>
+<strong><i class="icon-eye"></i> </strong><i class="icon-eye"></i><strong>{n * 7 % 1000}</strong> <i class="icon-download"></i> <strong>{n * 3 % 100}</strong></div>
+</div></div>""")
+        return f'<div id="popular-post-list-sidebar">\n{chr(10).join(rows)}\n</div>'
+
+    def _layout(self, title, sidebar, listing, pagination=""):
+        return self._page(title, f'<div class="row"><div class="col-md-3 sidebar">{sidebar}</div><div class="col-md-9">{listing}{pagination}</div></div>')
+
+    def _location(self, court, year, category=None, classification=None, month=None):
+        c, y = self.dataset.court_index(court), self.dataset.year_index(year)
+        k = CATEGORIES.index(name) if (name := next((n for n in CATEGORIES if slug(n) == category), None)) else None
+        l = CLASSIFICATIONS.index(name) if (name := next((n for n in CLASSIFICATIONS if slug(n) == classification), None)) else None
+        if c is None or y is None: return None
+        if category is not None and (k is None or k >= self.dataset.categories): return None
+        if classification is not None and (l is None or l >= self.dataset.classifications): return None
+        if month is not None and not 1 <= int(month) <= 12: return None
+        return c, y, k, l
+
+    def _render_court_list(self, page=1):
+        first = (page - 1) * self.dataset.courts_per_page
+        rows = "\n".join(f"""<tr><td><a href="{self.url}/pengadilan/profil/pengadilan/{self.dataset.court_code(c)}.html">PN MOCK {c + 1}</a></td>
+<td><a href="{self.url}/pengadilan/profil/pengadilan/pt-mock-{c % len(PROVINCES)}.html">PT {PROVINCES[c % len(PROVINCES)].upper()}</a></td>
+<td>{PROVINCES[c % len(PROVINCES)]}</td><td>{self._court_total(c)} / {self._court_total(c)}</td></tr>"""
+                         for c in range(first, min(first + self.dataset.courts_per_page, self.dataset.courts)))
+        last = max(1, -(-self.dataset.courts // self.dataset.courts_per_page))
+        return self._page("Pengadilan Negeri", f"""<table class="table table-responsive table-striped table-bordered">
+<thead><tr><th>Nama Pengadilan</th><th>Pengadilan Tingkat Banding</th><th>Provinsi</th><th>Putusan / Publikasi</th></tr></thead>
+<tbody>{rows}</tbody></table>{self._pagination(f"{self.url}/pengadilan/index/ditjen/umum.html", page, last)}""")
+
+    def _court_total(self, court):
+        return sum(self.dataset.decision_count(court, y, k, l) for y in range(self.dataset.years)
+                   for k in range(self.dataset.categories) for l in range(self.dataset.classifications))
+
+    def _render_yearly(self, court, page=1):
+        if (c := self.dataset.court_index(court)) is None: return None
+        rows = "\n".join(f'<tr><td><a href="{self._index_url(c, y)}.html">{self.dataset.first_year - y}</a></td>'
+                         f'<td><a href="{self._index_url(c, y)}.html">{sum(self.dataset.decision_count(c, y, k, l) for k in range(self.dataset.categories) for l in range(self.dataset.classifications))}</a></td></tr>'
+                         for y in range(self.dataset.years))
+        return self._page(f"Periode Putusan {court.upper()}", f'<table class="table table-striped"><thead><tr><th>Tahun</th><th>Jumlah</th></tr></thead><tbody>{rows}</tbody></table>')
+
+    def _render_year_index(self, court, year, page=1):
+        if (location := self._location(court, year)) is None: return None
+        c, y, _, _ = location
+        numbers = self.dataset.decisions_for(c, y, 0, 0)[:self.dataset.page_size] if self.dataset.categories and self.dataset.classifications else []
+        listing = self._entries(c, y, 0, 0, numbers) if numbers else '<div id="popular-post-list-sidebar"></div>'
+        return self._layout(f"Direktori Putusan {court.upper()} {year}", self._category_card(c, y), listing)
+
+    def _render_category(self, court, year, category, page=1):
+        if (location := self._location(court, year, category)) is None: return None
+        c, y, k, _ = location
+        numbers = self.dataset.decisions_for(c, y, k, 0)[:self.dataset.page_size] if self.dataset.classifications else []
+        listing = self._entries(c, y, k, 0, numbers) if numbers else '<div id="popular-post-list-sidebar"></div>'
+        return self._layout(f"Direktori Putusan {court.upper()} {year} {CATEGORIES[k]}", self._category_card(c, y) + self._classification_card(c, y, k), listing)
+
+    def _render_listing(self, court, year, category, classification, month=None, page=1):
+        if (location := self._location(court, year, category, classification, month)) is None: return None
+        c, y, k, l = location
+        month_index = int(month) - 1 if month is not None else None
+        numbers = self.dataset.decisions_for(c, y, k, l, month_index)[::-1] # Newest upload first
+        last = max(1, -(-len(numbers) // self.dataset.page_size))
+        page_numbers = numbers[(page - 1) * self.dataset.page_size:page * self.dataset.page_size]
+        listing = (self._entries(c, y, k, l, page_numbers) if page_numbers else
+                   '<div id="popular-post-list-sidebar"><div class="spost clearfix"><div class="entry-c"><div class="small">Data Tidak Ditemukan</div></div></div></div>')
+        sidebar = self._category_card(c, y) + self._classification_card(c, y, k) + self._month_card(c, y, k, l)
+        return self._layout(f"Direktori Putusan {court.upper()} {year} {CLASSIFICATIONS[l]}", sidebar, listing,
+                            self._pagination(self._listing_url(c, y, k, l, month_index), page, last))
+
+    def _render_detail(self, id, page=1):
+        if (parsed := self.dataset.parse_decision_id(id)) is None: return None
+        c, y, k, l, n = parsed
+        code, year_value = self.dataset.court_code(c).upper(), self.dataset.first_year - y
+        nomor = self.dataset.nomor(c, y, k, l, n)
+        rows = [("Nomor", nomor), ("Tingkat Proses", "Pertama"),
+                ("Klasifikasi", f'<a href="#">{CATEGORIES[k]}</a> <a href="#">{CATEGORIES[k]} {CLASSIFICATIONS[l]}</a>'),
+                ("Kata Kunci", CLASSIFICATIONS[l]), ("Tahun", str(year_value)),
+                ("Tanggal Register", f"{n % 28 + 1} {MONTHS[self.dataset.decision_month(n)]} {year_value}"),
+                ("Lembaga Peradilan", f'<a href="{self._index_url(c, y)}.html">{code}</a>'), ("Jenis Lembaga Peradilan", "PN"),
+                ("Hakim Ketua", f"Hakim Ketua {c + 1}"), ("Hakim Anggota", f"Hakim Anggota {c + 1}A, Hakim Anggota {c + 1}B"),
+                ("Panitera", f"Panitera Pengganti {c + 1}"), ("Amar", "Lain-lain"), ("Amar Lainnya", "PIDANA PENJARA WAKTU TERTENTU"),
+                ("Catatan Amar", f"<p>M E N G A D I L I :</p><p>1. Menyatakan Terdakwa {n} terbukti bersalah;</p><p>2. Menjatuhkan pidana penjara selama {n % 5 + 1} tahun;</p>"),
+                ("Tanggal Musyawarah", f"{n % 28 + 1} {MONTHS[self.dataset.decision_month(n)]} {year_value}"),
+                ("Tanggal Dibacakan", f"{n % 28 + 1} {MONTHS[self.dataset.decision_month(n)]} {year_value}"), ("Kaidah", "—"), ("Abstrak", "<p></p>")]
+        table = "\n".join(f'<tr><td style="width:25%">{label}</td><td>{value}</td></tr>' for label, value in rows)
+        files = "".join(f'<li><a href="{self.url}/direktori/download_file/{id}/{kind}/{id}">Download {kind.upper()}</a></li>' for kind in ("zip", "pdf"))
+        return self._page(f"Putusan {code} Nomor {nomor}", f"""<div class="row"><div class="col-md-9"><div class="tab-container">
+<div class="tab-content clearfix" id="tabs-1"><div id="popular-post-list-sidebar">
+<h2>Putusan {code} Nomor {nomor}<br/><span id="title_pihak">Penuntut Umum:<br>PENUNTUT {n}<br>Terdakwa:<br>TERDAKWA {n}</span></h2>
+<table class="table"><tbody>{table}</tbody></table></div></div></div></div>
+<div class="col-md-3 sidebar"><div class="card"><div class="card-header"><div class="togglet"><i class="toggle-closed icon-ok-circle"></i>Lampiran</div></div>
+<div class="card-body"><ul class="portfolio-meta nobottommargin">{files}</ul></div></div></div></div>""")
+
+    def _render_pdf(self, id, page=1):
+        return self.dataset.pdf(id) if self.dataset.parse_decision_id(id) else None
+
+    def _render_zip(self, id, page=1):
+        return b"PK\x05\x06" + b"\x00" * 18 if self.dataset.parse_decision_id(id) else None
+
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, so client connection pooling behaves as against the real site
+    disable_nagle_algorithm = True # headers and body go out as separate writes; avoid the delayed-ACK stall
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        mock = self.server.mock
+        page_type, status, headers, body = mock.respond(parsed.path, parse_qs(parsed.query))
+        # Open-ended byte ranges ("bytes=N-") on PDFs, as a resuming downloader sends them
+        if status == 200 and page_type == "pdf" and (byte_range := re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))):
+            start = int(byte_range.group(1))
+            if start >= len(body): status, headers, body = 416, {"Content-Range": f"bytes */{len(body)}"}, b""
+            else: status, headers, body = 206, {**headers, "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"}, body[start:]
+        self.send_response(status)
+        for name, value in headers.items(): self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if page_type != "stats": mock._record(page_type, status, len(body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for putusan3.mahkamahagung.go.id (point main.py --site-root at it)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--courts", type=int, default=3)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--categories", type=int, default=2)
+    parser.add_argument("--classifications", type=int, default=2)
+    parser.add_argument("--decisions", type=int, default=30, help="Average decisions per classification")
+    parser.add_argument("--month-links", action="store_true", help="Link the month card to month-filtered listings")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, uniform in [0, JITTER] seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--throttle-every", type=int, default=0, help="Start a burst of 429s every N requests")
+    parser.add_argument("--throttle-burst", type=int, default=0, help="Length of each 429 burst")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+    dataset = MockDataset(courts=args.courts, years=args.years, categories=args.categories, classifications=args.classifications,
+                          decisions=args.decisions, month_links=args.month_links)
+    server = MockPutusanServer(dataset, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                               error_status=args.error_status, throttle_every=args.throttle_every, throttle_burst=args.throttle_burst,
+                               retry_after=args.retry_after)
+    try: server.serve_forever()
+    except KeyboardInterrupt: server.httpd.server_close()
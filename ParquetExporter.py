@@ -0,0 +1,178 @@
+import datetime
+import glob
+import os
+import re
+import threading
+
+from rich.console import Console
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # optional: pip install pyarrow
+    pa = pq = None
+
+TEXT_FIELDS = ("nomor", "tingkat_proses", "kata_kunci", "lembaga_peradilan", "lembaga_peradilan_link", "jenis_lembaga_peradilan",
+               "hakim_ketua", "hakim_anggota", "panitera", "amar", "amar_lainnya", "catatan_amar", "kaidah", "abstrak",
+               "title_full", "parties_raw", "download_link_zip", "download_link_pdf",
+               "_source_decision_list_url", "_source_decision_detail_url")
+DATE_FIELDS = ("tanggal_register", "tanggal_musyawarah", "tanggal_dibacakan")
+INT_FIELDS = ("tahun", "_source_year")
+DICTIONARY_FIELDS = ("_source_court_name", "_source_court_code", "_source_category", "_source_classification", "_source_month")
+PARTITION_COLUMNS = {"court": (("court", "_source_court_code"),),
+                     "court_year": (("court", "_source_court_code"), ("year", "_source_year"))}
+ID_MONTHS = {m: i for i, m in enumerate(("januari", "februari", "maret", "april", "mei", "juni", "juli", "agustus",
+                                        "september", "oktober", "november", "desember"), 1)}
+DMY_RE = re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})$')
+LONG_DATE_RE = re.compile(r'(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})$')
+
+
+def decision_schema():
+    # Fixed schema of get_decision_detail() fields plus the _source_* provenance added by the crawlers
+    if pa is None: raise ValueError("Parquet export needs the optional 'pyarrow' package")
+    court_dict = pa.dictionary(pa.int32(), pa.string())
+    fields = [pa.field(name, pa.string()) for name in TEXT_FIELDS]
+    fields += [pa.field("klasifikasi", pa.list_(pa.string()))]
+    fields += [pa.field(name, pa.date32()) for name in DATE_FIELDS]
+    fields += [pa.field(name, pa.int16()) for name in INT_FIELDS]
+    fields += [pa.field(name, court_dict) for name in DICTIONARY_FIELDS]
+    fields += [pa.field("_scrape_timestamp", pa.timestamp("s", tz="UTC"))]
+    return pa.schema(fields)
+
+
+def parse_date(text):
+    # "07-03-2024" (listing pages) or "7 Maret 2024" (detail pages) -> date; anything else -> None
+    if not text: return None
+    text = text.strip()
+    try:
+        if m := DMY_RE.match(text): return datetime.date(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+        if (m := LONG_DATE_RE.match(text)) and (month := ID_MONTHS.get(m.group(2).lower())):
+            return datetime.date(int(m.group(3)), month, int(m.group(1)))
+    except ValueError: pass
+    return None
+
+
+def parse_int(value):
+    if isinstance(value, int): return value
+    return int(value) if isinstance(value, str) and value.strip().isdigit() else None
+
+
+def parse_timestamp(text):
+    try: return datetime.datetime.strptime(text, "%Y-%m-%d %H:%M:%S UTC").replace(tzinfo=datetime.timezone.utc) if text else None
+    except ValueError: return None
+
+
+def to_row(record):
+    # One decision dict -> a row matching decision_schema() (unknown keys are dropped)
+    row = {name: record.get(name) for name in TEXT_FIELDS + DICTIONARY_FIELDS}
+    klasifikasi = record.get("klasifikasi")
+    row["klasifikasi"] = [klasifikasi] if isinstance(klasifikasi, str) else klasifikasi
+    for name in DATE_FIELDS: row[name] = parse_date(record.get(name))
+    for name in INT_FIELDS: row[name] = parse_int(record.get(name))
+    row["_scrape_timestamp"] = parse_timestamp(record.get("_scrape_timestamp"))
+    return row
+
+
+class ParquetExporter:
+    # Writes decisions as Parquet under out_dir, hive-partitioned (court=<code>/year=<year>/) so a
+    # query on one court/year only opens that directory. Rows are buffered per partition and written
+    # one row group of `row_group_size` rows at a time. Files are written as .part-NNNNN.parquet and
+    # renamed to part-NNNNN.parquet once their footer is written, so readers (which skip dot-files)
+    # never see a half-written file; a file left open by a killed process is discarded on the next
+    # open. JSONL output stays the source of truth: export_parquet() rebuilds the dataset from it.
+    #
+    # Used either streaming (as JsonlSink's mirror, receiving each newly written record) or as a
+    # batch conversion via export_parquet().
+
+    def __init__(self, out_dir, partition_by="court_year", row_group_size=50_000, compression="zstd", max_open=32, console=None):
+        self.schema = decision_schema()
+        if partition_by and partition_by not in PARTITION_COLUMNS: raise ValueError(f"Unknown partitioning '{partition_by}' (expected {', '.join(PARTITION_COLUMNS)})")
+        self.out_dir = out_dir
+        self.partition_columns = PARTITION_COLUMNS[partition_by] if partition_by else ()
+        self.row_group_size = max(1, row_group_size)
+        self.compression = compression
+        self.max_open = max_open
+        self.console = console or Console()
+        self.stats = {"rows": 0, "row_groups": 0, "files": 0}
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._writers = {}
+        self._closed = False
+        os.makedirs(out_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(glob.escape(out_dir), "**", ".part-*.parquet"), recursive=True): os.remove(stale)
+
+    def _partition(self, row):
+        return tuple((name, "unknown" if row[column] is None else re.sub(r'[\\/*?:"<>|= ]', "_", str(row[column])))
+                     for name, column in self.partition_columns)
+
+    def _writer(self, partition):
+        writer = self._writers.pop(partition, None)
+        if writer is None:
+            if len(self._writers) >= self.max_open: self._close_writer(next(iter(self._writers)))
+            directory = os.path.join(self.out_dir, *(f"{name}={value}" for name, value in partition))
+            os.makedirs(directory, exist_ok=True)
+            seq = 1 + max((int(m.group(1)) for p in os.listdir(directory) if (m := re.fullmatch(r'\.?part-(\d+)\.parquet', p))), default=0)
+            path = os.path.join(directory, f".part-{seq:05d}.parquet")
+            writer = (pq.ParquetWriter(path, self.schema, compression=self.compression), path)
+        self._writers[partition] = writer # Most recently used last
+        return writer
+
+    def _close_writer(self, partition):
+        writer, path = self._writers.pop(partition)
+        writer.close()
+        os.replace(path, os.path.join(os.path.dirname(path), os.path.basename(path)[1:]))
+        self.stats["files"] += 1
+
+    def write(self, record):
+        with self._lock:
+            if self._closed: raise ValueError("write to a closed ParquetExporter")
+            row = to_row(record)
+            partition = self._partition(row)
+            rows = self._buffers.setdefault(partition, [])
+            rows.append(row)
+            if len(rows) >= self.row_group_size: self._write_rows(partition)
+
+    def write_many(self, records):
+        for record in records: self.write(record)
+
+    def _write_rows(self, partition):
+        rows = self._buffers.pop(partition, None)
+        if not rows: return
+        self._writer(partition)[0].write_table(pa.Table.from_pylist(rows, schema=self.schema), row_group_size=self.row_group_size)
+        self.stats["rows"] += len(rows); self.stats["row_groups"] += 1
+
+    def flush(self):
+        with self._lock:
+            for partition in list(self._buffers): self._write_rows(partition)
+
+    def close(self):
+        with self._lock:
+            if self._closed: return
+            for partition in list(self._buffers): self._write_rows(partition)
+            for partition in list(self._writers): self._close_writer(partition)
+            self._closed = True
+
+    def describe(self):
+        s = self.stats
+        return f"{s['rows']} rows in {s['row_groups']} row groups, {s['files']} Parquet files under {self.out_dir}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_parquet(records, out_dir, key="_source_decision_detail_url", replace=True, **kwargs):
+    # Batch conversion (e.g. of JsonlSink.iter_output(path)); repeated `key` values are exported once.
+    # replace: drop the Parquet files of an earlier export/stream first, so the dataset is rebuilt
+    if replace:
+        for old in glob.glob(os.path.join(glob.escape(out_dir), "**", "part-*.parquet"), recursive=True): os.remove(old)
+    seen = set()
+    with ParquetExporter(out_dir, **kwargs) as exporter:
+        for record in records:
+            if key and (value := record.get(key)) is not None:
+                if value in seen: continue
+                seen.add(value)
+            exporter.write(record)
+    return exporter
@@ -0,0 +1,474 @@
+import re
+
+import lxml.html
+from bs4 import BeautifulSoup, Tag, NavigableString
+from lxml import etree
+from rich.console import Console
+
+DETAIL_LABEL_MAP = {
+    "nomor": "nomor", "tingkat proses": "tingkat_proses", "klasifikasi": "klasifikasi",
+    "kata kunci": "kata_kunci", "tahun": "tahun", "tanggal register": "tanggal_register",
+    "lembaga peradilan": "lembaga_peradilan", "jenis lembaga peradilan": "jenis_lembaga_peradilan",
+    "hakim ketua": "hakim_ketua", "hakim anggota": "hakim_anggota", "panitera": "panitera",
+    "amar": "amar", "amar lainnya": "amar_lainnya", "catatan amar": "catatan_amar",
+    "tanggal musyawarah": "tanggal_musyawarah", "tanggal dibacakan": "tanggal_dibacakan",
+    "kaidah": "kaidah", "abstrak": "abstrak"
+}
+COURT_COUNT_RE = re.compile(r'([\d,.]+)\s*/\s*([\d,.]+)')
+REGISTER_RE = re.compile(r'Register\s*:\s*(\d{2}-\d{2}-\d{4})')
+PUTUS_RE = re.compile(r'Putus\s*:\s*(\d{2}-\d{2}-\d{4})')
+UPLOAD_RE = re.compile(r'Upload\s*:\s*(\d{2}-\d{2}-\d{4})')
+
+
+class ParserBackend:
+    # Extractors take raw HTML and return plain dicts/lists; fetching stays in MahkamahAgungScraper.
+    name = None
+
+    def __init__(self, console=None):
+        self.console = console or Console()
+
+    def parse_listing_page(self, html):
+        if not html: return None
+        doc = self.document(html)
+        return {"months": self._monthly_decision_counts(doc), "last_page": self._last_page(doc),
+                "decisions": self._decision_list(doc)}
+
+    def parse_last_page(self, html):
+        return self._last_page(self.document(html)) if html else None
+
+    def parse_list_courts(self, html):
+        return self._list_courts(self.document(html)) if html else []
+
+    def parse_court_yearly_decisions(self, html):
+        return self._court_yearly_decisions(self.document(html)) if html else []
+
+    def parse_decision_categories(self, html):
+        return self._decision_categories(self.document(html)) if html else []
+
+    def parse_decision_classifications(self, html):
+        return self._decision_classifications(self.document(html)) if html else []
+
+    def parse_monthly_decision_counts(self, html):
+        return self._monthly_decision_counts(self.document(html)) if html else []
+
+    def parse_decision_list(self, html):
+        return self._decision_list(self.document(html)) if html else []
+
+    def parse_decision_detail(self, html, url=None):
+        return self._decision_detail(self.document(html), url) if html else None
+
+    @staticmethod
+    def _court_counts(text):
+        jumlah_putusan, jumlah_publikasi = None, None
+        match = COURT_COUNT_RE.match(text)
+        if match:
+            try:
+                ps = re.sub(r'\D', '', match.group(1))
+                pubs = re.sub(r'\D', '', match.group(2))
+                if ps: jumlah_putusan = int(ps)
+                if pubs: jumlah_publikasi = int(pubs)
+            except ValueError: pass
+        return jumlah_putusan, jumlah_publikasi
+
+
+class BeautifulSoupBackend(ParserBackend):
+    # Reference implementation (the original extractors); other backends must match it exactly.
+    name = "bs4"
+
+    def document(self, html):
+        return BeautifulSoup(html, 'lxml')
+
+    @staticmethod
+    def _card(soup, header_text):
+        # Same as 'div.card:has(> div.card-header :-soup-contains("...")' (soupsieve 3 rejects complex selectors in :has)
+        return next((card for card in soup.select('div.card')
+                     if any(header.select_one(f':-soup-contains("{header_text}")') for header in card.select(':scope > div.card-header'))), None)
+
+    def _last_page(self, soup):
+        pages = [int(a['data-ci-pagination-page'])
+                 for a in soup.select('ul.pagination a[data-ci-pagination-page]')
+                 if a.get('data-ci-pagination-page', '').isdigit()]
+        return max(pages) if pages else 1
+
+    def _list_courts(self, soup):
+        court_data = []
+        for row in soup.select('table.table-responsive.table-striped tbody tr'):
+            cells = row.select('td')
+            if len(cells) != 4: continue
+            nama_tag = cells[0].select_one('a')
+            tinggi_tag = cells[1].select_one('a')
+            if not nama_tag or not tinggi_tag: continue
+            jumlah_putusan, jumlah_publikasi = self._court_counts(cells[3].text.strip())
+            court_data.append({
+                "nama_pengadilan": nama_tag.text.strip(),
+                "link_pengadilan": nama_tag.get('href'),
+                "pengadilan_tinggi": tinggi_tag.text.strip(),
+                "link_pengadilan_tinggi": tinggi_tag.get('href'),
+                "provinsi": cells[2].text.strip(),
+                "jumlah_putusan": jumlah_putusan,
+                "jumlah_publikasi": jumlah_publikasi,
+            })
+        return court_data
+
+    def _court_yearly_decisions(self, soup):
+        tbody = soup.select_one('table.table-striped tbody')
+        if not tbody: return []
+        return [
+            {
+                "year": links[0].text.strip(),
+                "decision_count": int(c) if (c := re.sub(r'[.,]', '', links[1].text.strip())).isdigit() else 0,
+                "link": links[0].get('href')
+            }
+            for row in tbody.select('tr')
+            if (links := row.select('td > a[href]')) and len(links) == 2 and links[0].text.strip().isdigit()
+        ]
+
+    def _decision_categories(self, soup):
+        card = self._card(soup, "Direktori")
+        if not card: return []
+        return [
+            {"category": name, "link": tag.get('href')}
+            for tag in card.select('div.card-body a[href][style*="color:black"]')
+            if (name := next(tag.stripped_strings, None)) and name.lower() != "semua direktori"
+        ]
+
+    def _decision_classifications(self, soup):
+        card = self._card(soup, "Klasifikasi")
+        if not card: return []
+        return [
+            {"classification": name, "link": tag.get('href')}
+            for tag in card.select('div.card-body a[href]')
+            if (name := next(tag.stripped_strings, None))
+        ]
+
+    def _monthly_decision_counts(self, soup):
+        card = self._card(soup, "Bulan")
+        if not card: return []
+        return [
+            {"month": month_text, "count": int(count_text),
+             "link": link_tag.get('href') if (link_tag := p_tag.find_parent('a', href=True) or p_tag.find('a', href=True)) else None}
+            for p_tag in card.select('div.card-body div.form-check p.card-text')
+            if (span := p_tag.find('span', class_='badge'))
+            and (count_text := span.text.strip()).isdigit()
+            and (prev_node := span.find_previous(string=True))
+            and (month_text := prev_node.strip())
+        ]
+
+    def _decision_list(self, soup):
+        container = soup.select_one('#popular-post-list-sidebar')
+        if not container: return []
+        return [
+            {
+                 "breadcrumbs": [a.text.strip() for a in entry_c.select('div.small:first-of-type a')] if entry_c.select_one('div.small:first-of-type') else [],
+                 "register_date": (m.group(1) if (m := REGISTER_RE.search(date_text)) else None),
+                 "putus_date": (m.group(1) if (m := PUTUS_RE.search(date_text)) else None),
+                 "upload_date": (m.group(1) if (m := UPLOAD_RE.search(date_text)) else None),
+                 "title": title,
+                 "link": title_tag.get('href'),
+                 "description_parties": "\n".join(
+                     txt.strip() for txt in (
+                         (node.strip() if isinstance(node, NavigableString) else ('\n' if node.name == 'br' else node.get_text(strip=True)))
+                         for node in last_div.contents
+                         if not (isinstance(node, Tag) and node.find(lambda tag: tag.name == 'i' and ('icon-eye' in tag.get('class', []) or 'icon-download' in tag.get('class', []))))
+                     ) if txt
+                 ).strip() if last_div else '',
+                 "view_count": (int(vt) if last_div and (vs := last_div.select_one('i.icon-eye + strong')) and (vt := vs.text.strip()).isdigit() else 0),
+                 "download_count": (int(dt) if last_div and (ds := last_div.select_one('i.icon-download + strong')) and (dt := ds.text.strip()).isdigit() else 0),
+             }
+            for entry in container.select('div.spost.clearfix')
+            if (entry_c := entry.select_one('div.entry-c'))
+            and not entry_c.select_one('div.small:-soup-contains("Data Tidak Ditemukan")')
+            and (title_tag := entry_c.select_one('strong > a[href]'))
+            and (title := title_tag.text.strip())
+            and (date_text := (d.text if (d := entry_c.select_one('div.small:nth-of-type(2)')) else '')) is not None
+            and (last_div := entry_c.select_one('div:last-of-type')) is not None
+        ]
+
+    def _decision_detail(self, soup, url=None):
+        details = {}
+        metadata_container = soup.select_one('#tabs-1 #popular-post-list-sidebar')
+        if not metadata_container:
+            self.console.log("[yellow]Metadata container '#tabs-1 #popular-post-list-sidebar' not found.")
+            return None
+
+        title_h2 = metadata_container.find('h2')
+        if title_h2:
+            details['title_full'] = title_h2.get_text(separator='\n', strip=True)
+            parties_span = title_h2.find('span', id='title_pihak')
+            details['parties_raw'] = parties_span.get_text(separator='\n', strip=True) if parties_span else None
+        else:
+             self.console.log("[yellow]Title H2 not found near metadata.")
+             details['title_full'] = None
+             details['parties_raw'] = None
+
+        table = metadata_container.find('table', class_='table')
+        if table:
+            for row in table.select('tbody > tr'):
+                cells = row.find_all('td', recursive=False)
+                if len(cells) == 2:
+                    label_td, value_td = cells
+                    label_text = label_td.text.strip().lower()
+                    dict_key = DETAIL_LABEL_MAP.get(label_text)
+                    if dict_key:
+                        try:
+                            if dict_key == "klasifikasi": details[dict_key] = [a.text.strip() for a in value_td.find_all('a')]
+                            elif dict_key == "lembaga_peradilan":
+                                link_tag = value_td.find('a')
+                                details[dict_key] = link_tag.text.strip() if link_tag else value_td.text.strip()
+                                details["lembaga_peradilan_link"] = link_tag['href'] if link_tag else None
+                            elif dict_key in ["catatan_amar", "abstrak"]: details[dict_key] = value_td.get_text(separator='\n' if dict_key == "catatan_amar" else '', strip=True)
+                            else: value = value_td.text.strip(); details[dict_key] = value if value != '—' else None
+                        except Exception as e:
+                             self.console.log(f"[red]Error parsing metadata row '{label_text}': {e}")
+                             details[dict_key] = None
+        elif not details.get('title_full'):
+             self.console.log("[yellow]Metadata table not found and no title fallback available.")
+             return None
+        else:
+            self.console.log("[yellow]Metadata table not found within container, using only H2 data if found.")
+
+        details['download_link_zip'] = None
+        details['download_link_pdf'] = None
+        if lampiran_card := next((card for card in soup.select('div.card') if card.select_one('div.card-header div.togglet:-soup-contains("Lampiran")')), None):
+            if zip_link_tag := lampiran_card.select_one('ul.portfolio-meta a[href*="/zip/"]'): details['download_link_zip'] = zip_link_tag.get('href')
+            if pdf_link_tag := lampiran_card.select_one('ul.portfolio-meta a[href*="/pdf/"]'): details['download_link_pdf'] = pdf_link_tag.get('href')
+        return details
+
+
+# --- lxml / XPath backend ---
+SKIP_TEXT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp')) # strings bs4's get_text() leaves out
+
+
+def _cls(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first(nodes):
+    return nodes[0] if nodes else None
+
+
+def _strings(el, top=True):
+    # Same strings as bs4 Tag._all_strings(): text nodes only, no comments, nothing inside script/style.
+    if el.text and (top or el.tag not in SKIP_TEXT_TAGS): yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in SKIP_TEXT_TAGS: yield from _strings(child, False)
+        if child.tail: yield child.tail
+
+
+def _text(el):
+    return ''.join(_strings(el))
+
+
+def _stripped(el):
+    return (s for s in (t.strip() for t in _strings(el)) if s)
+
+
+_X = etree.XPath
+X_PAGINATION = _X(f"//ul[{_cls('pagination')}]//a[@data-ci-pagination-page]")
+X_COURT_ROWS = _X(f"//table[{_cls('table-responsive')}][{_cls('table-striped')}]//tbody//tr")
+X_DESC_TD = _X(".//td")
+X_DESC_A = _X(".//a")
+X_YEARLY_TBODY = _X(f"//table[{_cls('table-striped')}]//tbody")
+X_DESC_TR = _X(".//tr")
+X_TD_CHILD_A = _X(".//td/a[@href]")
+X_CARD_BY_HEADER = _X(f"//div[{_cls('card')}][div[{_cls('card-header')}]//*[contains(., $text)]]")
+X_CATEGORY_LINKS = _X(f".//div[{_cls('card-body')}]//a[@href][contains(@style, 'color:black')]")
+X_CARD_LINKS = _X(f".//div[{_cls('card-body')}]//a[@href]")
+X_MONTH_ROWS = _X(f".//div[{_cls('card-body')}]//div[{_cls('form-check')}]//p[{_cls('card-text')}]")
+X_BADGE = _X(f".//span[{_cls('badge')}]")
+X_PREVIOUS_STRING = _X("preceding::node()[self::text() or self::comment()][1]")
+X_ANCESTOR_LINK = _X("ancestor::a[@href][1]")
+X_DESC_LINK = _X(".//a[@href]")
+X_POST_CONTAINER = _X("//*[@id='popular-post-list-sidebar']")
+X_POSTS = _X(f".//div[{_cls('spost')}][{_cls('clearfix')}]")
+X_ENTRY_C = _X(f".//div[{_cls('entry-c')}]")
+X_NOT_FOUND = _X(f".//div[{_cls('small')}][contains(., 'Data Tidak Ditemukan')]")
+X_TITLE_LINK = _X(".//strong/a[@href]")
+X_DATE_DIV = _X(f".//div[{_cls('small')}][count(preceding-sibling::div) = 1]")
+X_LAST_DIV = _X(".//div[not(following-sibling::div)]")
+X_FIRST_SMALL = _X(f".//div[{_cls('small')}][not(preceding-sibling::div)]")
+X_BREADCRUMBS = _X(f".//div[{_cls('small')}][not(preceding-sibling::div)]//a")
+X_COUNTER_ICON = _X(f".//i[{_cls('icon-eye')} or {_cls('icon-download')}]")
+X_VIEW_COUNT = _X(f".//i[{_cls('icon-eye')}]/following-sibling::*[1][self::strong]")
+X_DOWNLOAD_COUNT = _X(f".//i[{_cls('icon-download')}]/following-sibling::*[1][self::strong]")
+X_METADATA = _X("//*[@id='tabs-1']//*[@id='popular-post-list-sidebar']")
+X_H2 = _X(".//h2")
+X_PARTIES = _X(".//span[@id='title_pihak']")
+X_TABLE = _X(f".//table[{_cls('table')}]")
+X_TABLE_ROWS = _X(".//tbody/tr")
+X_CHILD_TD = _X("./td")
+X_LAMPIRAN = _X(f"//div[{_cls('card')}][.//div[{_cls('card-header')}]//div[{_cls('togglet')}][contains(., 'Lampiran')]]")
+X_ZIP = _X(f".//ul[{_cls('portfolio-meta')}]//a[contains(@href, '/zip/')]")
+X_PDF = _X(f".//ul[{_cls('portfolio-meta')}]//a[contains(@href, '/pdf/')]")
+
+
+class LxmlBackend(ParserBackend):
+    # Native lxml tree + precompiled XPath; output is identical to BeautifulSoupBackend.
+    name = "lxml"
+
+    def document(self, html):
+        try: return lxml.html.document_fromstring(html)
+        except ValueError: # str input carrying an XML encoding declaration
+            return lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+        except etree.ParserError: return None
+
+    def _last_page(self, doc):
+        if doc is None: return 1
+        pages = [int(a.get('data-ci-pagination-page')) for a in X_PAGINATION(doc)
+                 if a.get('data-ci-pagination-page', '').isdigit()]
+        return max(pages) if pages else 1
+
+    def _list_courts(self, doc):
+        if doc is None: return []
+        court_data = []
+        for row in X_COURT_ROWS(doc):
+            cells = X_DESC_TD(row)
+            if len(cells) != 4: continue
+            nama_tag = _first(X_DESC_A(cells[0]))
+            tinggi_tag = _first(X_DESC_A(cells[1]))
+            if nama_tag is None or tinggi_tag is None: continue
+            jumlah_putusan, jumlah_publikasi = self._court_counts(_text(cells[3]).strip())
+            court_data.append({
+                "nama_pengadilan": _text(nama_tag).strip(),
+                "link_pengadilan": nama_tag.get('href'),
+                "pengadilan_tinggi": _text(tinggi_tag).strip(),
+                "link_pengadilan_tinggi": tinggi_tag.get('href'),
+                "provinsi": _text(cells[2]).strip(),
+                "jumlah_putusan": jumlah_putusan,
+                "jumlah_publikasi": jumlah_publikasi,
+            })
+        return court_data
+
+    def _court_yearly_decisions(self, doc):
+        if doc is None or (tbody := _first(X_YEARLY_TBODY(doc))) is None: return []
+        results = []
+        for row in X_DESC_TR(tbody):
+            links = X_TD_CHILD_A(row)
+            if len(links) != 2 or not (year := _text(links[0]).strip()).isdigit(): continue
+            count = re.sub(r'[.,]', '', _text(links[1]).strip())
+            results.append({"year": year, "decision_count": int(count) if count.isdigit() else 0, "link": links[0].get('href')})
+        return results
+
+    def _card(self, doc, header_text):
+        return _first(X_CARD_BY_HEADER(doc, text=header_text)) if doc is not None else None
+
+    def _decision_categories(self, doc):
+        if (card := self._card(doc, "Direktori")) is None: return []
+        return [
+            {"category": name, "link": tag.get('href')}
+            for tag in X_CATEGORY_LINKS(card)
+            if (name := next(_stripped(tag), None)) and name.lower() != "semua direktori"
+        ]
+
+    def _decision_classifications(self, doc):
+        if (card := self._card(doc, "Klasifikasi")) is None: return []
+        return [
+            {"classification": name, "link": tag.get('href')}
+            for tag in X_CARD_LINKS(card)
+            if (name := next(_stripped(tag), None))
+        ]
+
+    def _monthly_decision_counts(self, doc):
+        if (card := self._card(doc, "Bulan")) is None: return []
+        results = []
+        for p_tag in X_MONTH_ROWS(card):
+            if (span := _first(X_BADGE(p_tag))) is None or not (count_text := _text(span).strip()).isdigit(): continue
+            if (prev_node := _first(X_PREVIOUS_STRING(span))) is None: continue
+            prev_text = (prev_node.text or '') if isinstance(prev_node, etree._Comment) else str(prev_node)
+            if not (month_text := prev_text.strip()): continue
+            link_tag = _first(X_ANCESTOR_LINK(p_tag))
+            if link_tag is None: link_tag = _first(X_DESC_LINK(p_tag))
+            results.append({"month": month_text, "count": int(count_text),
+                            "link": link_tag.get('href') if link_tag is not None else None})
+        return results
+
+    @staticmethod
+    def _description_parties(last_div):
+        parts = [last_div.text.strip()] if last_div.text else []
+        for node in last_div:
+            if isinstance(node, etree._Comment): parts.append((node.text or '').strip())
+            elif isinstance(node.tag, str) and not X_COUNTER_ICON(node):
+                parts.append('\n' if node.tag == 'br' else ''.join(_stripped(node)))
+            if node.tail: parts.append(node.tail.strip())
+        return "\n".join(txt.strip() for txt in parts if txt).strip()
+
+    @staticmethod
+    def _counter(last_div, xpath):
+        strong = _first(xpath(last_div))
+        return int(text) if strong is not None and (text := _text(strong).strip()).isdigit() else 0
+
+    def _decision_list(self, doc):
+        if doc is None or (container := _first(X_POST_CONTAINER(doc))) is None: return []
+        results = []
+        for entry in X_POSTS(container):
+            if (entry_c := _first(X_ENTRY_C(entry))) is None or X_NOT_FOUND(entry_c): continue
+            if (title_tag := _first(X_TITLE_LINK(entry_c))) is None or not (title := _text(title_tag).strip()): continue
+            date_text = _text(d) if (d := _first(X_DATE_DIV(entry_c))) is not None else ''
+            if (last_div := _first(X_LAST_DIV(entry_c))) is None: continue
+            results.append({
+                "breadcrumbs": [_text(a).strip() for a in X_BREADCRUMBS(entry_c)] if X_FIRST_SMALL(entry_c) else [],
+                "register_date": (m.group(1) if (m := REGISTER_RE.search(date_text)) else None),
+                "putus_date": (m.group(1) if (m := PUTUS_RE.search(date_text)) else None),
+                "upload_date": (m.group(1) if (m := UPLOAD_RE.search(date_text)) else None),
+                "title": title,
+                "link": title_tag.get('href'),
+                "description_parties": self._description_parties(last_div),
+                "view_count": self._counter(last_div, X_VIEW_COUNT),
+                "download_count": self._counter(last_div, X_DOWNLOAD_COUNT),
+            })
+        return results
+
+    def _decision_detail(self, doc, url=None):
+        details = {}
+        if doc is None or (metadata_container := _first(X_METADATA(doc))) is None:
+            self.console.log("[yellow]Metadata container '#tabs-1 #popular-post-list-sidebar' not found.")
+            return None
+
+        if (title_h2 := _first(X_H2(metadata_container))) is not None:
+            details['title_full'] = '\n'.join(_stripped(title_h2))
+            parties_span = _first(X_PARTIES(title_h2))
+            details['parties_raw'] = '\n'.join(_stripped(parties_span)) if parties_span is not None else None
+        else:
+            self.console.log("[yellow]Title H2 not found near metadata.")
+            details['title_full'] = None
+            details['parties_raw'] = None
+
+        if (table := _first(X_TABLE(metadata_container))) is not None:
+            for row in X_TABLE_ROWS(table):
+                cells = X_CHILD_TD(row)
+                if len(cells) != 2: continue
+                label_td, value_td = cells
+                label_text = _text(label_td).strip().lower()
+                if not (dict_key := DETAIL_LABEL_MAP.get(label_text)): continue
+                try:
+                    if dict_key == "klasifikasi": details[dict_key] = [_text(a).strip() for a in X_DESC_A(value_td)]
+                    elif dict_key == "lembaga_peradilan":
+                        link_tag = _first(X_DESC_A(value_td))
+                        details[dict_key] = _text(link_tag).strip() if link_tag is not None else _text(value_td).strip()
+                        details["lembaga_peradilan_link"] = link_tag.attrib['href'] if link_tag is not None else None
+                    elif dict_key in ["catatan_amar", "abstrak"]: details[dict_key] = ('\n' if dict_key == "catatan_amar" else '').join(_stripped(value_td))
+                    else: value = _text(value_td).strip(); details[dict_key] = value if value != '—' else None
+                except Exception as e:
+                    self.console.log(f"[red]Error parsing metadata row '{label_text}': {e}")
+                    details[dict_key] = None
+        elif not details.get('title_full'):
+            self.console.log("[yellow]Metadata table not found and no title fallback available.")
+            return None
+        else:
+            self.console.log("[yellow]Metadata table not found within container, using only H2 data if found.")
+
+        details['download_link_zip'] = None
+        details['download_link_pdf'] = None
+        if (lampiran_card := _first(X_LAMPIRAN(doc))) is not None:
+            if (zip_link_tag := _first(X_ZIP(lampiran_card))) is not None: details['download_link_zip'] = zip_link_tag.get('href')
+            if (pdf_link_tag := _first(X_PDF(lampiran_card))) is not None: details['download_link_pdf'] = pdf_link_tag.get('href')
+        return details
+
+
+PARSER_BACKENDS = {backend.name: backend for backend in (BeautifulSoupBackend, LxmlBackend)}
+
+
+def get_parser_backend(name="lxml", console=None):
+    if isinstance(name, ParserBackend): return name
+    if name not in PARSER_BACKENDS: raise ValueError(f"Unknown parser backend '{name}' (available: {', '.join(PARSER_BACKENDS)})")
+    return PARSER_BACKENDS[name](console=console)
@@ -0,0 +1,226 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from rich.console import Console
+
+from HttpTransport import HttpTransport
+from RateLimiter import TokenBucket
+from RetryPolicy import FetchError
+
+PDF_MAGIC = b"%PDF-"
+PDF_EOF = b"%%EOF"
+SIGNATURES = { # kind -> (leading magic, trailer, bytes from the end the trailer must appear in)
+    "pdf": (PDF_MAGIC, PDF_EOF, 1024),
+    "zip": (b"PK", b"PK\x05\x06", 22 + 65535), # End of central directory, after an archive comment of up to 64 KiB
+}
+RETRY_STATUSES = {408, 425, 429}
+
+
+class PdfDownloader:
+    # PDF download stage, decoupled from detail scraping: submit(url) queues a download on its own
+    # thread pool and returns a Future, so the crawl never waits on a transfer. Each download
+    # streams into `<name>.pdf.part`, resumes an existing .part with an HTTP Range request, and is
+    # renamed to its final name only after the size (Content-Length / Content-Range) and the %PDF-
+    # magic were verified, so a file under its final name is always complete. Request pacing goes
+    # through the shared AIMD limiter ("pdf" budget); `bandwidth` caps bytes/sec over all workers.
+    # With a retry_policy (the scraper's), network errors share its backoff, retry budget and circuit
+    # breaker, and PDFs given up on are dead-lettered; max_attempts then only covers corrupt files.
+    #
+    # Files land flat in output_dir by default. With a `store` (DocumentStore) they are staged in
+    # its tmp/ and moved into its content-addressed tree instead, and the "already downloaded?" check
+    # is an index lookup. ZIP archive URLs (download_link_zip; queued by callers when `archives` is
+    # set) go through the same pipeline, verified as ZIP files.
+
+    def __init__(self, output_dir, workers=4, bandwidth=None, rate_limiter=None, session=None, headers=None,
+                 timeout=90, max_attempts=3, retry_delay=5, chunk_size=64 * 1024, metrics=None, retry_policy=None, transport=None, on_downloaded=None,
+                 store=None, archives=False, console=None):
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.bandwidth = TokenBucket(bandwidth, burst=max(bandwidth, chunk_size)) if bandwidth else None
+        self.rate_limiter = rate_limiter
+        self.console = console or Console()
+        self.transport = None if session else (transport or HttpTransport("pdf", pool_maxsize=self.workers, console=self.console)) # Own pool, apart from HTML pages
+        self.session = session or self.transport.session
+        if headers: self.session.headers.update(headers)
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.chunk_size = chunk_size
+        self.metrics = metrics
+        self.retry_policy = retry_policy
+        self.on_downloaded = on_downloaded # Next pipeline stage, e.g. PdfTextExtractor.submit(path, url, decision_url); PDFs only
+        self.store = store
+        self.archives = archives
+        self.stats = {"queued": 0, "downloaded": 0, "resumed": 0, "skipped": 0, "failed": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._executor = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    @staticmethod
+    def kind_for(url):
+        # "zip" for the archive links (/download_file/<id>/zip/<id>), otherwise "pdf"
+        path = url.split('?')[0].lower()
+        return "zip" if "/zip/" in path or path.endswith('.zip') else "pdf"
+
+    @staticmethod
+    def filename_for(url):
+        ext = f".{PdfDownloader.kind_for(url)}"
+        parsed_path = url.split('/')[-1]; filename = f"{parsed_path}{ext}" if not parsed_path.lower().endswith(ext) else parsed_path
+        filename = re.sub(r'[\\/*?:"<>|]', "_", filename); max_len = 150
+        if len(filename) > max_len: name, ext = os.path.splitext(filename); filename = name[:max_len - len(ext)] + ext
+        return filename
+
+    def path_for(self, url):
+        # Download target (.part is appended while transferring): the final file, or the store's staging file
+        if self.store: return self.store.staging_path(url, self.kind_for(url))
+        return os.path.join(self.output_dir, self.filename_for(url))
+
+    def stored(self, url):
+        # Final path of a URL downloaded before, or None: an index lookup with a store, a file check otherwise
+        if self.store: return self.store.lookup(url)
+        path = self.path_for(url)
+        return path if self.is_complete(path, kind=self.kind_for(url)) else None
+
+    @staticmethod
+    def is_complete(path, expected_size=None, kind="pdf"):
+        # Magic bytes plus the expected size, or the trailer (%%EOF, ZIP end of central directory) when the size is unknown
+        magic, trailer, tail = SIGNATURES[kind]
+        try: size = os.path.getsize(path)
+        except OSError: return False
+        if expected_size is not None and size != expected_size: return False
+        with open(path, 'rb') as f:
+            if f.read(len(magic)) != magic: return False
+            if expected_size is not None: return True
+            f.seek(max(0, size - tail)); return trailer in f.read()
+
+    def _count(self, key, amount=1):
+        with self._lock: self.stats[key] += amount
+
+    # --- Single download ---
+    def download(self, url):
+        # Blocking; returns the final path, or None once the PDF could not be fetched
+        if not url: return None
+        if done := self.stored(url): self._count("skipped"); return done
+        path = self.path_for(url)
+        if self.store and not os.path.exists(f"{path}.part"): self.store.adopt_part(url, self.kind_for(url), idle=2 * self.timeout) # A live transfer writes at least once per read timeout
+        retry, attempt = self.retry_policy.begin(url, "pdf") if self.retry_policy else None, 0
+        while True:
+            attempt += 1
+            if retry: retry.before() # Blocks while the circuit breaker is open
+            try:
+                path = self._fetch(url, path)
+                if retry: retry.success()
+                return path
+            except (requests.exceptions.RequestException, ValueError, OSError) as e:
+                status = e.response.status_code if getattr(e, 'response', None) is not None else None
+                if status == 404: self.console.print(f"[yellow]PDF 404: {url}[/yellow]")
+                else: self.console.print(f"[red]Failed DL PDF from {url} (attempt {attempt}): {e}[/red]")
+                # Throttling responses are paced by the rate limiter (lowered rate + Retry-After pause)
+                paced = self.rate_limiter is not None and status in self.rate_limiter.THROTTLE_CODES
+                if retry and isinstance(e, requests.exceptions.RequestException): # Network errors go through the shared policy
+                    try: delay = retry.failure(status, e, paced)
+                    except FetchError: break
+                else: # Corrupt/short files and local I/O errors: a few local attempts
+                    if attempt >= self.max_attempts or not (status is None or status in RETRY_STATUSES or status >= 500): break
+                    delay = 0 if paced else self.retry_delay
+                if self.metrics: self.metrics.inc("http_retries_total", page_type="pdf")
+                if delay: time.sleep(delay)
+        self._count("failed")
+        return None
+
+    def _fetch(self, url, path):
+        part = f"{path}.part"
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if self.rate_limiter: self.rate_limiter.acquire('pdf')
+        started = time.monotonic()
+        try: response = self.session.get(url, stream=True, timeout=self.timeout, headers={"Range": f"bytes={offset}-"} if offset else None)
+        except requests.exceptions.RequestException as e:
+            if self.rate_limiter: self.rate_limiter.record('pdf', error=e, latency=time.monotonic() - started)
+            if self.metrics: self.metrics.record_request("pdf", "error", time.monotonic() - started)
+            raise
+        if self.rate_limiter: self.rate_limiter.record('pdf', status=response.status_code, latency=time.monotonic() - started, retry_after=response.headers.get('Retry-After'))
+        if self.metrics: self.metrics.record_request("pdf", response.status_code, time.monotonic() - started) # Bytes: stats["bytes"] (pdf_bytes_total)
+        with response:
+            if response.status_code == 416 and offset: return self._finish(url, part, path, None) # .part already holds the whole file
+            response.raise_for_status()
+            if response.status_code == 206:
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                expected, mode = (int(total) if total.isdigit() else None), 'ab'
+                self._count("resumed")
+            else: # Full body (no .part, or the server ignored Range)
+                length = response.headers.get('Content-Length')
+                expected, mode = (int(length) if length and length.isdigit() and not response.headers.get('Content-Encoding') else None), 'wb'
+            with open(part, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if self.bandwidth: self.bandwidth.acquire(len(chunk))
+                    f.write(chunk); self._count("bytes", len(chunk))
+        return self._finish(url, part, path, expected)
+
+    def _finish(self, url, part, path, expected_size):
+        kind = self.kind_for(url)
+        if not self.is_complete(part, expected_size, kind):
+            size = os.path.getsize(part)
+            # A short file is kept so the next attempt resumes it; anything else is not a file we can use
+            if expected_size is None or size > expected_size or not self.is_complete(part, size, kind): os.remove(part)
+            raise ValueError(f"incomplete or invalid {kind.upper()} ({size} bytes{f' of {expected_size}' if expected_size else ''})")
+        if self.store: path = self.store.put(url, part, kind)
+        else: os.replace(part, path)
+        self._count("downloaded")
+        self.console.log(f"[green]{kind.upper()} downloaded:[/green] {os.path.basename(path)}")
+        return path
+
+    # --- Queue ---
+    def submit(self, url, decision_url=None):
+        # Queues a download; the same URL already queued or running shares one Future
+        with self._lock:
+            if url in self._pending: return self._pending[url]
+            if self._executor is None: self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf")
+            future = self._pending[url] = self._executor.submit(self._download_then_next, url, decision_url)
+            self.stats["queued"] += 1
+        future.add_done_callback(lambda _: self._forget(url))
+        return future
+
+    def _download_then_next(self, url, decision_url):
+        path = self.download(url)
+        if path and self.on_downloaded and self.kind_for(url) == "pdf":
+            try: self.on_downloaded(path, url, decision_url)
+            except Exception as e: self.console.log(f"[yellow]PDF post-processing failed for {os.path.basename(path)}: {e}")
+        return path
+
+    def _forget(self, url):
+        with self._lock: self._pending.pop(url, None)
+
+    def backlog(self):
+        with self._lock: return len(self._pending)
+
+    def backfill(self, records, field="download_link_pdf"):
+        # Queues every PDF (and with `archives` every ZIP) referenced by already scraped records (e.g. JsonlSink.iter_output(path)) not downloaded yet
+        queued = 0
+        for record in records:
+            for url in (record.get(field), self.archives and record.get("download_link_zip")):
+                if url and not self.stored(url): self.submit(url, record.get('_source_decision_detail_url')); queued += 1
+        return queued
+
+    def close(self, wait=True, cancel=False):
+        with self._lock: executor, self._executor = self._executor, None
+        if executor: executor.shutdown(wait=wait, cancel_futures=cancel)
+        if wait and self.store: self.store.close() # Without waiting, running downloads may still put() into it
+
+    def snapshot(self):
+        with self._lock: return {**self.stats, "backlog": len(self._pending)}
+
+    def describe(self):
+        s = self.snapshot()
+        return (f"{s['downloaded']} downloaded ({s['resumed']} resumed, {s['bytes'] / 1e6:.1f} MB), {s['skipped']} already on disk, {s['failed']} failed, {s['backlog']} queued"
+                + (f"; {self.store.describe()}" if self.store else ""))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(wait=exc_type is None, cancel=exc_type is not None)
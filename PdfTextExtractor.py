@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from rich.console import Console
+
+from JsonlSink import JsonlSink
+from PdfDownloader import PdfDownloader
+
+try: import resource # Unix only: memory cap of the worker processes
+except ImportError: resource = None
+try: import pypdf
+except ImportError: # optional: pip install pypdf
+    pypdf = None
+
+PAGE_SEPARATOR = "\f" # Form feed between pages, like pdftotext
+
+
+def _limit_memory(memory_mb):
+    # Pool initializer: caps the address space of each worker, so a decompression bomb raises MemoryError there
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def extract_pdf_text(path, max_pages=None):
+    # (page count, text) of one PDF
+    if pypdf is None: raise ValueError("PDF text extraction needs the optional 'pypdf' package")
+    reader = pypdf.PdfReader(path)
+    pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+    return len(reader.pages), PAGE_SEPARATOR.join((page.extract_text() or "").strip() for page in pages)
+
+
+def _run_limited(extract, path, timeout=None, max_pages=None):
+    # Runs in a worker process; pypdf is pure Python, so a timer signal interrupts a pathological file
+    alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if alarm:
+        def expired(*_): raise TimeoutError(f"extraction took longer than {timeout}s")
+        signal.signal(signal.SIGALRM, expired); signal.setitimer(signal.ITIMER_REAL, timeout)
+    try: return extract(path, max_pages)
+    finally:
+        if alarm: signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class PdfTextExtractor:
+    # Text extraction stage after the PDF downloads: submit(path, pdf_url, decision_url) queues a PDF
+    # on a process pool (one worker per core by default) and a callback appends one JSONL record per
+    # decision of the PDF to `output_file` (decision_url, pdf_url, pdf_file, pdf_bytes, pages, chars,
+    # text, error), so the text sits next to the decision records and joins them on
+    # _source_decision_detail_url. A file shared by several decisions (one DocumentStore object) is
+    # extracted once and written for each of them.
+    #
+    # Pathological PDFs cannot stall or sink the stage: each extraction is interrupted after `timeout`
+    # seconds, workers run under a `memory_mb` address-space cap, and a worker killed outright (OOM
+    # killer, crash in a C extension) only costs a new pool; its PDFs are retried once and otherwise
+    # left for the next run. Files already in output_file (extracted or failed) are skipped, so
+    # extract_directory() can run incrementally over an existing PDF directory.
+
+    def __init__(self, output_file, workers=None, timeout=60.0, memory_mb=1024, max_pages=None, extract=extract_pdf_text, console=None):
+        if pypdf is None and extract is extract_pdf_text: raise ValueError("PDF text extraction needs the optional 'pypdf' package")
+        self.output_file = output_file
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_pages = max_pages
+        self.extract = extract # extract(path, max_pages) -> (pages, text); a top-level function, pickled to the workers
+        self.console = console or Console()
+        self.stats = {"queued": 0, "extracted": 0, "failed": 0, "skipped": 0, "crashed": 0, "pages": 0, "chars": 0}
+        self.sink = JsonlSink(output_file, flush_records=50, key=("pdf_file", "decision_url"), console=self.console)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = {} # pdf_file -> attempts
+        self._links = {} # pdf_file -> [(pdf_url, decision_url)] of a queued file
+        self._files = {name for name, _ in self.sink.keys} # Files with a text record (for submits that know no decision)
+        self._pool = None
+        self._closed = False
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_limit_memory, initargs=(self.memory_mb,))
+            return self._pool
+
+    # --- Queue ---
+    def submit(self, path, pdf_url=None, decision_url=None):
+        # Queues one downloaded PDF; matches PdfDownloader's on_downloaded(path, url, decision_url)
+        return self._submit(path, [(pdf_url, decision_url)])
+
+    def _submit(self, path, links):
+        # links: (pdf_url, decision_url) of every decision of the file; a file already queued only gains the new ones
+        name = os.path.basename(path)
+        with self._lock:
+            done = [link for link in links if (name, link[1]) in self.sink or (link[1] is None and name in self._files)]
+            links = [link for link in links if link not in done]
+            self.stats["skipped"] += bool(done and not links)
+            if not links: return False
+            if name in self._pending:
+                self._links[name].extend(link for link in links if link not in self._links[name]); return False
+            self._pending[name] = 0; self._links[name] = links; self.stats["queued"] += 1
+        self._start(path, name)
+        return True
+
+    def _start(self, path, name):
+        with self._lock: self._pending[name] += 1
+        pool = self._executor()
+        try: future = pool.submit(_run_limited, self.extract, path, self.timeout, self.max_pages)
+        except BrokenProcessPool: # Broke between _executor() and submit
+            self._replace(pool); return self._start(path, name)
+        future.add_done_callback(lambda f: self._done(f, pool, path, name))
+
+    def _replace(self, pool):
+        with self._lock:
+            if self._pool is pool: self._pool = None
+        pool.shutdown(wait=False)
+
+    def _done(self, future, pool, path, name):
+        if future.cancelled(): # close(wait=False): left for the next run
+            with self._lock: self._pending.pop(name, None); self._links.pop(name, None); self._idle.notify_all()
+            return
+        try: pages, text = future.result(); error = None
+        except BrokenProcessPool:
+            self._replace(pool)
+            with self._lock: attempts = self._pending[name]
+            if attempts < 2: return self._start(path, name)
+            self.console.log(f"[red]Text extraction worker died on {name}; left for the next run")
+            return self._finish(name, None, crashed=True)
+        except Exception as e: pages, text, error = None, None, f"{type(e).__name__}: {e}"
+        record = {"pdf_file": name, "pdf_bytes": os.path.getsize(path) if os.path.exists(path) else None,
+                  "pages": pages, "chars": len(text) if text is not None else None, "text": text, "error": error,
+                  "extracted_at": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())}
+        if error: self.console.log(f"[yellow]Text extraction failed for {name}: {error}")
+        self._finish(name, record)
+
+    def _finish(self, name, record, crashed=False):
+        with self._lock: links = self._links.pop(name, [])
+        if record is not None and not self._closed: # After close(wait=False) the PDF is left for the next run
+            for pdf_url, decision_url in links: self.sink.write({"decision_url": decision_url, "pdf_url": pdf_url, **record})
+            with self._lock: self._files.add(name)
+        with self._lock:
+            self._pending.pop(name, None)
+            if crashed: self.stats["crashed"] += 1
+            elif record["error"]: self.stats["failed"] += 1
+            else: self.stats["extracted"] += 1; self.stats["pages"] += record["pages"]; self.stats["chars"] += record["chars"]
+            self._idle.notify_all()
+
+    def backlog(self):
+        with self._lock: return len(self._pending)
+
+    def wait(self):
+        with self._lock:
+            while self._pending: self._idle.wait(0.5)
+
+    # --- Incremental run over a PDF directory ---
+    def extract_directory(self, pdf_dir, records=(), store=None):
+        # Queues every PDF in pdf_dir (or in a DocumentStore) not processed yet; records (decision JSONL) link files to their decision
+        links = {} # file name -> [(pdf_url, decision_url)]: decisions can share one stored file
+        for record in records:
+            if pdf_url := record.get('download_link_pdf'):
+                name = os.path.basename(store.lookup(pdf_url) or "") if store else PdfDownloader.filename_for(pdf_url)
+                if name: links.setdefault(name, []).append((pdf_url, record.get('_source_decision_detail_url')))
+        if store: paths = store.paths("pdf")
+        else: paths = [os.path.join(pdf_dir, name) for name in sorted(os.listdir(pdf_dir)) if name.lower().endswith('.pdf')] if os.path.isdir(pdf_dir) else []
+        return sum(self._submit(path, links.get(os.path.basename(path), [(None, None)])) for path in paths)
+
+    # --- Lifecycle ---
+    def close(self, wait=True):
+        if wait: self.wait()
+        with self._lock: pool, self._pool, self._closed = self._pool, None, True
+        if pool: pool.shutdown(wait=wait, cancel_futures=not wait)
+        self.sink.close()
+
+    def describe(self):
+        s = self.stats
+        return (f"{s['extracted']} PDFs extracted ({s['pages']} pages, {s['chars'] / 1e6:.1f}M chars), {s['failed']} failed, "
+                f"{s['crashed']} worker crashes, {s['skipped']} already done, {self.backlog()} queued -> {self.output_file}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,122 @@
+import threading
+import time
+
+from rich.console import Console
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        if rate <= 0: raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def reserve(self, tokens=1):
+        # Takes the token(s) now (possibly going into debt) and returns how long the caller must wait.
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0: time.sleep(wait)
+        return wait
+
+
+class AimdRateLimiter:
+    # One token bucket per traffic kind ("html", "pdf", ...). Successful fast responses raise the
+    # rate additively (~`increase` req/s per second of clean traffic); throttling codes, 5xx,
+    # transport errors and slow responses cut it multiplicatively, at most once per cooldown.
+    DEFAULT_BUDGETS = {
+        "html": {"rate": 2.0, "min_rate": 0.2, "max_rate": 10.0},
+        "pdf": {"rate": 1.0, "min_rate": 0.1, "max_rate": 4.0},
+    }
+    THROTTLE_CODES = {429, 503}
+
+    def __init__(self, budgets=None, increase=0.1, decrease=0.5, target_latency=3.0, cooldown=2.0,
+                 on_change=None, console=None):
+        self.budgets = {kind: {**cfg} for kind, cfg in (budgets or self.DEFAULT_BUDGETS).items()}
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.console = console or Console()
+        self.buckets = {kind: TokenBucket(cfg['rate'], cfg.get('burst')) for kind, cfg in self.budgets.items()}
+        self.stats = {kind: {"requests": 0, "throttled": 0, "errors": 0, "slow": 0, "latency_ewma": None} for kind in self.budgets}
+        self._last_decrease = {kind: 0.0 for kind in self.budgets}
+        self._lock = threading.Lock()
+
+    def _bucket(self, kind):
+        if kind not in self.buckets: raise ValueError(f"Unknown rate limit budget '{kind}'")
+        return self.buckets[kind]
+
+    def rate(self, kind="html"):
+        return self._bucket(kind).rate
+
+    def acquire(self, kind="html"):
+        return self._bucket(kind).acquire()
+
+    @staticmethod
+    def parse_retry_after(value):
+        if value is None: return None
+        try: return max(0.0, float(str(value).strip()))
+        except ValueError: return None
+
+    def record(self, kind="html", status=None, latency=None, error=None, retry_after=None):
+        bucket = self._bucket(kind); cfg = self.budgets[kind]
+        with self._lock:
+            stats = self.stats[kind]; stats["requests"] += 1
+            if latency is not None:
+                stats["latency_ewma"] = latency if stats["latency_ewma"] is None else 0.8 * stats["latency_ewma"] + 0.2 * latency
+            throttled = status in self.THROTTLE_CODES
+            failed = error is not None or (status is not None and status >= 500)
+            slow = latency is not None and latency > self.target_latency
+            if throttled: stats["throttled"] += 1
+            elif failed: stats["errors"] += 1
+            elif slow: stats["slow"] += 1
+            old_rate = bucket.rate
+            now = time.monotonic()
+            if throttled or failed or slow:
+                if now - self._last_decrease[kind] < self.cooldown: new_rate = old_rate
+                else:
+                    new_rate = max(cfg.get('min_rate', 0.1), old_rate * self.decrease)
+                    self._last_decrease[kind] = now
+            elif status is None or status < 400:
+                new_rate = min(cfg.get('max_rate', old_rate), old_rate + self.increase / max(old_rate, 1.0))
+            else: new_rate = old_rate # 4xx other than throttling says nothing about server load
+            if new_rate != old_rate: bucket.set_rate(new_rate)
+        if (pause := self.parse_retry_after(retry_after)) and throttled: bucket.pause(pause)
+        if new_rate != old_rate:
+            if new_rate < old_rate:
+                reason = f"HTTP {status}" if status else (type(error).__name__ if error else f"latency {latency:.1f}s")
+                self.console.log(f"[yellow]Rate limit '{kind}' lowered {old_rate:.2f} -> {new_rate:.2f} req/s ({reason})")
+            if self.on_change: self.on_change(kind, old_rate, new_rate)
+        return new_rate
+
+    def snapshot(self):
+        with self._lock:
+            return {kind: {"rate": round(self.buckets[kind].rate, 3), **{k: (round(v, 3) if isinstance(v, float) else v) for k, v in stats.items()}}
+                    for kind, stats in self.stats.items()}
+
+    def describe(self):
+        return " | ".join(f"{kind} {bucket.rate:.2f} req/s" for kind, bucket in self.buckets.items())
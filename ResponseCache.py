@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from rich.console import Console
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "last_modified", "stored_at", "page_type", "ttl")
+
+    def __init__(self, body, etag, last_modified, stored_at, page_type, ttl):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.page_type = page_type
+        self.ttl = ttl
+
+    @property
+    def fresh(self):
+        return self.ttl is not None and time.time() - self.stored_at < self.ttl
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag: headers['If-None-Match'] = self.etag
+        if self.last_modified: headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    # Persistent cache for _fetch_page: zlib-compressed bodies in a SQLite file, keyed by the
+    # normalized URL + params. Fresh entries (per page-type TTL) are served without a request,
+    # stale ones are revalidated with If-None-Match / If-Modified-Since. Least recently used
+    # entries are evicted once the compressed size exceeds max_bytes. Page types in `revalidate` are
+    # never served without asking the server (a delta crawl needs current counts, not cached ones).
+    DEFAULT_TTLS = { # seconds; None disables caching for that page type
+        "court_list": 7 * 86400,
+        "yearly": 86400,
+        "index": 86400,
+        "listing": 6 * 3600,
+        "detail": 30 * 86400,
+        "other": 3600,
+    }
+    COUNT_PAGE_TYPES = ("court_list", "yearly", "index", "listing") # Pages carrying the subtree counts a delta crawl compares
+
+    def __init__(self, directory="http_cache", max_bytes=512 * 1024 * 1024, ttls=None, compress_level=6, revalidate=(), console=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.revalidate = set(revalidate)
+        self.compress_level = compress_level
+        self.console = console or Console()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "responses.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, url TEXT, page_type TEXT, body BLOB, raw_size INTEGER, size INTEGER,
+            etag TEXT, last_modified TEXT, stored_at REAL, accessed_at REAL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def normalize_key(url, params=None):
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True) + [(str(k), str(v)) for k, v in (params or {}).items()]
+        path = parts.path or '/'
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+    @staticmethod
+    def classify_url(url):
+        path = urlsplit(url).path
+        if '/direktori/putusan/' in path: return "detail"
+        if '/pengadilan/index/' in path: return "court_list"
+        if '/direktori/periode/' in path: return "yearly"
+        # Classification listings (page 1 included: new decisions land there first) and any paged index
+        if '/direktori/index/' in path: return "listing" if '/klasifikasi/' in path or 'page=' in url else "index"
+        return "other"
+
+    def lookup(self, url, params=None):
+        key = self.normalize_key(url, params)
+        with self._lock:
+            row = self._db.execute("SELECT body, etag, last_modified, stored_at, page_type FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        body, etag, last_modified, stored_at, page_type = row
+        ttl = None if page_type in self.revalidate else self.ttls.get(page_type) # No TTL: stale, so a conditional request
+        entry = CacheEntry(zlib.decompress(body).decode('utf-8'), etag, last_modified, stored_at, page_type, ttl)
+        with self._lock:
+            if entry.fresh: self.stats["hits"] += 1; self.stats["bytes_saved"] += len(entry.body)
+            else: self.stats["misses"] += 1
+        return entry
+
+    def revalidated(self, url, params=None, entry=None):
+        key = self.normalize_key(url, params)
+        with self._lock:
+            now = time.time()
+            self._db.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            self.stats["misses"] -= 1; self.stats["revalidated"] += 1
+            if entry: self.stats["bytes_saved"] += len(entry.body); entry.stored_at = now
+
+    def store(self, url, body, params=None, etag=None, last_modified=None):
+        page_type = self.classify_url(self.normalize_key(url, params))
+        if self.ttls.get(page_type) is None or body is None: return False
+        key = self.normalize_key(url, params)
+        raw = body.encode('utf-8')
+        blob = zlib.compress(raw, self.compress_level)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             (key, url, page_type, blob, len(raw), len(blob), etag, last_modified, now, now))
+            self._total_bytes += len(blob) - (old[0] if old else 0)
+            self.stats["stores"] += 1
+            self._evict()
+        return True
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows: self._total_bytes = 0; return
+            self._db.execute("BEGIN")
+            for key, size in rows:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size; self.stats["evictions"] += 1
+                if self._total_bytes <= self.max_bytes: break
+            self._db.execute("COMMIT")
+
+    def invalidate(self, url, params=None):
+        key = self.normalize_key(url, params)
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old: self._db.execute("DELETE FROM responses WHERE key = ?", (key,)); self._total_bytes -= old[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses"); self._total_bytes = 0
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def snapshot(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {**self.stats, "entries": entries, "size_bytes": self._total_bytes}
+
+    def close(self):
+        with self._lock: self._db.close()
@@ -0,0 +1,156 @@
+import json
+import os
+import random
+import threading
+import time
+
+from rich.console import Console
+
+RETRYABLE_4XX = {408, 425, 429}
+
+
+class FetchError(Exception):
+    # A request given up by the RetryPolicy (permanent error, attempts or retry budget exhausted)
+    def __init__(self, url, status=None, reason=""):
+        super().__init__(f"{reason}: {url}" + (f" (HTTP {status})" if status else ""))
+        self.url = url
+        self.status = status
+        self.reason = reason
+
+
+class RetryState:
+    # Attempts of one request; created by RetryPolicy.begin()
+    __slots__ = ("policy", "url", "kind", "attempts", "throttled")
+
+    def __init__(self, policy, url, kind):
+        self.policy = policy
+        self.url = url
+        self.kind = kind
+        self.attempts = 0
+        self.throttled = 0 # Paced throttling responses, capped apart from attempts
+
+    def before(self):
+        self.policy.before_request()
+
+    def success(self):
+        self.policy.success()
+
+    def failure(self, status=None, error=None, paced=False):
+        # Seconds to wait before the next attempt; raises FetchError once the request is given up (and dead-lettered)
+        return self.policy.failure(self, status, error, paced)
+
+
+class RetryPolicy:
+    # Retry decisions for every page and PDF request. Errors are classified: 4xx other than
+    # 408/425/429 are permanent and given up at once; connection errors, timeouts and 5xx are
+    # retried with exponential backoff and full jitter, up to max_attempts per request. Throttling
+    # responses the AIMD limiter already paces (paced=True) are retried without delay or an attempt,
+    # up to the larger max_throttled per request, so a URL that answers 503 forever still ends.
+    #
+    # Retries share a global budget: at most budget_min + budget_ratio * requests retries over the
+    # run, so a failing site cannot multiply the load. After breaker_threshold consecutive transient
+    # failures (503 included, paced or not) the circuit breaker opens and every request waits breaker_cooldown seconds; one probe
+    # then decides between closing it and a longer (doubled, capped) pause. Failures while the site
+    # is down do not use attempts or budget, so an outage pauses the crawl rather than losing URLs.
+    #
+    # URLs given up on are appended to the dead_letter JSONL (url, kind, status, reason, attempts,
+    # time) and raised as FetchError, so the caller moves on instead of retrying forever.
+
+    def __init__(self, max_attempts=5, max_throttled=50, base_delay=1.0, max_delay=120.0, budget_ratio=0.2, budget_min=20,
+                 breaker_threshold=10, breaker_cooldown=30.0, breaker_max_cooldown=600.0, dead_letter=None, console=None):
+        self.max_attempts = max(1, max_attempts)
+        self.max_throttled = max(1, max_throttled)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_max_cooldown = breaker_max_cooldown
+        self.dead_letter = dead_letter
+        self.console = console or Console()
+        self.stats = {"requests": 0, "retries": 0, "given_up": 0, "budget_exhausted": 0, "breaker_opened": 0}
+        self.dead = [] # Dead letters of this run
+        self._lock = threading.Condition()
+        self._consecutive = 0
+        self._open_until = None # Breaker open (monotonic deadline) or None when closed
+        self._cooldown = breaker_cooldown
+        self._probing = None # monotonic start of the half-open probe
+        if dead_letter and os.path.dirname(dead_letter): os.makedirs(os.path.dirname(dead_letter), exist_ok=True)
+
+    def begin(self, url, kind="html"):
+        return RetryState(self, url, kind)
+
+    @staticmethod
+    def is_permanent(status):
+        return status is not None and 400 <= status < 500 and status not in RETRYABLE_4XX
+
+    def backoff(self, attempt):
+        # Full jitter: uniform over [0, base * 2^(attempt-1)], capped
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    # --- Circuit breaker ---
+    def before_request(self):
+        with self._lock:
+            while self._open_until is not None:
+                wait = self._open_until - time.monotonic()
+                if wait <= 0 and (self._probing is None or time.monotonic() - self._probing > self._cooldown): # Half-open: this request is the probe
+                    self._probing = time.monotonic(); break
+                self._lock.wait(wait if wait > 0 else 0.5)
+            self.stats["requests"] += 1
+
+    def success(self):
+        with self._lock: self._consecutive = 0; self._close()
+
+    def _close(self):
+        if self._open_until is None: return
+        self.console.log("[green]Circuit closed: site responding again, crawl resumed")
+        self._open_until = None; self._probing = None; self._cooldown = self.breaker_cooldown
+        self._lock.notify_all()
+
+    def _trip(self):
+        # Opens the breaker (or re-opens it after a failed probe with a longer cooldown)
+        if self._probing is not None: self._cooldown = min(self.breaker_max_cooldown, self._cooldown * 2)
+        self._open_until = time.monotonic() + self._cooldown; self._probing = None
+        self.stats["breaker_opened"] += 1
+        self.console.log(f"[red]Circuit open after {self._consecutive} consecutive failures: pausing all requests for {self._cooldown:.0f}s")
+
+    # --- Failures ---
+    def failure(self, state, status=None, error=None, paced=False):
+        transient = status is None or status >= 500 # A paced 503 too: a site answering only 503 is down
+        with self._lock:
+            if transient:
+                self._consecutive += 1
+                if self._probing is not None or (self._open_until is None and self._consecutive >= self.breaker_threshold): self._trip()
+                if self._open_until is not None: return 0 # Site down: wait for the breaker instead of using attempts
+            else: self._consecutive = 0; self._close() # Any other HTTP answer (404, a 429) means the site is up
+            if paced and not self.is_permanent(status): # The rate limiter lowers the rate and honours Retry-After
+                state.throttled += 1
+                if state.throttled < self.max_throttled: return 0
+                reason = f"gave up after {state.throttled} throttled attempts"
+            else:
+                state.attempts += 1
+                if self.is_permanent(status): reason = "permanent error"
+                elif state.attempts >= self.max_attempts: reason = f"gave up after {state.attempts} attempts"
+                elif self.stats["retries"] >= self.budget_min + self.budget_ratio * self.stats["requests"]:
+                    reason = "retry budget exhausted"; self.stats["budget_exhausted"] += 1
+                else:
+                    self.stats["retries"] += 1
+                    return self.backoff(state.attempts)
+            self.stats["given_up"] += 1
+        self._dead_letter(state, status, error, reason)
+        raise FetchError(state.url, status, reason) from error
+
+    def _dead_letter(self, state, status, error, reason):
+        entry = {"url": state.url, "kind": state.kind, "status": status, "reason": reason, "error": str(error) if error else None,
+                 "attempts": state.attempts, "throttled": state.throttled, "time": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())}
+        with self._lock:
+            self.dead.append(entry)
+            if self.dead_letter:
+                with open(self.dead_letter, 'a', encoding='utf-8') as f: f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.console.log(f"[red]Dead letter ({reason}): {state.url}" + (f" HTTP {status}" if status else ""))
+
+    def describe(self):
+        s = self.stats
+        return (f"{s['retries']} retries for {s['requests']} requests, {s['given_up']} URLs dead-lettered"
+                f"{f' ({self.dead_letter})' if self.dead_letter and s['given_up'] else ''}, breaker opened {s['breaker_opened']}x")
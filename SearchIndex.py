@@ -0,0 +1,226 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from rich.console import Console
+
+from JsonlSink import iter_jsonl, iter_jsonl_from, output_segments
+
+COLUMNS = ("nomor", "title", "parties", "klasifikasi", "kata_kunci", "judges", "amar", "text") # Searchable (FTS5) columns
+WEIGHTS = (10.0, 2.0, 5.0, 2.0, 3.0, 3.0, 1.0, 0.5) # bm25 weight per column: a hit in nomor or the parties outranks one in the PDF body
+SOURCES = {"title": ("title_full", "title"), "parties": ("parties_raw", "description_parties"), "klasifikasi": ("klasifikasi",),
+           "kata_kunci": ("kata_kunci",), "judges": ("hakim_ketua", "hakim_anggota", "panitera"), "amar": ("amar", "amar_lainnya", "catatan_amar")}
+RESULT_FIELDS = ("url", "nomor", "title", "court", "court_name", "year", "classification", "putus_date", "pdf_file", "score", "snippet")
+TOKEN_RE = re.compile(r'"[^"]*"\*?|\S+')
+YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+
+
+def _joined(record, fields):
+    # Non-empty values of `fields` (lists flattened, repeats dropped), one per line
+    values = []
+    for field in fields:
+        value = record.get(field)
+        for v in value if isinstance(value, list) else [value]:
+            if v not in (None, "") and str(v) not in values: values.append(str(v))
+    return "\n".join(values) or None
+
+
+def _year(record):
+    for value in (record.get("_source_year"), record.get("tahun"), record.get("putus_date")):
+        if value and (match := YEAR_RE.search(str(value))): return int(match.group(0))
+    return None
+
+
+class SearchIndex:
+    # Local full-text search over the scraped decisions. An FTS5 table holds the searchable text of each
+    # decision (nomor, title, parties, klasifikasi, kata_kunci, judges, amar and, once extracted, the PDF
+    # text) next to a plain table with the court, year and classification used as filters; search()
+    # ranks with bm25 and answers in milliseconds where grepping the JSONL takes minutes.
+    #
+    # Records are buffered and written `batch_size` at a time in one transaction. A decision and its
+    # PDF text (PdfTextExtractor records, joined on the detail URL) may arrive in either order.
+    # sync(path) indexes what a JsonlSink output gained since the last sync, from the stored byte
+    # offset of each segment (as in SeenIndex). As a JsonlSink mirror the index follows the crawl
+    # live; follow(path) catches up first and marks the mirrored output as indexed on close(). The
+    # database is in WAL mode, so another process can search while a crawl writes.
+
+    def __init__(self, path="decisions_search.sqlite3", batch_size=1000, console=None):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.console = console or Console()
+        self.stats = {"decisions": 0, "texts": 0, "unlinked": 0, "batches": 0, "queries": 0}
+        self._lock = threading.RLock()
+        self._pending = {} # detail URL -> [filter columns or None, {fts column: text}, (pdf_file, pages) or None]
+        self._synced = [] # Outputs re-synced on close()
+        self._followed = [] # Outputs whose new records arrive through write()
+        self._counts = None # Final count() once closed (the sink describes its mirrors after closing them)
+        if path != ":memory:" and os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS decisions (id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, nomor TEXT, title TEXT, court TEXT, court_name TEXT, "
+                         "year INTEGER, classification TEXT COLLATE NOCASE, putus_date TEXT, pdf_file TEXT, pages INTEGER)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS decisions_court_year ON decisions (court, year)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS decisions_year ON decisions (year)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS decisions_classification ON decisions (classification)")
+        try: self._db.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS decisions_fts USING fts5({', '.join(COLUMNS)}, tokenize='unicode61 remove_diacritics 2')")
+        except sqlite3.OperationalError as e: self._db.close(); raise ValueError(f"The search index needs SQLite with FTS5 ({e})")
+        self._db.execute("INSERT INTO decisions_fts (decisions_fts, rank) VALUES ('rank', ?)", (f"bm25({', '.join(map(str, WEIGHTS))})",))
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+        self._db.commit()
+
+    def _get_meta(self, name, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, name, value):
+        self._db.execute("INSERT INTO meta (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value", (name, value))
+
+    # --- Updates ---
+    def write(self, record):
+        # JsonlSink mirror: takes decision records and PdfTextExtractor records alike
+        if "pdf_file" in record and "text" in record: return self.add_text(record)
+        return self.add(record)
+
+    def add(self, record, key="_source_decision_detail_url"):
+        if not (url := record.get(key)): return False
+        meta = (record.get("nomor"), record.get("title_full") or record.get("title"), record.get("_source_court_code"), record.get("_source_court_name"),
+                _year(record), record.get("_source_classification"), record.get("putus_date") or record.get("tanggal_dibacakan"))
+        columns = {"nomor": record.get("nomor"), **{column: _joined(record, fields) for column, fields in SOURCES.items()}}
+        with self._lock: self.stats["decisions"] += 1; self._queue(url, meta, columns)
+        return True
+
+    def add_text(self, record):
+        # A PdfTextExtractor record; failed extractions carry no text and PDFs without a known decision cannot be joined
+        if not record.get("text"): return False
+        if not (url := record.get("decision_url")):
+            with self._lock: self.stats["unlinked"] += 1
+            return False
+        with self._lock: self.stats["texts"] += 1; self._queue(url, None, {"text": record["text"]}, (record.get("pdf_file"), record.get("pages")))
+        return True
+
+    def _queue(self, url, meta, columns, pdf=None):
+        entry = self._pending.setdefault(url, [None, {}, None])
+        if meta: entry[0] = meta
+        if pdf: entry[2] = pdf
+        entry[1].update(columns)
+        if len(self._pending) >= self.batch_size: self._flush()
+
+    def _select(self, sql, values, chunk=500):
+        for i in range(0, len(values), chunk):
+            part = values[i:i + chunk]
+            yield from self._db.execute(f"{sql} ({', '.join('?' * len(part))})", part)
+
+    def _flush(self):
+        # One transaction per batch; FTS rows are replaced whole, merged with the columns indexed before (e.g. the PDF text)
+        if not self._pending: return
+        batch, self._pending = self._pending, {}
+        with self._db:
+            self._db.executemany("INSERT INTO decisions (url, nomor, title, court, court_name, year, classification, putus_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                                 "ON CONFLICT(url) DO UPDATE SET nomor = excluded.nomor, title = excluded.title, court = excluded.court, court_name = excluded.court_name, "
+                                 "year = excluded.year, classification = excluded.classification, putus_date = excluded.putus_date",
+                                 [(url, *meta) for url, (meta, _, _) in batch.items() if meta])
+            self._db.executemany("INSERT OR IGNORE INTO decisions (url) VALUES (?)", [(url,) for url, (meta, _, _) in batch.items() if not meta])
+            self._db.executemany("UPDATE decisions SET pdf_file = ?, pages = ? WHERE url = ?", [(*pdf, url) for url, (_, _, pdf) in batch.items() if pdf])
+            ids = dict(self._select("SELECT url, id FROM decisions WHERE url IN", list(batch)))
+            existing = {row[0]: dict(zip(COLUMNS, row[1:])) for row in self._select(f"SELECT rowid, {', '.join(COLUMNS)} FROM decisions_fts WHERE rowid IN", list(ids.values()))}
+            self._db.executemany("DELETE FROM decisions_fts WHERE rowid = ?", [(rowid,) for rowid in existing])
+            rows = [(ids[url], *({**existing.get(ids[url], {}), **columns}.get(c) for c in COLUMNS)) for url, (_, columns, _) in batch.items()]
+            self._db.executemany(f"INSERT INTO decisions_fts (rowid, {', '.join(COLUMNS)}) VALUES ({', '.join('?' * (len(COLUMNS) + 1))})", rows)
+        self.stats["batches"] += 1
+
+    def flush(self):
+        with self._lock: self._flush()
+
+    def sync(self, path):
+        # Indexes the records (decisions or PDF text) appended to a JsonlSink output since the last sync; returns how many were read.
+        # The output is synced again on close(), e.g. the PDF text written during a crawl.
+        with self._lock:
+            if path not in self._synced: self._synced.append(path)
+            return self._sync(path)
+
+    def follow(self, path):
+        # sync() for the output of the sink this index mirrors: its later records arrive through write()
+        with self._lock:
+            if path not in self._followed: self._followed.append(path)
+            return self._sync(path)
+
+    def _sync(self, path):
+        positions = json.loads(self._get_meta("positions", "{}"))
+        read = 0
+        for file in ([path] if os.path.exists(path) else []) + output_segments(path):
+            name, size = os.path.abspath(file), os.path.getsize(file)
+            offset = positions.get(name, 0)
+            if offset > size: self.console.log(f"[yellow]Search index: {file} shrank, indexing it again"); offset = 0
+            if offset == size: continue
+            if file.endswith((".gz", ".zst")): records = ((size, record) for record in iter_jsonl(file)) # Compressed segments are re-read whole when they changed
+            else: records = iter_jsonl_from(file, offset)
+            for offset, record in records:
+                if record is not None: self.write(record); read += 1
+                positions[name] = offset
+            self._flush(); self._set_meta("positions", json.dumps(positions)); self._db.commit()
+        if read: self.console.log(f"[cyan]Search index: indexed {read} records from {path}")
+        return read
+
+    def optimize(self):
+        # Merges the FTS5 segments after a large build (faster queries)
+        with self._lock: self._flush(); self._db.execute("INSERT INTO decisions_fts (decisions_fts) VALUES ('optimize')"); self._db.commit()
+
+    # --- Queries ---
+    @staticmethod
+    def match_expression(query):
+        # Plain input -> FTS5 terms that must all match: "quoted phrases" and a trailing * (prefix) are kept, anything else is literal
+        terms = []
+        for token in TOKEN_RE.findall(query or ""):
+            prefix = len(token) > 1 and token.endswith("*")
+            token = token[:-1] if prefix else token
+            if len(token) > 1 and token.startswith('"') and token.endswith('"'): token = token[1:-1]
+            if re.search(r'\w', token): terms.append('"' + token.replace('"', '""') + '"' + ("*" if prefix else ""))
+        return " ".join(terms)
+
+    def search(self, query, court=None, year=None, classification=None, limit=20, offset=0, raw=False, highlight=("«", "»")):
+        # Best matches first, as dicts of RESULT_FIELDS with a highlighted snippet; raw=True takes FTS5 syntax (OR, NEAR, column:term)
+        match = query.strip() if raw else self.match_expression(query)
+        if not match: raise ValueError("Empty search query")
+        where, params = ["decisions_fts MATCH ?"], [match]
+        if court: where.append("(d.court = lower(?) OR d.court_name = ? COLLATE NOCASE)"); params += [court, court]
+        if year: where.append("d.year = ?"); params.append(int(year))
+        if classification: where.append("d.classification = ?"); params.append(classification)
+        sql = (f"SELECT d.url, d.nomor, d.title, d.court, d.court_name, d.year, d.classification, d.putus_date, d.pdf_file, rank, "
+               f"snippet(decisions_fts, -1, ?, ?, '…', 16) FROM decisions_fts JOIN decisions d ON d.id = decisions_fts.rowid "
+               f"WHERE {' AND '.join(where)} ORDER BY rank LIMIT ? OFFSET ?")
+        with self._lock:
+            self._flush() # Include records still buffered
+            try: rows = self._db.execute(sql, [*highlight, *params, limit, offset]).fetchall()
+            except sqlite3.OperationalError as e: raise ValueError(f"Invalid search query {match!r}: {e}")
+            self.stats["queries"] += 1
+        return [dict(zip(RESULT_FIELDS, row)) for row in rows]
+
+    # --- Lifecycle ---
+    def count(self):
+        # (decisions, decisions with PDF text)
+        with self._lock: return self._counts if self._db is None else self._db.execute("SELECT count(*), count(pdf_file) FROM decisions").fetchone()
+
+    def describe(self):
+        s, (total, with_text) = self.stats, self.count()
+        unlinked = f", {s['unlinked']} PDF texts without a decision" if s["unlinked"] else ""
+        return f"Search index: {total} decisions ({with_text} with PDF text) in {self.path}; {s['decisions']} records and {s['texts']} PDF texts indexed in {s['batches']} batches{unlinked}"
+
+    def close(self):
+        with self._lock:
+            if self._db is None: return
+            self._flush()
+            positions = json.loads(self._get_meta("positions", "{}"))
+            for path in self._followed: # Everything the sink wrote since follow() came through write()
+                for file in ([path] if os.path.exists(path) else []) + output_segments(path): positions[os.path.abspath(file)] = os.path.getsize(file)
+            self._set_meta("positions", json.dumps(positions)); self._db.commit()
+            for path in self._synced: self._sync(path)
+            self._counts = self.count(); self._db.close(); self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+
+from rich.console import Console
+
+from JsonlSink import iter_jsonl, iter_jsonl_from, output_segments
+
+
+class BloomFilter:
+    # Fixed-size Bloom filter (double hashing over one blake2b digest); no false negatives
+    def __init__(self, capacity, error_rate=0.001, bits=None):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        if bits is not None and len(bits) != (self.size + 7) // 8: raise ValueError("Bloom filter bits do not match its parameters")
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for pos in self._positions(value): self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class SeenIndex:
+    # Persistent index of already scraped decisions, keyed by detail URL and by court + `nomor`, so re-runs
+    # (lost state, re-crawled courts) skip the detail and PDF fetch for listing rows already in the
+    # output. The exact set lives in SQLite; an in-memory Bloom filter answers most lookups for new
+    # decisions without touching disk, and only possible hits are confirmed against the table.
+    #
+    # sync(path) indexes a JsonlSink's output incrementally: the byte offset reached in each plain
+    # segment (or the size of a compressed one) is stored, so startup only reads records written
+    # since the last run. If an output file disappeared or shrank the index is rebuilt from scratch.
+    # The filter is saved on close(); after an unclean exit it is rebuilt from the table.
+
+    def __init__(self, path="seen_decisions.sqlite3", capacity=1_000_000, error_rate=0.001, commit_every=1000, console=None):
+        self.path = path
+        self.error_rate = error_rate
+        self.commit_every = commit_every
+        self.console = console or Console()
+        self.stats = {"checked": 0, "skipped": 0, "bloom_rejected": 0, "indexed": 0}
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        if path != ":memory:" and os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (value TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+        count = self._db.execute("SELECT count(*) FROM seen").fetchone()[0]
+        self.bloom = self._load_bloom(max(capacity, count * 2), count)
+        self._set_meta("clean", 0); self._db.commit()
+
+    def _get_meta(self, name, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, name, value):
+        self._db.execute("INSERT INTO meta (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value", (name, value))
+
+    def _load_bloom(self, capacity, count):
+        saved, bits = json.loads(self._get_meta("bloom_params", "null")), self._get_meta("bloom_bits")
+        if saved and bits and self._get_meta("clean") == 1 and saved["capacity"] >= count * 1.5:
+            try: return BloomFilter(saved["capacity"], saved["error_rate"], bytearray(bits))
+            except ValueError: pass
+        bloom = BloomFilter(capacity, self.error_rate) # Unclean exit, first run or outgrown: rebuild from the exact set
+        for (value,) in self._db.execute("SELECT value FROM seen"): bloom.add(value)
+        if count: self.console.log(f"[cyan]Seen index: rebuilt Bloom filter over {count} entries")
+        return bloom
+
+    @staticmethod
+    def nomor_key(nomor, court=None):
+        # Decision numbers are only unique within one court
+        return f"nomor:{court or ''}:" + re.sub(r'\s+', ' ', nomor).strip().upper() if nomor else None
+
+    # --- Lookups ---
+    def _contains(self, value):
+        if value not in self.bloom: self.stats["bloom_rejected"] += 1; return False
+        return self._db.execute("SELECT 1 FROM seen WHERE value = ?", (value,)).fetchone() is not None
+
+    def seen(self, url=None, nomor=None, court=None):
+        # True (and counted as skipped) when the listing row's URL or the court's decision number was scraped before
+        with self._lock:
+            self.stats["checked"] += 1
+            found = any(self._contains(value) for value in (url, self.nomor_key(nomor, court)) if value)
+            if found: self.stats["skipped"] += 1
+            return found
+
+    def __contains__(self, url):
+        with self._lock: return self._contains(url)
+
+    # --- Updates ---
+    def add(self, url=None, nomor=None, court=None):
+        with self._lock: self._add([value for value in (url, self.nomor_key(nomor, court)) if value])
+
+    def add_record(self, record, key="_source_decision_detail_url"):
+        self.add(record.get(key), record.get("nomor"), record.get("_source_court_code"))
+
+    def _add(self, values):
+        if not values: return
+        self._db.executemany("INSERT OR IGNORE INTO seen (value) VALUES (?)", [(v,) for v in values])
+        for value in values: self.bloom.add(value)
+        self.stats["indexed"] += 1
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every: self._db.commit(); self._uncommitted = 0
+
+    def sync(self, path, key="_source_decision_detail_url"):
+        # Indexes the records of a JsonlSink output written since the last sync; returns how many were read
+        with self._lock:
+            files = ([path] if os.path.exists(path) else []) + output_segments(path)
+            positions = json.loads(self._get_meta("positions", "{}"))
+            sizes = {os.path.abspath(p): os.path.getsize(p) for p in files}
+            if any(p not in sizes or sizes[p] < pos for p, pos in positions.items()):
+                self.console.log("[yellow]Seen index: output was truncated or removed, rebuilding the index")
+                self._db.execute("DELETE FROM seen"); positions = {}
+                self.bloom = BloomFilter(self.bloom.capacity, self.error_rate)
+            read = 0
+            for file in files:
+                name = os.path.abspath(file); offset = positions.get(name, 0)
+                if offset == sizes[name]: continue
+                if file.endswith((".gz", ".zst")): # Compressed segments are only re-read when they changed
+                    records, offset = iter_jsonl(file), sizes[name]
+                else: records, offset = self._read_from(file, offset, positions, name), None
+                for record in records:
+                    self._add([value for value in (record.get(key), self.nomor_key(record.get("nomor"), record.get("_source_court_code"))) if value]); read += 1
+                if offset is not None: positions[name] = offset
+            self._set_meta("positions", json.dumps(positions)); self._db.commit(); self._uncommitted = 0
+        if read: self.console.log(f"[cyan]Seen index: indexed {read} decisions from {path}")
+        return read
+
+    @staticmethod
+    def _read_from(file, offset, positions, name):
+        # Complete lines after `offset`; positions[name] advances as they are consumed
+        for offset, record in iter_jsonl_from(file, offset):
+            positions[name] = offset
+            if record is not None: yield record
+
+    # --- Lifecycle ---
+    def count(self):
+        with self._lock: return self._db.execute("SELECT count(*) FROM seen").fetchone()[0]
+
+    def describe(self):
+        s = self.stats
+        return f"Seen index: skipped {s['skipped']} of {s['checked']} listed decisions already scraped ({s['bloom_rejected']} lookups answered by the Bloom filter)"
+
+    def close(self):
+        with self._lock:
+            if self._db is None: return
+            self._set_meta("bloom_params", json.dumps({"capacity": self.bloom.capacity, "error_rate": self.bloom.error_rate}))
+            self._set_meta("bloom_bits", bytes(self.bloom.bits)); self._set_meta("clean", 1)
+            self._db.commit(); self._db.close(); self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,122 @@
+import json
+import os
+import time
+
+from rich.console import Console
+
+from FrontierStore import DONE, FAILED, FrontierStore
+from JsonlSink import iter_output, repair_tail
+from MahkamahAgungScraper import MahkamahAgungScraper
+
+SHARD_LEVELS = ("court", "year")
+WORKER_META_PREFIX = "worker:"
+
+
+class ShardCoordinator:
+    # Hands out crawl work units to worker processes (on this machine, or on others sharing the
+    # coordinator file) through leases on a FrontierStore:
+    #   plan(courts) records one unit per court (key = court index, like CrawlEngine's node keys)
+    #   acquire(worker) leases the next unit; heartbeat(worker) extends the lease while it is crawled
+    #   complete()/fail() finish it; a unit whose worker stops heartbeating goes back to pending
+    #   once its lease expires and is handed to the next worker that asks.
+    # With shard_by="year" a court unit is split into court+year units by whichever worker takes it
+    # (split()), so one big court is spread over several workers.
+    # Each worker writes its own output file, registered under meta "worker:<id>"; merge() joins
+    # them, dropping decisions crawled twice by a unit that was reassigned.
+
+    def __init__(self, path="crawl_shards.sqlite3", lease=120.0, max_attempts=3, console=None):
+        self.console = console or Console()
+        self.store = FrontierStore(path, console=self.console)
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    @property
+    def shard_by(self):
+        return self.store.get_meta("plan", {}).get("shard_by", "court")
+
+    def plan(self, courts, shard_by="court"):
+        if shard_by not in SHARD_LEVELS: raise ValueError(f"Unknown shard_by '{shard_by}' (expected one of {', '.join(SHARD_LEVELS)})")
+        units = []
+        for court_idx, court in enumerate(courts):
+            code = MahkamahAgungScraper.extract_court_code(court.get('link_pengadilan'))
+            if code: units.append((str(court_idx), "court", 0, {"court_name": court.get('nama_pengadilan', f'?C {court_idx+1}'), "court_code": code}))
+        added = self.store.add(units)
+        self.store.set_meta("plan", {"shard_by": shard_by, "courts": len(courts), "units": len(units), "planned_at": time.time()})
+        return added
+
+    # --- Worker side ---
+    def register(self, worker, output_file):
+        self.store.set_meta(f"{WORKER_META_PREFIX}{worker}", {"output": os.path.abspath(output_file), "pid": os.getpid(),
+                                                             "started_at": time.time(), "last_seen": time.time(), "units": 0})
+
+    def _touch(self, worker, units=0):
+        name = f"{WORKER_META_PREFIX}{worker}"
+        info = self.store.get_meta(name, {})
+        info["last_seen"] = time.time(); info["units"] = info.get("units", 0) + units
+        self.store.set_meta(name, info)
+
+    def acquire(self, worker):
+        if expired := self.store.requeue_claimed(expired_only=True):
+            self.console.log(f"[yellow]Reassigning {expired} shard units whose lease expired")
+        claimed = self.store.claim(worker, lease=self.lease)
+        return claimed[0] if claimed else None
+
+    def heartbeat(self, worker):
+        self._touch(worker)
+        return self.store.renew(worker, self.lease)
+
+    def split(self, unit, worker, children):
+        # children: (key, level, depth, context) rows, e.g. CrawlNode.as_row() of a court's years
+        return self.store.complete(unit['key'], worker, children)
+
+    def complete(self, unit, worker):
+        self._touch(worker, units=1)
+        return self.store.complete(unit['key'], worker)
+
+    def fail(self, unit, worker, error):
+        return self.store.fail(unit['key'], worker, error, self.max_attempts)
+
+    def release(self, worker):
+        # Graceful shutdown: hand back whatever this worker still holds
+        return self.store.requeue_claimed(worker=worker)
+
+    # --- Coordinator side ---
+    def remaining(self):
+        return self.store.remaining()
+
+    def summary(self):
+        counts = self.store.counts()
+        return {"units": {level: counts[level] for level in SHARD_LEVELS if level in counts},
+                "done": sum(c.get(DONE, 0) for c in counts.values()), "failed": sum(c.get(FAILED, 0) for c in counts.values()),
+                "remaining": self.store.remaining(), "workers": len(self.workers())}
+
+    def workers(self):
+        return {name[len(WORKER_META_PREFIX):]: info for name, info in self.store.meta_items(WORKER_META_PREFIX).items()}
+
+    def merge(self, output_file, key="_source_decision_detail_url"):
+        return merge_outputs([info["output"] for info in self.workers().values()], output_file, key=key)
+
+    def close(self):
+        self.store.close()
+
+
+def merge_outputs(paths, output_file, key="_source_decision_detail_url"):
+    # Appends the per-worker JSONL records to output_file, keeping the first record per key. Keys already in the
+    # output (plain file plus any rotated/partitioned/compressed JsonlSink segments) count as seen, and existing
+    # data is never rewritten. Returns (written, duplicates).
+    seen = {value for record in iter_output(output_file) if key and (value := record.get(key)) is not None}
+    written = duplicates = 0
+    if os.path.exists(output_file): repair_tail(output_file)
+    with open(output_file, 'a', encoding='utf-8') as out:
+        for path in paths:
+            if not os.path.exists(path) or os.path.abspath(path) == os.path.abspath(output_file): continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip(): continue
+                    try: record_key = json.loads(line).get(key) if key else None
+                    except ValueError: continue  # torn last line of a killed worker
+                    if record_key is not None:
+                        if record_key in seen: duplicates += 1; continue
+                        seen.add(record_key)
+                    out.write(line if line.endswith('\n') else line + '\n'); written += 1
+    return written, duplicates
@@ -0,0 +1,114 @@
+import cProfile
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from rich.console import Console
+from rich.table import Table
+
+
+class StageProfiler:
+    # --profile: timing spans around the crawl stages (fetch, rate-limit wait, parse per extractor,
+    # append_data, save_state, PDF download, Rich rendering). Stages are attached by wrapping the
+    # methods of the live objects (wrap(obj, "method", "stage")), so a crawl without --profile runs
+    # the original methods and pays nothing. Spans nest per thread: a stage's self time excludes the
+    # stages inside it (e.g. rate-limit waits inside fetch).
+    #
+    # Optionally, while running: cProfile of the calling thread (pstats file, for snakeviz/pstats)
+    # and a stack sampler over all threads writing collapsed stacks ("a;b;c count" lines) for
+    # flamegraph.pl / speedscope.
+
+    def __init__(self, pstats_file=None, collapsed_file=None, sample_interval=0.005, console=None):
+        self.pstats_file = pstats_file
+        self.collapsed_file = collapsed_file
+        self.sample_interval = sample_interval
+        self.console = console or Console()
+        self.stages = {} # stage -> [calls, total, self, max]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wrapped = []
+        self._profile = None
+        self._sampler = None
+        self._samples = Counter()
+        self._stop = threading.Event()
+        self.started = self.stopped = None
+
+    # --- Spans ---
+    def _record(self, stage, elapsed, children):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0, 0.0, 0.0, 0.0])
+            entry[0] += 1; entry[1] += elapsed; entry[2] += elapsed - children; entry[3] = max(entry[3], elapsed)
+
+    def span(self, stage, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0) # Time spent in nested spans
+            started = time.perf_counter()
+            try: return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = stack.pop()
+                if stack: stack[-1] += elapsed
+                self._record(stage, elapsed, children)
+        return timed
+
+    def wrap(self, obj, name, stage):
+        # Replaces obj.name with a timed version on this instance only; unwrap() restores it
+        if obj is None or not hasattr(obj, name): return
+        self._wrapped.append((obj, name, name in vars(obj)))
+        setattr(obj, name, self.span(stage, getattr(obj, name)))
+
+    def unwrap(self):
+        for obj, name, own in reversed(self._wrapped):
+            if own: setattr(obj, name, getattr(obj, name).__wrapped__)
+            else: delattr(obj, name)
+        self._wrapped = []
+
+    # --- cProfile / stack sampling ---
+    def start(self):
+        self.started = time.perf_counter()
+        if self.pstats_file: self._profile = cProfile.Profile(); self._profile.enable()
+        if self.collapsed_file:
+            self._sampler = threading.Thread(target=self._sample, name="stack-sampler", daemon=True); self._sampler.start()
+        return self
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.sample_interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own: continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"); frame = frame.f_back
+                self._samples[";".join([names.get(ident, str(ident))] + stack[::-1])] += 1
+
+    def stop(self):
+        if self.stopped is not None: return
+        self.stopped = time.perf_counter()
+        self._stop.set()
+        if self._profile:
+            self._profile.disable(); self._profile.dump_stats(self.pstats_file)
+            self.console.log(f"[cyan]cProfile stats written to {self.pstats_file}")
+        if self._sampler:
+            self._sampler.join()
+            with open(self.collapsed_file, 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self._samples.items()): f.write(f"{stack} {count}\n")
+            self.console.log(f"[cyan]{sum(self._samples.values())} stack samples written to {self.collapsed_file} (collapsed, flame-graph ready)")
+        self.unwrap()
+
+    # --- Report ---
+    def report(self):
+        wall = ((self.stopped or time.perf_counter()) - self.started) if self.started else None
+        table = Table(title=f"Per-stage time{f' (wall {wall:.1f}s)' if wall else ''}", show_lines=False)
+        for column in ("Stage", "Calls", "Total s", "Self s", "Mean ms", "Max ms", "% wall"): table.add_column(column, justify="left" if column == "Stage" else "right")
+        with self._lock: stages = sorted(self.stages.items(), key=lambda item: -item[1][2])
+        for stage, (calls, total, own, longest) in stages:
+            table.add_row(stage, str(calls), f"{total:.2f}", f"{own:.2f}", f"{total / calls * 1000:.1f}", f"{longest * 1000:.1f}",
+                          f"{own / wall * 100:.1f}" if wall else "-")
+        return table
@@ -0,0 +1,98 @@
+import json
+import os
+
+from rich.console import Console
+
+
+class StateJournal:
+    # Append-only JSONL journal for incremental scrape state. Each save appends the new records,
+    # one {"record": ...} line each, followed by one {"checkpoint": ...} line holding the small resume
+    # state (e.g. the next page). A save therefore costs time proportional to its own records.
+    # Records after the last checkpoint line belong to a save that never finished (crash,
+    # torn write) and are cut off by load(), so a checkpoint always matches the records before it.
+    # Every `compact_every` saves the file is rewritten to the records plus one checkpoint, dropping
+    # superseded checkpoints and, when `key` is given, records whose key was already recorded.
+
+    def __init__(self, path, key=None, compact_every=500, fsync=True, console=None):
+        self.path = path
+        self.key = key
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.console = console or Console()
+        self.checkpoint = None
+        self.records = 0
+        self._checkpoints = 0
+        self._loaded = False
+        self._file = None
+
+    def load(self):
+        # Returns the last checkpoint (None for a new journal); past records stay on disk, see iter_records()
+        self.close()
+        self.checkpoint, self.records, self._checkpoints = None, 0, 0
+        committed = pending = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"): break  # torn last line
+                    try: entry = json.loads(line)
+                    except ValueError: break
+                    if "checkpoint" in entry:
+                        self.checkpoint = entry["checkpoint"]; self._checkpoints += 1
+                        self.records += pending; pending = 0
+                        committed = f.tell()
+                    else: pending += 1
+                size = f.seek(0, os.SEEK_END)
+            if size > committed:
+                self.console.log(f"[yellow]Journal {self.path}: dropping {size - committed} bytes of an unfinished save")
+                with open(self.path, 'r+b') as f: f.truncate(committed)
+        self._loaded = True
+        return self.checkpoint
+
+    def _entries(self):
+        if not os.path.exists(self.path): return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f: yield json.loads(line)
+
+    def iter_records(self):
+        # Streams the saved records in order, skipping repeated keys when `key` is set
+        seen = set() if self.key else None
+        for entry in self._entries():
+            if "record" not in entry: continue
+            if seen is not None:
+                key = self.key(entry["record"])
+                if key in seen: continue
+                seen.add(key)
+            yield entry["record"]
+
+    def append(self, records, checkpoint):
+        if not self._loaded: self.load()
+        if self._file is None: self._file = open(self.path, 'a', encoding='utf-8')
+        lines = [json.dumps({"record": record}, ensure_ascii=False) for record in records]
+        lines.append(json.dumps({"checkpoint": checkpoint}, ensure_ascii=False))
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        if self.fsync: os.fsync(self._file.fileno())
+        self.checkpoint = checkpoint; self.records += len(records); self._checkpoints += 1
+        if self.compact_every and self._checkpoints > self.compact_every: self.compact()
+
+    def compact(self):
+        if not self._loaded: self.load()
+        self.close()
+        tmp_path = f"{self.path}.tmp"
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self.iter_records():
+                f.write(json.dumps({"record": record}, ensure_ascii=False) + "\n"); count += 1
+            f.write(json.dumps({"checkpoint": self.checkpoint}, ensure_ascii=False) + "\n")
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.records, self._checkpoints = count, 1
+
+    def close(self):
+        if self._file is not None: self._file.close(); self._file = None
+
+    def remove(self):
+        self.close()
+        for path in (self.path, f"{self.path}.tmp"):
+            if os.path.exists(path): os.remove(path)
+        self.checkpoint, self.records, self._checkpoints = None, 0, 0
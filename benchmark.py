@@ -0,0 +1,289 @@
+# benchmark.py
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+from rich.console import Console
+from rich.table import Table
+
+import main
+from MockPutusanServer import MockDataset, MockPutusanServer, STATS_PATH
+from ParserBackends import PARSER_BACKENDS
+
+try: import resource
+except ImportError: resource = None # Windows: peak RSS falls back to the current RSS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "fixtures")
+PARSER_CASES = [ # (extractor, fixture): one per page type the crawler parses
+    ("parse_list_courts", "court_list"),
+    ("parse_last_page", "court_list"),
+    ("parse_court_yearly_decisions", "court_yearly"),
+    ("parse_decision_categories", "year_index"),
+    ("parse_decision_classifications", "classification_index"),
+    ("parse_monthly_decision_counts", "decision_listing"),
+    ("parse_decision_list", "decision_listing"),
+    ("parse_listing_page", "decision_listing"),
+    ("parse_decision_detail", "decision_detail"),
+]
+RSS_DOCUMENTS = 50 # parsed trees kept alive at once when measuring resident memory per document
+E2E_RATE_LIMITS = { # Far above the live-site budgets: the point is to find where the client saturates
+    "html": {"rate": 50.0, "min_rate": 1.0, "max_rate": 1000.0},
+    "pdf": {"rate": 50.0, "min_rate": 1.0, "max_rate": 1000.0},
+}
+E2E_COMPARE_KEYS = ["decisions_per_min", "requests_per_decision", "cpu_ms_per_decision", "peak_rss_mb"]
+
+console = Console()
+
+
+class QuietConsole:
+    def log(self, *args, **kwargs): pass
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+    fixtures = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".html"):
+            with open(os.path.join(directory, filename), encoding="utf-8") as f: fixtures[filename[:-5]] = f.read()
+    return fixtures
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError): return None
+
+
+def _pages_per_sec(func, html, min_time, rounds):
+    # Best of `rounds` timed batches; each batch doubles its size until it runs for at least min_time
+    best = 0.0
+    for _ in range(rounds):
+        count, elapsed = 1, 0.0
+        while elapsed < min_time:
+            count *= 2
+            start = time.perf_counter()
+            for _ in range(count): func(html)
+            elapsed = time.perf_counter() - start
+        best = max(best, count / elapsed)
+    return best
+
+
+def _python_peak_bytes(func, html):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(html)
+        return tracemalloc.get_traced_memory()[1]
+    finally: tracemalloc.stop()
+
+
+def _document_rss_bytes(backend_name, html):
+    # tracemalloc misses libxml2's C heap, so also measure RSS growth with many parsed trees alive
+    backend = PARSER_BACKENDS[backend_name](console=QuietConsole())
+    backend.document(html)
+    gc.collect()
+    before = _rss_bytes()
+    if before is None: return None
+    documents = [backend.document(html) for _ in range(RSS_DOCUMENTS)]
+    return max(_rss_bytes() - before, 0) / RSS_DOCUMENTS
+
+
+def _document_rss_fresh(backend_name, html):
+    # A fresh interpreter per measurement: freed memory from earlier parses would otherwise be reused and hide growth
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_document_rss_bytes, backend_name, html).result()
+
+
+def bench_parsers(backends=None, min_time=0.2, rounds=3, fixtures_dir=FIXTURES_DIR):
+    fixtures = load_fixtures(fixtures_dir)
+    results, document_rss = [], {}
+    for name in backends or sorted(PARSER_BACKENDS):
+        backend = PARSER_BACKENDS[name](console=QuietConsole())
+        for extractor, fixture in PARSER_CASES:
+            html = fixtures[fixture]
+            func = getattr(backend, extractor)
+            rate = _pages_per_sec(func, html, min_time, rounds)
+            if (name, fixture) not in document_rss: document_rss[(name, fixture)] = _document_rss_fresh(name, html)
+            rss = document_rss[(name, fixture)]
+            results.append({
+                "backend": name, "extractor": extractor, "fixture": fixture, "html_kb": round(len(html.encode("utf-8")) / 1024, 1),
+                "pages_per_sec": round(rate, 1), "ms_per_page": round(1000 / rate, 3),
+                "python_peak_kb": round(_python_peak_bytes(func, html) / 1024, 1),
+                "document_rss_kb": round(rss / 1024, 1) if rss is not None else None,
+            })
+    return results
+
+
+def _print_parser_results(results, baseline=None):
+    previous = {(r["backend"], r["extractor"]): r for r in baseline or []}
+    table = Table(title="Parser benchmark")
+    for column in ("Backend", "Extractor", "Fixture", "KB", "Pages/s", "ms/page", "Py peak KB", "Doc RSS KB"):
+        table.add_column(column, justify="left" if column in ("Backend", "Extractor", "Fixture") else "right")
+    if previous: table.add_column("vs baseline", justify="right")
+    for r in results:
+        row = [r["backend"], r["extractor"], r["fixture"], f"{r['html_kb']}", f"{r['pages_per_sec']:,.0f}", f"{r['ms_per_page']:.3f}",
+               f"{r['python_peak_kb']}", "-" if r["document_rss_kb"] is None else f"{r['document_rss_kb']}"]
+        if previous:
+            old = previous.get((r["backend"], r["extractor"]))
+            if not old: row.append("new")
+            else:
+                change = r["pages_per_sec"] / old["pages_per_sec"] - 1 if old["pages_per_sec"] else 0.0
+                row.append(f"[{'green' if change >= 0 else 'red'}]{change:+.1%}[/]")
+        table.add_row(*row)
+    console.print(table)
+    by_backend = {}
+    for r in results: by_backend.setdefault(r["backend"], []).append(r["ms_per_page"])
+    if "bs4" in by_backend:
+        for name, timings in by_backend.items():
+            if name != "bs4": console.log(f"[cyan]{name}: {sum(by_backend['bs4']) / sum(timings):.1f}x faster than bs4 over all extractors")
+
+
+def _serve_mock(dataset_options, server_options, queue):
+    server = MockPutusanServer(MockDataset(**dataset_options), console=Console(quiet=True), **server_options).start()
+    queue.put(server.url)
+    threading.Event().wait()
+
+
+def _peak_rss_bytes():
+    if resource is None: return _rss_bytes()
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # kilobytes on Linux
+
+
+def bench_e2e(dataset_options=None, server_options=None, use_async=False, concurrency=main.CONCURRENCY, parser=main.PARSER_BACKEND,
+              rate_limits=None, retry_delay=1, quiet=True):
+    # Runs main.run_scraper / run_scraper_async in a scratch directory against a MockPutusanServer in its own
+    # process, so CPU time and RSS below belong to the crawler alone.
+    dataset_options, server_options = dataset_options or {}, server_options or {}
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    server = context.Process(target=_serve_mock, args=(dataset_options, server_options, queue), daemon=True)
+    server.start()
+    cwd, was_quiet = os.getcwd(), main.console.quiet
+    try:
+        site_root = queue.get(timeout=60)
+        with tempfile.TemporaryDirectory(prefix="ma-bench-") as workdir:
+            os.chdir(workdir); main.console.quiet = quiet
+            options = dict(use_cache=False, parser=parser, site_root=site_root, rate_limits=rate_limits or E2E_RATE_LIMITS, retry_delay=retry_delay)
+            started, started_cpu = time.perf_counter(), time.process_time()
+            if use_async: main.run_scraper_async(concurrency=concurrency, **options)
+            else: main.run_scraper(**options)
+            wall, cpu = time.perf_counter() - started, time.process_time() - started_cpu
+            decisions = 0
+            if os.path.exists(main.OUTPUT_DATA_FILE):
+                with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: decisions = sum(1 for _ in f)
+            pdfs = len(os.listdir(main.OUTPUT_PDF_DIR)) if os.path.isdir(main.OUTPUT_PDF_DIR) else 0
+            os.chdir(cwd)
+        server_stats = requests.get(f"{site_root}{STATS_PATH}", timeout=10).json()
+    finally:
+        os.chdir(cwd); main.console.quiet = was_quiet
+        server.terminate(); server.join()
+    pdf_requests = server_stats["by_type"].get("pdf", 0)
+    html_requests = server_stats["requests"] - pdf_requests
+    peak_rss = _peak_rss_bytes()
+    return {
+        "mode": f"async x{concurrency}" if use_async else "sync", "parser": parser,
+        "expected_decisions": MockDataset(**dataset_options).total_decisions(), "decisions": decisions, "pdfs": pdfs,
+        "wall_sec": round(wall, 2), "decisions_per_min": round(decisions / wall * 60, 1) if wall else 0.0,
+        "requests": server_stats["requests"], "html_requests": html_requests, "pdf_requests": pdf_requests,
+        "requests_per_decision": round(html_requests / decisions, 3) if decisions else None,
+        "cpu_sec": round(cpu, 2), "cpu_ms_per_decision": round(cpu * 1000 / decisions, 2) if decisions else None,
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1) if peak_rss else None,
+        "server": server_stats,
+    }
+
+
+def _print_e2e_result(result, baseline=None):
+    table = Table(title=f"End-to-end benchmark ({result['mode']}, {result['parser']})")
+    table.add_column("Metric"); table.add_column("Value", justify="right")
+    if baseline: table.add_column("vs baseline", justify="right")
+    for key in ("decisions", "expected_decisions", "pdfs", "wall_sec", "decisions_per_min", "requests", "html_requests",
+                "requests_per_decision", "cpu_sec", "cpu_ms_per_decision", "peak_rss_mb"):
+        row = [key, "-" if result[key] is None else f"{result[key]:,}"]
+        if baseline:
+            old = baseline.get(key)
+            if key in E2E_COMPARE_KEYS and old and result[key] is not None:
+                change = result[key] / old - 1
+                better = change >= 0 if key == "decisions_per_min" else change <= 0
+                row.append(f"[{'green' if better else 'red'}]{change:+.1%}[/]")
+            else: row.append("")
+        table.add_row(*row)
+    console.print(table)
+    console.log(f"Server responses: {result['server']['by_status']}")
+    if result["decisions"] != result["expected_decisions"]:
+        console.log(f"[yellow]Crawled {result['decisions']} of {result['expected_decisions']} decisions")
+
+
+def _load_baseline(path):
+    if not path: return None
+    with open(path, encoding="utf-8") as f: return json.load(f)["results"]
+
+
+def _save_results(path, name, results):
+    if not path: return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": name, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+    console.log(f"[green]Results saved to {path}")
+
+
+def run_parser_benchmark(args):
+    results = bench_parsers(args.backend, min_time=args.min_time, rounds=args.rounds, fixtures_dir=args.fixtures)
+    _print_parser_results(results, _load_baseline(args.compare))
+    _save_results(args.json, "parsers", results)
+
+
+def run_e2e_benchmark(args):
+    dataset_options = dict(courts=args.courts, years=args.years, categories=args.categories, classifications=args.classifications,
+                           decisions=args.decisions, month_links=args.month_links, pdf_bytes=args.pdf_bytes)
+    server_options = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+                          throttle_every=args.throttle_every, throttle_burst=args.throttle_burst, retry_after=args.retry_after)
+    rate_limits = {kind: {**budget, "rate": args.rate, "max_rate": max(budget["max_rate"], args.rate)} for kind, budget in E2E_RATE_LIMITS.items()}
+    result = bench_e2e(dataset_options, server_options, use_async=args.use_async, concurrency=args.concurrency, parser=args.parser,
+                       rate_limits=rate_limits, retry_delay=args.retry_delay, quiet=not args.verbose)
+    _print_e2e_result(result, _load_baseline(args.compare))
+    _save_results(args.json, "e2e", result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Mahkamah Agung scraper")
+    commands = parser.add_subparsers(dest="command", required=True)
+    parsers = commands.add_parser("parsers", help="Parse the tests/fixtures corpus with every backend (pages/sec, memory)")
+    parsers.add_argument("--backend", action="append", choices=sorted(PARSER_BACKENDS), help="Backend to run (repeatable, default: all)")
+    parsers.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per timed batch")
+    parsers.add_argument("--rounds", type=int, default=3, help="Timed batches per extractor; the best one is reported")
+    parsers.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of *.html fixture pages")
+    parsers.add_argument("--json", metavar="PATH", help="Write results as JSON for later --compare")
+    parsers.add_argument("--compare", metavar="PATH", help="Show pages/sec change against a previous --json run")
+    parsers.set_defaults(run=run_parser_benchmark)
+    e2e = commands.add_parser("e2e", help="Crawl a local MockPutusanServer with main.py (decisions/min, requests/decision, CPU, RSS)")
+    e2e.add_argument("--courts", type=int, default=3)
+    e2e.add_argument("--years", type=int, default=2)
+    e2e.add_argument("--categories", type=int, default=2)
+    e2e.add_argument("--classifications", type=int, default=2)
+    e2e.add_argument("--decisions", type=int, default=30, help="Average decisions per classification")
+    e2e.add_argument("--month-links", action="store_true", help="Serve month-filtered listings from the month card")
+    e2e.add_argument("--pdf-bytes", type=int, default=4096)
+    e2e.add_argument("--latency", type=float, default=0.02, help="Server-side seconds per response")
+    e2e.add_argument("--jitter", type=float, default=0.0)
+    e2e.add_argument("--error-rate", type=float, default=0.0)
+    e2e.add_argument("--error-status", type=int, default=500)
+    e2e.add_argument("--throttle-every", type=int, default=0, help="Start a burst of 429s every N requests")
+    e2e.add_argument("--throttle-burst", type=int, default=0)
+    e2e.add_argument("--retry-after", type=int, default=1)
+    e2e.add_argument("--async", dest="use_async", action="store_true", help="Benchmark run_scraper_async instead of run_scraper")
+    e2e.add_argument("--concurrency", type=int, default=main.CONCURRENCY)
+    e2e.add_argument("--parser", choices=sorted(PARSER_BACKENDS), default=main.PARSER_BACKEND)
+    e2e.add_argument("--rate", type=float, default=E2E_RATE_LIMITS["html"]["rate"], help="Initial requests/sec for the AIMD limiter")
+    e2e.add_argument("--retry-delay", type=float, default=1, help="Seconds before retrying a failed (non-429) request")
+    e2e.add_argument("--verbose", action="store_true", help="Show the crawler's own progress output")
+    e2e.add_argument("--json", metavar="PATH", help="Write the result as JSON for later --compare")
+    e2e.add_argument("--compare", metavar="PATH", help="Show the change against a previous --json run")
+    e2e.set_defaults(run=run_e2e_benchmark)
+    args = parser.parse_args()
+    args.run(args)
@@ -1,161 +1,402 @@
 # main.py
+import argparse
+import asyncio
 import json
+import multiprocessing
 import os
-import re
+import socket
 import time
-from urllib.parse import urlparse
 
-import requests
 from rich.console import Console
+from rich.markup import escape
 from rich.panel import Panel
 from rich.progress import (
     Progress, BarColumn, TextColumn, TimeRemainingColumn,
     TimeElapsedColumn, MofNCompleteColumn
 )
+from rich.table import Table
 
+from AsyncMahkamahAgungScraper import AsyncMahkamahAgungScraper
+from CrawlEngine import CrawlEngine, CrawlNode, LEVELS
+from CrawlMetrics import CrawlMetrics
+from CrawlPlanner import COURT_ORDERS, YEAR_ORDERS, CrawlPlanner
+from DeltaTracker import DeltaTracker
+from DocumentStore import DocumentStore
+from FieldProjection import DETAIL_FIELDS, LISTING_FIELDS, FieldProjection
+from FrontierStore import FrontierStore
+from HttpTransport import HttpTransport
+from JsonlSink import COMPRESSIONS, PARTITIONS, JsonlSink, iter_output
 from MahkamahAgungScraper import MahkamahAgungScraper
+from ParserBackends import PARSER_BACKENDS
+from ParquetExporter import ParquetExporter, export_parquet
+from PdfDownloader import PdfDownloader
+from PdfTextExtractor import PdfTextExtractor
+from RateLimiter import AimdRateLimiter
+from ResponseCache import ResponseCache
+from RetryPolicy import RetryPolicy
+from SearchIndex import SearchIndex
+from SeenIndex import SeenIndex
+from ShardCoordinator import SHARD_LEVELS, ShardCoordinator
+from StageProfiler import StageProfiler
+from StateJournal import StateJournal
 
 # --- Configuration ---
-STATE_FILE = "scrape_state.json"
-COURT_LIST_CACHE_FILE = "court_list_cache.json"
+STATE_DB_FILE = "crawl_state.sqlite3" # SQLite (WAL) crawl frontier + resume state
+STATE_FILE = "scrape_state.json" # Legacy JSON state, migrated into STATE_DB_FILE on first load
+COURT_LIST_CACHE_FILE = "court_list_cache.jsonl" # Append-only journal, one checkpoint per fetched page
+LEGACY_COURT_LIST_CACHE_FILE = "court_list_cache.json"
 OUTPUT_DATA_FILE = "mahkamah_agung_decisions.jsonl"
 OUTPUT_PDF_DIR = "output_data/pdfs"
-TARGET_COURT_LIST_URL = "https://putusan3.mahkamahagung.go.id/pengadilan/index/ditjen/umum.html"
+OUTPUT_FLUSH_RECORDS = 100 # Decisions buffered before a batched write
+OUTPUT_FLUSH_INTERVAL = 5.0 # ...or seconds since the last write
+OUTPUT_FSYNC = "batch" # "batch" (fsync each write), "close" or "never"
+OUTPUT_ROTATE_BYTES = None # e.g. 256 * 1024 * 1024 to rotate into numbered segments
+OUTPUT_PARTITION = None # None, "court" or "court_year": one segment series per court (and year)
+OUTPUT_COMPRESSION = None # None, "gzip" or "zstd" (optional zstandard package)
+DELTA_FILE = "crawl_delta.sqlite3" # Subtree counts + listing upload high-water marks kept across runs (--delta)
+SEEN_INDEX_FILE = "seen_decisions.sqlite3" # Decisions already in the output (Bloom filter + exact set); their details are not fetched again
+USE_SEEN_INDEX = True
+OUTPUT_PARQUET_DIR = None # e.g. "output_data/parquet": also stream decisions into Parquet (optional pyarrow package)
+PARQUET_PARTITION = "court_year" # Hive directories court=<code>/year=<year>
+PARQUET_ROW_GROUP = 50_000 # Rows per row group
+METRICS_PORT = None # e.g. 9108: serve Prometheus /metrics (and /metrics.json) on METRICS_HOST
+METRICS_HOST = "127.0.0.1"
+METRICS_FILE = None # e.g. "crawl_metrics.json": JSON snapshot rewritten every METRICS_INTERVAL seconds
+METRICS_INTERVAL = 30
+HTTP_CACHE_DIR = "http_cache"
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+SITE_ROOT = MahkamahAgungScraper.SITE_ROOT # Override with --site-root, e.g. a local MockPutusanServer
+TARGET_COURT_LIST_PATH = MahkamahAgungScraper.COURT_LIST_PATH
 MAX_COURTS_TO_PROCESS = None
-REQUEST_DELAY = 1
+RATE_LIMITS = { # Initial/min/max requests per second, tuned live by AIMD (replaces fixed REQUEST_DELAY sleeps)
+    "html": {"rate": 2.0, "min_rate": 0.2, "max_rate": 10.0},
+    "pdf": {"rate": 1.0, "min_rate": 0.1, "max_rate": 4.0},
+}
+RETRY_DELAY = 10 # Base of the exponential backoff (full jitter)
+RETRY_MAX_ATTEMPTS = 5 # Per request; 4xx other than 408/425/429 are never retried
+RETRY_MAX_THROTTLED = 50 # Per request: 429/503 answers the rate limiter paces, then the URL is dead-lettered too
+DEAD_LETTER_FILE = "dead_letters.jsonl" # URLs given up on (permanent errors, attempts or retry budget exhausted)
+HTTP2 = False # Multiplex requests over one HTTP/2 connection per host (optional httpx[http2] package)
+HTTP_POOL_CONNECTIONS = 4 # Hosts whose connection pools are kept
+HTTP_POOL_SIZE = 16 # Keep-alive connections per host for HTML pages (PDFs: one per PDF worker, in a separate pool)
+PDF_WORKERS = 4 # Download threads of the PDF stage (separate from crawl concurrency)
+PDF_BANDWIDTH = None # Bytes/sec budget for all PDF transfers, e.g. 2_000_000; None = unlimited
+PDF_STORE = False # Content-addressed OUTPUT_PDF_DIR: objects/<ab>/<cd>/<sha256>.pdf + URL index (identical documents stored once, no directory scans)
+DOWNLOAD_ZIPS = False # Also download the decisions' ZIP archives (download_link_zip)
+EXTRACT_TEXT = False # Extract the text of every downloaded PDF on a process pool (optional pypdf package)
+TEXT_OUTPUT_FILE = "mahkamah_agung_decisions.text.jsonl" # One record per decision PDF: decision_url, pdf_file, pages, text
+TEXT_WORKERS = None # Extraction processes; None = one per core
+TEXT_TIMEOUT = 60 # Seconds per PDF before it is recorded as failed
+TEXT_MEMORY_MB = 1024 # Address-space cap of each extraction process
+SEARCH_INDEX_FILE = "decisions_search.sqlite3" # SQLite FTS5 index over decisions and PDF text (--build-index, --search)
+SEARCH_INDEX = False # Keep SEARCH_INDEX_FILE up to date while crawling
+CONCURRENCY = 8
+COURT_ORDER = "site" # Concurrent engine only: "largest" / "smallest" courts first (by jumlah_putusan)
+YEAR_ORDER = "site" # ...and "recent" / "oldest" years first
+FIELDS = None # Decision fields to produce, e.g. "listing" or ["title", "putus_date", "hakim_ketua"]; None = all. Detail pages are only fetched for fields the listing lacks
+DEFER_DETAILS = False # Concurrent engine: fetch detail pages only after all listing work
+PARSER_BACKEND = "lxml" # "bs4" is the slower reference implementation
+COORDINATOR_FILE = "crawl_shards.sqlite3" # Shard leases for --workers / --worker (SQLite, shared by all worker processes)
+SHARD_LEASE = 120 # Seconds a worker may go without heartbeat before its unit is reassigned
+SHARD_POLL = 5 # Seconds an idle worker waits for leased units to finish or expire
+WORKER_SETTINGS = ("HTTP2", "FIELDS", "DEFER_DETAILS", "PDF_STORE", "DOWNLOAD_ZIPS") # Settings (set by the CLI) that run_sharded passes on to its worker processes
 
 # --- Global State Variable ---
 current_state = {} # Stores LAST COMPLETED index
+state_store = None # FrontierStore holding current_state and the --async frontier
 
-# --- Helper Functions (ensure_dir, load_state, save_state, load_court_list_cache, save_court_list_cache, append_data, _download_pdf_main) ---
+# --- Helper Functions (ensure_dir, load_state, save_state, load_court_list_cache, save_court_list_cache, _make_sink) ---
 # (These remain the same as the previous version - saving state frequently during list fetch)
 console = Console()
 def ensure_dir(directory_path):
-    if not os.path.exists(directory_path): os.makedirs(directory_path); console.log(f"[cyan]Created dir:[/cyan] {directory_path}")
+    if not os.path.exists(directory_path): os.makedirs(directory_path, exist_ok=True); console.log(f"[cyan]Created dir:[/cyan] {directory_path}") # exist_ok: shard workers race here
 
-def load_state(filename=STATE_FILE):
+def _open_state_store(db_file=STATE_DB_FILE):
+    global state_store
+    if state_store is None or os.path.abspath(state_store.path) != os.path.abspath(db_file): state_store = FrontierStore(db_file, console=console)
+    return state_store
+
+def load_state(filename=STATE_FILE, db_file=STATE_DB_FILE):
     global current_state
-    if os.path.exists(filename):
+    store = _open_state_store(db_file)
+    if os.path.exists(filename) and store.get_meta("state") is None: # One-time migration of the legacy JSON state
         try:
-            with open(filename, 'r', encoding='utf-8') as f: current_state = json.load(f)
-            console.log(f"[yellow]Resuming state (last completed):[/yellow]", current_state)
-            return current_state
+            with open(filename, 'r', encoding='utf-8') as f: store.set_meta("state", json.load(f))
+            os.replace(filename, f"{filename}.migrated"); console.log(f"[cyan]Migrated {filename} into {db_file}[/cyan]")
         except (json.JSONDecodeError, IOError) as e:
             console.log(f"[red]Err loading state {filename}: {e}. Starting fresh.[/red]")
             try: os.rename(filename, f"{filename}.corrupted_{int(time.time())}")
             except OSError: pass
-            current_state = {}; return current_state
-    current_state = {}; return current_state
+    current_state = store.get_meta("state", {})
+    if current_state: console.log(f"[yellow]Resuming state (last completed):[/yellow]", current_state)
+    return current_state
 
-def save_state(filename=STATE_FILE):
-    global current_state; state_to_save = current_state.copy()
-    try:
-        if os.path.exists(filename): # Backup logic
-            backup_filename = f"{filename}.bak"
-            try: os.replace(filename, backup_filename)
-            except OSError:
-                 if os.path.exists(backup_filename): os.remove(backup_filename)
-                 os.rename(filename, backup_filename)
-        with open(filename, 'w', encoding='utf-8') as f: json.dump(state_to_save, f, indent=4, ensure_ascii=False)
-        # console.log(f"[grey70]State saved: {state_to_save}[/grey70]")
+def save_state():
+    try: _open_state_store().set_meta("state", current_state) # Single row upsert, atomic under WAL
     except Exception as e: console.log(f"[red]Err saving state: {e}[/red]")
 
 def load_court_list_cache(cache_file=COURT_LIST_CACHE_FILE):
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'r', encoding='utf-8') as f: courts = json.load(f)
-            console.log(f"[cyan]Loaded {len(courts)} courts from cache: {cache_file}[/cyan]"); return courts
-        except (json.JSONDecodeError, IOError) as e:
-            console.log(f"[red]Err loading court cache {cache_file}: {e}. Re-fetching.[/red]")
-            try: os.remove(cache_file)
-            except OSError: pass
-    return []
-
-def save_court_list_cache(court_list, cache_file=COURT_LIST_CACHE_FILE):
+    # Returns (journal, courts, last court list page fetched)
+    cache = StateJournal(cache_file, key=lambda court: court.get('link_pengadilan'), console=console)
     try:
-        with open(cache_file, 'w', encoding='utf-8') as f: json.dump(court_list, f, ensure_ascii=False)
-        # console.log(f"[grey70]Court cache saved ({len(court_list)} items)[/grey70]")
-    except IOError as e: console.log(f"[red]Err saving court cache {cache_file}: {e}[/red]")
+        checkpoint = cache.load()
+        if checkpoint is None and os.path.exists(LEGACY_COURT_LIST_CACHE_FILE): # One-time import of the old whole-list cache
+            with open(LEGACY_COURT_LIST_CACHE_FILE, 'r', encoding='utf-8') as f: legacy_courts = json.load(f)
+            cache.append(legacy_courts, {"last_page": current_state.get('court_list_last_page_fetched', 0)}); os.remove(LEGACY_COURT_LIST_CACHE_FILE)
+            checkpoint = cache.checkpoint
+        courts = list(cache.iter_records())
+        if courts: console.log(f"[cyan]Loaded {len(courts)} courts from cache: {cache_file}[/cyan]")
+        return cache, courts, (checkpoint or {}).get('last_page', 0)
+    except (json.JSONDecodeError, IOError) as e:
+        console.log(f"[red]Err loading court cache {cache_file}: {e}. Re-fetching.[/red]")
+        try: cache.remove()
+        except OSError: pass
+    return cache, [], 0
 
-def append_data(data_record, filename=OUTPUT_DATA_FILE):
-    try:
-        with open(filename, 'a', encoding='utf-8') as f: json.dump(data_record, f, ensure_ascii=False); f.write('\n')
-    except IOError as e: console.log(f"[red]Err appending data {filename}: {e}[/red]")
+def save_court_list_cache(cache, courts_on_page, page_num):
+    try: cache.append(courts_on_page, {"last_page": page_num}) # Only the new page is written
+    except IOError as e: console.log(f"[red]Err saving court cache {cache.path}: {e}[/red]")
 
-def _download_pdf_main(scraper_instance, url, output_dir):
-    if not url: return None; filepath = None
-    try:
-        parsed_path = url.split('/')[-1]; filename = f"{parsed_path}.pdf" if not parsed_path.lower().endswith('.pdf') else parsed_path
-        filename = re.sub(r'[\\/*?:"<>|]', "_", filename); max_len=150
-        if len(filename) > max_len: name, ext = os.path.splitext(filename); filename = name[:max_len - len(ext)] + ext
-        filepath = os.path.join(output_dir, filename)
-        if os.path.exists(filepath) and os.path.getsize(filepath) > 1000: return filepath
-        response = scraper_instance.session.get(url, stream=True, timeout=scraper_instance.timeout + 30); response.raise_for_status()
-        with open(filepath, 'wb') as pdf_file:
-            for chunk in response.iter_content(chunk_size=8192 * 4): pdf_file.write(chunk)
-        console.log(f"[green]PDF downloaded:[/green] {os.path.basename(filepath)}"); return filepath
-    except requests.exceptions.RequestException as e:
-        if isinstance(e, requests.exceptions.HTTPError) and e.response.status_code == 404: console.print(f"[yellow]PDF 404: {url}[/yellow]")
-        else: console.print(f"[red]Failed DL PDF from {url}: {e}[/red]")
-        if filepath and os.path.exists(filepath):
-             try: os.remove(filepath)
-             except OSError: pass
-        return None
-    except Exception as e: console.print(f"[red]Unexpected PDF DL err from {url}: {e}[/red]"); return None
-# --- End Helpers ---
+def _make_sink(path=OUTPUT_DATA_FILE, plain=False):
+    # plain: one uncompressed file (per-worker shard outputs, which merge_outputs joins), deduplicated in memory
+    index = None
+    if USE_SEEN_INDEX and not plain: index = SeenIndex(SEEN_INDEX_FILE, console=console); index.sync(path)
+    return JsonlSink(path, flush_records=OUTPUT_FLUSH_RECORDS, flush_interval=OUTPUT_FLUSH_INTERVAL, fsync=OUTPUT_FSYNC,
+                     rotate_bytes=None if plain else OUTPUT_ROTATE_BYTES, partition=None if plain else OUTPUT_PARTITION,
+                     compression=None if plain else OUTPUT_COMPRESSION, index=index,
+                     mirror=None if plain else [_make_parquet_exporter() if OUTPUT_PARQUET_DIR else None, _make_search_index(path) if SEARCH_INDEX else None], console=console)
 
+def _make_parquet_exporter(out_dir=None):
+    return ParquetExporter(out_dir or OUTPUT_PARQUET_DIR, partition_by=PARQUET_PARTITION, row_group_size=PARQUET_ROW_GROUP, console=console)
 
-# --- Main Scraping Logic ---
-def run_scraper():
+def _make_search_index(path=OUTPUT_DATA_FILE):
+    # Live index (the sink's mirror): catches up with the output first; PDF text written meanwhile is indexed when the sink closes
+    index = SearchIndex(SEARCH_INDEX_FILE, console=console)
+    index.follow(path); index.sync(TEXT_OUTPUT_FILE)
+    return index
+
+def fetch_all_courts(scraper, progress):
     global current_state
-    ensure_dir(OUTPUT_PDF_DIR)
-    current_state = load_state()
-    scraper = MahkamahAgungScraper(timeout=60, retry_delay=10)
+    last_page_courts = current_state.get('court_list_total_pages', None)
+    court_list_url = f"{scraper.site_root}{TARGET_COURT_LIST_PATH}"
+    try: # Fetch court list pages with state
+        if last_page_courts is None:
+            console.log(f"Fetching page 1 court list for total pages...")
+            first_page_html = scraper._fetch_page(1, url=court_list_url)
+            if not first_page_html: raise Exception("Failed fetch page 1 for total pages")
+            last_page_courts = scraper.get_last_page(first_page_html) or 1
+            current_state['court_list_total_pages'] = last_page_courts; save_state()
+            console.log(f"Found {last_page_courts} pages of courts.")
+        else: console.log(f"Resuming court list fetch (Total pages: {last_page_courts})")
+        court_cache, all_courts, last_page_fetched = load_court_list_cache()
+        start_fetch_page = last_page_fetched + 1
+        if start_fetch_page <= last_page_courts:
+            list_page_task = progress.add_task(f"[magenta]Fetching court pages ({start_fetch_page}/{last_page_courts})", total=last_page_courts, completed=start_fetch_page - 1)
+            for page_num in range(start_fetch_page, last_page_courts + 1):
+                progress.update(list_page_task, description=f"[magenta]Fetching court list page ({page_num}/{last_page_courts})")
+                page_url = scraper.page_url(court_list_url, page_num)
+                try:
+                    courts_on_page = scraper.get_list_courts(url=page_url)
+                    if courts_on_page: all_courts.extend(courts_on_page)
+                    current_state['court_list_last_page_fetched'] = page_num
+                    save_court_list_cache(court_cache, courts_on_page, page_num); save_state() # Save after each page fetch
+                    progress.advance(list_page_task)
+                except Exception as fetch_err: console.print(f"[red]Error fetching court list page {page_num}: {fetch_err}. Stopping list fetch.[/red]"); raise fetch_err
+            progress.remove_task(list_page_task)
+        else: console.log("[green]Court list already fully fetched.[/green]")
+        court_cache.close()
+        if not all_courts: raise Exception("Failed to fetch or load any courts")
+        return all_courts
+    except Exception as e: console.print(f"[red]Fatal Error fetching court list: {e}"); return None
+
+def _cleanup_state_files():
+    global state_store
+    try: # Cleanup
+        for path in (COURT_LIST_CACHE_FILE, LEGACY_COURT_LIST_CACHE_FILE):
+            if os.path.exists(path): os.remove(path)
+        if state_store is not None: state_store.close(); state_store = None
+        for path in (STATE_DB_FILE, f"{STATE_DB_FILE}-wal", f"{STATE_DB_FILE}-shm", f"{STATE_FILE}.migrated"):
+            if os.path.exists(path): os.remove(path)
+        console.log("[green]State and cache files removed on success.[/green]")
+    except OSError as e: console.log(f"[yellow]Could not remove state/cache: {e}[/yellow]")
+
+def _make_rate_limiter(progress, rate_limits=RATE_LIMITS):
+    rate_task_id = progress.add_task(f"[blue]Rate", total=None)
+    def report(*_): progress.update(rate_task_id, description=f"[blue]Rate: {limiter.describe()}")
+    limiter = AimdRateLimiter(budgets=rate_limits, on_change=report, console=console); report()
+    return limiter
+
+def _make_cache(use_cache):
+    if not use_cache: return None
+    cache = ResponseCache(HTTP_CACHE_DIR, max_bytes=HTTP_CACHE_MAX_BYTES, console=console)
+    console.log(f"[cyan]HTTP cache:[/cyan] {HTTP_CACHE_DIR} ({cache.snapshot()['entries']} entries)")
+    return cache
+
+def _make_retry_policy(retry_delay):
+    return RetryPolicy(max_attempts=RETRY_MAX_ATTEMPTS, max_throttled=RETRY_MAX_THROTTLED, base_delay=retry_delay, dead_letter=DEAD_LETTER_FILE, console=console)
+
+def _make_transport(name, pool_size):
+    return HttpTransport(name, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=pool_size, http2=HTTP2, console=console)
 
-    progress = Progress(
+def _make_scraper(progress, use_cache, parser, site_root, rate_limits, retry_delay, metrics=None):
+    return MahkamahAgungScraper(timeout=60, retry_delay=retry_delay, rate_limiter=_make_rate_limiter(progress, rate_limits), cache=_make_cache(use_cache),
+                                parser=parser, site_root=site_root, metrics=metrics, retry_policy=_make_retry_policy(retry_delay), transport=_make_transport("html", HTTP_POOL_SIZE), console=console)
+
+def _make_text_extractor(force=False):
+    if not (EXTRACT_TEXT or force): return None
+    extractor = PdfTextExtractor(TEXT_OUTPUT_FILE, workers=TEXT_WORKERS, timeout=TEXT_TIMEOUT, memory_mb=TEXT_MEMORY_MB, console=console)
+    console.log(f"[cyan]PDF text:[/cyan] {TEXT_OUTPUT_FILE} ({extractor.workers} processes)")
+    return extractor
+
+def _make_pdf_store():
+    return DocumentStore(OUTPUT_PDF_DIR, console=console) if PDF_STORE else None
+
+def _make_pdf_downloader(scraper, extractor=None):
+    # extractor: PdfTextExtractor fed with every PDF once it is on disk
+    return PdfDownloader(OUTPUT_PDF_DIR, workers=PDF_WORKERS, bandwidth=PDF_BANDWIDTH, rate_limiter=scraper.rate_limiter, headers=scraper.headers,
+                         timeout=scraper.timeout + 30, retry_delay=scraper.retry_delay, metrics=scraper.metrics, retry_policy=scraper.retry_policy,
+                         transport=_make_transport("pdf", PDF_WORKERS), on_downloaded=extractor and extractor.submit, store=_make_pdf_store(),
+                         archives=DOWNLOAD_ZIPS, console=console)
+
+def _make_projection(fields, defer_details=False):
+    projection = FieldProjection(fields, defer_details)
+    if not projection.needs_detail: console.log("[cyan]Listing-only fields: no detail pages (and no PDF links) are fetched")
+    return projection
+
+def _make_metrics():
+    # Optional /metrics endpoint and periodic JSON snapshot; None when both are off
+    if not (METRICS_PORT or METRICS_FILE): return None
+    metrics = CrawlMetrics(console=console)
+    if METRICS_PORT: metrics.serve(METRICS_PORT, METRICS_HOST)
+    if METRICS_FILE: metrics.write_snapshots(METRICS_FILE, METRICS_INTERVAL); console.log(f"[cyan]Metrics snapshot:[/cyan] {METRICS_FILE} every {METRICS_INTERVAL}s")
+    return metrics
+
+def _watch_metrics(scraper, pdfs, sink, extractor=None):
+    # Output, queue and limiter numbers are read from the components' own stats whenever metrics are scraped
+    if scraper.metrics is None: return
+    def collect():
+        yield "decisions_total", "counter", {}, sink.stats["written"] + sink.backlog()
+        yield "output_bytes_total", "counter", {}, sink.stats["bytes"]
+        yield "pdf_bytes_total", "counter", {}, pdfs.stats["bytes"]
+        for result in ("downloaded", "resumed", "skipped", "failed"): yield "pdf_downloads_total", "counter", {"result": result}, pdfs.stats[result]
+        yield "queue_depth", "gauge", {"queue": "output_buffer"}, sink.backlog()
+        yield "queue_depth", "gauge", {"queue": "pdf"}, pdfs.backlog()
+        if extractor: yield "queue_depth", "gauge", {"queue": "pdf_text"}, extractor.backlog()
+        if state_store is not None: yield "queue_depth", "gauge", {"queue": "frontier"}, state_store.remaining()
+        for kind, stats in scraper.rate_limiter.snapshot().items(): yield "rate_limit_requests_per_second", "gauge", {"kind": kind}, stats["rate"]
+        yield "dead_letters_total", "counter", {}, scraper.retry_policy.stats["given_up"]
+        yield "circuit_breaker_opened_total", "counter", {}, scraper.retry_policy.stats["breaker_opened"]
+        for transport in (scraper.transport, pdfs.transport):
+            if transport is None: continue
+            stats = transport.snapshot()
+            yield "http_connections_opened_total", "counter", {"pool": transport.name}, stats["connections"]
+            yield "http_wire_bytes_total", "counter", {"pool": transport.name}, stats["wire_bytes"]
+            yield "http_connection_reuse_ratio", "gauge", {"pool": transport.name}, stats["reuse_ratio"]
+    scraper.metrics.collect(collect)
+
+def _finish_pdfs(pdfs, extractor=None):
+    if backlog := pdfs.backlog(): console.log(f"[cyan]Waiting for {backlog} queued PDF downloads...")
+    pdfs.close()
+    if extractor:
+        if backlog := extractor.backlog(): console.log(f"[cyan]Waiting for {backlog} PDF text extractions...")
+        extractor.close()
+
+def _summary(scraper, decisions=0, pdfs=None, sink=None, projection=None, extractor=None):
+    requests_made = scraper.stats['requests']
+    lines = [f"Requests: {requests_made} sent, {scraper.stats['shared_hits']} shared in-run"
+             + (f", {requests_made / decisions:.2f} per decision ({decisions} decisions)" if decisions else ""),
+             f"Rate limiter: {scraper.rate_limiter.snapshot()}", f"Retries: {scraper.retry_policy.describe()}"]
+    if scraper.cache: lines.append(f"HTTP cache: {scraper.cache.snapshot()}")
+    lines.append(f"Connections: {'; '.join(t.describe() for t in (scraper.transport, pdfs and pdfs.transport) if t)}")
+    if projection: lines.append(f"Fields: {projection.describe()}")
+    if sink: lines.append(f"Output: {sink.describe()}")
+    if pdfs: lines.append(f"PDFs: {pdfs.describe()}")
+    if extractor: lines.append(f"PDF text: {extractor.describe()}")
+    return "\n".join(lines)
+
+def _make_progress():
+    return Progress(
         TextColumn("[progress.description]{task.description}", justify="right"),
         BarColumn(bar_width=None), TextColumn("[progress.percentage]{task.percentage:>3.1f}%"),
         MofNCompleteColumn(), TimeElapsedColumn(), TimeRemainingColumn(),
         console=console, expand=True
     )
 
+def _profile_stages(profiler, scraper, pdfs, sink, progress):
+    # --profile: time spans around each crawl stage (the objects are only wrapped when profiling)
+    profiler.wrap(scraper, "_request_page", "fetch")
+    profiler.wrap(scraper.rate_limiter, "acquire", "rate_limit_wait")
+    for name in dir(scraper.parser):
+        if name.startswith("parse_"): profiler.wrap(scraper.parser, name, f"parse:{name[6:]}")
+    profiler.wrap(sink, "write", "append_data"); profiler.wrap(sink, "flush", "append_data:flush")
+    profiler.wrap(state_store, "set_meta", "save_state")
+    profiler.wrap(pdfs, "download", "pdf_download")
+    profiler.wrap(progress.live, "refresh", "render")
+    return profiler.start()
+# --- End Helpers ---
+
+
+# --- Main Scraping Logic ---
+def run_scraper(use_cache=True, parser=PARSER_BACKEND, site_root=SITE_ROOT, rate_limits=RATE_LIMITS, retry_delay=RETRY_DELAY, profiler=None):
+    # profiler: StageProfiler for --profile (per-stage breakdown printed at exit)
+    global current_state
+    ensure_dir(OUTPUT_PDF_DIR)
+    current_state = load_state()
+    progress = _make_progress()
+    scraper = _make_scraper(progress, use_cache, parser, site_root, rate_limits, retry_delay, _make_metrics())
+    extractor = _make_text_extractor()
+    pdfs = _make_pdf_downloader(scraper, extractor) # Downloads run in the background; the crawl only queues them
+    sink = _make_sink()
+    _watch_metrics(scraper, pdfs, sink, extractor)
+    projection = _make_projection(FIELDS, DEFER_DETAILS)
+    planner = CrawlPlanner(details=projection.needs_detail, progress=progress, console=console) # Site order: the resume cursor walks courts/years by index
+    if profiler: _profile_stages(profiler, scraper, pdfs, sink, progress)
+    decisions_written = 0
+
+    def crawl_page(decisions_on_page, source, decisions_task_id):
+        # Detail, append and PDF queueing for the decisions of one listing page; source: court/year/.../month and page_url
+        nonlocal decisions_written
+        for decision_idx, decision_summary in enumerate(decisions_on_page):
+            decision_link = decision_summary.get('link'); decision_title = decision_summary.get('title', '?Dec')
+            display_title = (decision_title[:35] + '...') if len(decision_title) > 38 else decision_title
+            dec_task_desc = f"            Decision {decision_idx+1}/{len(decisions_on_page)}: {display_title}"; progress.update(decisions_task_id, description=dec_task_desc)
+            if decision_link and sink.index is not None and sink.index.seen(decision_link, scraper.nomor_from_title(decision_title), source['court_code']): pass # Already in the output: no detail/PDF fetch
+            elif decision_link:
+                try:
+                    decision_detail = scraper.get_decision_detail(url=decision_link) if projection.needs_detail else scraper.listing_record(decision_summary)
+                    if decision_detail and projection.needs_detail and projection.fields is not None: decision_detail = {**scraper.listing_record(decision_summary), **decision_detail} # Mixed fields: listing-only ones from the row
+                    if decision_detail:
+                        scraper.add_source(decision_detail, {**source, "putus_date": decision_summary.get('putus_date'), "decision_link": decision_link})
+                        pdf_url = decision_detail.get('download_link_pdf')
+                        decisions_written += sink.write(projection.project(decision_detail, from_detail=projection.needs_detail))
+                        if pdf_url: pdfs.submit(pdf_url, decision_link)
+                        if pdfs.archives and (archive_url := decision_detail.get('download_link_zip')): pdfs.submit(archive_url, decision_link)
+                except Exception as e: console.print(f"[red]Err detail/DL ({decision_link}): {e}")
+            progress.advance(decisions_task_id); planner.advance() # Advance per decision attempt
+        progress.update(decisions_task_id, visible=False) # Hide when page decisions done
+
+    def retry_failed_pages():
+        # Listing pages that failed during the crawl (dead-lettered), fetched once more after the rest; pages failing again stay in the state for the next run
+        failed = current_state.get('failed_pages', [])
+        console.log(f"[yellow]Retrying {len(failed)} listing pages that failed during the crawl")
+        for source in list(failed):
+            decisions_task_id = progress.add_task(f"            Retry: page {source['page']} of {source['court_code']} {source['year']} {source['classification']}", total=1, start=False)
+            try:
+                decisions_on_page = scraper.get_listing_page(source['page_url'])['decisions'] if source['page'] == 1 else scraper.get_decision_list(url=source['page_url'])
+                progress.update(decisions_task_id, total=len(decisions_on_page or []), completed=0, start=True)
+            except Exception as e: console.print(f"[red]Err Decisions (retry {source['page_url']}): {e}"); progress.update(decisions_task_id, visible=False); continue
+            crawl_page(decisions_on_page or [], source, decisions_task_id)
+            failed.remove(source); sink.flush(); save_state()
+
     try:
         with progress:
             console.print(Panel(f"Starting scrape. State (last completed): {current_state}\nOutput: {OUTPUT_DATA_FILE}, PDFs: {OUTPUT_PDF_DIR}", title="Scraper Initialized", border_style="green"))
-            time.sleep(REQUEST_DELAY)
 
             # 1. Get Court List (with state saving during fetch)
             courts_task_id = progress.add_task("[green]Courts", total=1, start=False)
-            last_page_courts = current_state.get('court_list_total_pages', None)
-            try: # Fetch court list pages with state
-                if last_page_courts is None:
-                    console.log(f"Fetching page 1 court list for total pages...")
-                    first_page_html = scraper._fetch_page(1, url=TARGET_COURT_LIST_URL)
-                    if not first_page_html: raise Exception("Failed fetch page 1 for total pages")
-                    last_page_courts = scraper.get_last_page(first_page_html) or 1
-                    current_state['court_list_total_pages'] = last_page_courts; save_state()
-                    console.log(f"Found {last_page_courts} pages of courts.")
-                else: console.log(f"Resuming court list fetch (Total pages: {last_page_courts})")
-                all_courts = load_court_list_cache(); last_page_fetched = current_state.get('court_list_last_page_fetched', 0)
-                start_fetch_page = last_page_fetched + 1
-                if start_fetch_page <= last_page_courts:
-                    list_page_task = progress.add_task(f"[magenta]Fetching court pages ({start_fetch_page}/{last_page_courts})", total=last_page_courts, completed=start_fetch_page - 1)
-                    for page_num in range(start_fetch_page, last_page_courts + 1):
-                        progress.update(list_page_task, description=f"[magenta]Fetching court list page ({page_num}/{last_page_courts})")
-                        page_url = f"{TARGET_COURT_LIST_URL}?page={page_num}" if page_num > 1 else TARGET_COURT_LIST_URL
-                        try:
-                            courts_on_page = scraper.get_list_courts(url=page_url)
-                            if courts_on_page: all_courts.extend(courts_on_page)
-                            current_state['court_list_last_page_fetched'] = page_num
-                            save_court_list_cache(all_courts); save_state() # Save after each page fetch
-                            progress.advance(list_page_task)
-                            if page_num < last_page_courts: time.sleep(0.3)
-                        except Exception as fetch_err: console.print(f"[red]Error fetching court list page {page_num}: {fetch_err}. Stopping list fetch.[/red]"); raise fetch_err
-                    progress.remove_task(list_page_task)
-                else: console.log("[green]Court list already fully fetched.[/green]")
-                if not all_courts: raise Exception("Failed to fetch or load any courts")
-                last_completed_court = current_state.get('court_idx', -1); progress.update(courts_task_id, total=len(all_courts), completed=last_completed_court + 1, start=True)
-            except Exception as e: console.print(f"[red]Fatal Error fetching court list: {e}"); return
+            all_courts = fetch_all_courts(scraper, progress)
+            if not all_courts: return
+            last_completed_court = current_state.get('court_idx', -1); progress.update(courts_task_id, total=len(all_courts), completed=last_completed_court + 1, start=True)
 
             # ==============================================================
             # Main Processing Loops (Court -> Year -> Cat -> Class -> MONTH -> Page -> Decision)
@@ -163,6 +404,7 @@ def run_scraper():
             start_court_idx = current_state.get('court_idx', -1) + 1
             if start_court_idx >= len(all_courts): console.log("[green]All courts previously completed."); start_court_idx = len(all_courts)
             console.log(f"Starting main court processing from index: {start_court_idx}")
+            planner.plan_courts(all_courts[start_court_idx:]); console.log(planner.describe(rate_limits['html']['rate']))
 
             for court_idx in range(start_court_idx, len(all_courts)):
                 court = all_courts[court_idx]; loaded_court_idx = current_state.get('court_idx', -1)
@@ -174,19 +416,20 @@ def run_scraper():
                 court_skipped = False; court_code = None
                 if not current_court_link: court_skipped = True; console.log(f"[yellow]Skip Court (no link)")
                 else: # Extract code
-                    try: parsed_url=urlparse(current_court_link); p=[p for p in parsed_url.path.split('/') if p]; pc=p[-1].replace('.html','') if p else ''; court_code=pc if any(x in pc for x in ['pn-','pt-','pa-','ma-','tun-']) else None
-                    except Exception: pass
+                    court_code = scraper.extract_court_code(current_court_link)
                     if not court_code: court_skipped = True; console.log(f"[yellow]Skip Court (no code)")
+                    elif court.get('jumlah_putusan') == 0: court_skipped = True; console.log(f"[grey50]Skip Court (no decisions): {current_court_name}[/grey50]")
                 if court_skipped: current_state['court_idx'] = court_idx; save_state(); progress.advance(courts_task_id); continue
 
                 # --- Process Years ---
                 years_task_id = progress.add_task(f"  Years ({current_court_name})", total=1, start=False, visible=True)
                 yearly_decisions = []; start_year_idx = current_state.get('year_idx', -1) + 1
                 try:
-                    time.sleep(REQUEST_DELAY*0.8); yearly_decisions = scraper.get_court_yearly_decisions(court_code=court_code)
+                    yearly_decisions = scraper.get_court_yearly_decisions(court_code=court_code)
                     if not yearly_decisions: court_skipped = True; progress.update(years_task_id, visible=False); console.log(f"[grey50]No Years found for {current_court_name}[/grey50]")
                     else:
                         if start_year_idx >= len(yearly_decisions): start_year_idx = len(yearly_decisions)
+                        planner.plan_years(yearly_decisions, court.get('jumlah_putusan')) # Refines the global total from the year counts
                         progress.update(years_task_id, total=len(yearly_decisions), completed=start_year_idx, start=True)
                 except Exception as e: court_skipped = True; console.print(f"[red]Err Years: {e}"); progress.update(years_task_id, visible=False)
 
@@ -197,12 +440,13 @@ def run_scraper():
                         current_year = year_data.get('year', f'?Y {year_idx+1}'); year_link = year_data.get('link')
                         year_task_desc = f"  Year {year_idx+1}/{len(yearly_decisions)}: {current_year}"; progress.update(years_task_id, description=year_task_desc); year_skipped = False
                         if not year_link: year_skipped = True; console.log(f"[yellow]Skip Year (no link)")
+                        elif year_data.get('decision_count') == 0: year_skipped = True # Nothing below it to fetch
                         else:
                             # --- Process Categories ---
                             cats_task_id = progress.add_task(f"    Cats ({current_year})", total=1, start=False, visible=True)
                             categories = []; start_cat_idx = current_state.get('category_idx', -1) + 1
                             try:
-                                time.sleep(REQUEST_DELAY*0.8); categories = scraper.get_court_decision_categories_by_year(url=year_link)
+                                categories = scraper.get_court_decision_categories_by_year(url=year_link)
                                 if not categories: year_skipped = True; progress.update(cats_task_id, visible=False); console.log(f"[grey50]No Cats found for {current_year}[/grey50]")
                                 else:
                                     if start_cat_idx >= len(categories): start_cat_idx = len(categories)
@@ -221,7 +465,7 @@ def run_scraper():
                                         class_task_id = progress.add_task(f"      Class ({current_category})", total=1, start=False, visible=True)
                                         classifications = []; start_class_idx = current_state.get('classification_idx', -1) + 1
                                         try:
-                                            time.sleep(REQUEST_DELAY*0.8); classifications = scraper.get_decision_classifications(url=category_link)
+                                            classifications = scraper.get_decision_classifications(url=category_link)
                                             if not classifications: cat_skipped = True; progress.update(class_task_id, visible=False); console.log(f"[grey50]No Class found for {current_category}[/grey50]")
                                             else:
                                                 if start_class_idx >= len(classifications): start_class_idx = len(classifications)
@@ -236,73 +480,58 @@ def run_scraper():
                                                 class_task_desc = f"      Class {class_idx+1}/{len(classifications)}: {current_classification}"; progress.update(class_task_id, description=class_task_desc); class_skipped = False
                                                 if not classification_link: class_skipped = True; console.log(f"[yellow]Skip Class (no link)")
                                                 else:
-                                                    # --- Process MONTHS (New Step!) ---
+                                                    # --- Process MONTHS (one listing fetch gives months, pagination and page 1 rows) ---
                                                     months_task_id = progress.add_task(f"        Months ({current_classification[:15]}..)", total=1, start=False, visible=True)
-                                                    monthly_counts = []; start_month_idx = current_state.get('month_idx', -1) + 1
+                                                    month_targets = []; class_listing = None; start_month_idx = current_state.get('month_idx', -1) + 1
                                                     try:
-                                                        time.sleep(REQUEST_DELAY * 0.7) # Slightly less delay
-                                                        monthly_counts = scraper.get_monthly_decision_counts(url=classification_link)
-                                                        if not monthly_counts: class_skipped = True; progress.update(months_task_id, visible=False); console.log(f"[grey50]No Months found for {current_classification}[/grey50]")
-                                                        else:
-                                                            if start_month_idx >= len(monthly_counts): start_month_idx = len(monthly_counts)
-                                                            progress.update(months_task_id, total=len(monthly_counts), completed=start_month_idx, start=True)
+                                                        class_listing = scraper.get_listing_page(classification_link)
+                                                        if class_listing is None: raise Exception("Failed fetch classification listing")
+                                                        month_targets = scraper.month_listing_targets(class_listing['months'], classification_link)
+                                                        if start_month_idx >= len(month_targets): start_month_idx = len(month_targets)
+                                                        progress.update(months_task_id, total=len(month_targets), completed=start_month_idx, start=True)
                                                     except Exception as e: class_skipped = True; console.print(f"[red]Err Months: {e}"); progress.update(months_task_id, visible=False)
 
                                                     if not class_skipped:
-                                                        for month_idx in range(start_month_idx, len(monthly_counts)):
-                                                            month_data = monthly_counts[month_idx]; loaded_month_idx = current_state.get('month_idx', -1)
+                                                        for month_idx in range(start_month_idx, len(month_targets)):
+                                                            month_data = month_targets[month_idx]; loaded_month_idx = current_state.get('month_idx', -1)
                                                             if loaded_month_idx < month_idx - 1: current_state.pop('decision_page', None) # Clear page state for new month
-                                                            current_month_name = month_data.get('month', f'?Mon{month_idx+1}')
-                                                            month_task_desc = f"        Month {month_idx+1}/{len(monthly_counts)}: {current_month_name}"; progress.update(months_task_id, description=month_task_desc); month_skipped = False
+                                                            current_month_name = month_data.get('month'); month_link = month_data['link']
+                                                            month_task_desc = f"        Month {month_idx+1}/{len(month_targets)}: {current_month_name or 'All months'}"; progress.update(months_task_id, description=month_task_desc); month_skipped = False
 
-                                                            # --- Process Pages (using classification_link) ---
-                                                            pages_task_id = progress.add_task(f"          Pages ({current_month_name})", total=1, start=False, visible=True)
-                                                            last_page = 1;
+                                                            # --- Process Pages (month-filtered listing, or the classification listing once) ---
+                                                            pages_task_id = progress.add_task(f"          Pages ({current_month_name or current_classification[:15]})", total=1, start=False, visible=True)
+                                                            last_page = 1
                                                             start_page = current_state.get('decision_page', 0) + 1
+                                                            month_listing = class_listing if month_link == classification_link else None
                                                             try:
-                                                                # We still need pagination info from the classification link
-                                                                time.sleep(REQUEST_DELAY * 0.7)
-                                                                first_page_html_content = scraper._fetch_page(1, url=classification_link)
-                                                                if not first_page_html_content: raise Exception("Failed fetch page 1 for pagination")
-                                                                last_page = scraper.get_last_page(first_page_html_content) or 1
+                                                                if month_data.get('count') == 0: last_page = 0 # Empty month, nothing to fetch
+                                                                else:
+                                                                    if month_listing is None: month_listing = scraper.get_listing_page(month_link)
+                                                                    if month_listing is None: raise Exception("Failed fetch page 1 for pagination")
+                                                                    last_page = month_listing['last_page'] or 1
                                                                 if start_page > last_page: start_page = last_page + 1
                                                                 progress.update(pages_task_id, total=last_page, completed=start_page - 1, start=True)
                                                             except Exception as e: month_skipped = True; console.print(f"[red]Err Pages Info: {e}"); progress.update(pages_task_id, visible=False)
 
                                                             if not month_skipped:
                                                                 for page_num in range(start_page, last_page + 1):
-                                                                    page_task_desc = f"          Page {page_num}/{last_page} ({current_month_name})"; progress.update(pages_task_id, description=page_task_desc); page_skipped = False
-                                                                    page_url = f"{classification_link}?page={page_num}" if page_num > 1 else classification_link
+                                                                    page_task_desc = f"          Page {page_num}/{last_page} ({current_month_name or 'All months'})"; progress.update(pages_task_id, description=page_task_desc); page_skipped = False
+                                                                    page_url = scraper.page_url(month_link, page_num)
 
                                                                     # --- Process Decisions ---
                                                                     decisions_task_id = progress.add_task(f"            Decisions (Pg {page_num})", total=1, start=False, visible=True)
                                                                     decisions_on_page = []
                                                                     try:
-                                                                        time.sleep(REQUEST_DELAY*0.6); decisions_on_page = scraper.get_decision_list(url=page_url)
+                                                                        decisions_on_page = month_listing['decisions'] if page_num == 1 else scraper.get_decision_list(url=page_url)
                                                                         if not decisions_on_page: progress.update(decisions_task_id, visible=False) # No decisions is fine
                                                                         else: progress.update(decisions_task_id, total=len(decisions_on_page), completed=0, start=True)
                                                                     except Exception as e: page_skipped = True; console.print(f"[red]Err Decisions: {e}"); progress.update(decisions_task_id, visible=False)
 
-                                                                    if not page_skipped and decisions_on_page:
-                                                                        for decision_idx, decision_summary in enumerate(decisions_on_page):
-                                                                            # Get detail, append, download PDF (same as before)
-                                                                            decision_link = decision_summary.get('link'); decision_title = decision_summary.get('title', '?Dec')
-                                                                            display_title = (decision_title[:35] + '...') if len(decision_title) > 38 else decision_title
-                                                                            dec_task_desc = f"            Decision {decision_idx+1}/{len(decisions_on_page)}: {display_title}"; progress.update(decisions_task_id, description=dec_task_desc)
-                                                                            if decision_link:
-                                                                                try:
-                                                                                    time.sleep(REQUEST_DELAY*0.5); decision_detail = scraper.get_decision_detail(url=decision_link)
-                                                                                    if decision_detail:
-                                                                                        decision_detail['_source_court_name'] = current_court_name; decision_detail['_source_court_code'] = court_code; decision_detail['_source_year'] = current_year; decision_detail['_source_category'] = current_category; decision_detail['_source_classification'] = current_classification; decision_detail['_source_month'] = current_month_name; decision_detail['_source_decision_list_url'] = page_url; decision_detail['_source_decision_detail_url'] = decision_link; decision_detail['_scrape_timestamp'] = time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())
-                                                                                        append_data(decision_detail, OUTPUT_DATA_FILE)
-                                                                                        pdf_url = decision_detail.get('download_link_pdf')
-                                                                                        if pdf_url: time.sleep(REQUEST_DELAY*0.3); _download_pdf_main(scraper, pdf_url, OUTPUT_PDF_DIR)
-                                                                                except Exception as e: console.print(f"[red]Err detail/DL ({decision_link}): {e}")
-                                                                            progress.advance(decisions_task_id) # Advance per decision attempt
-                                                                        progress.update(decisions_task_id, visible=False) # Hide when page decisions done
+                                                                    source = {"court_name": current_court_name, "court_code": court_code, "year": current_year, "category": current_category, "classification": current_classification, "month": current_month_name, "page_url": page_url, "page": page_num}
+                                                                    if page_skipped: current_state.setdefault('failed_pages', []).append(source) # Retried after the crawl; the month's other pages still run
+                                                                    elif decisions_on_page: crawl_page(decisions_on_page, source, decisions_task_id)
                                                                     # --- End Decision Processing ---
-                                                                    current_state['decision_page'] = page_num; save_state(); progress.advance(pages_task_id)
-                                                                    if page_skipped: break # Exit page loop for this month
+                                                                    sink.flush(); current_state['decision_page'] = page_num; save_state(); progress.advance(pages_task_id) # Records before the checkpoint
                                                                 progress.update(pages_task_id, visible=False) # Hide page bar when month done
                                                             # --- End Page Processing ---
                                                             current_state['month_idx'] = month_idx; current_state.pop('decision_page', None); save_state(); progress.advance(months_task_id)
@@ -327,19 +556,343 @@ def run_scraper():
                 current_state['court_idx'] = court_idx; current_state.pop('year_idx', None); current_state.pop('category_idx', None); current_state.pop('classification_idx', None); current_state.pop('month_idx', None); current_state.pop('decision_page', None); save_state(); progress.advance(courts_task_id)
             # --- End Court Loop ---
 
+            if current_state.get('failed_pages'): retry_failed_pages()
+
             # --- Scraping Finished ---
             progress.update(courts_task_id, description="[bold green]All Courts Processed", completed=len(all_courts))
-            console.print(Panel("[bold green]Scraping process completed successfully![/bold green]", title="Finished", border_style="green"))
-            try: # Cleanup
-                if os.path.exists(COURT_LIST_CACHE_FILE): os.remove(COURT_LIST_CACHE_FILE)
-                if os.path.exists(STATE_FILE): os.remove(STATE_FILE)
-                if os.path.exists(f"{STATE_FILE}.bak"): os.remove(f"{STATE_FILE}.bak")
-                console.log("[green]State and cache files removed on success.[/green]")
-            except OSError as e: console.log(f"[yellow]Could not remove state/cache: {e}[/yellow]")
+            _finish_pdfs(pdfs, extractor); sink.close()
+            if failed_pages := current_state.get('failed_pages'): # Not complete: keep the state so the next run retries them
+                console.print(Panel(f"[bold yellow]Scraping finished with {len(failed_pages)} listing pages still failing[/bold yellow] (kept in {STATE_DB_FILE}; run again to retry them)\n{_summary(scraper, decisions_written, pdfs, sink, projection, extractor)}", title="Finished (incomplete)", border_style="yellow"))
+            else:
+                console.print(Panel(f"[bold green]Scraping process completed successfully![/bold green]\n{_summary(scraper, decisions_written, pdfs, sink, projection, extractor)}", title="Finished", border_style="green"))
+                _cleanup_state_files()
 
     except KeyboardInterrupt: console.print("\n[yellow]Interrupted. Saving final state...[/yellow]"); save_state(); console.print("[yellow]State saved. Exiting.[/yellow]")
     except Exception: console.print(f"\n[bold red]Unexpected error:[/bold red]"); console.print_exception(show_locals=False); console.print("[yellow]Attempting save state...[/yellow]"); save_state(); console.print("[red]State saved (if possible). Check logs.[/red]")
-    finally: console.print("[grey50]Scraper finished or exited.[/grey50]")
+    finally:
+        if pdfs.backlog(): console.print(f"[yellow]{pdfs.backlog()} PDF downloads not finished; .part files resume with --backfill-pdfs[/yellow]")
+        pdfs.close(wait=False, cancel=True); sink.close()
+        if extractor: extractor.close(wait=False)
+        if scraper.metrics: scraper.metrics.close()
+        if profiler: profiler.stop(); console.print(profiler.report())
+        console.print("[grey50]Scraper finished or exited.[/grey50]")
+
+
+# --- Concurrent Scraping Logic ---
+def run_scraper_async(concurrency=CONCURRENCY, level_limits=None, use_cache=True, parser=PARSER_BACKEND, site_root=SITE_ROOT,
+                      rate_limits=RATE_LIMITS, retry_delay=RETRY_DELAY, delta=False, court_order=COURT_ORDER, year_order=YEAR_ORDER):
+    # delta: only crawl subtrees whose counts changed since the last run (a full run records the baseline)
+    # court_order/year_order: which courts and years are claimed first (see CrawlPlanner)
+    global current_state
+    ensure_dir(OUTPUT_PDF_DIR)
+    current_state = load_state()
+    progress = _make_progress()
+    scraper = _make_scraper(progress, use_cache, parser, site_root, rate_limits, retry_delay, _make_metrics())
+    if delta and scraper.cache: scraper.cache.revalidate.update(ResponseCache.COUNT_PAGE_TYPES) # Counts from the server, not from pages cached for hours or days
+    extractor = _make_text_extractor()
+    pdfs = _make_pdf_downloader(scraper, extractor)
+    sink = _make_sink()
+    _watch_metrics(scraper, pdfs, sink, extractor)
+    tracker = DeltaTracker(DELTA_FILE, incremental=delta, console=console)
+    projection = _make_projection(FIELDS, DEFER_DETAILS)
+    planner = CrawlPlanner(court_order, year_order, details=projection.needs_detail, progress=progress, console=console)
+
+    async def crawl(all_courts):
+        async with AsyncMahkamahAgungScraper(scraper, max_workers=concurrency) as async_scraper:
+            engine = CrawlEngine(async_scraper, on_decision=sink.write, is_recorded=sink.__contains__, is_seen=sink.index and sink.index.seen, delta=tracker, planner=planner, projection=projection, pdf_downloader=pdfs,
+                                 state=current_state, save_state=save_state, concurrency=concurrency,
+                                 level_limits=level_limits, progress=progress, console=console, store=state_store)
+            stats = await engine.run(all_courts)
+            return stats, engine.errors
+
+    try:
+        with progress:
+            console.print(Panel(f"Starting {'incremental' if delta else 'concurrent'} scrape (concurrency={concurrency}). State (last completed): {current_state.get('court_idx', -1)}\nOutput: {OUTPUT_DATA_FILE}, PDFs: {OUTPUT_PDF_DIR}", title="Scraper Initialized", border_style="green"))
+            all_courts = fetch_all_courts(scraper, progress)
+            if not all_courts: return
+            stats, errors = asyncio.run(crawl(all_courts)); _finish_pdfs(pdfs, extractor); sink.close()
+            console.print(Panel(f"[bold green]Scraping process completed![/bold green]\nNodes completed: {stats}\nErrors: {errors}\n{_summary(scraper, stats['decision'], pdfs, sink, projection, extractor)}\n{tracker.describe()}", title="Finished", border_style="green"))
+            if current_state.get('court_idx', -1) >= len(all_courts) - 1: _cleanup_state_files()
+    except KeyboardInterrupt: console.print("\n[yellow]Interrupted. Saving final state...[/yellow]"); save_state(); console.print("[yellow]State saved. Exiting.[/yellow]")
+    except Exception: console.print(f"\n[bold red]Unexpected error:[/bold red]"); console.print_exception(show_locals=False); console.print("[yellow]Attempting save state...[/yellow]"); save_state(); console.print("[red]State saved (if possible). Check logs.[/red]")
+    finally:
+        pdfs.close(wait=False, cancel=True); sink.close(); tracker.close()
+        if extractor: extractor.close(wait=False)
+        if scraper.metrics: scraper.metrics.close()
+        console.print("[grey50]Scraper finished or exited.[/grey50]")
+
+# --- Crawl Plan ---
+def plan_crawl(court_order=COURT_ORDER, year_order=YEAR_ORDER, use_cache=True, parser=PARSER_BACKEND, site_root=SITE_ROOT, rate_limits=RATE_LIMITS, retry_delay=RETRY_DELAY):
+    # Prints the size of a full crawl from the court list counts alone (one court list walk, no crawl)
+    progress = _make_progress()
+    scraper = _make_scraper(progress, use_cache, parser, site_root, rate_limits, retry_delay)
+    with progress: all_courts = fetch_all_courts(scraper, progress)
+    if not all_courts: return None
+    planner = CrawlPlanner(court_order, year_order, details=FieldProjection(FIELDS).needs_detail, console=console)
+    planned = planner.plan_courts(all_courts)
+    largest = "\n".join(f"  {court.get('nama_pengadilan', '?')}: {court.get('jumlah_putusan') or 0:,}" for _, court in planned[:10])
+    console.print(Panel(f"{planner.describe(rate=rate_limits['html']['rate'])}\nFirst courts in crawl order:\n{largest}", title="Crawl Plan", border_style="cyan"))
+    return planner
+
+# --- Sharded (multi-process) Scraping Logic ---
+def worker_output_file(worker_id):
+    base, ext = os.path.splitext(OUTPUT_DATA_FILE)
+    return f"{base}.{worker_id}{ext}"
+
+def _worker_settings():
+    return {name: globals()[name] for name in WORKER_SETTINGS}
+
+def run_shard_worker(coordinator_file=COORDINATOR_FILE, worker_id=None, concurrency=CONCURRENCY, level_limits=None, use_cache=True,
+                     parser=PARSER_BACKEND, site_root=SITE_ROOT, rate_limits=RATE_LIMITS, retry_delay=RETRY_DELAY, poll=SHARD_POLL, quiet=None, settings=None):
+    # Leases shard units from the coordinator until none are left; each process has its own session and rate limiter.
+    # settings: _worker_settings() of the launching process (a spawned worker re-imports this module and does not see globals set by the CLI)
+    if quiet is not None: console.quiet = quiet
+    if settings:
+        if unknown := set(settings) - set(WORKER_SETTINGS): raise ValueError(f"Unknown worker setting(s) {', '.join(sorted(unknown))}")
+        globals().update(settings)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    ensure_dir(OUTPUT_PDF_DIR)
+    coordinator = ShardCoordinator(coordinator_file, lease=SHARD_LEASE, console=console)
+    output_file = worker_output_file(worker_id); coordinator.register(worker_id, output_file)
+    sink = _make_sink(output_file, plain=True)
+    progress = _make_progress()
+    scraper = _make_scraper(progress, use_cache, parser, site_root, rate_limits, retry_delay)
+    pdfs = _make_pdf_downloader(scraper)
+    projection = _make_projection(FIELDS, DEFER_DETAILS)
+    units_done = decisions = 0
+
+    async def crawl_unit(unit):
+        async def heartbeat():
+            while True: await asyncio.sleep(coordinator.lease / 3); coordinator.heartbeat(worker_id)
+        async with AsyncMahkamahAgungScraper(scraper, max_workers=concurrency) as async_scraper:
+            engine = CrawlEngine(async_scraper, on_decision=sink.write, pdf_downloader=pdfs, projection=projection,
+                                 concurrency=concurrency, level_limits=level_limits, progress=progress, console=console)
+            node, beat = CrawlNode.from_row(unit), asyncio.create_task(heartbeat())
+            try:
+                if node.level == "court" and coordinator.shard_by == "year": # Split into court+year units for any worker to take
+                    years = await engine._expand_court(node)
+                    coordinator.split(unit, worker_id, [year.as_row() for year in years])
+                    console.log(f"[cyan]{worker_id}: split {node.context['court_code']} into {len(years)} year units")
+                    return 0
+                stats = await engine.run_nodes([node])
+                sink.flush(); coordinator.complete(unit, worker_id) # The unit's records are on disk before it counts as done
+                return stats['decision']
+            finally: beat.cancel()
+
+    try:
+        with progress:
+            console.print(Panel(f"Shard worker {worker_id} (concurrency={concurrency})\nCoordinator: {coordinator_file}\nOutput: {output_file}", title="Worker Initialized", border_style="green"))
+            while True:
+                unit = coordinator.acquire(worker_id)
+                if unit is None:
+                    if coordinator.remaining() == 0: break
+                    time.sleep(poll); continue # Others hold the rest; wait for them to finish or their leases to expire
+                label = "/".join(str(unit['context'].get(k)) for k in ("court_code", "year") if unit['context'].get(k))
+                try: decisions += asyncio.run(crawl_unit(unit)); units_done += 1; console.log(f"[green]{worker_id}: unit {label} done")
+                except Exception as e: console.print(f"[red]{worker_id}: unit {label} failed: {e}"); coordinator.fail(unit, worker_id, e)
+            console.print(Panel(f"[bold green]Worker {worker_id} finished[/bold green]\nUnits: {units_done}, decisions: {decisions}\n{_summary(scraper, decisions, pdfs, projection=projection)}", title="Finished", border_style="green"))
+    except KeyboardInterrupt: console.print(f"\n[yellow]Interrupted. Releasing {coordinator.release(worker_id)} units...[/yellow]")
+    finally: pdfs.close(wait=False, cancel=True); sink.close(); coordinator.close()
+
+def run_sharded(workers=2, shard_by="court", coordinator_file=COORDINATOR_FILE, concurrency=CONCURRENCY, level_limits=None, use_cache=True,
+                parser=PARSER_BACKEND, site_root=SITE_ROOT, rate_limits=RATE_LIMITS, retry_delay=RETRY_DELAY, poll=SHARD_POLL):
+    # Plans shard units from the court list, runs `workers` local worker processes against them, then merges their outputs
+    progress = _make_progress()
+    scraper = _make_scraper(progress, use_cache, parser, site_root, rate_limits, retry_delay)
+    load_state()
+    with progress: all_courts = fetch_all_courts(scraper, progress)
+    if not all_courts: return
+    coordinator = ShardCoordinator(coordinator_file, lease=SHARD_LEASE, console=console)
+    try:
+        console.log(f"[cyan]Planned {coordinator.plan(all_courts, shard_by=shard_by)} new {shard_by}-level units in {coordinator_file}")
+        context = multiprocessing.get_context("spawn")
+        kwargs = {"coordinator_file": coordinator_file, "concurrency": concurrency, "level_limits": level_limits, "use_cache": use_cache,
+                  "parser": parser, "site_root": site_root, "rate_limits": rate_limits, "retry_delay": retry_delay, "poll": poll, "quiet": console.quiet,
+                  "settings": _worker_settings()}
+        processes = [context.Process(target=run_shard_worker, kwargs={**kwargs, "worker_id": f"{socket.gethostname()}-w{i}"}) for i in range(workers)]
+        for process in processes: process.start()
+        for process in processes: process.join()
+        merge_shard_outputs(coordinator)
+        if OUTPUT_PARQUET_DIR: export_to_parquet() # Worker outputs are plain JSONL; convert the merged result
+        if EXTRACT_TEXT: extract_pdf_texts() # Workers only download; the text is extracted from the merged result (before indexing it)
+        if SEARCH_INDEX: build_search_index()
+        summary = coordinator.summary()
+        if not summary['remaining'] and not summary['failed']: _cleanup_shard_files(coordinator, coordinator_file)
+    finally: coordinator.close()
+
+def _cleanup_shard_files(coordinator, coordinator_file=COORDINATOR_FILE):
+    # A finished run is fully merged into OUTPUT_DATA_FILE: like a sequential crawl, leave nothing to resume
+    # (incomplete or failed runs keep the worker outputs and shard plan for the next --workers/--merge)
+    outputs = [info["output"] for info in coordinator.workers().values()]
+    coordinator.close()
+    try:
+        for path in outputs + [coordinator_file, f"{coordinator_file}-wal", f"{coordinator_file}-shm"]:
+            if os.path.exists(path): os.remove(path)
+    except OSError as e: console.log(f"[yellow]Could not remove shard files: {e}[/yellow]")
+    _cleanup_state_files()
+
+def merge_shard_outputs(coordinator=None, coordinator_file=COORDINATOR_FILE):
+    coordinator = coordinator or ShardCoordinator(coordinator_file, console=console)
+    summary = coordinator.summary()
+    written, duplicates = coordinator.merge(OUTPUT_DATA_FILE)
+    console.print(Panel(f"Units: {summary}\nMerged {written} decisions into {OUTPUT_DATA_FILE} ({duplicates} duplicates from reassigned units or earlier merges dropped)",
+                        title="Merged" if not summary['remaining'] else "Merged (incomplete)", border_style="green" if not summary['remaining'] else "yellow"))
+    return written, duplicates
+
+# --- Parquet Export ---
+def export_to_parquet(jsonl_file=OUTPUT_DATA_FILE, out_dir=None):
+    # Rebuilds the Parquet dataset from a decisions JSONL (plus its rotated/compressed segments)
+    out_dir = out_dir or OUTPUT_PARQUET_DIR or "output_data/parquet"
+    with console.status(f"[cyan]Exporting {jsonl_file} to Parquet..."):
+        exporter = export_parquet(iter_output(jsonl_file), out_dir, partition_by=PARQUET_PARTITION, row_group_size=PARQUET_ROW_GROUP, console=console)
+    console.print(Panel(f"Exported {exporter.describe()}", title="Parquet Export Finished", border_style="green"))
+    return exporter
+
+# --- PDF Back-fill ---
+def backfill_pdfs(jsonl_file=OUTPUT_DATA_FILE, rate_limits=RATE_LIMITS, retry_delay=RETRY_DELAY):
+    # Downloads (or resumes) every PDF referenced by an existing decisions JSONL that is not on disk yet
+    progress = _make_progress()
+    pdfs = PdfDownloader(OUTPUT_PDF_DIR, workers=PDF_WORKERS, bandwidth=PDF_BANDWIDTH, rate_limiter=_make_rate_limiter(progress, rate_limits),
+                         headers=MahkamahAgungScraper.DEFAULT_HEADERS, retry_delay=retry_delay, retry_policy=_make_retry_policy(retry_delay), transport=_make_transport("pdf", PDF_WORKERS),
+                         store=_make_pdf_store(), archives=DOWNLOAD_ZIPS, console=console)
+    try:
+        with progress:
+            queued = pdfs.backfill(iter_output(jsonl_file))
+            task_id = progress.add_task("[magenta]Back-filling PDFs", total=queued)
+            while pdfs.backlog(): time.sleep(0.5); progress.update(task_id, completed=queued - pdfs.backlog())
+            progress.update(task_id, completed=queued)
+        console.print(Panel(f"Queued {queued} missing PDFs from {jsonl_file}\nPDFs: {pdfs.describe()}", title="Back-fill Finished", border_style="green"))
+    except KeyboardInterrupt: console.print("\n[yellow]Interrupted; partial downloads resume from their .part files next time.[/yellow]")
+    finally: pdfs.close(wait=False, cancel=True)
+
+# --- PDF Text Extraction ---
+def extract_pdf_texts(jsonl_file=OUTPUT_DATA_FILE, pdf_dir=OUTPUT_PDF_DIR):
+    # Incremental: extracts every PDF in pdf_dir not yet in TEXT_OUTPUT_FILE, linked to its decision through the decisions JSONL
+    progress = _make_progress()
+    extractor = _make_text_extractor(force=True)
+    store = _make_pdf_store()
+    try:
+        with progress:
+            queued = extractor.extract_directory(pdf_dir, iter_output(jsonl_file), store=store)
+            task_id = progress.add_task("[magenta]Extracting PDF text", total=queued)
+            while extractor.backlog(): time.sleep(0.5); progress.update(task_id, completed=queued - extractor.backlog())
+            progress.update(task_id, completed=queued)
+        extractor.close()
+        console.print(Panel(f"Queued {queued} PDFs from {pdf_dir}\nPDF text: {extractor.describe()}", title="Text Extraction Finished", border_style="green"))
+    except KeyboardInterrupt: console.print("\n[yellow]Interrupted; unfinished PDFs are extracted next time.[/yellow]")
+    finally:
+        extractor.close(wait=False)
+        if store: store.close()
+    return extractor
+
+# --- PDF Store Migration ---
+def migrate_pdf_store(jsonl_file=OUTPUT_DATA_FILE):
+    # Moves the flat OUTPUT_PDF_DIR files referenced by a decisions JSONL into the content-addressed store
+    with console.status(f"[cyan]Moving {OUTPUT_PDF_DIR} into the PDF store..."), DocumentStore(OUTPUT_PDF_DIR, console=console) as store:
+        moved = store.import_directory(OUTPUT_PDF_DIR, iter_output(jsonl_file))
+        left = sum(name.lower().endswith(('.pdf', '.zip')) for name in os.listdir(OUTPUT_PDF_DIR))
+        console.print(Panel(f"Moved {moved} files{f', {left} not referenced by {jsonl_file} left in place' if left else ''}\n{store.describe()}", title="PDF Store Migration Finished", border_style="green"))
+    return moved
+
+# --- Full-text Search ---
+def build_search_index(jsonl_file=OUTPUT_DATA_FILE, text_file=None):
+    # Incremental: indexes the decisions and PDF text appended since the last build
+    with console.status(f"[cyan]Indexing {jsonl_file}..."), SearchIndex(SEARCH_INDEX_FILE, console=console) as index:
+        read = index.sync(jsonl_file) + index.sync(text_file or TEXT_OUTPUT_FILE)
+        if read: index.optimize()
+        console.print(Panel(f"Read {read} new records\n{index.describe()}", title="Search Index Updated", border_style="green"))
+    return read
+
+def search_decisions(query, court=None, year=None, classification=None, limit=20, raw=False):
+    if not os.path.exists(SEARCH_INDEX_FILE): console.print(f"[yellow]No search index at {SEARCH_INDEX_FILE}; build it with --build-index[/yellow]"); return []
+    with SearchIndex(SEARCH_INDEX_FILE, console=console) as index:
+        started = time.perf_counter()
+        try: results = index.search(query, court=court, year=year, classification=classification, limit=limit, raw=raw)
+        except ValueError as e: console.print(f"[red]{escape(str(e))}[/red]"); return []
+        elapsed = (time.perf_counter() - started) * 1000
+    table = Table(title=f"{len(results)} results for {escape(query)} ({elapsed:.1f} ms)", show_lines=True)
+    for column in ("#", "Nomor", "Court", "Year", "Classification", "Match"): table.add_column(column, overflow="fold")
+    for i, r in enumerate(results, 1):
+        snippet = escape(r["snippet"] or "").replace("«", "[bold yellow]").replace("»", "[/bold yellow]")
+        table.add_row(str(i), escape(r["nomor"] or r["url"]), escape(r["court_name"] or r["court"] or ""), str(r["year"] or ""), escape(r["classification"] or ""), f"{snippet}\n[grey50]{escape(r['url'])}[/grey50]")
+    console.print(table)
+    return results
+
+def _parse_level_limits(values):
+    limits = {}
+    for value in values or []:
+        level, _, limit = value.partition('=')
+        if level not in LEVELS or not limit.isdigit(): raise argparse.ArgumentTypeError(f"Invalid --level-limit '{value}' (expected LEVEL=N, LEVEL in {', '.join(LEVELS)})")
+        limits[level] = int(limit)
+    return limits
 
 if __name__ == "__main__":
-    run_scraper()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Mahkamah Agung decision scraper")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the concurrent crawl engine")
+    parser.add_argument("--delta", action="store_true", help=f"Incremental crawl (implies --async): only subtrees whose counts changed since the last run ({DELTA_FILE})")
+    parser.add_argument("--order", choices=list(COURT_ORDERS), default=COURT_ORDER, help="Courts crawled first (--async; by decision count)")
+    parser.add_argument("--years", choices=list(YEAR_ORDERS), default=YEAR_ORDER, help="Years crawled first within a court (--async)")
+    parser.add_argument("--plan", action="store_true", help="Only print the estimated decisions, requests, bytes and duration of a crawl")
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 (one multiplexed connection per host; needs httpx[http2])")
+    parser.add_argument("--fields", help=f"Comma-separated decision fields to produce, or 'listing' ({', '.join(LISTING_FIELDS)}); detail pages are only fetched for "
+                                          f"fields the listing lacks ({', '.join(DETAIL_FIELDS)})")
+    parser.add_argument("--defer-details", action="store_true", help="Fetch detail pages only after all listing pages (--async)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Global number of requests in flight (--async)")
+    parser.add_argument("--level-limit", action="append", metavar="LEVEL=N", help="Per-level concurrency limit, e.g. decision=8 (--async)")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help=f"Disable the on-disk HTTP cache ({HTTP_CACHE_DIR})")
+    parser.add_argument("--parser", choices=sorted(PARSER_BACKENDS), default=PARSER_BACKEND, help="HTML parser backend")
+    parser.add_argument("--site-root", default=SITE_ROOT, help="Site to crawl (e.g. http://127.0.0.1:8000 for MockPutusanServer)")
+    parser.add_argument("--workers", type=int, help="Plan shard units and crawl them with N local worker processes, then merge")
+    parser.add_argument("--shard-by", choices=SHARD_LEVELS, default="court", help="Shard unit size for --workers (court, or court+year)")
+    parser.add_argument("--worker", action="store_true", help="Join an existing --coordinator as one more shard worker (other machines/processes)")
+    parser.add_argument("--worker-id", help="Worker name used for leases and its output file (default: host-pid)")
+    parser.add_argument("--merge", action="store_true", help="Merge the per-worker outputs registered in --coordinator")
+    parser.add_argument("--coordinator", default=COORDINATOR_FILE, help="Shard coordinator database")
+    parser.add_argument("--output-compression", choices=[c for c in COMPRESSIONS if c], help="Write gzip/zstd-compressed output segments")
+    parser.add_argument("--rotate-mb", type=int, help="Rotate output segments at this size")
+    parser.add_argument("--partition-by", choices=sorted(PARTITIONS), help="One output segment series per court (and year)")
+    parser.add_argument("--no-seen-index", dest="use_seen_index", action="store_false", help=f"Fetch details again even for decisions already in the output ({SEEN_INDEX_FILE})")
+    parser.add_argument("--parquet-dir", help="Also stream decisions into a Parquet dataset in this directory (needs pyarrow)")
+    parser.add_argument("--export-parquet", nargs="?", const=OUTPUT_DATA_FILE, metavar="JSONL", help=f"Only convert a decisions JSONL to Parquet (default {OUTPUT_DATA_FILE})")
+    parser.add_argument("--metrics-port", type=int, help=f"Serve Prometheus metrics on http://{METRICS_HOST}:PORT/metrics")
+    parser.add_argument("--metrics-file", help=f"Rewrite a JSON metrics snapshot every {METRICS_INTERVAL}s")
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage time breakdown at exit (sequential runner)")
+    parser.add_argument("--profile-pstats", metavar="FILE", help="With --profile: also write cProfile stats of the crawl thread")
+    parser.add_argument("--profile-collapsed", metavar="FILE", help="With --profile: also write sampled stacks of all threads (collapsed, for flame graphs)")
+    parser.add_argument("--extract-text", action="store_true", help=f"Extract the text of downloaded PDFs on a process pool into {TEXT_OUTPUT_FILE} (needs pypdf)")
+    parser.add_argument("--extract-text-only", nargs="?", const=OUTPUT_DATA_FILE, metavar="JSONL", help=f"Only extract the text of PDFs in {OUTPUT_PDF_DIR} not processed yet, linked via JSONL (default {OUTPUT_DATA_FILE})")
+    parser.add_argument("--search-index", action="store_true", help=f"Keep the full-text search index ({SEARCH_INDEX_FILE}) up to date while crawling")
+    parser.add_argument("--build-index", nargs="?", const=OUTPUT_DATA_FILE, metavar="JSONL", help=f"Only add new decisions of JSONL (default {OUTPUT_DATA_FILE}) and {TEXT_OUTPUT_FILE} to the search index")
+    parser.add_argument("--search", metavar="QUERY", help="Only search the index: party names, nomor, judges, amar, PDF text ('\"exact phrase\"', prefix*)")
+    parser.add_argument("--court", help="With --search: court code or name")
+    parser.add_argument("--year", type=int, help="With --search: decision year")
+    parser.add_argument("--classification", help="With --search: classification, e.g. Narkotika")
+    parser.add_argument("--limit", type=int, default=20, help="With --search: number of results")
+    parser.add_argument("--raw-query", action="store_true", help="With --search: QUERY is FTS5 syntax (OR, NEAR, column:term)")
+    parser.add_argument("--pdf-store", action="store_true", help=f"Store PDFs content-addressed in {OUTPUT_PDF_DIR}/objects with a URL index (deduplicated)")
+    parser.add_argument("--download-zips", action="store_true", help="Also download the decisions' ZIP archives")
+    parser.add_argument("--migrate-pdf-store", nargs="?", const=OUTPUT_DATA_FILE, metavar="JSONL", help=f"Only move the flat files of {OUTPUT_PDF_DIR} referenced by JSONL (default {OUTPUT_DATA_FILE}) into the PDF store")
+    parser.add_argument("--backfill-pdfs", nargs="?", const=OUTPUT_DATA_FILE, metavar="JSONL", help=f"Only download missing PDFs referenced by a decisions JSONL (default {OUTPUT_DATA_FILE})")
+    args = parser.parse_args()
+    OUTPUT_COMPRESSION = args.output_compression or OUTPUT_COMPRESSION; OUTPUT_PARTITION = args.partition_by or OUTPUT_PARTITION
+    if args.rotate_mb: OUTPUT_ROTATE_BYTES = args.rotate_mb * 1024 * 1024
+    OUTPUT_PARQUET_DIR = args.parquet_dir or OUTPUT_PARQUET_DIR; USE_SEEN_INDEX = args.use_seen_index
+    HTTP2 = args.http2 or HTTP2; EXTRACT_TEXT = args.extract_text or EXTRACT_TEXT; SEARCH_INDEX = args.search_index or SEARCH_INDEX
+    FIELDS = args.fields or FIELDS; DEFER_DETAILS = args.defer_details or DEFER_DETAILS
+    PDF_STORE = args.pdf_store or PDF_STORE; DOWNLOAD_ZIPS = args.download_zips or DOWNLOAD_ZIPS
+    try: FieldProjection(FIELDS)
+    except ValueError as e: parser.error(str(e))
+    METRICS_PORT = args.metrics_port or METRICS_PORT; METRICS_FILE = args.metrics_file or METRICS_FILE
+    if args.plan: plan_crawl(court_order=args.order, year_order=args.years, use_cache=args.use_cache, parser=args.parser, site_root=args.site_root)
+    elif args.export_parquet: export_to_parquet(args.export_parquet)
+    elif args.backfill_pdfs: backfill_pdfs(args.backfill_pdfs)
+    elif args.migrate_pdf_store: migrate_pdf_store(args.migrate_pdf_store)
+    elif args.extract_text_only: extract_pdf_texts(args.extract_text_only)
+    elif args.build_index: build_search_index(args.build_index)
+    elif args.search: search_decisions(args.search, court=args.court, year=args.year, classification=args.classification, limit=args.limit, raw=args.raw_query)
+    elif args.workers: run_sharded(workers=args.workers, shard_by=args.shard_by, coordinator_file=args.coordinator, concurrency=args.concurrency, level_limits=_parse_level_limits(args.level_limit), use_cache=args.use_cache, parser=args.parser, site_root=args.site_root)
+    elif args.worker: run_shard_worker(coordinator_file=args.coordinator, worker_id=args.worker_id, concurrency=args.concurrency, level_limits=_parse_level_limits(args.level_limit), use_cache=args.use_cache, parser=args.parser, site_root=args.site_root)
+    elif args.merge: merge_shard_outputs(coordinator_file=args.coordinator)
+    elif args.use_async or args.delta: run_scraper_async(concurrency=args.concurrency, level_limits=_parse_level_limits(args.level_limit), use_cache=args.use_cache, parser=args.parser, site_root=args.site_root, delta=args.delta, court_order=args.order, year_order=args.years)
+    else: run_scraper(use_cache=args.use_cache, parser=args.parser, site_root=args.site_root,
+                      profiler=StageProfiler(args.profile_pstats, args.profile_collapsed, console=console) if args.profile or args.profile_pstats or args.profile_collapsed else None)
\ No newline at end of file
@@ -0,0 +1,291 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import Future
+
+from rich.console import Console
+
+from CrawlEngine import CrawlEngine
+from CrawlPlanner import CrawlPlanner
+from DeltaTracker import DeltaTracker
+from FieldProjection import FieldProjection
+from FrontierStore import DONE, FAILED, FrontierStore
+from MahkamahAgungScraper import MahkamahAgungScraper
+
+
+class FakeAsyncScraper:
+    def __init__(self, years=2, months=2, pages=2, decisions=2, month_links=False):
+        self.years, self.months, self.pages, self.decisions = years, months, pages, decisions
+        self.month_links = month_links
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _call(self, name, value):
+        self.calls.append((name, value))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+
+    async def run_in_executor(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    async def get_court_yearly_decisions(self, court_code=None, url=None):
+        await self._call("years", court_code)
+        return [{"year": str(2020 + i), "decision_count": 1, "link": f"{court_code}/y{i}"} for i in range(self.years)]
+
+    async def get_court_decision_categories_by_year(self, url):
+        await self._call("categories", url)
+        return [{"category": "Perdata", "link": f"{url}/cat"}]
+
+    async def get_decision_classifications(self, url):
+        await self._call("classifications", url)
+        return [{"classification": "Perdata", "link": f"{url}/cls"}]
+
+    async def get_listing_page(self, url):
+        await self._call("listing", url)
+        months = [{"month": m, "count": 1, "link": f"{url}/bulan/{i + 1}" if self.month_links else None}
+                  for i, m in enumerate(["Januari", "Februari", "Maret"][:self.months])]
+        return {"months": months, "last_page": self.pages,
+                "decisions": [{"title": f"d{i}", "link": f"{url}#d{i}", "putus_date": "05-02-2024"} for i in range(self.decisions)]}
+
+    async def get_decision_list(self, url):
+        await self._call("list", url)
+        return [{"title": f"d{i}", "link": f"{url}#d{i}"} for i in range(self.decisions)]
+
+    async def get_decision_detail(self, url):
+        await self._call("detail", url)
+        return {"nomor": url, "download_link_pdf": f"{url}.pdf"}
+
+
+class ArchiveOnlyScraper(FakeAsyncScraper):
+    # Every other decision has a ZIP archive but no PDF link
+    async def get_decision_detail(self, url):
+        detail = await super().get_decision_detail(url)
+        if url.endswith("#d1"): detail["download_link_pdf"] = None
+        return {**detail, "download_link_zip": f"{url}.zip"}
+
+
+class FakePdfDownloader:
+    def __init__(self, archives=False):
+        self.archives = archives
+        self.urls = []
+
+    def submit(self, url, decision_url=None):
+        self.urls.append(url)
+        future = Future(); future.set_result(url)
+        return future
+
+
+class Crash(BaseException):
+    pass
+
+
+class CrashingScraper(FakeAsyncScraper):
+    # Dies like a killed process after `details` decision pages
+    def __init__(self, details, **kwargs):
+        super().__init__(**kwargs)
+        self.details = details
+
+    async def get_decision_detail(self, url):
+        if self.details <= 0: raise Crash()
+        detail = await super().get_decision_detail(url)
+        self.details -= 1
+        return detail
+
+
+class FailingYearScraper(FakeAsyncScraper):
+    def __init__(self, failing_url, **kwargs):
+        super().__init__(**kwargs)
+        self.failing_url = failing_url
+
+    async def get_court_decision_categories_by_year(self, url):
+        if url == self.failing_url: raise ValueError("boom")
+        return await super().get_court_decision_categories_by_year(url)
+
+
+class EmptyYearScraper(FakeAsyncScraper):
+    # Year 2020 shows no decisions; the others show their real count
+    async def get_court_yearly_decisions(self, court_code=None, url=None):
+        years = await super().get_court_yearly_decisions(court_code, url)
+        for y in years: y["decision_count"] = 0 if y["year"] == "2020" else self.pages * self.decisions
+        return years
+
+
+COURTS = [
+    {"nama_pengadilan": "PN A", "link_pengadilan": "https://putusan3.mahkamahagung.go.id/pengadilan/profil/pengadilan/pn-a.html"},
+    {"nama_pengadilan": "No Code", "link_pengadilan": "https://putusan3.mahkamahagung.go.id/pengadilan/profil/pengadilan/x.html"},
+    {"nama_pengadilan": "PN B", "link_pengadilan": "https://putusan3.mahkamahagung.go.id/pengadilan/profil/pengadilan/pn-b.html"},
+]
+
+
+class TestCrawlEngine(unittest.TestCase):
+
+    def _run(self, scraper, state=None, courts=COURTS, **kwargs):
+        records = []
+        engine = CrawlEngine(scraper, on_decision=records.append, state=state if state is not None else {}, **kwargs)
+        asyncio.run(engine.run(courts))
+        return engine, records
+
+    def test_extract_court_code(self):
+        self.assertEqual(MahkamahAgungScraper.extract_court_code(COURTS[0]["link_pengadilan"]), "pn-a")
+        self.assertIsNone(MahkamahAgungScraper.extract_court_code(COURTS[1]["link_pengadilan"]))
+        self.assertIsNone(MahkamahAgungScraper.extract_court_code(None))
+
+    def test_full_crawl_visits_every_decision(self):
+        scraper = FakeAsyncScraper()
+        engine, records = self._run(scraper)
+        # No month links: each classification listing is crawled once -> 2 courts x 2 years x 2 pages x 2 decisions
+        self.assertEqual(len(records), 16)
+        self.assertEqual(engine.state["court_idx"], 2)
+        self.assertEqual(engine.state["pages_done"], [])
+        self.assertEqual(engine.state["courts_done"], [])
+        self.assertEqual(records[0]["_source_court_code"] in ("pn-a", "pn-b"), True)
+        self.assertEqual(records[0]["_source_month"], "Februari")
+        self.assertIn("_scrape_timestamp", records[0])
+
+    def test_each_listing_url_fetched_once(self):
+        scraper = FakeAsyncScraper()
+        self._run(scraper)
+        listing_urls = [value for name, value in scraper.calls if name in ("listing", "list")]
+        self.assertEqual(len(listing_urls), len(set(listing_urls)))
+        self.assertEqual(len(listing_urls), 2 * 2 * 2)  # page 1 via get_listing_page, page 2 via get_decision_list
+
+    def test_month_filtered_listings(self):
+        scraper = FakeAsyncScraper(month_links=True)
+        _, records = self._run(scraper)
+        self.assertEqual(len(records), 2 * 2 * 2 * 2 * 2)
+        self.assertEqual({r["_source_month"] for r in records}, {"Januari", "Februari"})
+        self.assertTrue(all("/bulan/" in r["_source_decision_list_url"] for r in records))
+
+    def test_concurrency_is_bounded(self):
+        scraper = FakeAsyncScraper()
+        self._run(scraper, concurrency=3)
+        self.assertLessEqual(scraper.max_in_flight, 3)
+        self.assertGreater(scraper.max_in_flight, 1)
+
+    def test_level_limit_is_bounded(self):
+        scraper = FakeAsyncScraper()
+        self._run(scraper, concurrency=8, level_limits={"decision": 1, "page": 1, "month": 1, "year": 1,
+                                                         "category": 1, "classification": 1, "court": 1})
+        self.assertLessEqual(scraper.max_in_flight, 7)
+
+    def test_resume_skips_completed_courts_and_pages(self):
+        state = {"court_idx": -1, "courts_done": [2], "pages_done": ["0/0/0/0/0/1"]}
+        scraper = FakeAsyncScraper()
+        _, records = self._run(scraper, state=state)
+        self.assertEqual(len(records), 8 - 2)
+        self.assertFalse(any(call == ("years", "pn-b") for call in scraper.calls))
+        self.assertEqual(state["court_idx"], 2)
+
+    def test_resume_honours_sequential_cursor(self):
+        state = {"court_idx": -1, "year_idx": 0, "month_idx": 0, "decision_page": 1}
+        scraper = FakeAsyncScraper(month_links=True)
+        _, records = self._run(scraper, state=state)
+        # Court 0: year 0 done; year 1 month 0 done, month 1 page 1 done -> 1 page (2 decisions) left; court 2 has 16
+        self.assertEqual(len(records), 2 + 16)
+        self.assertNotIn("year_idx", state)
+
+    def test_pdf_nodes_are_retried_then_recorded_as_failed(self):
+        downloads = []
+        def download(url):
+            downloads.append(url)
+            return None if url.endswith("#d1.pdf") else url
+        engine, records = self._run(FakeAsyncScraper(), download_pdf=download, max_attempts=2)
+        self.assertEqual(engine.stats["pdf"], 16)
+        self.assertEqual(len(downloads), 16 + 8)
+        self.assertEqual(engine.store.counts()["pdf"], {DONE: 8, FAILED: 8})
+        self.assertEqual(engine.state["court_idx"], 2)
+
+    def test_archives_are_queued_without_a_pdf_link(self):
+        pdfs = FakePdfDownloader(archives=True)
+        engine, records = self._run(ArchiveOnlyScraper(), pdf_downloader=pdfs)
+        self.assertEqual(sum(url.endswith(".zip") for url in pdfs.urls), 16)
+        self.assertEqual(sum(url.endswith(".pdf") for url in pdfs.urls), 8)
+        self.assertEqual(engine.stats["pdf"], 16 + 8)
+        pdfs = FakePdfDownloader()
+        self._run(ArchiveOnlyScraper(), pdf_downloader=pdfs)
+        self.assertEqual(len(pdfs.urls), 8) # Archives only when asked for
+
+    def test_resume_from_store_after_crash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "crawl_state.sqlite3")
+            records, state = [], {}
+            def crawl(scraper):
+                store = FrontierStore(path, console=Console(quiet=True))
+                try: asyncio.run(CrawlEngine(scraper, on_decision=records.append, state=state, store=store, console=Console(quiet=True)).run(COURTS))
+                finally: store.close()
+            with self.assertRaises(Crash): crawl(CrashingScraper(details=5))
+            self.assertGreaterEqual(len(records), 5)
+            scraper = FakeAsyncScraper()
+            crawl(scraper)
+            self.assertEqual(sorted(r["nomor"] for r in records), sorted({r["nomor"] for r in records}))
+            self.assertEqual(len(records), 16)
+            self.assertEqual(state["court_idx"], 2)
+            # Listings already expanded before the crash are not fetched again
+            self.assertLess(len([c for c in scraper.calls if c[0] in ("listing", "list")]), 8)
+
+    def test_decisions_missing_from_output_are_crawled_again(self):
+        store = FrontierStore(":memory:", console=Console(quiet=True))
+        self._run(FakeAsyncScraper(), store=store)
+        lost = {link for _, link in store.values("decision", "decision_link")[:3]}
+        engine, records = self._run(FakeAsyncScraper(), store=store, is_recorded=lambda link: link not in lost)
+        self.assertEqual({r["nomor"] for r in records}, lost)
+        self.assertEqual(store.remaining(), 0)
+
+    def test_delta_crawl_revisits_only_changed_or_failed_subtrees(self):
+        tracker = DeltaTracker(":memory:", console=Console(quiet=True))
+        self._run(FailingYearScraper("pn-a/y1"), delta=tracker, console=Console(quiet=True))
+        self.assertEqual(tracker.stats["recorded"], 3 + 3 + 1)  # 3 finished years and their listings, court pn-b (pn-a had a failure)
+        tracker.incremental = True
+        scraper = FakeAsyncScraper()
+        _, records = self._run(scraper, delta=tracker)
+        self.assertEqual([v for name, v in scraper.calls if name == "categories"], ["pn-a/y1"])
+        self.assertEqual(len(records), 2 * 2)
+        scraper = FakeAsyncScraper()
+        self._run(scraper, delta=tracker)
+        self.assertEqual([v for name, v in scraper.calls if name == "categories"], [])
+
+    def test_planner_prunes_empty_subtrees_and_orders_courts(self):
+        courts = [dict(COURTS[0], jumlah_putusan=5), dict(COURTS[1], jumlah_putusan=0), dict(COURTS[2], jumlah_putusan=9)]
+        planner = CrawlPlanner(court_order="largest", console=Console(quiet=True))
+        scraper = EmptyYearScraper()
+        engine, records = self._run(scraper, courts=courts, planner=planner, concurrency=1, console=Console(quiet=True))
+        self.assertEqual([v for name, v in scraper.calls if name == "years"], ["pn-b", "pn-a"])
+        self.assertEqual([v for name, v in scraper.calls if name == "categories"], ["pn-b/y1", "pn-a/y1"])
+        self.assertEqual(len(records), 2 * 4)
+        self.assertEqual((planner.total, planner.done, planner.pruned["court"], planner.pruned["year"]), (8, 8, 1, 2))
+        self.assertEqual(engine.state["court_idx"], 2)
+
+    def test_listing_only_fields_skip_detail_pages(self):
+        scraper = FakeAsyncScraper()
+        pdfs = []
+        projection = FieldProjection("title,putus_date")
+        engine, records = self._run(scraper, projection=projection, download_pdf=pdfs.append)
+        self.assertEqual(len(records), 16)
+        self.assertNotIn("detail", {name for name, _ in scraper.calls})
+        self.assertEqual(pdfs, [])
+        self.assertEqual({k for k in records[0] if not k.startswith("_")}, {"title", "putus_date"})
+        self.assertEqual(projection.stats, {"from_listing": 16, "from_detail": 0})
+
+    def test_deferred_details_run_after_all_listing_work(self):
+        scraper = FakeAsyncScraper()
+        engine, records = self._run(scraper, projection=FieldProjection("title,amar", defer_details=True), concurrency=1)
+        self.assertEqual(len(records), 16)
+        names = [name for name, _ in scraper.calls]
+        self.assertEqual(names[names.index("detail"):], ["detail"] * 16)
+        self.assertEqual({k for k in records[0] if not k.startswith("_")}, {"title"}) # From the listing row; the fake detail has no amar
+
+    def test_mixed_fields_keep_listing_fields(self):
+        scraper = FakeAsyncScraper()
+        engine, records = self._run(scraper, projection=FieldProjection("title,putus_date,download_link_pdf"))
+        self.assertEqual(len(records), 16)
+        self.assertEqual([name for name, _ in scraper.calls].count("detail"), 16)
+        self.assertTrue(all(r["title"] and r["download_link_pdf"] for r in records))
+        self.assertEqual(sum(1 for r in records if r.get("putus_date")), 8) # Only the fake page 1 rows have a putus_date
+
+
+if __name__ == '__main__':
+    unittest.main()
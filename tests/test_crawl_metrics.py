@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+from rich.console import Console
+
+from CrawlMetrics import CrawlMetrics, Histogram, page_type
+
+
+class TestCrawlMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = CrawlMetrics(console=Console(quiet=True))
+        self.addCleanup(self.metrics.close)
+
+    def test_page_types(self):
+        root = "https://putusan3.mahkamahagung.go.id"
+        self.assertEqual(page_type(f"{root}/pengadilan/index/ditjen/umum.html?page=2"), "court_list")
+        self.assertEqual(page_type(f"{root}/direktori/periode/tahunjenis/putus/pengadilan/pn-a.html"), "yearly")
+        self.assertEqual(page_type(f"{root}/direktori/index/pengadilan/pn-a/tahunjenis/putus/tahun/2024.html"), "year_index")
+        self.assertEqual(page_type(f"{root}/direktori/index/pengadilan/pn-a/tahunjenis/putus/tahun/2024/direktori/pidana-umum.html"), "category")
+        self.assertEqual(page_type(f"{root}/direktori/index/pengadilan/pn-a/tahunjenis/putus/tahun/2024/direktori/pidana-umum/klasifikasi/pencurian.html"), "listing")
+        self.assertEqual(page_type(f"{root}/direktori/putusan/zaf0123.html"), "detail")
+        self.assertEqual(page_type(f"{root}/direktori/download_file/zaf0123/pdf/zaf0123"), "pdf")
+
+    def test_histogram_buckets_and_quantiles(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0): histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1.0, 3), (float("inf"), 4)])
+        self.assertEqual((histogram.quantile(0.5), histogram.quantile(0.95)), (0.1, float("inf")))
+
+    def test_render_prometheus_text(self):
+        self.metrics.record_request("detail", 200, 0.2, 1000)
+        self.metrics.record_request("detail", 429, 0.01)
+        with self.metrics.time("parse_seconds", extractor="parse_decision_detail"): pass
+        self.metrics.collect(lambda: [("queue_depth", "gauge", {"queue": "pdf"}, 3)])
+        text = self.metrics.render()
+        self.assertIn("# TYPE putusan_http_request_seconds histogram", text)
+        self.assertIn('putusan_http_request_seconds_bucket{le="0.25",page_type="detail"} 2', text)
+        self.assertIn('putusan_http_request_seconds_count{page_type="detail"} 2', text)
+        self.assertIn('putusan_http_responses_total{page_type="detail",status="429"} 1', text)
+        self.assertIn('putusan_http_response_bytes_total{page_type="detail"} 1000', text)
+        self.assertIn('putusan_parse_seconds_count{extractor="parse_decision_detail"} 1', text)
+        self.assertIn('putusan_queue_depth{queue="pdf"} 3', text)
+        self.assertEqual(text.count("# TYPE putusan_http_responses_total counter"), 1)
+
+    def test_snapshot_rates(self):
+        decisions = [0]
+        self.metrics.collect(lambda: [("decisions_total", "counter", {}, decisions[0])])
+        self.assertEqual(self.metrics.snapshot()["gauges"]["decisions_per_minute"], 0.0)
+        decisions[0] = 30
+        self.metrics._samples[0] = (self.metrics._samples[0][0] - 60, self.metrics._samples[0][1])  # first sample a minute ago
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["counters"]["decisions_total"], 30)
+        self.assertAlmostEqual(snapshot["gauges"]["decisions_per_minute"], 30, delta=1)
+
+    def test_endpoint_and_snapshot_file(self):
+        self.metrics.inc("decisions_total", 5)
+        port = self.metrics.serve(0)
+        response = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=10)
+        self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+        self.assertIn("putusan_decisions_total 5", response.text)
+        self.assertEqual(requests.get(f"http://127.0.0.1:{port}/metrics.json", timeout=10).json()["counters"]["decisions_total"], 5)
+        self.assertEqual(requests.get(f"http://127.0.0.1:{port}/other", timeout=10).status_code, 404)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics", "snapshot.json")
+            self.metrics.write_snapshots(path, interval=60)
+            self.metrics.close()  # Writes the final snapshot
+            with open(path, encoding="utf-8") as f: self.assertEqual(json.load(f)["counters"]["decisions_total"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from rich.console import Console
+from rich.progress import Progress
+
+from CrawlPlanner import AVG_BYTES, STRUCTURE_REQUESTS, CrawlPlanner
+
+COURTS = [{"nama_pengadilan": "PN A", "jumlah_putusan": 10}, {"nama_pengadilan": "PN B", "jumlah_putusan": 0},
+          {"nama_pengadilan": "PN C", "jumlah_putusan": 40}, {"nama_pengadilan": "PN D"}]
+YEARS = [{"year": "2019", "decision_count": 3}, {"year": "2020", "decision_count": 0}, {"year": "2021", "decision_count": 4}]
+
+
+class TestCrawlPlanner(unittest.TestCase):
+
+    def _planner(self, **kwargs):
+        return CrawlPlanner(console=Console(quiet=True), **kwargs)
+
+    def test_unknown_order_is_rejected(self):
+        with self.assertRaises(ValueError): self._planner(court_order="alphabetical")
+        with self.assertRaises(ValueError): self._planner(year_order="random")
+
+    def test_zero_count_courts_and_years_are_pruned(self):
+        planner = self._planner()
+        self.assertEqual([i for i, _ in planner.plan_courts(COURTS)], [0, 2, 3])
+        self.assertEqual(planner.total, 50)
+        self.assertEqual([i for i, _ in planner.plan_years(YEARS, court_count=10)], [0, 2])
+        self.assertEqual(planner.total, 47)  # PN A's 10 replaced by its year counts 3 + 4
+        self.assertFalse(planner.keep_month({"month": "Januari", "count": 0}))
+        self.assertTrue(planner.keep_month({"month": "Februari", "count": 2}))
+        self.assertEqual(planner.pruned, {"court": 1, "year": 1, "month": 1})
+
+    def test_orders(self):
+        self.assertEqual([i for i, _ in self._planner(court_order="largest").plan_courts(COURTS)], [2, 0, 3])
+        self.assertEqual([i for i, _ in self._planner(court_order="smallest").plan_courts(COURTS)], [3, 0, 2])
+        self.assertEqual([i for i, _ in self._planner(year_order="recent").plan_years(YEARS)], [2, 0])
+        self.assertEqual([i for i, _ in self._planner(year_order="oldest").plan_years(YEARS)], [0, 2])
+
+    def test_estimate_and_global_progress(self):
+        progress = Progress(console=Console(quiet=True))
+        planner = self._planner(page_size=20, progress=progress)
+        planner.plan_courts(COURTS[:1])
+        html = STRUCTURE_REQUESTS + 1 + 10
+        self.assertEqual(planner.estimate(), {"decisions": 10, "requests": html + 10, "bytes": html * AVG_BYTES["html"] + 10 * AVG_BYTES["pdf"]})
+        planner.advance(4); planner.refine(6, 0)  # 4 crawled, the remaining subtree was skipped
+        task = progress.tasks[0]
+        self.assertEqual((task.total, task.completed), (4, 4))
+        self.assertEqual(planner.estimate()["decisions"], 0)
+        self.assertIn("pruned nothing", planner.describe(rate=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+
+from rich.console import Console
+
+from DocumentStore import DocumentStore
+from MockPutusanServer import MockDataset
+
+
+class TestDocumentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "pdfs")
+        self.dataset = MockDataset(pdf_bytes=5000)
+        self.ids = [self.dataset.decision_id(0, 0, 0, 0, n) for n in range(2)]
+
+    def _store(self):
+        store = DocumentStore(self.root, console=Console(quiet=True))
+        self.addCleanup(store.close)
+        return store
+
+    def _file(self, name, body):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f: f.write(body)
+        return path
+
+    def test_identical_bodies_are_stored_once(self):
+        store = self._store()
+        first, second = self.dataset.pdf(self.ids[0]), self.dataset.pdf(self.ids[1])
+        a = store.put("https://a/pdf/1", self._file("a.part", first))
+        b = store.put("https://mirror/pdf/1", self._file("b.part", first))
+        c = store.put("https://a/pdf/2", self._file("c.part", second))
+        digest = hashlib.sha256(first).hexdigest()
+        self.assertEqual(a, os.path.join(self.root, "objects", digest[:2], digest[2:4], f"{digest}.pdf"))
+        self.assertEqual(b, a); self.assertNotEqual(c, a)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "b.part")))
+        self.assertEqual((store.stats["stored"], store.stats["deduplicated"], store.stats["bytes_saved"]), (2, 1, len(first)))
+        self.assertEqual(store.count(), (3, 2, len(first) + len(second)))
+        store.close()
+        reopened = self._store()
+        self.assertEqual(reopened.lookup("https://mirror/pdf/1"), a)
+        self.assertIsNone(reopened.lookup("https://a/pdf/3"))
+        self.assertEqual(sorted(reopened.paths("pdf")), sorted([a, c]))
+        with self.assertRaises(ValueError): reopened.put("https://a/doc", self._file("d.part", b"x"), kind="doc")
+
+    def test_flat_directory_is_imported(self):
+        os.makedirs(self.root)
+        pdf_url, zip_url = (f"https://a/direktori/download_file/{self.ids[0]}/{kind}/{self.ids[0]}" for kind in ("pdf", "zip"))
+        with open(os.path.join(self.root, f"{self.ids[0]}.pdf"), 'wb') as f: f.write(self.dataset.pdf(self.ids[0]))
+        with open(os.path.join(self.root, f"{self.ids[0]}.zip"), 'wb') as f: f.write(b"PK\x05\x06" + b"\x00" * 18)
+        with open(os.path.join(self.root, f"{self.ids[1]}.pdf"), 'wb') as f: f.write(self.dataset.pdf(self.ids[1]))
+        store = self._store()
+        self.assertEqual(store.import_directory(self.root, [{"download_link_pdf": pdf_url, "download_link_zip": zip_url}]), 2)
+        self.assertTrue(store.lookup(pdf_url).endswith(".pdf")); self.assertTrue(store.lookup(zip_url).endswith(".zip"))
+        self.assertEqual(sorted(n for n in os.listdir(self.root) if n.endswith((".pdf", ".zip"))), [f"{self.ids[1]}.pdf"]) # Unreferenced: left in place
+
+    def test_staging_is_per_process_and_idle_parts_are_adopted(self):
+        store, url = self._store(), "https://a/pdf/1"
+        mine, other, live = (f"{store.staging_path(url, pid=pid)}.part" for pid in (None, 1, 2))
+        self.assertNotEqual(mine, other)
+        for path, age in ((other, 600), (live, 0)):
+            with open(path, 'wb') as f: f.write(b"%PDF-")
+            os.utime(path, (time.time() - age,) * 2)
+        self.assertTrue(store.adopt_part(url, idle=300))
+        self.assertTrue(os.path.exists(mine)); self.assertFalse(os.path.exists(other))
+        self.assertTrue(os.path.exists(live)) # Still being written by its process
+        os.remove(mine)
+        self.assertFalse(store.adopt_part(url, idle=300))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from FieldProjection import LISTING_FIELDS, FieldProjection
+from MahkamahAgungScraper import MahkamahAgungScraper
+
+
+class TestFieldProjection(unittest.TestCase):
+
+    def test_detail_only_needed_for_fields_missing_from_listing(self):
+        self.assertTrue(FieldProjection().needs_detail)
+        self.assertTrue(FieldProjection("all").needs_detail)
+        self.assertFalse(FieldProjection("listing").needs_detail)
+        self.assertFalse(FieldProjection(["title", "putus_date", "nomor"]).needs_detail)
+        self.assertTrue(FieldProjection("title, hakim_ketua").needs_detail)
+        self.assertTrue(FieldProjection("listing,download_link_pdf").needs_detail)
+        self.assertEqual(FieldProjection("listing,amar").fields, frozenset(LISTING_FIELDS) | {"amar"})
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaises(ValueError): FieldProjection("title,judge")
+
+    def test_project_keeps_requested_and_provenance_fields(self):
+        projection = FieldProjection("title,amar")
+        record = {"title": "t", "amar": "a", "hakim_ketua": "h", "_source_court_code": "pn-a", "_scrape_timestamp": "now"}
+        self.assertEqual(projection.project(record), {"title": "t", "amar": "a", "_source_court_code": "pn-a", "_scrape_timestamp": "now"})
+        self.assertIs(FieldProjection().project(record, from_detail=False), record)
+        projection.project({"title": "u"}, from_detail=False)
+        self.assertEqual(projection.stats, {"from_listing": 1, "from_detail": 1})
+        self.assertIn("1 detail requests saved", projection.describe())
+
+    def test_mixed_fields_keep_listing_fields_of_the_merged_record(self):
+        row = {"title": "Putusan PN Mock Nomor 12/Pid.B/2024/PN Mck", "link": "l", "putus_date": "05-02-2024", "view_count": "3"}
+        detail = {"title_full": "full", "hakim_ketua": "h", "amar": "a"}
+        record = FieldProjection("listing,hakim_ketua").project({**MahkamahAgungScraper.listing_record(row), **detail})
+        self.assertEqual(record, {**row, "nomor": "12/Pid.B/2024/PN Mck", "hakim_ketua": "h"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import unittest
+
+import benchmark
+from MahkamahAgungScraper import MahkamahAgungScraper
+from ParserBackends import PARSER_BACKENDS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BASE = "https://putusan3.mahkamahagung.go.id"
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+class QuietConsole:
+    def log(self, *args, **kwargs): pass
+
+
+class TestFixtureCorpus(unittest.TestCase):
+    # Offline counterpart of test_scraper.py: same extractors, checked-in pages, every backend.
+
+    def setUp(self):
+        self.scrapers = {name: MahkamahAgungScraper(parser=name) for name in PARSER_BACKENDS}
+        for scraper in self.scrapers.values():
+            scraper.console = scraper.parser.console = QuietConsole()
+            scraper._fetch_page = None  # fixtures only, never the network
+
+    def _each(self, method, fixture, **kwargs):
+        html = load_fixture(fixture)
+        for name, scraper in self.scrapers.items():
+            with self.subTest(parser=name):
+                yield getattr(scraper, method)(html=html, **kwargs)
+
+    def test_court_list(self):
+        for courts in self._each("get_list_courts", "court_list"):
+            self.assertEqual(len(courts), 36)
+            self.assertEqual(courts[0], {
+                "nama_pengadilan": "PN AIRMADIDI",
+                "link_pengadilan": f"{BASE}/pengadilan/profil/pengadilan/pn-airmadidi.html",
+                "pengadilan_tinggi": "PT ACEH",
+                "link_pengadilan_tinggi": f"{BASE}/pengadilan/profil/pengadilan/pt-aceh.html",
+                "provinsi": "Aceh",
+                "jumlah_putusan": 42645,
+                "jumlah_publikasi": 9986,
+            })
+            self.assertTrue(all(MahkamahAgungScraper.extract_court_code(c["link_pengadilan"]) for c in courts))
+
+    def test_last_page(self):
+        expected = {"court_list": 13, "court_yearly": 1, "year_index": 48, "classification_index": 21,
+                    "decision_listing": 9, "decision_listing_empty": 1, "decision_detail": 1}
+        for fixture, last_page in expected.items():
+            for backend in PARSER_BACKENDS.values():
+                with self.subTest(fixture=fixture, parser=backend.name):
+                    self.assertEqual(backend(console=QuietConsole()).parse_last_page(load_fixture(fixture)), last_page)
+
+    def test_court_yearly(self):
+        for years in self._each("get_court_yearly_decisions", "court_yearly"):
+            self.assertEqual([y["year"] for y in years], [str(y) for y in range(2025, 2006, -1)])
+            self.assertEqual(years[0]["decision_count"], 1039)
+            self.assertEqual(years[0]["link"], f"{BASE}/direktori/index/pengadilan/pn-airmadidi/tahunjenis/putus/tahun/2025.html")
+
+    def test_categories(self):
+        for categories in self._each("get_court_decision_categories_by_year", "year_index"):
+            self.assertEqual([c["category"] for c in categories],
+                             ["Pidana Umum", "Pidana Khusus", "Perdata", "Perdata Agama", "Perdata Khusus",
+                              "Pidana Militer", "Tata Usaha Negara", "Pajak"])
+            self.assertTrue(categories[0]["link"].endswith("/tahun/2024/direktori/pidana-umum.html"))
+
+    def test_classifications(self):
+        for classifications in self._each("get_decision_classifications", "classification_index"):
+            self.assertEqual(len(classifications), 8)
+            self.assertEqual(classifications[0]["classification"], "Narkotika dan Psikotropika")
+            self.assertTrue(classifications[1]["link"].endswith("/klasifikasi/pencurian.html"))
+
+    def test_monthly_counts(self):
+        for months in self._each("get_monthly_decision_counts", "decision_listing"):
+            self.assertEqual(len(months), 12)
+            self.assertEqual(months[0], {"month": "Januari", "count": 17, "link": None})
+            self.assertEqual([m["count"] for m in months[-3:]], [16, 0, 0])
+
+    def test_decision_listing(self):
+        for listing in self._each("get_listing_page", "decision_listing"):
+            self.assertEqual(listing["last_page"], 9)
+            self.assertEqual(len(listing["months"]), 12)
+            decisions = listing["decisions"]
+            self.assertEqual(len(decisions), 20)
+            first = decisions[0]
+            self.assertEqual(first["title"], "Putusan PN AIRMADIDI Nomor 46/Pid.Sus/2024/PN Arm")
+            self.assertEqual(first["breadcrumbs"], ["Putusan", "PN AIRMADIDI", "Pidana Umum"])
+            self.assertEqual((first["register_date"], first["putus_date"], first["upload_date"]), ("19-01-2024", "13-01-2024", "10-05-2025"))
+            self.assertEqual((first["view_count"], first["download_count"]), (3743, 816))
+            self.assertTrue(all(d["link"].startswith(f"{BASE}/direktori/putusan/zaf") for d in decisions))
+
+    def test_empty_listing(self):
+        for listing in self._each("get_listing_page", "decision_listing_empty"):
+            self.assertEqual(listing["decisions"], [])
+            self.assertEqual(listing["last_page"], 1)
+
+    def test_decision_detail(self):
+        for detail in self._each("get_decision_detail", "decision_detail"):
+            self.assertEqual(detail["nomor"], "3/Pid.B/2024/PN Arm")
+            self.assertEqual(detail["klasifikasi"], ["Pidana Umum", "Pidana Umum Pencurian"])
+            self.assertEqual(detail["lembaga_peradilan"], "PN AIRMADIDI")
+            self.assertEqual(detail["lembaga_peradilan_link"], f"{BASE}/direktori/index/pengadilan/pn-airmadidi.html")
+            self.assertEqual(detail["tanggal_dibacakan"], "13 Maret 2024")
+            self.assertIsNone(detail["kaidah"])
+            self.assertEqual(detail["abstrak"], "")
+            self.assertTrue(detail["catatan_amar"].startswith("M E N G A D I L I :\n1. Menyatakan"))
+            self.assertEqual(detail["parties_raw"].splitlines()[1:], ["Penuntut Umum:", "JAKSA PENUNTUT UMUM", "Terdakwa:", "NAMA TERDAKWA"])
+            self.assertTrue(detail["download_link_pdf"].endswith("/pdf/zaef0b1b2c3d4e5f60718293a4b5c6d7"))
+            self.assertIn("/zip/", detail["download_link_zip"])
+
+    def test_detail_extractor_on_listing_page(self):
+        for detail in self._each("get_decision_detail", "court_list"):
+            self.assertIsNone(detail)
+
+
+class TestParserBenchmark(unittest.TestCase):
+
+    def test_benchmark_covers_every_case(self):
+        results = benchmark.bench_parsers(["lxml"], min_time=0.001, rounds=1, fixtures_dir=FIXTURES_DIR)
+        self.assertEqual([(r["extractor"], r["fixture"]) for r in results], benchmark.PARSER_CASES)
+        self.assertTrue(all(r["pages_per_sec"] > 0 and r["python_peak_kb"] > 0 for r in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
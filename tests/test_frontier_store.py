@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from rich.console import Console
+
+from FrontierStore import CLAIMED, DONE, EXPANDED, FAILED, PENDING, FrontierStore
+
+
+class TestFrontierStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = FrontierStore(":memory:", console=Console(quiet=True))
+        self.addCleanup(self.store.close)
+
+    def _claim_one(self, worker="w1"):
+        claimed = self.store.claim(worker)
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+    def test_claim_order_is_deepest_first_then_discovery(self):
+        self.store.add([("0", "court", 0, {"court_code": "pn-a"}), ("1", "court", 0, {})])
+        court = self._claim_one()
+        self.assertEqual((court["key"], court["context"], court["attempts"]), ("0", {"court_code": "pn-a"}, 1))
+        self.store.complete("0", "w1", [("0/0", "year", 1, {}), ("0/1", "year", 1, {})])
+        self.assertEqual([row["key"] for row in self.store.claim("w2", limit=5)], ["0/0", "0/1", "1"])
+        self.assertEqual(self.store.claim("w3"), [])
+
+    def test_add_is_idempotent(self):
+        self.assertEqual(self.store.add([("0", "court", 0, {})]), 1)
+        self._claim_one()
+        self.assertEqual(self.store.add([("0", "court", 0, {}), ("1", "court", 0, {})]), 1)
+        self.assertEqual(self.store.status("0"), CLAIMED)
+
+    def test_completion_propagates_to_ancestors(self):
+        self.store.add([("0", "court", 0, {})])
+        self._claim_one()
+        self.assertEqual(self.store.complete("0", "w1", [("0/0", "year", 1, {}), ("0/1", "year", 1, {})]), [])
+        self.assertEqual(self.store.status("0"), EXPANDED)
+        self.store.claim("w1", limit=2)
+        self.assertEqual(self.store.complete("0/0", "w1"), [("0/0", "year", DONE)])
+        self.assertEqual(self.store.complete("0/1", "w1"), [("0/1", "year", DONE), ("0", "court", DONE)])
+        self.assertEqual(self.store.remaining(), 0)
+        self.assertEqual(self.store.counts(), {"court": {DONE: 1}, "year": {DONE: 2}})
+
+    def test_fail_retries_then_parks(self):
+        self.store.add([("0", "court", 0, {})])
+        self._claim_one()
+        self.store.complete("0", "w1", [("0/0", "year", 1, {})])
+        self._claim_one()
+        self.assertEqual(self.store.fail("0/0", "w1", ValueError("boom"), max_attempts=2), [])
+        self.assertEqual(self.store.status("0/0"), PENDING)
+        self.assertEqual(self._claim_one()["attempts"], 2)
+        self.assertEqual(self.store.fail("0/0", "w1", ValueError("boom"), max_attempts=2), [("0/0", "year", FAILED), ("0", "court", DONE)])
+        self.assertEqual(self.store.failures(), [{"key": "0/0", "level": "year", "attempts": 2, "error": "boom"}])
+
+    def test_lost_claim_is_ignored(self):
+        self.store.add([("0", "court", 0, {})])
+        self.store.claim("w1", lease=-1)
+        self.assertEqual(self.store.requeue_claimed(expired_only=True), 1)
+        self._claim_one("w2")
+        self.assertEqual(self.store.complete("0", "w1"), [])
+        self.assertEqual(self.store.status("0"), CLAIMED)
+        self.assertEqual(self.store.complete("0", "w2"), [("0", "court", DONE)])
+
+    def test_requeue_by_worker(self):
+        self.store.add([("0", "court", 0, {}), ("1", "court", 0, {})])
+        self._claim_one("w1"); self._claim_one("w2")
+        self.assertEqual(self.store.requeue_claimed(worker="w1"), 1)
+        self.assertEqual((self.store.status("0"), self.store.status("1")), (PENDING, CLAIMED))
+
+    def test_reopen_finished_nodes(self):
+        self.store.add([("0", "court", 0, {})])
+        self._claim_one()
+        self.store.complete("0", "w1", [("0/0", "decision", 1, {"decision_link": "a"}), ("0/1", "decision", 1, {"decision_link": "b"})])
+        self.store.claim("w1", limit=2)
+        self.store.complete("0/0", "w1"); self.store.complete("0/1", "w1")
+        self.assertEqual(self.store.values("decision", "decision_link"), [("0/0", "a"), ("0/1", "b")])
+        self.assertEqual(self.store.reopen(["0/0", "0/1", "missing"]), 2)
+        self.assertEqual((self.store.status("0"), self.store.remaining()), (EXPANDED, 3))
+        self.store.claim("w1", limit=2)
+        self.store.complete("0/0", "w1")
+        self.assertEqual(self.store.complete("0/1", "w1"), [("0/1", "decision", DONE), ("0", "court", DONE)])
+
+    def test_meta_documents(self):
+        self.assertEqual(self.store.get_meta("state", {}), {})
+        self.store.set_meta("state", {"court_idx": 3})
+        self.store.set_meta("state", {"court_idx": 4, "year_idx": 1})
+        self.assertEqual(self.store.get_meta("state"), {"court_idx": 4, "year_idx": 1})
+        self.store.delete_meta("state")
+        self.assertIsNone(self.store.get_meta("state"))
+
+
+class TestFrontierStoreFile(unittest.TestCase):
+
+    def test_reopen_after_unclean_exit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state", "crawl.sqlite3")
+            store = FrontierStore(path, console=Console(quiet=True))
+            store.add([("0", "court", 0, {"court_code": "pn-a"})])
+            store.claim("w1")
+            store.complete("0", "w1", [("0/0", "year", 1, {}), ("0/1", "year", 1, {})])
+            store.claim("w1")  # in flight when the process dies
+            store.set_meta("state", {"court_idx": -1})
+            store.close()
+            store = FrontierStore(path, console=Console(quiet=True))
+            self.assertEqual(store._db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(store.requeue_claimed(), 1)
+            self.assertEqual([row["key"] for row in store.claim("w2", limit=5)], ["0/0", "0/1"])
+            self.assertEqual(store.status("0"), EXPANDED)
+            self.assertEqual(store.get_meta("state"), {"court_idx": -1})
+            store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
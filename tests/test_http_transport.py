@@ -0,0 +1,94 @@
+import os
+import socket
+import tempfile
+import unittest
+
+import requests
+from rich.console import Console
+
+import main
+from HttpTransport import HttpTransport, httpx, h2
+from MockPutusanServer import MockDataset, MockPutusanServer
+from PdfDownloader import PdfDownloader
+
+
+class TestHttpTransport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=4, pdf_bytes=30000)
+        cls.server = MockPutusanServer(cls.dataset, console=Console(quiet=True)).start()
+        cls.page = f"{cls.server.url}{main.TARGET_COURT_LIST_PATH}"
+        decision_id = cls.dataset.decision_id(0, 0, 0, 0, 0)
+        cls.pdf_url = f"{cls.server.url}/direktori/download_file/{decision_id}/pdf/{decision_id}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def _transport(self, **kwargs):
+        transport = HttpTransport(console=Console(quiet=True), **kwargs)
+        self.addCleanup(transport.close)
+        return transport
+
+    def _unused_url(self):
+        with socket.socket() as s: s.bind(("127.0.0.1", 0)); port = s.getsockname()[1]
+        return f"http://127.0.0.1:{port}/"
+
+    def test_keep_alive_reuses_one_connection(self):
+        transport = self._transport()
+        bodies = [transport.session.get(self.page, timeout=10).text for _ in range(5)]
+        self.assertEqual(len(set(bodies)), 1)
+        stats = transport.snapshot()
+        self.assertEqual((stats["requests"], stats["connections"], stats["reused"], stats["tls_handshakes"]), (5, 1, 4, 0))
+        self.assertEqual(stats["wire_bytes"], stats["body_bytes"]) # The mock server does not compress
+        self.assertIn("5 requests over 1 connections (80.0% reused", transport.describe())
+
+    def test_advertises_compression_and_keeps_caller_headers(self):
+        transport = self._transport(headers={"User-Agent": "test-agent"})
+        self.assertIn("gzip", transport.session.headers["Accept-Encoding"])
+        self.assertEqual(transport.session.headers["User-Agent"], "test-agent")
+
+    def test_resize_keeps_counting(self):
+        transport = self._transport(pool_maxsize=2)
+        transport.session.get(self.page, timeout=10)
+        transport.resize(1) # Never shrinks
+        self.assertEqual(transport.pool_maxsize, 2)
+        transport.resize(8)
+        transport.session.get(self.page, timeout=10)
+        self.assertEqual((transport.pool_maxsize, transport.snapshot()["requests"], transport.snapshot()["connections"]), (8, 2, 2))
+
+    def test_scraper_and_pdf_downloader_use_separate_pools(self):
+        scraper = main.MahkamahAgungScraper(site_root=self.server.url, console=Console(quiet=True))
+        with tempfile.TemporaryDirectory() as tmp:
+            pdfs = PdfDownloader(os.path.join(tmp, "pdfs"), workers=2, retry_delay=0, console=Console(quiet=True))
+            self.assertIsNotNone(pdfs.download(self.pdf_url))
+            pdfs.close()
+        scraper.session.get(self.page, timeout=10)
+        self.assertIsNot(scraper.session, pdfs.session)
+        self.assertEqual((scraper.transport.name, pdfs.transport.name, pdfs.transport.pool_maxsize), ("html", "pdf", 2))
+        self.assertEqual((scraper.transport.snapshot()["requests"], pdfs.transport.snapshot()["requests"]), (1, 1))
+
+    @unittest.skipIf(httpx is None or h2 is None, "httpx[http2] not installed")
+    def test_http2_adapter_speaks_requests(self):
+        transport = self._transport(http2=True)
+        self.assertTrue(transport.http2)
+        for _ in range(3): self.assertEqual(transport.session.get(self.page, timeout=10).status_code, 200)
+        stats = transport.snapshot()
+        self.assertEqual((stats["requests"], stats["connections"]), (3, 1)) # Plain http: httpx falls back to HTTP/1.1 keep-alive
+        with self.assertRaises(requests.HTTPError) as raised:
+            transport.session.get(f"{self.server.url}/direktori/putusan/zaf00ff000000000000.html", timeout=10).raise_for_status()
+        self.assertEqual(raised.exception.response.status_code, 404)
+        with self.assertRaises(requests.ConnectionError): transport.session.get(self._unused_url(), timeout=5)
+
+    @unittest.skipIf(httpx is None or h2 is None, "httpx[http2] not installed")
+    def test_pdf_streams_through_http2_adapter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pdfs = PdfDownloader(os.path.join(tmp, "pdfs"), retry_delay=0, transport=self._transport(name="pdf", http2=True), console=Console(quiet=True))
+            path = pdfs.download(self.pdf_url)
+            with open(path, 'rb') as f: self.assertEqual(f.read(), self.dataset.pdf(self.dataset.decision_id(0, 0, 0, 0, 0)))
+            pdfs.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
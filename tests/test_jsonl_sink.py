@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from rich.console import Console
+
+from JsonlSink import JsonlSink, iter_output, output_segments, zstandard
+
+
+def record(n, court="pn-a", year="2024"):
+    return {"_source_decision_detail_url": f"https://example/{n}", "_source_court_code": court, "_source_year": year, "n": n}
+
+
+class TestJsonlSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "decisions.jsonl")
+
+    def _sink(self, **kwargs):
+        sink = JsonlSink(self.path, console=Console(quiet=True), **{"flush_interval": None, **kwargs})
+        self.addCleanup(sink.close)
+        return sink
+
+    def _lines(self, path=None):
+        with open(path or self.path, encoding='utf-8') as f: return [json.loads(line) for line in f]
+
+    def test_flushes_by_count(self):
+        sink = self._sink(flush_records=3)
+        for n in range(5): sink.write(record(n))
+        self.assertEqual([r["n"] for r in self._lines()], [0, 1, 2])
+        sink.close()
+        self.assertEqual([r["n"] for r in self._lines()], [0, 1, 2, 3, 4])
+        self.assertEqual(sink.stats["flushes"], 2)
+
+    def test_flushes_by_time(self):
+        sink = self._sink(flush_records=100, flush_interval=0.1)
+        sink.write(record(1))
+        time.sleep(0.4)
+        self.assertEqual(len(self._lines()), 1)
+
+    def test_exactly_once_across_reopen(self):
+        sink = self._sink()
+        self.assertTrue(sink.write(record(1)))
+        self.assertFalse(sink.write(record(1)))
+        sink.close()
+        with open(self.path, 'a', encoding='utf-8') as f: f.write('{"_source_decision_detail_url": "https://example/2", "n"')  # torn write
+        resumed = self._sink()
+        self.assertIn("https://example/1", resumed)
+        self.assertNotIn("https://example/2", resumed)
+        self.assertFalse(resumed.write(record(1)))
+        self.assertTrue(resumed.write(record(2)))
+        resumed.close()
+        self.assertEqual([r["n"] for r in self._lines()], [1, 2])
+
+    def test_rotation(self):
+        sink = self._sink(flush_records=1, rotate_bytes=300)
+        for n in range(6): sink.write(record(n))
+        sink.close()
+        segments = output_segments(self.path)
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(os.path.basename(segments[0]).startswith("decisions.00001"))
+        self.assertEqual([r["n"] for r in iter_output(self.path)], list(range(6)))
+
+    def test_partitioned_gzip_segments(self):
+        sink = self._sink(flush_records=2, partition="court_year", compression="gzip")
+        for n in range(4): sink.write(record(n, court="pn-a" if n % 2 else "pn-b"))
+        sink.close()
+        self.assertEqual([os.path.basename(p) for p in output_segments(self.path)],
+                         ["decisions.pn-a.2024.00001.jsonl.gz", "decisions.pn-b.2024.00001.jsonl.gz"])
+        resumed = self._sink(partition="court_year", compression="gzip")
+        self.assertFalse(resumed.write(record(3, court="pn-a")))
+        resumed.write(record(4, court="pn-a"))
+        resumed.close()
+        self.assertIn("decisions.pn-a.2024.00002.jsonl.gz", os.listdir(self.tmp.name))
+        self.assertEqual(sorted(r["n"] for r in iter_output(self.path)), [0, 1, 2, 3, 4])
+
+    @unittest.skipUnless(zstandard, "zstandard not installed")
+    def test_zstd_segments(self):
+        sink = self._sink(flush_records=2, compression="zstd")
+        for n in range(5): sink.write(record(n))
+        sink.close()
+        self.assertEqual([r["n"] for r in iter_output(self.path)], list(range(5)))
+
+    def test_concurrent_writers(self):
+        sink = self._sink(flush_records=7)
+        threads = [threading.Thread(target=lambda t=t: [sink.write(record(t * 1000 + n)) for n in range(250)]) for t in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        sink.close()
+        self.assertEqual(len({r["n"] for r in self._lines()}), 1000)
+
+    def test_rejects_unknown_options(self):
+        with self.assertRaises(ValueError): JsonlSink(self.path, compression="lz4", console=Console(quiet=True))
+        with self.assertRaises(ValueError): JsonlSink(self.path, fsync="sometimes", console=Console(quiet=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+from rich.console import Console
+
+import benchmark
+import main
+from AsyncMahkamahAgungScraper import AsyncMahkamahAgungScraper
+from DocumentStore import DocumentStore
+from MahkamahAgungScraper import MahkamahAgungScraper
+from MockPutusanServer import MockDataset, MockPutusanServer, STATS_PATH
+from PdfTextExtractor import pypdf
+from RetryPolicy import FetchError
+from StageProfiler import StageProfiler
+
+FAST_RATE_LIMITS = {kind: {"rate": 500.0, "min_rate": 50.0, "max_rate": 1000.0} for kind in ("html", "pdf")}
+
+
+class TestMockDataset(unittest.TestCase):
+
+    def test_decision_ids_round_trip(self):
+        dataset = MockDataset(courts=3, years=2, categories=2, classifications=3, decisions=10)
+        decision_id = dataset.decision_id(2, 1, 1, 2, 4)
+        self.assertEqual(dataset.parse_decision_id(decision_id), (2, 1, 1, 2, 4))
+        self.assertIsNone(dataset.parse_decision_id(dataset.decision_id(3, 0, 0, 0, 0)))
+        self.assertIsNone(dataset.parse_decision_id(dataset.decision_id(0, 0, 0, 0, 999)))
+
+    def test_sizes_are_deterministic(self):
+        a, b = MockDataset(decisions=40, seed=3), MockDataset(decisions=40, seed=3)
+        self.assertEqual(a.total_decisions(), b.total_decisions())
+        counts = [a.decision_count(0, 0, 0, l) for l in range(2)]
+        self.assertTrue(all(20 <= c <= 60 for c in counts))
+        self.assertEqual(sum(len(a.decisions_for(0, 0, 0, 0, m)) for m in range(12)), counts[0])
+
+    def test_pdf_payload(self):
+        pdf = MockDataset(pdf_bytes=2048).pdf("zaf0000000000000000")
+        self.assertEqual(len(pdf), 2048)
+        self.assertTrue(pdf.startswith(b"%PDF-") and pdf.rstrip().endswith(b"%%EOF"))
+
+
+class TestMockPutusanServer(unittest.TestCase):
+
+    def _server(self, dataset=None, **kwargs):
+        server = MockPutusanServer(dataset or MockDataset(courts=3, years=2, decisions=25, courts_per_page=2, month_links=True),
+                                   console=Console(quiet=True), **kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_scraper_walks_the_hierarchy(self):
+        server = self._server()
+        scraper = MahkamahAgungScraper(site_root=server.url, console=Console(quiet=True))
+        court_list_url = f"{server.url}{main.TARGET_COURT_LIST_PATH}"
+        self.assertEqual(scraper.get_last_page(scraper._fetch_page(1, court_list_url)), 2)
+        courts = scraper.get_list_courts(url=court_list_url) + scraper.get_list_courts(url=scraper.page_url(court_list_url, 2))
+        self.assertEqual([scraper.extract_court_code(c["link_pengadilan"]) for c in courts], ["pn-mock-001", "pn-mock-002", "pn-mock-003"])
+        years = scraper.get_court_yearly_decisions(court_code="pn-mock-002")
+        self.assertEqual([y["year"] for y in years], ["2025", "2024"])
+        categories = scraper.get_court_decision_categories_by_year(url=years[1]["link"])
+        classifications = scraper.get_decision_classifications(url=categories[1]["link"])
+        self.assertEqual([c["classification"] for c in classifications], ["Pencurian", "Narkotika dan Psikotropika"])
+        listing = scraper.get_listing_page(classifications[0]["link"])
+        expected = server.dataset.decision_count(1, 1, 1, 0)
+        self.assertEqual(sum(m["count"] for m in listing["months"]), expected)
+        self.assertEqual(listing["last_page"], -(-expected // 20))
+        january = scraper.get_listing_page(listing["months"][0]["link"])
+        self.assertEqual(len(january["decisions"]), listing["months"][0]["count"])
+        detail = scraper.get_decision_detail(url=listing["decisions"][0]["link"])
+        self.assertEqual(detail["tahun"], "2024")
+        self.assertTrue(requests.get(detail["download_link_pdf"], timeout=10).content.startswith(b"%PDF-"))
+
+    def test_iter_decisions_streams_a_selection(self):
+        server = self._server()
+        dataset, scraper = server.dataset, MahkamahAgungScraper(site_root=server.url, console=Console(quiet=True))
+        expected = sum(dataset.decision_count(1, 1, k, l) for k in range(dataset.categories) for l in range(dataset.classifications))
+        records = scraper.iter_decisions(court_filter={"pn-mock-002"}, year_range=(None, 2024), read_ahead=3)
+        first = next(records)
+        self.assertEqual((first["_source_court_code"], first["_source_year"], first["tahun"]), ("pn-mock-002", "2024", "2024"))
+        self.assertEqual(1 + sum(1 for _ in records), expected)
+        rows = list(scraper.iter_decisions(court_filter=lambda court: court["nama_pengadilan"] == "PN MOCK 3", year_range=2025, with_detail=False))
+        self.assertEqual(len(rows), sum(dataset.decision_count(2, 0, k, l) for k in range(dataset.categories) for l in range(dataset.classifications)))
+        self.assertTrue(all(row["nomor"] and row["_source_month"] for row in rows))
+        self.assertNotIn("amar", rows[0])
+
+    def test_async_iter_decisions_can_stop_early(self):
+        server = self._server()
+        async def take(count):
+            async with AsyncMahkamahAgungScraper(site_root=server.url, console=Console(quiet=True)) as scraper:
+                records = []
+                async for record in scraper.iter_decisions(court_filter={"pn-mock-001"}, year_range=2025):
+                    records.append(record)
+                    if len(records) == count: break
+                return records
+        records = asyncio.run(take(5))
+        self.assertEqual(len({r["_source_decision_detail_url"] for r in records}), 5)
+
+    def test_async_iter_decisions_projects_fields(self):
+        server = self._server()
+        async def take(count):
+            async with AsyncMahkamahAgungScraper(site_root=server.url, console=Console(quiet=True)) as scraper:
+                records = []
+                async for record in scraper.iter_decisions(court_filter={"pn-mock-001"}, year_range=2025, fields="title,putus_date"):
+                    records.append(record)
+                    if len(records) == count: break
+                return records
+        records = asyncio.run(take(3))
+        self.assertEqual({k for k in records[0] if not k.startswith("_")}, {"title", "putus_date"})
+        stats = requests.get(f"{server.url}{STATS_PATH}", timeout=10).json()["by_type"]
+        self.assertNotIn("detail", stats) # Listing fields only: no detail pages
+
+    def test_unknown_pages_are_404(self):
+        server = self._server()
+        scraper = MahkamahAgungScraper(site_root=server.url, console=Console(quiet=True))
+        with self.assertRaises(FetchError): scraper.get_decision_detail(url=f"{server.url}/direktori/putusan/zaf00ff000000000000.html")
+        self.assertEqual((scraper.stats["requests"], scraper.retry_policy.dead[0]["status"]), (1, 404))  # Given up without retrying
+        self.assertEqual(requests.get(f"{server.url}/direktori/putusan/zaf00ff000000000000.html", timeout=10).status_code, 404)
+        self.assertEqual(requests.get(f"{server.url}/direktori/periode/tahunjenis/putus/pengadilan/pn-mock-999.html", timeout=10).status_code, 404)
+
+    def test_fault_injection(self):
+        server = self._server(throttle_every=4, throttle_burst=2, retry_after=3)
+        statuses = [requests.get(f"{server.url}{main.TARGET_COURT_LIST_PATH}", timeout=10) for _ in range(6)]
+        self.assertEqual([r.status_code for r in statuses], [429, 429, 200, 200, 429, 429])
+        self.assertEqual(statuses[0].headers["Retry-After"], "3")
+        failing = self._server(error_rate=1.0, error_status=503)
+        self.assertEqual(requests.get(f"{failing.url}{main.TARGET_COURT_LIST_PATH}", timeout=10).status_code, 503)
+        stats = requests.get(f"{server.url}{STATS_PATH}", timeout=10).json()
+        self.assertEqual(stats["by_status"], {"429": 4, "200": 2})
+
+
+class TestEndToEnd(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        cwd, quiet = os.getcwd(), main.console.quiet
+        os.chdir(self.tmp.name); main.console.quiet = True
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(setattr, main.console, "quiet", quiet)
+
+    def _crawl(self, runner, dataset, **kwargs):
+        with MockPutusanServer(dataset, console=Console(quiet=True), throttle_every=50, throttle_burst=1, retry_after=0) as server:
+            runner(use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, **kwargs)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+        return records
+
+    def test_run_scraper(self):
+        dataset = MockDataset(courts=2, years=1, categories=1, classifications=2, decisions=12, page_size=5)
+        records = self._crawl(main.run_scraper, dataset)
+        self.assertEqual(len(records), dataset.total_decisions())
+        self.assertEqual(len({r["_source_decision_detail_url"] for r in records}), len(records))
+        self.assertEqual(len(os.listdir(main.OUTPUT_PDF_DIR)), len(records))
+        self.assertFalse(os.path.exists(main.STATE_DB_FILE))
+
+    def test_failed_listing_page_does_not_skip_the_rest_of_the_month(self):
+        dataset = MockDataset(courts=2, years=1, categories=1, classifications=2, decisions=16, page_size=5)
+        outage, make_scraper = {"page=2"}, main._make_scraper
+        def flaky_scraper(*args, **kwargs):
+            scraper = make_scraper(*args, **kwargs); fetch = scraper.get_decision_list
+            def get_decision_list(url=None, html=None):
+                if any(part in (url or "") for part in outage): raise FetchError(url, 503, "gave up after 50 throttled attempts")
+                return fetch(url=url, html=html)
+            scraper.get_decision_list = get_decision_list
+            return scraper
+        self.addCleanup(setattr, main, "_make_scraper", make_scraper); main._make_scraper = flaky_scraper
+        counts = [dataset.decision_count(c, 0, 0, l) for c in range(2) for l in range(2)]
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server: # One server: the kept state refers to its URLs
+            main.run_scraper(use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0)
+            with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+            self.assertEqual(len(records), sum(counts) - sum(min(5, max(0, c - 5)) for c in counts))
+            self.assertTrue(any(r["_source_decision_list_url"].endswith("page=3") for r in records)) # Pages after the failed one still crawled
+            self.assertTrue(os.path.exists(main.STATE_DB_FILE)) # Incomplete: the failed pages stay in the state
+            outage.clear()
+            main.run_scraper(use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0) # Only retries them
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), sum(counts))
+        self.assertEqual(len({r["_source_decision_detail_url"] for r in records}), len(records))
+        self.assertFalse(os.path.exists(main.STATE_DB_FILE))
+
+    @unittest.skipIf(pypdf is None, "pypdf not installed")
+    def test_crawl_extracts_pdf_text_linked_to_decisions(self):
+        dataset = MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=6, page_size=5)
+        self.addCleanup(setattr, main, "EXTRACT_TEXT", main.EXTRACT_TEXT); main.EXTRACT_TEXT = True
+        self.addCleanup(setattr, main, "TEXT_WORKERS", main.TEXT_WORKERS); main.TEXT_WORKERS = 2
+        records = self._crawl(main.run_scraper_async, dataset, concurrency=4)
+        with open(main.TEXT_OUTPUT_FILE, encoding="utf-8") as f: texts = {t["decision_url"]: t for t in map(json.loads, f)}
+        self.assertEqual(set(texts), {r["_source_decision_detail_url"] for r in records})
+        for record in records:
+            self.assertEqual(texts[record["_source_decision_detail_url"]]["text"], f"PUTUSAN Nomor {record['_source_decision_detail_url'].split('/')[-1][:-5]}")
+        self.assertEqual(main.extract_pdf_texts().stats["skipped"], len(records)) # Incremental re-run: nothing left to do
+
+    def test_live_search_index_covers_decisions_and_pdf_text(self):
+        dataset = MockDataset(courts=2, years=1, categories=1, classifications=1, decisions=4, page_size=5)
+        self.addCleanup(setattr, main, "SEARCH_INDEX", main.SEARCH_INDEX); main.SEARCH_INDEX = True
+        self.addCleanup(setattr, main, "EXTRACT_TEXT", main.EXTRACT_TEXT); main.EXTRACT_TEXT = True
+        self.addCleanup(setattr, main, "TEXT_WORKERS", main.TEXT_WORKERS); main.TEXT_WORKERS = 2
+        records = self._crawl(main.run_scraper_async, dataset, concurrency=4)
+        record = records[0]
+        decision_id = record["_source_decision_detail_url"].split('/')[-1][:-5]
+        self.assertEqual([r["url"] for r in main.search_decisions(f'"{record["nomor"]}"', court=record["_source_court_code"])], [record["_source_decision_detail_url"]])
+        self.assertEqual([r["url"] for r in main.search_decisions(decision_id)], [record["_source_decision_detail_url"]]) # Only in the PDF text
+        self.assertEqual(main.search_decisions("terdakwa", year=1990), [])
+        self.assertEqual(main.build_search_index(), 0) # Everything was indexed live
+
+    def test_pdf_store_with_archives_and_migration_of_flat_pdfs(self):
+        dataset = MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=6, page_size=5)
+        records = self._crawl(main.run_scraper, dataset)
+        self.assertEqual(main.migrate_pdf_store(), len(records))
+        self.addCleanup(setattr, main, "PDF_STORE", main.PDF_STORE); main.PDF_STORE = True
+        self.addCleanup(setattr, main, "DOWNLOAD_ZIPS", main.DOWNLOAD_ZIPS); main.DOWNLOAD_ZIPS = True
+        os.remove(main.OUTPUT_DATA_FILE); os.remove(main.SEEN_INDEX_FILE)
+        rescraped = self._crawl(main.run_scraper_async, dataset, concurrency=4)
+        with DocumentStore(main.OUTPUT_PDF_DIR, console=Console(quiet=True)) as store:
+            self.assertEqual(store.count()[:2], (3 * len(records), len(records) + 1)) # New server port: new URLs, same bodies; every archive is identical
+            self.assertTrue(all(store.lookup(r["download_link_zip"]) for r in rescraped))
+        self.assertEqual([n for n in os.listdir(main.OUTPUT_PDF_DIR) if n.endswith(".pdf")], [])
+
+    def test_listing_only_crawl_makes_no_detail_requests(self):
+        dataset = MockDataset(courts=1, years=1, categories=1, classifications=2, decisions=12, page_size=5)
+        self.addCleanup(setattr, main, "FIELDS", main.FIELDS); main.FIELDS = "listing"
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server:
+            main.run_scraper(use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0)
+            by_type = requests.get(f"{server.url}{STATS_PATH}", timeout=10).json()["by_type"]
+        self.assertNotIn("detail", by_type); self.assertNotIn("pdf", by_type)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), dataset.total_decisions())
+        self.assertTrue(all(r["nomor"] and r["putus_date"] and "amar" not in r for r in records))
+
+    def test_mixed_fields_crawl_keeps_listing_fields(self):
+        dataset = MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=8, page_size=5)
+        self.addCleanup(setattr, main, "FIELDS", main.FIELDS); main.FIELDS = "listing,hakim_ketua"
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server:
+            main.run_scraper(use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0)
+            scraper = MahkamahAgungScraper(site_root=server.url, console=Console(quiet=True))
+            streamed = list(scraper.iter_decisions(fields=main.FIELDS))
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+        for rows in (records, streamed):
+            self.assertEqual(len(rows), dataset.total_decisions())
+            self.assertTrue(all(r["title"] and r["putus_date"] and r["upload_date"] and r["hakim_ketua"] and "amar" not in r for r in rows))
+
+    def test_rerun_without_state_skips_scraped_decisions(self):
+        dataset = MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=8, page_size=5)
+        self._crawl(main.run_scraper_async, dataset, concurrency=4)
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server:  # state files are gone after a finished crawl
+            main.run_scraper(use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0)
+            by_type = requests.get(f"{server.url}{STATS_PATH}", timeout=10).json()["by_type"]
+        self.assertNotIn("detail", by_type); self.assertNotIn("pdf", by_type)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: self.assertEqual(sum(1 for _ in f), dataset.total_decisions())
+
+    def test_delta_crawl_fetches_only_new_uploads(self):
+        kwargs = dict(courts=2, years=1, categories=1, classifications=2, decisions=30, page_size=5)
+        self._crawl(main.run_scraper_async, MockDataset(**kwargs), concurrency=4)
+        grown = MockDataset(**kwargs, growth={(0, 0, 0, 1): 3})
+        with MockPutusanServer(grown, console=Console(quiet=True)) as server:
+            main.run_scraper_async(use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, concurrency=4, delta=True)
+            by_type = requests.get(f"{server.url}{STATS_PATH}", timeout=10).json()["by_type"]
+        # Court 2 unchanged; court 1: both classification listings (page 1), only the grown one changed and its page 1 reaches old uploads
+        self.assertEqual((by_type["yearly"], by_type["listing"], by_type["detail"], by_type["pdf"]), (1, 2, 3, 3))
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: self.assertEqual(sum(1 for _ in f), grown.total_decisions())
+
+    def test_delta_crawl_with_the_http_cache_sees_new_uploads(self):
+        kwargs = dict(courts=2, years=1, categories=1, classifications=2, decisions=30, page_size=5)
+        grown = MockDataset(**kwargs, growth={(0, 0, 0, 1): 3})
+        with MockPutusanServer(MockDataset(**kwargs), console=Console(quiet=True)) as server: # Same URLs for both runs, so cached pages are reused
+            main.run_scraper_async(use_cache=True, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, concurrency=4)
+            server.dataset = grown
+            main.run_scraper_async(use_cache=True, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, concurrency=4, delta=True)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: self.assertEqual(sum(1 for _ in f), grown.total_decisions())
+
+    def test_profiled_run_reports_stages(self):
+        profiler = StageProfiler(console=Console(quiet=True))
+        records = self._crawl(main.run_scraper, MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=6, page_size=5), profiler=profiler)
+        self.assertLessEqual({"fetch", "rate_limit_wait", "parse:decision_detail", "append_data", "save_state", "pdf_download"}, set(profiler.stages))
+        self.assertEqual(profiler.stages["append_data"][0], len(records))
+        self.assertEqual(profiler._wrapped, [])  # Instances unwrapped at exit
+
+    def test_metrics_snapshot_of_a_crawl(self):
+        self.addCleanup(setattr, main, "METRICS_FILE", main.METRICS_FILE)
+        main.METRICS_FILE = "crawl_metrics.json"
+        records = self._crawl(main.run_scraper_async, MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=8, page_size=5), concurrency=4)
+        with open(main.METRICS_FILE, encoding="utf-8") as f: snapshot = json.load(f)
+        self.assertEqual(snapshot["counters"]["decisions_total"], len(records))
+        self.assertEqual(snapshot["histograms"]['http_request_seconds{page_type="detail"}']["count"], len(records))
+        self.assertEqual(snapshot["counters"]['pdf_downloads_total{result="downloaded"}'], len(records))
+        self.assertIn('parse_seconds{extractor="parse_decision_detail"}', snapshot["histograms"])
+
+    def test_run_scraper_async_month_links(self):
+        dataset = MockDataset(courts=2, years=1, categories=1, classifications=1, decisions=12, page_size=5, month_links=True)
+        records = self._crawl(main.run_scraper_async, dataset, concurrency=4)
+        self.assertEqual(len(records), dataset.total_decisions())
+        self.assertTrue(all("/bulan/" in r["_source_decision_list_url"] for r in records))
+
+
+class TestEndToEndBenchmark(unittest.TestCase):
+
+    def test_bench_e2e_reports_throughput(self):
+        result = benchmark.bench_e2e({"courts": 1, "years": 1, "categories": 1, "classifications": 1, "decisions": 6},
+                                     {"latency": 0.0}, rate_limits=FAST_RATE_LIMITS, retry_delay=0)
+        self.assertEqual(result["decisions"], result["expected_decisions"])
+        self.assertEqual(result["pdf_requests"], result["decisions"])
+        self.assertGreater(result["decisions_per_min"], 0)
+        self.assertGreaterEqual(result["requests_per_decision"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
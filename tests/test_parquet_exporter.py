@@ -0,0 +1,84 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from rich.console import Console
+
+from JsonlSink import JsonlSink
+from ParquetExporter import ParquetExporter, export_parquet, pa, parse_date, to_row
+
+if pa is not None:
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+
+def record(n, court="pn-a", year="2024"):
+    return {"nomor": f"{n}/Pid.B/{year}/PN", "klasifikasi": ["Pidana Umum", "Pencurian"], "tahun": year,
+            "tanggal_register": "7 Maret 2024", "tanggal_dibacakan": "—", "_source_court_code": court, "_source_court_name": court.upper(),
+            "_source_year": year, "_source_decision_detail_url": f"https://example/{court}/{n}", "_scrape_timestamp": "2024-03-08 10:00:00 UTC"}
+
+
+class TestRowConversion(unittest.TestCase):
+
+    def test_dates(self):
+        self.assertEqual(parse_date("7 Maret 2024"), datetime.date(2024, 3, 7))
+        self.assertEqual(parse_date("07-03-2024"), datetime.date(2024, 3, 7))
+        for text in ("—", "31 Februari 2024", "", None): self.assertIsNone(parse_date(text))
+
+    def test_row_types(self):
+        row = to_row({**record(1), "klasifikasi": "Perdata", "unexpected": 1})
+        self.assertEqual((row["tahun"], row["_source_year"], row["klasifikasi"]), (2024, 2024, ["Perdata"]))
+        self.assertIsNone(row["tanggal_dibacakan"])
+        self.assertEqual(row["_scrape_timestamp"].tzinfo, datetime.timezone.utc)
+        self.assertNotIn("unexpected", row)
+
+
+@unittest.skipUnless(pa, "pyarrow not installed")
+class TestParquetExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.out = os.path.join(self.tmp.name, "parquet")
+
+    def _files(self):
+        return sorted(os.path.relpath(os.path.join(root, f), self.out) for root, _, files in os.walk(self.out) for f in files)
+
+    def test_partitioned_typed_dataset(self):
+        records = [record(n, court="pn-a" if n % 3 else "pn-b", year="2023" if n % 2 else "2024") for n in range(12)]
+        exporter = export_parquet(records + records[:2], self.out, row_group_size=2, console=Console(quiet=True))
+        self.assertEqual(exporter.stats["rows"], 12)
+        self.assertEqual(len(self._files()), 4)
+        path = os.path.join(self.out, "court=pn-a", "year=2024", "part-00001.parquet")
+        metadata = pq.ParquetFile(path).metadata
+        self.assertEqual((metadata.num_rows, metadata.num_row_groups), (4, 2))
+        table = ds.dataset(self.out, partitioning="hive").to_table(filter=(ds.field("court") == "pn-b") & (ds.field("year") == 2024))
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.schema.field("_source_court_code").type, pa.dictionary(pa.int32(), pa.string()))
+        self.assertEqual(table.column("tanggal_register")[0].as_py(), datetime.date(2024, 3, 7))
+        self.assertEqual(table.column("klasifikasi")[0].as_py(), ["Pidana Umum", "Pencurian"])
+
+    def test_reexport_replaces_dataset(self):
+        export_parquet([record(1)], self.out, console=Console(quiet=True))
+        export_parquet([record(1), record(2)], self.out, console=Console(quiet=True))
+        self.assertEqual(ds.dataset(self.out, partitioning="hive").count_rows(), 2)
+
+    def test_unfinished_files_are_hidden_and_discarded(self):
+        exporter = ParquetExporter(self.out, row_group_size=1, console=Console(quiet=True))
+        exporter.write(record(1))
+        self.assertEqual(self._files(), ["court=pn-a/year=2024/.part-00001.parquet"])
+        exporter._writers.clear()  # process killed before the footer was written
+        ParquetExporter(self.out, console=Console(quiet=True)).close()
+        self.assertEqual(self._files(), [])
+
+    def test_mirrors_accepted_sink_records(self):
+        exporter = ParquetExporter(self.out, partition_by=None, console=Console(quiet=True))
+        with JsonlSink(os.path.join(self.tmp.name, "out.jsonl"), flush_interval=None, mirror=exporter, console=Console(quiet=True)) as sink:
+            for n in (1, 2, 1): sink.write(record(n))
+        self.assertEqual(self._files(), ["part-00001.parquet"])
+        self.assertEqual(pq.read_table(os.path.join(self.out, "part-00001.parquet")).column("nomor").to_pylist(), ["1/Pid.B/2024/PN", "2/Pid.B/2024/PN"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+
+from MahkamahAgungScraper import MahkamahAgungScraper
+from ParserBackends import BeautifulSoupBackend, LxmlBackend, get_parser_backend
+
+COURT_LIST_HTML = """<html><body>
+<table class="table table-responsive table-striped"><thead><tr><th>Nama</th></tr></thead><tbody>
+<tr><td><a href="https://x/pengadilan/profil/pengadilan/pn-a.html"> PN A </a></td><td><a href="https://x/pt-a.html">PT A</a></td>
+<td>Jawa&nbsp;Barat</td><td>1.234 / 1,200</td></tr>
+<tr><td><a href="https://x/pn-b.html">PN <b>B</b><!-- c --></a></td><td><a>PT B</a></td><td>Bali</td><td>- / -</td></tr>
+<tr><td>no link</td><td><a href="#">PT C</a></td><td>Aceh</td><td>3/4</td></tr>
+<tr><td colspan="4">short</td></tr>
+</tbody></table>
+<ul class="pagination"><li><a data-ci-pagination-page="2" href="?page=2">2</a></li><li><a data-ci-pagination-page="12">Last</a></li><li><a data-ci-pagination-page="x">Next</a></li></ul>
+</body></html>"""
+
+YEARLY_HTML = """<html><body><table class="table table-striped"><tbody>
+<tr><td><a href="https://x/tahun/2025.html">2025</a></td><td><a href="https://x/c">1.024</a></td></tr>
+<tr><td><a href="https://x/tahun/2024.html"> 2024 </a></td><td><a href="https://x/c">n/a</a></td></tr>
+<tr><td><a href="https://x/semua.html">Semua</a></td><td><a href="https://x/c">9</a></td></tr>
+<tr><td><span><a href="https://x/nested">2023</a></span></td><td><a href="https://x/c">1</a></td></tr>
+</tbody></table></body></html>"""
+
+CARDS_HTML = """<html><body>
+<div class="card"><div class="card-header"><div class="togglet">Pengadilan</div></div><div class="card-body"><a href="https://x/no" style="color:black">Nope</a></div></div>
+<div class="card"><div class="card-header"><h4 class="title">Direktori <small>Putusan</small></h4></div>
+<div class="card-body">
+<a href="https://x/semua" style="color:black">Semua Direktori</a>
+<a href="https://x/perdata" style="color:black; font-weight:bold"> <!-- x --> Perdata <span class="badge">12</span></a>
+<a href="https://x/pidana" style="color:blue">Pidana</a>
+<a href="https://x/empty" style="color:black">  </a>
+</div></div>
+<div class="card"><div class="card-header"><span>Klasifikasi</span></div><div class="card-body">
+<a href="https://x/k1">Perdata<br/>Umum</a><a href="https://x/k2"><script>var a=1;</script>Wanprestasi</a><a>no href</a>
+</div></div>
+<div class="card"><div class="card-header"><span>Bulan</span></div><div class="card-body">
+<div class="form-check"><p class="card-text">Januari <span class="badge badge-info">3</span></p></div>
+<div class="form-check"><a href="https://x/bulan/2"><p class="card-text">Februari<span class="badge">14</span></p></a></div>
+<div class="form-check"><p class="card-text"><a href="https://x/bulan/3">Maret</a> <span class="badge">x</span></p></div>
+<div class="form-check"><p class="card-text"><span class="badge">7</span></p></div>
+</div></div>
+</body></html>"""
+
+LISTING_HTML = """<html><body><div id="popular-post-list-sidebar">
+<div class="spost clearfix"><div class="entry-c">
+<div class="small"><a href="#">Putusan</a> &gt; <a href="#">PN A</a> &gt; <a href="#">Perdata</a></div>
+<strong><a href="https://x/direktori/putusan/zaf1.html"> Putusan PN A Nomor 1/Pdt.G/2025 </a></strong>
+<div class="small">Register : 02-01-2025 — Putus : 03-02-2025 — Upload : 04-02-2025</div>
+<div>PENGGUGAT:<br/>Budi <b>Santoso</b><!-- hidden -->
+ Lawan <br> TERGUGAT: Ani<script>track()</script>
+<strong><i class="icon-eye"></i> </strong><i class="icon-eye"></i><strong>15</strong>
+<i class="icon-download"></i> <strong>7</strong></div>
+</div></div>
+<div class="spost clearfix"><div class="entry-c">
+<strong><a href="https://x/direktori/putusan/zaf2.html">Putusan 2</a></strong>
+<div class="small">Putus : 09-03-2025</div><div class="small">Register : 01-01-2024</div>
+</div></div>
+<div class="spost clearfix"><div class="entry-c"><div class="small">Data Tidak Ditemukan</div></div></div>
+<div class="spost clearfix"><div class="entry-c"><strong><a href="https://x/3">   </a></strong><div></div></div></div>
+</div>
+<ul class="pagination"><li><a data-ci-pagination-page="3">3</a></li></ul></body></html>"""
+
+DETAIL_HTML = """<html><body><div id="tabs-1"><div id="popular-post-list-sidebar">
+<h2>Putusan PN AIRMADIDI Nomor 3/Pdt.G.S/2025/PN Arm<br/><span id="title_pihak">Penggugat:<br> A <br/>Tergugat: B</span></h2>
+<table class="table"><tbody>
+<tr><td>Nomor</td><td> 3/Pdt.G.S/2025/PN Arm </td></tr>
+<tr><td>Klasifikasi</td><td><a href="#">Perdata</a> <a href="#"> Gugatan Sederhana </a></td></tr>
+<tr><td>Kata Kunci</td><td>—</td></tr>
+<tr><td>Lembaga Peradilan</td><td><a href="https://x/pn-arm">PN AIRMADIDI</a></td></tr>
+<tr><td>Catatan Amar</td><td><p>MENGADILI:</p><p>1. Mengabulkan</p>  <p> 2. Menghukum </p></td></tr>
+<tr><td>Abstrak</td><td> <p>Satu</p><p>Dua</p></td></tr>
+<tr><td>Tidak Dikenal</td><td>x</td></tr>
+<tr><td>Tahun</td><td>2025</td><td>extra</td></tr>
+<tr><td>Tahun</td><td><table><tbody><tr><td>Panitera</td><td>Nested</td></tr></tbody></table>2025</td></tr>
+</tbody></table></div></div>
+<div class="card"><div class="card-header"><div class="togglet"><i></i>Lampiran</div></div><div class="card-body">
+<ul class="portfolio-meta"><li><a href="https://x/direktori/download_file/abc/zip/zaf1">zip</a></li>
+<li><a href="https://x/direktori/download_file/abc/pdf/zaf1">pdf</a></li></ul></div></div>
+</body></html>"""
+
+DETAIL_NO_HREF_HTML = """<html><body><div id="tabs-1"><div id="popular-post-list-sidebar">
+<table class="table"><tbody><tr><td>Lembaga Peradilan</td><td><a>PN X</a></td></tr><tr><td>Nomor</td><td>9</td></tr></tbody></table>
+</div></div></body></html>"""
+
+DETAIL_NO_TABLE_HTML = """<html><body><div id="tabs-1"><div id="popular-post-list-sidebar"><h2>Judul</h2></div></div></body></html>"""
+
+PAGES = [COURT_LIST_HTML, YEARLY_HTML, CARDS_HTML, LISTING_HTML, DETAIL_HTML, DETAIL_NO_HREF_HTML, DETAIL_NO_TABLE_HTML,
+         "<html><body></body></html>", "<p>fragment</p>", "<?xml version='1.0' encoding='utf-8'?><html><body><p>x</p></body></html>"]
+EXTRACTORS = ["parse_last_page", "parse_list_courts", "parse_court_yearly_decisions", "parse_decision_categories",
+              "parse_decision_classifications", "parse_monthly_decision_counts", "parse_decision_list",
+              "parse_decision_detail", "parse_listing_page"]
+
+
+class QuietConsole:
+    def log(self, *args, **kwargs): pass
+
+
+class TestParserBackendEquivalence(unittest.TestCase):
+
+    def setUp(self):
+        self.reference = BeautifulSoupBackend(console=QuietConsole())
+        self.fast = LxmlBackend(console=QuietConsole())
+
+    def test_every_extractor_matches_reference(self):
+        for page_idx, html in enumerate(PAGES):
+            for extractor in EXTRACTORS:
+                with self.subTest(page=page_idx, extractor=extractor):
+                    expected = getattr(self.reference, extractor)(html)
+                    actual = getattr(self.fast, extractor)(html)
+                    self.assertEqual(repr(actual), repr(expected))
+
+    def test_empty_html(self):
+        for backend in (self.reference, self.fast):
+            self.assertIsNone(backend.parse_last_page(""))
+            self.assertEqual(backend.parse_decision_list(None), [])
+            self.assertIsNone(backend.parse_decision_detail(""))
+
+    def test_reference_values(self):
+        courts = self.fast.parse_list_courts(COURT_LIST_HTML)
+        self.assertEqual([c["nama_pengadilan"] for c in courts], ["PN A", "PN B"])
+        self.assertEqual((courts[0]["jumlah_putusan"], courts[0]["jumlah_publikasi"], courts[0]["provinsi"]), (1234, 1200, "Jawa\xa0Barat"))
+        self.assertEqual(self.fast.parse_last_page(COURT_LIST_HTML), 12)
+        self.assertEqual([c["category"] for c in self.fast.parse_decision_categories(CARDS_HTML)], ["Perdata"])
+        self.assertEqual([c["classification"] for c in self.fast.parse_decision_classifications(CARDS_HTML)], ["Perdata", "Wanprestasi"])
+        self.assertEqual(self.fast.parse_monthly_decision_counts(CARDS_HTML),
+                         [{"month": "Januari", "count": 3, "link": None}, {"month": "Februari", "count": 14, "link": "https://x/bulan/2"}])
+        decisions = self.fast.parse_decision_list(LISTING_HTML)
+        self.assertEqual(len(decisions), 2)
+        self.assertEqual(decisions[0]["breadcrumbs"], ["Putusan", "PN A", "Perdata"])
+        self.assertEqual((decisions[0]["view_count"], decisions[0]["download_count"]), (15, 7))
+        self.assertEqual(decisions[0]["putus_date"], "03-02-2025")
+        detail = self.fast.parse_decision_detail(DETAIL_HTML)
+        self.assertEqual(detail["nomor"], "3/Pdt.G.S/2025/PN Arm")
+        self.assertEqual(detail["klasifikasi"], ["Perdata", "Gugatan Sederhana"])
+        self.assertIsNone(detail["kata_kunci"])
+        self.assertEqual(detail["download_link_pdf"], "https://x/direktori/download_file/abc/pdf/zaf1")
+
+    def test_get_parser_backend(self):
+        self.assertIsInstance(get_parser_backend("bs4"), BeautifulSoupBackend)
+        self.assertIs(get_parser_backend(self.fast), self.fast)
+        with self.assertRaises(ValueError):
+            get_parser_backend("html5lib")
+
+    def test_extractors_accept_prefetched_html(self):
+        for parser in ("bs4", "lxml"):
+            scraper = MahkamahAgungScraper(parser=parser)
+            scraper._fetch_page = None  # must not be called
+            scraper.console = QuietConsole()
+            self.assertEqual(len(scraper.get_list_courts(html=COURT_LIST_HTML)), 2)
+            self.assertEqual(scraper.get_listing_page(html=LISTING_HTML)["last_page"], 3)
+            self.assertEqual(scraper.get_decision_detail(html=DETAIL_HTML)["nomor"], "3/Pdt.G.S/2025/PN Arm")
+            with self.assertRaises(ValueError):
+                scraper.get_decision_list()
+
+
+if __name__ == '__main__':
+    unittest.main()
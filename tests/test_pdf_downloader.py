@@ -0,0 +1,97 @@
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+from rich.console import Console
+
+from DocumentStore import DocumentStore
+from MockPutusanServer import MockDataset, MockPutusanServer, STATS_PATH
+from PdfDownloader import PdfDownloader
+
+
+class TestPdfDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dataset = MockDataset(courts=1, years=1, categories=1, classifications=1, decisions=4, pdf_bytes=30000)
+        self.server = MockPutusanServer(self.dataset, console=Console(quiet=True)).start()
+        self.addCleanup(self.server.stop)
+        self.decision_id = self.dataset.decision_id(0, 0, 0, 0, 0)
+        self.url = f"{self.server.url}/direktori/download_file/{self.decision_id}/pdf/{self.decision_id}"
+
+    def _downloader(self, **kwargs):
+        downloader = PdfDownloader(os.path.join(self.tmp.name, "pdfs"), retry_delay=0, console=Console(quiet=True), **kwargs)
+        self.addCleanup(downloader.close)
+        return downloader
+
+    def _by_status(self):
+        return requests.get(f"{self.server.url}{STATS_PATH}", timeout=10).json()["by_status"]
+
+    def test_download_is_verified_and_renamed(self):
+        downloader = self._downloader()
+        path = downloader.download(self.url)
+        with open(path, 'rb') as f: self.assertEqual(f.read(), self.dataset.pdf(self.decision_id))
+        self.assertFalse(os.path.exists(f"{path}.part"))
+        self.assertEqual(downloader.download(self.url), path)
+        self.assertEqual(downloader.snapshot()["skipped"], 1)
+        self.assertEqual(self._by_status(), {"200": 1})
+
+    def test_resume_from_part_file(self):
+        downloader = self._downloader()
+        pdf = self.dataset.pdf(self.decision_id)
+        with open(f"{downloader.path_for(self.url)}.part", 'wb') as f: f.write(pdf[:10000])
+        path = downloader.download(self.url)
+        with open(path, 'rb') as f: self.assertEqual(f.read(), pdf)
+        self.assertEqual((downloader.stats["resumed"], downloader.stats["bytes"]), (1, len(pdf) - 10000))
+        self.assertEqual(self._by_status(), {"206": 1})
+
+    def test_invalid_part_file_is_discarded(self):
+        downloader = self._downloader(max_attempts=2)
+        with open(f"{downloader.path_for(self.url)}.part", 'wb') as f: f.write(b"<html>error page</html>")
+        path = downloader.download(self.url)
+        with open(path, 'rb') as f: self.assertTrue(f.read().startswith(b"%PDF-"))
+        self.assertEqual(self._by_status(), {"206": 1, "200": 1})
+
+    def test_missing_pdf_is_not_retried(self):
+        downloader = self._downloader(max_attempts=3)
+        self.assertIsNone(downloader.download(f"{self.server.url}/direktori/download_file/x/pdf/zaf00ff000000000000"))
+        self.assertEqual(downloader.stats["failed"], 1)
+        self.assertEqual(self._by_status(), {"404": 1})
+
+    def test_bandwidth_budget(self):
+        downloader = self._downloader(bandwidth=20000, chunk_size=4096)
+        started = time.monotonic()
+        downloader.download(self.url)
+        self.assertGreaterEqual(time.monotonic() - started, 0.4)  # 30000 bytes, 20000 burst, then 20000 B/s
+
+    def test_queue_and_backfill(self):
+        downloader = self._downloader(workers=2)
+        urls = [f"{self.server.url}/direktori/download_file/{d}/pdf/{d}" for d in (self.dataset.decision_id(0, 0, 0, 0, i) for i in range(3))]
+        first = downloader.submit(urls[0])
+        self.assertIs(downloader.submit(urls[0]), first)
+        self.assertTrue(first.result(timeout=10).endswith(".pdf"))
+        self.assertEqual(downloader.backfill({"download_link_pdf": url} for url in urls + [None]), 2)
+        downloader.close()
+        self.assertEqual(sorted(os.listdir(downloader.output_dir)), sorted(PdfDownloader.filename_for(u) for u in urls))
+        self.assertEqual(downloader.stats["downloaded"], 3)
+
+    def test_store_deduplicates_and_keeps_archives(self):
+        store = DocumentStore(os.path.join(self.tmp.name, "store"), console=Console(quiet=True))
+        downloader = self._downloader(store=store, archives=True)
+        path = downloader.download(self.url)
+        self.assertEqual(downloader.download(f"{self.url}?mirror=1"), path) # Same body through another URL
+        self.assertEqual(os.path.dirname(path), os.path.join(store.root, "objects", os.path.basename(path)[:2], os.path.basename(path)[2:4]))
+        zip_url = self.url.replace("/pdf/", "/zip/")
+        self.assertTrue(downloader.download(zip_url).endswith(".zip"))
+        self.assertEqual(downloader.backfill([{"download_link_pdf": self.url, "download_link_zip": zip_url}]), 0) # Index lookups, no stat
+        self.assertEqual(downloader.download(self.url), path)
+        self.assertEqual((store.stats["stored"], store.stats["deduplicated"], downloader.stats["skipped"]), (2, 1, 1))
+        self.assertEqual(os.listdir(os.path.join(store.root, "tmp")), [])
+        self.assertEqual(self._by_status(), {"200": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
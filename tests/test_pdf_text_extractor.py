@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from rich.console import Console
+
+from DocumentStore import DocumentStore
+from MockPutusanServer import MockDataset
+from PdfDownloader import PdfDownloader
+from PdfTextExtractor import PdfTextExtractor, pypdf
+
+
+def slow_extract(path, max_pages=None):
+    time.sleep(30)
+
+
+def greedy_extract(path, max_pages=None):
+    return 1, str(len(bytearray(4 * 1024 ** 3)))
+
+
+def crashing_extract(path, max_pages=None):
+    os._exit(3)
+
+
+@unittest.skipIf(pypdf is None, "pypdf not installed")
+class TestPdfTextExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.pdf_dir = os.path.join(self.tmp.name, "pdfs")
+        self.output = os.path.join(self.tmp.name, "decisions.text.jsonl")
+        os.makedirs(self.pdf_dir)
+        self.dataset = MockDataset(pdf_bytes=8000)
+        self.ids = [self.dataset.decision_id(0, 0, 0, 0, n) for n in range(3)]
+        for decision_id in self.ids:
+            with open(os.path.join(self.pdf_dir, f"{decision_id}.pdf"), 'wb') as f: f.write(self.dataset.pdf(decision_id))
+
+    def _extractor(self, **kwargs):
+        extractor = PdfTextExtractor(self.output, workers=2, console=Console(quiet=True), **kwargs)
+        self.addCleanup(extractor.close, False)
+        return extractor
+
+    def _records(self):
+        with open(self.output, encoding="utf-8") as f: return {r["pdf_file"]: r for r in map(json.loads, f)}
+
+    def test_directory_is_extracted_once_and_linked_to_decisions(self):
+        pdf_url = f"https://example/direktori/download_file/{self.ids[0]}/pdf/{self.ids[0]}"
+        linked = {"download_link_pdf": pdf_url, "_source_decision_detail_url": f"https://example/direktori/putusan/{self.ids[0]}.html"}
+        self.assertEqual(PdfDownloader.filename_for(pdf_url), f"{self.ids[0]}.pdf")
+        extractor = self._extractor()
+        self.assertEqual(extractor.extract_directory(self.pdf_dir, [linked]), 3)
+        extractor.close()
+        records = self._records()
+        self.assertEqual(len(records), 3)
+        first = records[f"{self.ids[0]}.pdf"]
+        self.assertEqual((first["decision_url"], first["pdf_url"], first["pages"], first["error"]), (linked["_source_decision_detail_url"], pdf_url, 1, None))
+        self.assertEqual(first["text"], f"PUTUSAN Nomor {self.ids[0]}")
+        self.assertIsNone(records[f"{self.ids[1]}.pdf"]["decision_url"])
+        self.assertEqual(extractor.stats["extracted"], 3)
+        # Incremental: a new PDF is the only one processed on the next run
+        with open(os.path.join(self.pdf_dir, "extra.pdf"), 'wb') as f: f.write(self.dataset.pdf(self.dataset.decision_id(0, 0, 0, 0, 9)))
+        again = self._extractor()
+        self.assertEqual(again.extract_directory(self.pdf_dir), 1)
+        again.close()
+        self.assertEqual((again.stats["skipped"], again.stats["extracted"], len(self._records())), (3, 1, 4))
+
+    def test_pdf_shared_by_decisions_is_linked_to_each(self):
+        store = DocumentStore(os.path.join(self.tmp.name, "store"), console=Console(quiet=True))
+        self.addCleanup(store.close)
+        decisions = []
+        for n in range(2): # Two decisions whose PDFs have the same body: one stored object
+            copy = os.path.join(self.pdf_dir, f"copy{n}.pdf")
+            with open(os.path.join(self.pdf_dir, f"{self.ids[0]}.pdf"), 'rb') as src, open(copy, 'wb') as f: f.write(src.read())
+            store.put(f"https://example/pdf/{n}", copy)
+            decisions.append({"download_link_pdf": f"https://example/pdf/{n}", "_source_decision_detail_url": f"https://example/putusan/{n}.html"})
+        extractor = self._extractor()
+        self.assertEqual(extractor.extract_directory(self.pdf_dir, decisions, store=store), 1)
+        extractor.close()
+        with open(self.output, encoding="utf-8") as f: texts = [json.loads(line) for line in f]
+        self.assertEqual(sorted(t["decision_url"] for t in texts), [d["_source_decision_detail_url"] for d in decisions])
+        self.assertEqual(len({t["pdf_file"] for t in texts}), 1)
+        self.assertEqual(extractor.stats["extracted"], 1)
+        again = self._extractor()
+        self.assertEqual(again.extract_directory(self.pdf_dir, decisions, store=store), 0) # Both decisions done
+        self.assertEqual(again.submit(store.lookup("https://example/pdf/0")), False) # Unlinked: the file has text already
+
+    def test_broken_pdf_is_recorded_as_failed(self):
+        with open(os.path.join(self.pdf_dir, "broken.pdf"), 'wb') as f: f.write(b"%PDF-1.4\nnot really a pdf\n%%EOF\n")
+        extractor = self._extractor()
+        extractor.submit(os.path.join(self.pdf_dir, "broken.pdf"))
+        extractor.close()
+        record = self._records()["broken.pdf"]
+        self.assertIsNone(record["text"]); self.assertTrue(record["error"])
+        self.assertEqual(extractor.stats["failed"], 1)
+
+    def test_timeouts_and_memory_limits(self):
+        extractor = self._extractor(timeout=0.5, extract=slow_extract)
+        started = time.monotonic()
+        extractor.submit(os.path.join(self.pdf_dir, f"{self.ids[0]}.pdf"))
+        extractor.close()
+        self.assertLess(time.monotonic() - started, 20)
+        self.assertTrue(self._records()[f"{self.ids[0]}.pdf"]["error"].startswith("TimeoutError"))
+        greedy = self._extractor(memory_mb=512, extract=greedy_extract)
+        greedy.submit(os.path.join(self.pdf_dir, f"{self.ids[1]}.pdf"))
+        greedy.close()
+        self.assertTrue(self._records()[f"{self.ids[1]}.pdf"]["error"].startswith("MemoryError"))
+
+    def test_crashing_worker_is_retried_then_left_for_next_run(self):
+        extractor = self._extractor(extract=crashing_extract)
+        extractor.submit(os.path.join(self.pdf_dir, f"{self.ids[0]}.pdf"))
+        extractor.close()
+        self.assertEqual((extractor.stats["crashed"], extractor.backlog()), (1, 0))
+        self.assertFalse(os.path.exists(self.output) and os.path.getsize(self.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from RateLimiter import AimdRateLimiter, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.02)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.02)
+
+    def test_pause_blocks_reservations(self):
+        bucket = TokenBucket(rate=100, burst=5)
+        bucket.pause(3)
+        self.assertGreater(bucket.reserve(), 2.5)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestAimdRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.changes = []
+        self.limiter = AimdRateLimiter(budgets={"html": {"rate": 4.0, "min_rate": 0.5, "max_rate": 5.0},
+                                                "pdf": {"rate": 1.0, "min_rate": 0.1, "max_rate": 2.0}},
+                                       increase=0.4, decrease=0.5, target_latency=1.0, cooldown=60,
+                                       on_change=lambda *args: self.changes.append(args))
+
+    def test_additive_increase_capped(self):
+        for _ in range(100): self.limiter.record("html", status=200, latency=0.1)
+        self.assertEqual(self.limiter.rate("html"), 5.0)
+        self.assertEqual(self.limiter.rate("pdf"), 1.0)
+
+    def test_multiplicative_decrease_once_per_cooldown(self):
+        self.limiter.record("html", status=429, latency=0.1)
+        self.limiter.record("html", status=503, latency=0.1)
+        self.assertEqual(self.limiter.rate("html"), 2.0)
+        self.assertEqual(self.limiter.snapshot()["html"]["throttled"], 2)
+        self.assertEqual(self.changes[0][:3], ("html", 4.0, 2.0))
+
+    def test_slow_and_failed_responses_decrease(self):
+        self.limiter.record("pdf", status=200, latency=5.0)
+        self.assertEqual(self.limiter.rate("pdf"), 0.5)
+        self.limiter._last_decrease["pdf"] = 0
+        self.limiter.record("pdf", error=TimeoutError())
+        self.assertEqual(self.limiter.rate("pdf"), 0.25)
+
+    def test_not_found_does_not_change_rate(self):
+        self.limiter.record("html", status=404, latency=0.1)
+        self.assertEqual(self.limiter.rate("html"), 4.0)
+
+    def test_retry_after_pauses_bucket(self):
+        self.limiter.record("html", status=429, retry_after="30")
+        self.assertGreater(self.limiter.buckets["html"].reserve(), 29)
+
+    def test_unknown_budget(self):
+        with self.assertRaises(ValueError):
+            self.limiter.acquire("zip")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import tempfile
+import time
+import unittest
+
+from MahkamahAgungScraper import MahkamahAgungScraper
+from ResponseCache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400: raise AssertionError(f"unexpected status {self.status_code}")
+
+
+class FakeSession:
+    def __init__(self):
+        self.requests = []
+        self.body = "<html>v1</html>"
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        self.requests.append((url, params, headers))
+        if headers and headers.get('If-None-Match') == '"v1"': return FakeResponse(304)
+        return FakeResponse(200, self.body, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _cache(self, **kwargs):
+        cache = ResponseCache(self.tmp.name, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_normalize_key(self):
+        a = ResponseCache.normalize_key("HTTPS://Putusan3.MahkamahAgung.go.id/a.html?b=2&a=1#frag")
+        b = ResponseCache.normalize_key("https://putusan3.mahkamahagung.go.id/a.html", {"a": 1, "b": 2})
+        self.assertEqual(a, b)
+
+    def test_classify_url(self):
+        base = "https://putusan3.mahkamahagung.go.id"
+        self.assertEqual(ResponseCache.classify_url(f"{base}/direktori/putusan/zaf1.html"), "detail")
+        self.assertEqual(ResponseCache.classify_url(f"{base}/pengadilan/index/ditjen/umum.html"), "court_list")
+        self.assertEqual(ResponseCache.classify_url(f"{base}/direktori/periode/tahunjenis/putus/pengadilan/pn-a.html"), "yearly")
+        self.assertEqual(ResponseCache.classify_url(f"{base}/direktori/index/pengadilan/pn-a/tahun/2025.html"), "index")
+        self.assertEqual(ResponseCache.classify_url(f"{base}/direktori/index/pengadilan/pn-a/tahun/2025.html?page=3"), "listing")
+        listing = f"{base}/direktori/index/pengadilan/pn-a/tahunjenis/putus/tahun/2025/direktori/pidana-umum/klasifikasi/pencurian"
+        self.assertEqual(ResponseCache.classify_url(f"{listing}.html"), "listing") # Page 1: where new decisions appear
+        self.assertEqual(ResponseCache.classify_url(f"{listing}/bulan/3.html"), "listing")
+
+    def test_store_and_hit_persists(self):
+        cache = self._cache()
+        url = "https://putusan3.mahkamahagung.go.id/direktori/putusan/zaf1.html"
+        self.assertIsNone(cache.lookup(url))
+        self.assertTrue(cache.store(url, "<html>é</html>", etag='"x"'))
+        cache.close()
+        reopened = self._cache()
+        entry = reopened.lookup(url)
+        self.assertTrue(entry.fresh)
+        self.assertEqual(entry.body, "<html>é</html>")
+        self.assertEqual(entry.conditional_headers(), {'If-None-Match': '"x"'})
+        self.assertEqual(reopened.snapshot()["hits"], 1)
+
+    def test_disabled_page_type_not_stored(self):
+        cache = self._cache(ttls={"detail": None})
+        self.assertFalse(cache.store("https://x/direktori/putusan/a.html", "body"))
+
+    def test_lru_eviction(self):
+        cache = self._cache(max_bytes=350, compress_level=0)
+        for i in range(3):
+            cache.store(f"https://x/other/{i}", "x" * 100)
+            time.sleep(0.01)
+        cache.lookup("https://x/other/0")
+        cache.store("https://x/other/3", "x" * 100)
+        self.assertLessEqual(cache.total_bytes, 350)
+        self.assertIsNotNone(cache.lookup("https://x/other/0"))
+        self.assertIsNone(cache.lookup("https://x/other/1"))
+        self.assertGreaterEqual(cache.snapshot()["evictions"], 1)
+
+    def test_fetch_page_uses_cache_and_revalidates(self):
+        cache = self._cache(ttls={"index": 0})
+        scraper = MahkamahAgungScraper(cache=cache, shared_fetch_size=0)
+        scraper.session = FakeSession()
+        url = "https://putusan3.mahkamahagung.go.id/direktori/index/pengadilan/pn-a.html"
+        self.assertEqual(scraper._fetch_page(1, url), "<html>v1</html>")
+        self.assertEqual(scraper._fetch_page(1, url), "<html>v1</html>")
+        self.assertEqual(scraper.session.requests[1][2], {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        self.assertEqual(cache.snapshot()["revalidated"], 1)
+
+    def test_fetch_page_fresh_hit_makes_no_request(self):
+        cache = self._cache()
+        scraper = MahkamahAgungScraper(cache=cache, shared_fetch_size=0)
+        scraper.session = FakeSession()
+        url = "https://putusan3.mahkamahagung.go.id/direktori/index/pengadilan/pn-a.html"
+        scraper._fetch_page(1, url); scraper._fetch_page(1, url)
+        self.assertEqual(len(scraper.session.requests), 1)
+        cache.revalidate.update(ResponseCache.COUNT_PAGE_TYPES) # Delta crawl: counts always asked of the server
+        self.assertEqual(scraper._fetch_page(1, url), "<html>v1</html>")
+        self.assertEqual(scraper.session.requests[1][2]['If-None-Match'], '"v1"')
+
+
+class TestSharedFetch(unittest.TestCase):
+
+    def test_same_url_fetched_once_per_run(self):
+        scraper = MahkamahAgungScraper(shared_fetch_size=2)
+        scraper.session = FakeSession()
+        for url in ["https://x/a", "https://x/a", "https://x/b", "https://x/a", "https://x/c", "https://x/a"]:
+            scraper._fetch_page(1, url)
+        self.assertEqual([r[0] for r in scraper.session.requests], ["https://x/a", "https://x/b", "https://x/c"])
+        self.assertEqual(scraper.stats, {"requests": 3, "shared_hits": 3})
+
+    def test_month_listing_targets(self):
+        link = "https://x/cls.html"
+        self.assertEqual(MahkamahAgungScraper.month_listing_targets([{"month": "Mei", "count": 3, "link": None}], link),
+                         [{"month": None, "link": link, "count": None}])
+        self.assertEqual(MahkamahAgungScraper.month_listing_targets([{"month": "Mei", "count": 3, "link": "https://x/m5"}], link),
+                         [{"month": "Mei", "link": "https://x/m5", "count": 3}])
+        self.assertEqual(MahkamahAgungScraper.page_url("https://x/m?bulan=5", 2), "https://x/m?bulan=5&page=2")
+        self.assertEqual(MahkamahAgungScraper.month_from_date("05-11-2024"), "November")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from rich.console import Console
+
+from RetryPolicy import FetchError, RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def _policy(self, **kwargs):
+        return RetryPolicy(console=Console(quiet=True), **{"base_delay": 0.01, **kwargs})
+
+    def _attempt(self, policy, state, status=None):
+        state.before()
+        return state.failure(status, ConnectionError("boom") if status is None else None)
+
+    def test_permanent_errors_are_dead_lettered_at_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dead", "letters.jsonl")
+            policy = self._policy(dead_letter=path)
+            with self.assertRaises(FetchError) as raised: self._attempt(policy, policy.begin("https://x/gone.html"), 404)
+            self.assertEqual((raised.exception.status, raised.exception.reason), (404, "permanent error"))
+            with open(path, encoding="utf-8") as f: entry = json.loads(f.readline())
+            self.assertEqual((entry["url"], entry["kind"], entry["status"], entry["attempts"]), ("https://x/gone.html", "html", 404, 1))
+
+    def test_transient_errors_back_off_up_to_max_attempts(self):
+        policy = self._policy(max_attempts=4, base_delay=1.0, max_delay=3.0)
+        state = policy.begin("https://x/flaky.html")
+        delays = [self._attempt(policy, state, 500) for _ in range(3)]
+        self.assertTrue(all(0 <= d <= cap for d, cap in zip(delays, (1.0, 2.0, 3.0))))
+        with self.assertRaises(FetchError) as raised: self._attempt(policy, state, 503)
+        self.assertEqual(raised.exception.reason, "gave up after 4 attempts")
+        self.assertEqual(policy.stats["retries"], 3)
+
+    def test_paced_throttling_has_its_own_cap(self):
+        policy = self._policy(max_attempts=1, max_throttled=6)
+        state = policy.begin("https://x/busy.html")
+        self.assertEqual([state.failure(429, paced=True) for _ in range(5)], [0] * 5)
+        self.assertEqual(state.attempts, 0)
+        with self.assertRaises(FetchError) as raised: state.failure(503, paced=True) # A URL throttled forever still ends
+        self.assertEqual((raised.exception.reason, policy.dead[0]["throttled"]), ("gave up after 6 throttled attempts", 6))
+        with self.assertRaises(FetchError): policy.begin("https://x/other.html").failure(429)  # Without a limiter a 429 is an ordinary retryable error
+
+    def test_paced_503s_open_the_breaker(self):
+        policy = self._policy(breaker_threshold=3, breaker_cooldown=60)
+        states = [policy.begin(f"https://x/{n}.html") for n in range(3)]
+        for state in states: state.failure(503, paced=True)
+        self.assertEqual(policy.stats["breaker_opened"], 1)
+        self.assertEqual(states[2].throttled, 0) # Opened by this failure: the breaker waits, nothing is used
+        states[0].failure(429, paced=True) # A throttled but answering site is up
+        self.assertIsNone(policy._open_until)
+
+    def test_retry_budget(self):
+        policy = self._policy(budget_min=2, budget_ratio=0.0, max_attempts=10)
+        for n in range(2): self._attempt(policy, policy.begin(f"https://x/{n}.html"), 500)
+        with self.assertRaises(FetchError) as raised: self._attempt(policy, policy.begin("https://x/2.html"), 500)
+        self.assertEqual(raised.exception.reason, "retry budget exhausted")
+
+    def test_circuit_breaker_pauses_then_probes(self):
+        policy = self._policy(breaker_threshold=3, breaker_cooldown=0.2, budget_min=100, max_attempts=2)
+        states = [policy.begin(f"https://x/{n}.html") for n in range(3)]
+        self.assertEqual([self._attempt(policy, state) > 0 for state in states[:2]], [True, True])
+        self.assertEqual(self._attempt(policy, states[2]), 0)  # Third failure opens the breaker
+        self.assertEqual((policy.stats["breaker_opened"], states[2].attempts), (1, 0))
+        self.assertEqual(self._attempt(policy, states[0]), 0)  # No attempts used while the site is down
+        waited = []
+        def request():
+            started = time.monotonic(); policy.before_request(); waited.append(time.monotonic() - started); policy.success()
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        for t in threads: t.start()
+        for t in threads: t.join(5)
+        self.assertTrue(all(w >= 0.1 for w in waited))
+        self.assertIsNone(policy._open_until)
+        self.assertEqual(policy.stats["breaker_opened"], 2)  # The failed probe above re-opened it once
+
+
+if __name__ == '__main__':
+    unittest.main()
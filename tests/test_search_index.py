@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+
+from rich.console import Console
+
+from JsonlSink import JsonlSink
+from SearchIndex import SearchIndex
+
+
+def decision(n, court="pn-a", year=2024, classification="Pencurian", **fields):
+    return {"nomor": f"{n}/Pid.B/{year}/PN A", "title_full": f"Putusan {court} Nomor {n}", "parties_raw": f"Terdakwa:\nTERDAKWA {n}",
+            "klasifikasi": ["Pidana Umum", classification], "hakim_ketua": f"Hakim {n % 3}", "catatan_amar": "MENGADILI: pidana penjara",
+            "_source_court_code": court, "_source_court_name": court.upper(), "_source_year": str(year), "_source_classification": classification,
+            "_source_decision_detail_url": f"https://example/direktori/putusan/{court}-{n}.html", **fields}
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = os.path.join(self.tmp.name, "search.sqlite3")
+        self.output = os.path.join(self.tmp.name, "decisions.jsonl")
+
+    def _index(self, **kwargs):
+        index = SearchIndex(self.db, console=Console(quiet=True), **kwargs)
+        self.addCleanup(index.close)
+        return index
+
+    def test_ranked_search_with_filters(self):
+        index = self._index(batch_size=7)
+        for n in range(20): index.add(decision(n, court=("pn-a", "pn-b")[n % 2], year=2023 + n % 2, classification=("Pencurian", "Narkotika")[n % 4 == 0]))
+        self.assertEqual(index.search('"7/Pid.B/2024/PN A"')[0]["nomor"], "7/Pid.B/2024/PN A")
+        self.assertEqual(len(index.search("terdakwa", limit=50)), 20)
+        filtered = index.search("pidana penjara", court="PN-B", year=2024, limit=50)
+        self.assertEqual({r["nomor"] for r in filtered}, {f"{n}/Pid.B/2024/PN A" for n in range(1, 20, 2)})
+        self.assertEqual({r["classification"] for r in index.search("terdakwa", classification="narkotika")}, {"Narkotika"})
+        self.assertIn("«TERDAKWA»", index.search("terdakwa 3")[0]["snippet"])
+        self.assertEqual(len(index.search("nomor:3 OR nomor:4", raw=True)), 2)
+        with self.assertRaises(ValueError): index.search("  ")
+        with self.assertRaises(ValueError): index.search("AND (", raw=True)
+
+    def test_pdf_text_joins_its_decision_in_either_order(self):
+        index = self._index()
+        index.write({"decision_url": decision(1)["_source_decision_detail_url"], "pdf_file": "a.pdf", "pages": 3, "text": "narkotika golongan satu"})
+        index.write(decision(1)); index.write(decision(2))
+        index.write({"decision_url": decision(2)["_source_decision_detail_url"], "pdf_file": "b.pdf", "pages": 1, "text": "sabu"})
+        index.write({"decision_url": None, "pdf_file": "c.pdf", "pages": 1, "text": "orphan"})
+        index.write(decision(1)) # Re-scraped: the PDF text stays
+        self.assertEqual([r["pdf_file"] for r in index.search("narkotika golongan")], ["a.pdf"])
+        self.assertEqual([r["nomor"] for r in index.search("sabu")], ["2/Pid.B/2024/PN A"])
+        self.assertEqual(index.count(), (2, 2))
+        self.assertEqual((index.stats["texts"], index.stats["unlinked"]), (2, 1))
+
+    def test_sync_reads_only_new_records_and_mirrored_output_counts_as_indexed(self):
+        with open(self.output, "w", encoding="utf-8") as f:
+            for n in range(5): f.write(json.dumps(decision(n)) + "\n")
+        index = SearchIndex(self.db, console=Console(quiet=True))
+        self.assertEqual(index.follow(self.output), 5)
+        with JsonlSink(self.output, flush_interval=None, mirror=index, console=Console(quiet=True)) as sink:
+            for n in range(5, 8): sink.write(decision(n))
+            self.assertEqual(len(index.search("terdakwa 6")), 1) # Live, before the sink flushed
+        self.assertIn("8 decisions", index.describe()) # Closed with the sink
+        index = self._index()
+        self.assertEqual(index.sync(self.output), 0)
+        with open(self.output, "a", encoding="utf-8") as f: f.write(json.dumps(decision(8)) + "\n" + json.dumps(decision(9))[:20])
+        self.assertEqual(index.sync(self.output), 1) # The torn tail waits for its newline
+        self.assertEqual(index.count(), (9, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from rich.console import Console
+
+from JsonlSink import JsonlSink
+from SeenIndex import BloomFilter, SeenIndex
+
+
+def record(n):
+    return {"_source_decision_detail_url": f"https://example/{n}", "nomor": f"{n}/Pid.B/2024/PN  Arm", "_source_court_code": "pn-arm"}
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives_and_low_false_positives(self):
+        bloom = BloomFilter(2000, error_rate=0.01)
+        for n in range(2000): bloom.add(f"in-{n}")
+        self.assertTrue(all(f"in-{n}" in bloom for n in range(2000)))
+        self.assertLess(sum(f"out-{n}" in bloom for n in range(10000)), 300)
+
+
+class TestSeenIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = os.path.join(self.tmp.name, "seen.sqlite3")
+        self.output = os.path.join(self.tmp.name, "decisions.jsonl")
+
+    def _index(self):
+        index = SeenIndex(self.db, capacity=1000, console=Console(quiet=True))
+        self.addCleanup(index.close)
+        return index
+
+    def _append(self, *records, path=None):
+        with open(path or self.output, 'a', encoding='utf-8') as f:
+            for r in records: f.write(json.dumps(r) + "\n")
+
+    def test_lookup_by_url_or_nomor(self):
+        index = self._index()
+        self._append(record(1), record(2))
+        self.assertEqual(index.sync(self.output), 2)
+        self.assertTrue(index.seen("https://example/1"))
+        self.assertTrue(index.seen("https://elsewhere/2", "2/Pid.B/2024/PN Arm", "pn-arm"))
+        self.assertFalse(index.seen("https://elsewhere/2", "2/Pid.B/2024/PN Arm", "pn-other"))
+        self.assertFalse(index.seen("https://example/3", "3/Pid.B/2024/PN Arm", "pn-arm"))
+        self.assertEqual((index.stats["checked"], index.stats["skipped"]), (4, 2))
+        self.assertGreaterEqual(index.stats["bloom_rejected"], 2)
+
+    def test_sync_is_incremental_and_persistent(self):
+        self._append(record(1))
+        index = self._index(); index.sync(self.output); index.close()
+        self._append(record(2))
+        with open(self.output, 'a', encoding='utf-8') as f: f.write('{"_source_decision_detail_url": "https://exa')  # torn tail
+        index = self._index()
+        self.assertEqual(index.sync(self.output), 1)
+        self.assertTrue(index.seen("https://example/1") and index.seen("https://example/2"))
+        self.assertEqual(index.sync(self.output), 0)
+
+    def test_compressed_segments(self):
+        with gzip.open(os.path.join(self.tmp.name, "decisions.00001.jsonl.gz"), 'wt', encoding='utf-8') as f: f.write(json.dumps(record(5)) + "\n")
+        index = self._index()
+        self.assertEqual(index.sync(self.output), 1)
+        self.assertEqual(index.sync(self.output), 0)
+        self.assertIn("https://example/5", index)
+
+    def test_unclean_exit_and_removed_output(self):
+        self._append(record(1))
+        index = SeenIndex(self.db, capacity=1000, console=Console(quiet=True))
+        index.sync(self.output); index.add_record(record(2)); index._db.commit()  # killed: Bloom filter never saved
+        reopened = self._index()
+        self.assertTrue(reopened.seen("https://example/2"))
+        os.remove(self.output)
+        reopened.sync(self.output)
+        self.assertFalse(reopened.seen("https://example/1"))
+
+    def test_sink_records_into_index(self):
+        index = self._index()
+        with JsonlSink(self.output, flush_interval=None, index=index, console=Console(quiet=True)) as sink:
+            self.assertTrue(sink.write(record(1)))
+            self.assertFalse(sink.write(record(1)))
+            self.assertIn("https://example/1", sink)
+            self.assertFalse(index.seen("https://example/1")) # Not on disk yet: not claimed by the index
+            sink.flush()
+            self.assertTrue(index.seen(None, "1/Pid.B/2024/PN Arm", "pn-arm"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+from rich.console import Console
+
+import main
+from DocumentStore import DocumentStore
+from JsonlSink import JsonlSink, iter_output
+from MockPutusanServer import MockDataset, MockPutusanServer, STATS_PATH
+from PdfTextExtractor import pypdf
+from ShardCoordinator import ShardCoordinator, merge_outputs
+from test_mock_server import FAST_RATE_LIMITS
+
+COURTS = [
+    {"nama_pengadilan": "PN A", "link_pengadilan": "https://putusan3.mahkamahagung.go.id/pengadilan/profil/pengadilan/pn-a.html"},
+    {"nama_pengadilan": "No Code", "link_pengadilan": "https://putusan3.mahkamahagung.go.id/pengadilan/profil/pengadilan/x.html"},
+    {"nama_pengadilan": "PN B", "link_pengadilan": "https://putusan3.mahkamahagung.go.id/pengadilan/profil/pengadilan/pn-b.html"},
+]
+
+
+class TestShardCoordinator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _coordinator(self, **kwargs):
+        coordinator = ShardCoordinator(os.path.join(self.tmp.name, "shards.sqlite3"), console=Console(quiet=True), **kwargs)
+        self.addCleanup(coordinator.close)
+        return coordinator
+
+    def test_plan_is_idempotent(self):
+        coordinator = self._coordinator()
+        self.assertEqual(coordinator.plan(COURTS), 2)
+        self.assertEqual(coordinator.plan(COURTS), 0)
+        self.assertEqual(coordinator.remaining(), 2)
+        with self.assertRaises(ValueError): coordinator.plan(COURTS, shard_by="month")
+
+    def test_expired_lease_is_reassigned(self):
+        coordinator = self._coordinator(lease=-1)
+        coordinator.plan(COURTS)
+        self.assertEqual(coordinator.acquire("w1")["context"]["court_code"], "pn-a")
+        unit = coordinator.acquire("w2")  # w1 never heartbeat: its unit comes back first
+        self.assertEqual((unit["context"]["court_code"], unit["attempts"]), ("pn-a", 2))
+        self.assertEqual(coordinator.complete(unit, "w1"), [])
+        self.assertEqual(coordinator.complete(unit, "w2"), [("0", "court", "done")])
+
+    def test_heartbeat_keeps_the_lease(self):
+        coordinator = self._coordinator(lease=-1)
+        coordinator.plan(COURTS)
+        coordinator.acquire("w1")
+        coordinator.lease = 60
+        self.assertEqual(coordinator.heartbeat("w1"), 1)
+        self.assertEqual(coordinator.acquire("w2")["context"]["court_code"], "pn-b")
+        self.assertIsNone(coordinator.acquire("w3"))
+        self.assertEqual(coordinator.release("w1"), 1)
+        self.assertEqual(coordinator.acquire("w3")["key"], "0")
+
+    def test_split_by_year(self):
+        coordinator = self._coordinator()
+        coordinator.plan(COURTS, shard_by="year")
+        self.assertEqual(coordinator.shard_by, "year")
+        court = coordinator.acquire("w1")
+        coordinator.split(court, "w1", [("0/0", "year", 1, {**court["context"], "year": "2025"}), ("0/1", "year", 1, {**court["context"], "year": "2024"})])
+        years = [coordinator.acquire("w2"), coordinator.acquire("w3")]
+        self.assertEqual([y["context"]["year"] for y in years], ["2025", "2024"])
+        coordinator.complete(years[0], "w2")
+        self.assertEqual(coordinator.complete(years[1], "w3"), [("0/1", "year", "done"), ("0", "court", "done")])
+        self.assertEqual(coordinator.summary()["units"], {"court": {"done": 1, "pending": 1}, "year": {"done": 2}})
+
+    def test_merge_drops_duplicates_and_torn_lines(self):
+        paths = [os.path.join(self.tmp.name, f"w{i}.jsonl") for i in range(2)]
+        with open(paths[0], 'w', encoding='utf-8') as f: f.write('{"_source_decision_detail_url": "a"}\n{"_source_decision_detail_url": "b"}\n')
+        with open(paths[1], 'w', encoding='utf-8') as f: f.write('{"_source_decision_detail_url": "b"}\n{"_source_decision_detail_url": "c"}\n{"_source_deci')
+        output = os.path.join(self.tmp.name, "merged.jsonl")
+        self.assertEqual(merge_outputs(paths + [os.path.join(self.tmp.name, "missing.jsonl")], output), (3, 1))
+        with open(output, encoding='utf-8') as f: self.assertEqual([json.loads(l)["_source_decision_detail_url"] for l in f], ["a", "b", "c"])
+
+    def test_merge_keeps_the_existing_output(self):
+        worker, output = (os.path.join(self.tmp.name, name) for name in ("w0.jsonl", "out.jsonl"))
+        with open(output, 'w', encoding='utf-8') as f: f.write('{"_source_decision_detail_url": "old"}\n{"_source_decision_detail_url": "b"}\n')
+        with open(worker, 'w', encoding='utf-8') as f: f.write('{"_source_decision_detail_url": "b"}\n{"_source_decision_detail_url": "new"}\n')
+        self.assertEqual(merge_outputs([worker, output], output), (1, 1))
+        with open(output, encoding='utf-8') as f: self.assertEqual([json.loads(l)["_source_decision_detail_url"] for l in f], ["old", "b", "new"])
+
+    def test_merge_skips_records_in_rotated_segments(self):
+        output = os.path.join(self.tmp.name, "out.jsonl")
+        with JsonlSink(output, flush_interval=None, compression="gzip", console=Console(quiet=True)) as sink:
+            for n in ("a", "b"): sink.write({"_source_decision_detail_url": n})
+        worker = os.path.join(self.tmp.name, "w0.jsonl")
+        with open(worker, 'w', encoding='utf-8') as f: f.write('{"_source_decision_detail_url": "b"}\n{"_source_decision_detail_url": "c"}\n')
+        self.assertEqual(merge_outputs([worker], output), (1, 1))
+        self.assertEqual([r["_source_decision_detail_url"] for r in iter_output(output)], ["c", "a", "b"]) # Plain file first, then segments
+
+
+class TestShardedCrawl(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        cwd, quiet = os.getcwd(), main.console.quiet
+        os.chdir(self.tmp.name); main.console.quiet = True
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(setattr, main.console, "quiet", quiet)
+
+    def test_two_workers_split_by_year(self):
+        dataset = MockDataset(courts=3, years=2, categories=1, classifications=1, decisions=8, page_size=5)
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server:
+            main.run_sharded(workers=2, shard_by="year", use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, poll=0.1)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), dataset.total_decisions())
+        self.assertEqual(len({r["_source_decision_detail_url"] for r in records}), len(records))
+        self.assertEqual(len(os.listdir(main.OUTPUT_PDF_DIR)), len(records))
+        self.assertEqual(sorted(n for n in os.listdir() if os.path.isfile(n)), [main.OUTPUT_DATA_FILE]) # Finished: worker outputs, shard plan and state removed
+
+    def test_workers_get_the_cli_settings(self):
+        self.addCleanup(setattr, main, "FIELDS", main.FIELDS); main.FIELDS = "listing" # Set like the CLI does; spawned workers do not see it
+        dataset = MockDataset(courts=2, years=1, categories=1, classifications=1, decisions=6, page_size=5)
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server:
+            main.run_sharded(workers=2, use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, poll=0.1)
+            by_type = requests.get(f"{server.url}{STATS_PATH}", timeout=10).json()["by_type"]
+        self.assertNotIn("detail", by_type); self.assertNotIn("pdf", by_type)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: self.assertEqual(sum(1 for _ in f), dataset.total_decisions())
+
+    def test_workers_write_into_the_pdf_store(self):
+        self.addCleanup(setattr, main, "PDF_STORE", main.PDF_STORE); main.PDF_STORE = True
+        self.addCleanup(setattr, main, "DOWNLOAD_ZIPS", main.DOWNLOAD_ZIPS); main.DOWNLOAD_ZIPS = True
+        dataset = MockDataset(courts=2, years=1, categories=1, classifications=1, decisions=6, page_size=5)
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server:
+            main.run_sharded(workers=2, use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, poll=0.1)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+        with DocumentStore(main.OUTPUT_PDF_DIR, console=Console(quiet=True)) as store:
+            self.assertTrue(all(store.lookup(r["download_link_pdf"]) and store.lookup(r["download_link_zip"]) for r in records))
+        self.assertEqual([n for n in os.listdir(main.OUTPUT_PDF_DIR) if n.endswith(".pdf")], [])
+
+    @unittest.skipIf(pypdf is None, "pypdf not installed")
+    def test_text_is_extracted_after_the_merge(self):
+        self.addCleanup(setattr, main, "EXTRACT_TEXT", main.EXTRACT_TEXT); main.EXTRACT_TEXT = True
+        self.addCleanup(setattr, main, "TEXT_WORKERS", main.TEXT_WORKERS); main.TEXT_WORKERS = 2
+        dataset = MockDataset(courts=2, years=1, categories=1, classifications=1, decisions=4, page_size=5)
+        with MockPutusanServer(dataset, console=Console(quiet=True)) as server:
+            main.run_sharded(workers=2, use_cache=False, site_root=server.url, rate_limits=FAST_RATE_LIMITS, retry_delay=0, poll=0.1)
+        with open(main.OUTPUT_DATA_FILE, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+        with open(main.TEXT_OUTPUT_FILE, encoding="utf-8") as f: texts = [json.loads(line) for line in f]
+        self.assertEqual({t["decision_url"] for t in texts}, {r["_source_decision_detail_url"] for r in records})
+
+    def test_worker_settings_are_checked(self):
+        self.assertEqual(set(main._worker_settings()), set(main.WORKER_SETTINGS))
+        with self.assertRaises(ValueError): main.run_shard_worker(settings={"OUTPUT_DATA_FILE": "x.jsonl"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+
+from rich.console import Console
+
+from StageProfiler import StageProfiler
+
+
+class Worker:
+    def fetch(self):
+        time.sleep(0.02)
+        return self.parse("x")
+
+    def parse(self, html):
+        time.sleep(0.01)
+        return html.upper()
+
+
+class TestStageProfiler(unittest.TestCase):
+
+    def test_nested_spans_split_self_time(self):
+        profiler, worker = StageProfiler(console=Console(quiet=True)), Worker()
+        profiler.wrap(worker, "fetch", "fetch"); profiler.wrap(worker, "parse", "parse")
+        profiler.start()
+        self.assertEqual([worker.fetch() for _ in range(3)], ["X"] * 3)
+        profiler.stop()
+        fetch, parse = profiler.stages["fetch"], profiler.stages["parse"]
+        self.assertEqual((fetch[0], parse[0]), (3, 3))
+        self.assertGreaterEqual(fetch[1], 0.09)
+        self.assertAlmostEqual(fetch[2], fetch[1] - parse[1], places=6)  # parse time is not fetch self time
+        self.assertGreaterEqual(fetch[2], 0.06)
+        self.assertIn("fetch", {row for row in profiler.report().columns[0]._cells})
+
+    def test_unwrap_restores_the_original_methods(self):
+        profiler, worker = StageProfiler(console=Console(quiet=True)), Worker()
+        profiler.wrap(worker, "fetch", "fetch"); profiler.wrap(None, "x", "ignored")
+        self.assertIn("fetch", vars(worker))
+        profiler.start(); profiler.stop()
+        self.assertNotIn("fetch", vars(worker))
+        self.assertEqual(profiler.stages, {})
+
+    def test_pstats_and_collapsed_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pstats_file, collapsed_file = os.path.join(tmp, "crawl.pstats"), os.path.join(tmp, "crawl.collapsed")
+            profiler = StageProfiler(pstats_file, collapsed_file, sample_interval=0.001, console=Console(quiet=True)).start()
+            Worker().fetch()
+            profiler.stop()
+            self.assertTrue(any("fetch" in name for _, _, name in pstats.Stats(pstats_file).stats))
+            with open(collapsed_file, encoding="utf-8") as f: lines = f.read().splitlines()
+            self.assertTrue(lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+            self.assertTrue(any("MainThread;" in line and "fetch (test_stage_profiler.py:" in line for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
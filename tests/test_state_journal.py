@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+
+from rich.console import Console
+
+from MahkamahAgungScraper import MahkamahAgungScraper
+from StateJournal import StateJournal
+
+
+class TestStateJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "state.jsonl")
+
+    def _journal(self, **kwargs):
+        journal = StateJournal(self.path, console=Console(quiet=True), **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_append_and_resume(self):
+        journal = self._journal()
+        self.assertIsNone(journal.load())
+        journal.append([{"n": 1}, {"n": 2}], {"next_page": 2})
+        journal.append([{"n": 3}], {"next_page": 3})
+        journal.close()
+        resumed = self._journal()
+        self.assertEqual(resumed.load(), {"next_page": 3})
+        self.assertEqual(resumed.records, 3)
+        self.assertEqual([r["n"] for r in resumed.iter_records()], [1, 2, 3])
+
+    def test_save_writes_only_new_records(self):
+        journal = self._journal()
+        journal.append([{"n": i} for i in range(100)], {"next_page": 2})
+        size = os.path.getsize(self.path)
+        journal.append([{"n": 100}], {"next_page": 3})
+        self.assertLess(os.path.getsize(self.path) - size, 100)
+
+    def test_unfinished_save_is_dropped(self):
+        journal = self._journal()
+        journal.append([{"n": 1}], {"next_page": 2})
+        journal.close()
+        with open(self.path, 'a', encoding='utf-8') as f: f.write('{"record": {"n": 2}}\n{"checkpoint": {"next_pa')
+        resumed = self._journal()
+        self.assertEqual(resumed.load(), {"next_page": 2})
+        self.assertEqual(list(resumed.iter_records()), [{"n": 1}])
+        resumed.append([{"n": 3}], {"next_page": 3})
+        self.assertEqual([r["n"] for r in resumed.iter_records()], [1, 3])
+
+    def test_periodic_compaction(self):
+        journal = self._journal(key=lambda r: r["id"], compact_every=3)
+        for page in range(1, 5): journal.append([{"id": page}, {"id": 1}], {"next_page": page + 1})
+        with open(self.path, encoding='utf-8') as f: entries = [json.loads(line) for line in f]
+        self.assertEqual(entries, [{"record": {"id": i}} for i in (1, 2, 3, 4)] + [{"checkpoint": {"next_page": 5}}])
+        self.assertEqual(journal.records, 4)
+        journal.append([{"id": 5}], {"next_page": 6})
+        self.assertEqual([r["id"] for r in journal.iter_records()], [1, 2, 3, 4, 5])
+
+    def test_scraper_state_and_legacy_migration(self):
+        legacy = os.path.join(self.tmp.name, "scrape_state.json")
+        with open(legacy, 'w', encoding='utf-8') as f: json.dump({"next_page": 4, "scraped_data": [{"n": 1}, {"n": 2}]}, f)
+        scraper = MahkamahAgungScraper(state_file=os.path.join(self.tmp.name, "scrape_state.jsonl"), console=Console(quiet=True))
+        self.assertEqual(scraper._load_state(), (4, 2))
+        self.assertTrue(os.path.exists(f"{legacy}.migrated"))
+        scraper._save_state(5, [{"n": 3}])
+        scraper.journal.close()
+        self.assertEqual(scraper._load_state(), (5, 3))
+        self.assertEqual([r["n"] for r in scraper.iter_scraped_data()], [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()